@@ -4,7 +4,14 @@ from flask import Flask, redirect, url_for
 from flask_login import LoginManager, login_manager
 from app.db.models import get_user_by_id
 from app.models.user_obj import UserObject
-from app.db.init_db import init_db
+from app.db.init_db import init_db_command
+from app.utils.metrics import init_metrics
+from app.utils.profiler import init_profiler
+from app.utils.assets import init_assets
+from app.utils.fragment_cache import init_fragment_cache
+from app.utils.compression import init_compression
+from app.utils.json_provider import OrjsonProvider
+from app.db.instrumentation import slow_query_log
 
 import app.db.models as db_models
 
@@ -12,12 +19,46 @@ import app.db.models as db_models
 login_manager = LoginManager()
 
 
-def create_app():
+def _env_flag(name, default="1"):
+    return os.environ.get(name, default).strip().lower() not in ("0", "false", "no", "off", "")
+
+
+def create_app(config=None):
+    """
+    Фабрика застосунку без звернень до бази: схема створюється окремо
+    (python -m app.db.init_db або flask init-db) до старту воркерів
+    """
     app = Flask(__name__)
+    # jsonify і request.get_json через orjson (якщо встановлено)
+    app.json = OrjsonProvider(app)
 
     app.config.from_mapping(
         SECRET_KEY=os.environ.get("SECRET_KEY", "dev-secret"),
+        SLOW_QUERY_THRESHOLD_MS=float(os.environ.get("SLOW_QUERY_THRESHOLD_MS", 100)),
+        PROFILE_SAMPLE_RATE=float(os.environ.get("PROFILE_SAMPLE_RATE", 0.0)),
+        PROFILE_INTERVAL_MS=float(os.environ.get("PROFILE_INTERVAL_MS", 5)),
+        PROFILE_KEEP=int(os.environ.get("PROFILE_KEEP", 50)),
+        # /metrics: токен для Prometheus (інакше лише адмін) і спільний каталог
+        # лічильників воркерів gunicorn (без нього кожен воркер віддає лише своє)
+        METRICS_TOKEN=os.environ.get("METRICS_TOKEN", ""),
+        METRICS_DIR=os.environ.get("METRICS_DIR", ""),
+        GAME_SESSION_TTL=int(os.environ.get("GAME_SESSION_TTL", 7200)),
+        # Записів у кеші фрагментів шаблонів ({% cache %}); 0 вимикає кеш
+        FRAGMENT_CACHE_SIZE=int(os.environ.get("FRAGMENT_CACHE_SIZE", 1024)),
+        # Стиснення відповідей (gzip, br і zstd, якщо встановлені): поріг у байтах
+        # і кількість стиснутих тіл у кеші воркера; 0 вимикає кеш
+        ENABLE_COMPRESSION=_env_flag("ENABLE_COMPRESSION"),
+        COMPRESS_MIN_SIZE=int(os.environ.get("COMPRESS_MIN_SIZE", 1024)),
+        COMPRESS_CACHE_SIZE=int(os.environ.get("COMPRESS_CACHE_SIZE", 256)),
+        # Необов'язкові сторінки: Swagger UI (flask_swagger_ui, yaml) і тестувальник API
+        ENABLE_API_DOCS=_env_flag("ENABLE_API_DOCS"),
+        ENABLE_API_TEST=_env_flag("ENABLE_API_TEST"),
+        # Живе оновлення сторінки рейтингу (EventSource на /leaderboard/stream):
+        # лише коли стрім обслуговує асинхронний воркер (сервіс stream у docker-compose)
+        ENABLE_LIVE_LEADERBOARD=_env_flag("ENABLE_LIVE_LEADERBOARD", "0"),
     )
+    if config:
+        app.config.update(config)
 
     # Створення директорії для instance
     os.makedirs(app.instance_path, exist_ok=True)
@@ -25,6 +66,16 @@ def create_app():
     login_manager.init_app(app)
     login_manager.login_view = "auth.login" # Redirect для неавторизованих
 
+    # Метрики латентності та кількості SQL-запитів для кожного endpoint
+    init_metrics(app)
+    slow_query_log.threshold_ms = app.config["SLOW_QUERY_THRESHOLD_MS"]
+    init_profiler(app)
+    # asset_url() у шаблонах: файли збірки з хешем вмісту, якщо вона є
+    init_assets(app)
+    init_fragment_cache(app)
+    # Реєструється останнім, тож виконується першим: метрики бачать стиснутий розмір
+    init_compression(app)
+
     from app.routes.main import main_bp
     from app.routes.about import about_bp
     from app.routes.games import games_bp
@@ -34,9 +85,8 @@ def create_app():
     from app.routes.feedback import feedback_bp
     from app.routes.shop import shop_bp
     from app.routes.api import api_bp
-    from app.routes.api_test import api_test_bp
     from app.routes.leaderboard import leaderboard_bp
-    from app.routes.swagger import swagger_bp, swaggerui_blueprint
+    from app.routes.metrics import metrics_bp
 
     from app.routes.arithmetic import arithmetic_bp
     from app.routes.sequence_recall import sequence_recall_bp
@@ -53,19 +103,24 @@ def create_app():
     app.register_blueprint(feedback_bp)
     app.register_blueprint(shop_bp)
     app.register_blueprint(api_bp)
-    app.register_blueprint(api_test_bp)
     app.register_blueprint(leaderboard_bp)
+    app.register_blueprint(metrics_bp)
 
 
     app.register_blueprint(arithmetic_bp)
     app.register_blueprint(sequence_recall_bp)
     app.register_blueprint(color_rush_bp)
     app.register_blueprint(tapping_memory_bp)
-    app.register_blueprint(swaggerui_blueprint)
-    app.register_blueprint(swagger_bp)
 
-    with app.app_context():
-        init_db()
+    if app.config["ENABLE_API_TEST"]:
+        from app.routes.api_test import api_test_bp
+        app.register_blueprint(api_test_bp)
+    if app.config["ENABLE_API_DOCS"]:
+        from app.routes.swagger import swagger_bp, swaggerui_blueprint
+        app.register_blueprint(swaggerui_blueprint)
+        app.register_blueprint(swagger_bp)
+
+    app.cli.add_command(init_db_command)
 
     return app
 
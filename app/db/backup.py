@@ -0,0 +1,414 @@
+"""
+Гаряче резервне копіювання бази SQLite
+Повна копія робиться через sqlite3.Connection.backup порціями сторінок з паузами
+між ними, тож додаток продовжує писати в базу. Копія перевіряється
+PRAGMA integrity_check, стискається gzip, старі копії видаляються.
+Інкрементний режим переводить базу в WAL і архівує лише нові кадри WAL
+(змінені сторінки) сегментами поверх базової копії, тому його вартість
+залежить від кількості змін, а не від розміру бази.
+
+Використання:
+    python -m app.db.backup full --dest backups --keep 7
+    python -m app.db.backup wal --dest backups --interval 60
+    python -m app.db.backup restore backups/wal/20260101T120000000000 restored.db
+"""
+import argparse
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+import struct
+import sys
+import time
+from datetime import datetime, timezone
+
+from app.db import models
+
+BACKUP_PREFIX = "brainrush-"
+# Сторінок за один крок backup API і пауза між кроками, с
+PAGES_PER_STEP = 256
+STEP_SLEEP = 0.05
+BUSY_TIMEOUT = 30
+KEEP_BACKUPS = 7
+KEEP_GENERATIONS = 2
+WAL_INTERVAL = 60
+# Через скільки годин інкрементний архів починає нове покоління з базовою копією
+GENERATION_HOURS = 24
+
+_WAL_HEADER = struct.Struct(">8I")
+_FRAME_HEADER = struct.Struct(">6I")
+_WAL_MAGIC = (0x377F0682, 0x377F0683)
+
+
+class BackupError(Exception):
+    """Копія пошкоджена або в архіві WAL є розрив"""
+
+
+def _timestamp():
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+
+
+def _connect(path):
+    # sqlite3.connect створив би порожню базу замість відсутньої
+    if not os.path.exists(path):
+        raise BackupError(f"{path} does not exist")
+    return sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None)
+
+
+def _remove(*paths):
+    for path in paths:
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+def check_integrity(path):
+    """PRAGMA integrity_check для файлу бази; BackupError, якщо він пошкоджений"""
+    try:
+        conn = sqlite3.connect(path)
+        try:
+            result = conn.execute("PRAGMA integrity_check").fetchall()
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError as e:
+        raise BackupError(f"{path}: {e}") from e
+    if result != [("ok",)]:
+        raise BackupError(f"{path}: integrity check failed: {result[:5]}")
+
+
+def compress_file(src, dest):
+    """Стиснути src у dest.gz через тимчасовий файл"""
+    with open(src, "rb") as f_in, gzip.open(dest + ".tmp", "wb", compresslevel=6) as f_out:
+        shutil.copyfileobj(f_in, f_out, 1 << 20)
+    os.replace(dest + ".tmp", dest)
+
+
+def snapshot(db_path, dest, pages=PAGES_PER_STEP, sleep=STEP_SLEEP):
+    """
+    Узгоджена копія db_path у dest через backup API
+    Між кроками по pages сторінок блокування бази знімається на sleep секунд
+    """
+    source = _connect(db_path)
+    target = sqlite3.connect(dest)
+    try:
+        source.backup(target, pages=pages, sleep=sleep)
+    finally:
+        target.close()
+        source.close()
+    check_integrity(dest)
+
+
+def prune(directory, keep, prefix=BACKUP_PREFIX):
+    """Залишити keep найновіших записів directory з назвою на prefix"""
+    names = sorted(
+        name for name in os.listdir(directory)
+        if name.startswith(prefix) and not name.endswith(".tmp")
+    )
+    removed = names[:-keep] if keep > 0 else names
+    for name in removed:
+        path = os.path.join(directory, name)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+    return removed
+
+
+def full_backup(db_path, dest_dir, keep=KEEP_BACKUPS, compress=True, pages=PAGES_PER_STEP, sleep=STEP_SLEEP):
+    """Повна перевірена копія бази в dest_dir; повертає шлях до неї"""
+    os.makedirs(dest_dir, exist_ok=True)
+    name = f"{BACKUP_PREFIX}{_timestamp()}.db"
+    tmp = os.path.join(dest_dir, f".{name}.tmp")
+    final = os.path.join(dest_dir, name + (".gz" if compress else ""))
+    try:
+        snapshot(db_path, tmp, pages, sleep)
+        if compress:
+            compress_file(tmp, final)
+        else:
+            os.replace(tmp, final)
+    finally:
+        _remove(tmp)
+    prune(dest_dir, keep)
+    return final
+
+
+# -----------------------
+# ІНКРЕМЕНТНИЙ АРХІВ WAL
+# -----------------------
+
+class WalArchiver:
+    """
+    Покоління = базова копія base.db.gz плюс сегменти NNNNNNNN.wal.gz з кадрами WAL
+    Одне підключення постійно тримає транзакцію читання, тож SQLite не може почати
+    WAL спочатку, поки нові кадри не скопійовані. sync() копіює кадри під
+    блокуванням запису (недописаних кадрів немає), переставляє читання на кінець WAL
+    і робить PASSIVE checkpoint, щоб WAL не ріс без меж.
+    """
+
+    def __init__(self, db_path, dest_dir, keep=KEEP_GENERATIONS, pages=PAGES_PER_STEP, sleep=STEP_SLEEP):
+        self.db_path = db_path
+        self.wal_path = db_path + "-wal"
+        self.root = os.path.join(dest_dir, "wal")
+        self.keep = keep
+        self.pages = pages
+        self.sleep = sleep
+        self.generation = None
+        self.started_at = None
+        self._pin = None
+        self._writer = None
+        self._segment = 0
+        self._page_size = None
+        self._salt = None
+        self._offset = None
+
+    def start(self):
+        """Перевести базу в WAL і почати перше покоління"""
+        self._writer = _connect(self.db_path)
+        # Перемикання потребує виключного блокування і не чекає на busy timeout
+        deadline = time.monotonic() + BUSY_TIMEOUT
+        while True:
+            try:
+                mode = self._writer.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+                break
+            except sqlite3.OperationalError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.1)
+        if mode != "wal":
+            raise BackupError(f"Cannot switch {self.db_path} to WAL (journal_mode={mode})")
+        self._pin = _connect(self.db_path)
+        return self.new_generation()
+
+    def close(self):
+        for conn in (self._pin, self._writer):
+            if conn is not None:
+                conn.close()
+        self._pin = self._writer = None
+
+    def new_generation(self):
+        """
+        Нове покоління: позиція у WAL фіксується раніше за базову копію,
+        тож повторне застосування кадрів поверх неї дає той самий стан
+        """
+        self._writer.execute("BEGIN IMMEDIATE")
+        try:
+            self._read_header(resync=True)
+            self._repin()
+        finally:
+            self._writer.execute("ROLLBACK")
+
+        self.started_at = time.time()
+        self.generation = os.path.join(self.root, _timestamp())
+        self._segment = 0
+        os.makedirs(self.generation)
+        base = os.path.join(self.generation, "base.db")
+        try:
+            snapshot(self.db_path, base, self.pages, self.sleep)
+            self._page_size = self._page_size or self._db_page_size(base)
+            compress_file(base, base + ".gz")
+        finally:
+            _remove(base)
+        with open(os.path.join(self.generation, "meta.json"), "w") as f:
+            json.dump({"page_size": self._page_size, "created_at": datetime.now(timezone.utc).isoformat()}, f)
+        prune(self.root, self.keep, prefix="")
+        return self.generation
+
+    def sync(self):
+        """Скопіювати нові закомічені кадри в сегмент; повертає кількість кадрів"""
+        self._writer.execute("BEGIN IMMEDIATE")
+        try:
+            frames = self._read_frames()
+            self._repin(checkpoint=True)
+        finally:
+            self._writer.execute("ROLLBACK")
+
+        if not frames:
+            return 0
+        self._segment += 1
+        path = os.path.join(self.generation, f"{self._segment:08d}.wal")
+        with gzip.open(path + ".gz.tmp", "wb", compresslevel=6) as f:
+            f.write(frames)
+        os.replace(path + ".gz.tmp", path + ".gz")
+        return len(frames) // (_FRAME_HEADER.size + self._page_size)
+
+    def _repin(self, checkpoint=False):
+        # Викликається під блокуванням запису: між звільненням і новим читанням
+        # ніхто не допише кадрів, які ще не скопійовані
+        if self._pin.in_transaction:
+            self._pin.execute("ROLLBACK")
+        if checkpoint:
+            self._pin.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+        self._pin.execute("BEGIN")
+        self._pin.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+
+    def _db_page_size(self, path):
+        conn = sqlite3.connect(path)
+        try:
+            return conn.execute("PRAGMA page_size").fetchone()[0]
+        finally:
+            conn.close()
+
+    def _read_header(self, resync=False):
+        """
+        Прочитати заголовок WAL і перевірити, що ланцюжок кадрів не перервався
+        Новий WAL (інші salt) допустимий лише як перший перезапуск після попереднього sync
+        """
+        try:
+            with open(self.wal_path, "rb") as f:
+                header = f.read(_WAL_HEADER.size)
+        except FileNotFoundError:
+            header = b""
+        if len(header) < _WAL_HEADER.size:
+            # WAL порожній: перший запис створить заголовок з новими salt
+            if not resync and self._salt is not None:
+                raise BackupError("WAL was truncated outside the archiver")
+            self._salt = None
+            self._offset = _WAL_HEADER.size
+            return False
+
+        magic, _, page_size, _, salt1, salt2, _, _ = _WAL_HEADER.unpack(header)
+        if magic not in _WAL_MAGIC:
+            raise BackupError(f"{self.wal_path} is not a WAL file")
+        if resync:
+            # Кадри поточного WAL вже є і в базовій копії; повторне застосування безпечне
+            self._offset = _WAL_HEADER.size
+        elif (salt1, salt2) != self._salt:
+            # При кожному перезапуску WAL SQLite збільшує перший salt на одиницю
+            if self._salt is not None and salt1 != (self._salt[0] + 1) & 0xFFFFFFFF:
+                raise BackupError("WAL restarted more than once between syncs")
+            self._offset = _WAL_HEADER.size
+        self._page_size = page_size
+        self._salt = (salt1, salt2)
+        return True
+
+    def _read_frames(self):
+        # Під блокуванням запису всі кадри до останнього комітного дописані;
+        # кадри з іншими salt лишилися від попереднього WAL
+        if not self._read_header():
+            return b""
+        frame_size = _FRAME_HEADER.size + self._page_size
+        data = bytearray()
+        committed = 0
+        with open(self.wal_path, "rb") as f:
+            f.seek(self._offset)
+            while True:
+                frame = f.read(frame_size)
+                if len(frame) < frame_size:
+                    break
+                _, db_size, salt1, salt2, _, _ = _FRAME_HEADER.unpack_from(frame)
+                if (salt1, salt2) != self._salt:
+                    break
+                data += frame
+                if db_size:
+                    committed = len(data)
+        self._offset += committed
+        return bytes(data[:committed])
+
+
+def apply_frames(db_file, frames, page_size):
+    """Записати сторінки з кадрів WAL у відкритий файл бази"""
+    frame_size = _FRAME_HEADER.size + page_size
+    for start in range(0, len(frames) - frame_size + 1, frame_size):
+        page_no, db_size = struct.unpack_from(">2I", frames, start)
+        db_file.seek((page_no - 1) * page_size)
+        db_file.write(frames[start + _FRAME_HEADER.size:start + frame_size])
+        if db_size:
+            db_file.truncate(db_size * page_size)
+
+
+def restore(source, target):
+    """
+    Відновити базу в target з повної копії (.db або .db.gz)
+    або з каталогу покоління WAL (базова копія плюс усі сегменти)
+    """
+    if os.path.exists(target):
+        raise BackupError(f"{target} already exists")
+    tmp = target + ".tmp"
+    _remove(tmp)
+    try:
+        if os.path.isdir(source):
+            with open(os.path.join(source, "meta.json")) as f:
+                page_size = json.load(f)["page_size"]
+            with gzip.open(os.path.join(source, "base.db.gz"), "rb") as f_in, open(tmp, "wb") as f_out:
+                shutil.copyfileobj(f_in, f_out, 1 << 20)
+            segments = sorted(name for name in os.listdir(source) if name.endswith(".wal.gz"))
+            with open(tmp, "r+b") as db_file:
+                for name in segments:
+                    with gzip.open(os.path.join(source, name), "rb") as f:
+                        apply_frames(db_file, f.read(), page_size)
+        else:
+            opener = gzip.open if source.endswith(".gz") else open
+            with opener(source, "rb") as f_in, open(tmp, "wb") as f_out:
+                shutil.copyfileobj(f_in, f_out, 1 << 20)
+        check_integrity(tmp)
+        os.replace(tmp, target)
+    finally:
+        _remove(tmp)
+    return target
+
+
+def run_wal_archiver(db_path, dest_dir, interval=WAL_INTERVAL, keep=KEEP_GENERATIONS,
+                     generation_hours=GENERATION_HOURS, iterations=None):
+    """Цикл інкрементного архіву; при розриві ланцюжка WAL починає нове покоління"""
+    archiver = WalArchiver(db_path, dest_dir, keep)
+    print(f"Generation {archiver.start()}", flush=True)
+    try:
+        count = 0
+        while iterations is None or count < iterations:
+            count += 1
+            time.sleep(interval)
+            try:
+                frames = archiver.sync()
+                if frames:
+                    print(f"Archived {frames} WAL frames", flush=True)
+            except BackupError as e:
+                print(f"WAL chain broken ({e}), starting a new generation", flush=True)
+                print(f"Generation {archiver.new_generation()}", flush=True)
+                continue
+            if time.time() - archiver.started_at >= generation_hours * 3600:
+                print(f"Generation {archiver.new_generation()}", flush=True)
+    finally:
+        archiver.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Online backups of the BrainRush SQLite database")
+    parser.add_argument("--db", help="database path (default: instance/brainrush.db)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    full = commands.add_parser("full", help="verified, compressed copy via the SQLite backup API")
+    full.add_argument("--dest", default="backups")
+    full.add_argument("--keep", type=int, default=KEEP_BACKUPS, help="backups to keep")
+    full.add_argument("--pages", type=int, default=PAGES_PER_STEP, help="pages copied per step")
+    full.add_argument("--sleep", type=float, default=STEP_SLEEP, help="pause between steps, seconds")
+    full.add_argument("--no-compress", action="store_true")
+
+    wal = commands.add_parser("wal", help="continuous incremental archive of WAL frames")
+    wal.add_argument("--dest", default="backups")
+    wal.add_argument("--keep", type=int, default=KEEP_GENERATIONS, help="generations to keep")
+    wal.add_argument("--interval", type=float, default=WAL_INTERVAL, help="seconds between syncs")
+    wal.add_argument("--generation-hours", type=float, default=GENERATION_HOURS)
+
+    restore_cmd = commands.add_parser("restore", help="restore a full backup or a WAL generation")
+    restore_cmd.add_argument("source")
+    restore_cmd.add_argument("target")
+
+    args = parser.parse_args(argv)
+    db_path = args.db or models.DB_PATH
+
+    try:
+        if args.command == "full":
+            print(full_backup(db_path, args.dest, args.keep, not args.no_compress, args.pages, args.sleep))
+        elif args.command == "wal":
+            run_wal_archiver(db_path, args.dest, args.interval, args.keep, args.generation_hours)
+        else:
+            print(restore(args.source, args.target))
+    except BackupError as e:
+        print(f"Backup failed: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Потоковий експорт game_results і transactions у CSV або NDJSON
+Рядки йдуть з models.iter_export_rows порціями і одразу кодуються
+(за потреби стискаються gzip), тому пам'ять не залежить від розміру таблиці.
+Використовується в /admin/export і з командного рядка:
+    python -m app.db.export game_results --format csv --from 2026-01-01 --to 2026-01-31 --gzip -o results.csv.gz
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+import zlib
+from datetime import date, timedelta
+
+from app.db import models
+
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+# Рядків, що кодуються в один шматок відповіді
+ROWS_PER_CHUNK = 1000
+
+
+def parse_filters(start=None, end=None, user_id=None):
+    """
+    Перевірити фільтри експорту: дати YYYY-MM-DD (обидві включно) та id гравця
+    Повертає аргументи для models.iter_export_rows; ValueError для некоректних значень
+    """
+    filters = {}
+    if start:
+        filters["start"] = date.fromisoformat(start).isoformat()
+    if end:
+        filters["end"] = (date.fromisoformat(end) + timedelta(days=1)).isoformat()
+    if user_id not in (None, ""):
+        filters["user_id"] = int(user_id)
+    return filters
+
+
+def _batches(rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= ROWS_PER_CHUNK:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_csv(columns, rows):
+    """CSV з рядком заголовка, шматками байтів"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for batch in _batches(rows):
+        writer.writerows(batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def iter_ndjson(columns, rows):
+    """Один JSON-об'єкт на рядок, шматками байтів"""
+    for batch in _batches(rows):
+        yield "".join(
+            json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n" for row in batch
+        ).encode()
+
+
+def gzip_chunks(chunks, level=6):
+    """Стиснути потік шматків у gzip на льоту"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_chunks(table, fmt, filters=None, compress=False):
+    """Шматки байтів експорту table у форматі fmt (csv або ndjson)"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown format {fmt}")
+    columns = models.EXPORT_COLUMNS[table]
+    rows = models.iter_export_rows(table, **(filters or {}))
+    chunks = iter_csv(columns, rows) if fmt == "csv" else iter_ndjson(columns, rows)
+    return gzip_chunks(chunks) if compress else chunks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export BrainRush game results or transactions")
+    parser.add_argument("table", choices=sorted(models.EXPORT_COLUMNS))
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="csv")
+    parser.add_argument("--from", dest="start", help="first day, YYYY-MM-DD")
+    parser.add_argument("--to", dest="end", help="last day (inclusive), YYYY-MM-DD")
+    parser.add_argument("--user", type=int, help="only rows of this user id")
+    parser.add_argument("--gzip", action="store_true", help="compress the output")
+    parser.add_argument("--db", help="database path (default: instance/brainrush.db)")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        models.DB_PATH = args.db
+    try:
+        filters = parse_filters(args.start, args.end, args.user)
+    except ValueError as e:
+        parser.error(str(e))
+
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for chunk in export_chunks(args.table, args.format, filters, args.gzip):
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,31 @@
-from app.db.models import init_db
+"""
+Одноразове створення або оновлення схеми бази (міграції app.db.migrations)
+Запускається один раз перед стартом воркерів, а не в кожному create_app:
+    python -m app.db.init_db [--status] [--db PATH]
+    flask --app run init-db
+"""
+import sqlite3
+import sys
+
+import click
+
+from app.db import migrations, models
+
+
+@click.command("init-db")
+def init_db_command():
+    """Apply pending schema migrations."""
+    click.echo(f"Database {models.DB_PATH}")
+
+    def report(migration, unit, done, total):
+        click.echo(f"{migration.version} {migration.name}: {done}/{total} {unit}")
+
+    try:
+        applied = migrations.migrate(progress=report)
+    except sqlite3.Error as exc:
+        raise click.ClickException(f"Migration failed: {exc}") from exc
+    click.echo(f"Applied {len(applied)} migration(s)" if applied else "Schema is up to date")
+
 
 if __name__ == "__main__":
-    init_db()
-    print("Database initialized successfully at instance/brainrush.db")
+    sys.exit(migrations.main())
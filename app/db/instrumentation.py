@@ -0,0 +1,239 @@
+"""
+Інструментовані підключення SQLite
+Кожен виконаний SQL-запит вимірюється та передається в app.utils.metrics,
+повільні запити потрапляють у журнал разом з EXPLAIN QUERY PLAN.
+SQLite виконує SELECT покроково під час читання рядків, тому час запиту —
+це execute плюс усі fetch*/ітерація до останнього рядка; у журнал запит
+потрапляє, коли рядки прочитано, курсор виконує новий запит або закривається
+"""
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+from app.utils import metrics
+
+logger = logging.getLogger("brainrush.slow_query")
+
+_THIS_FILE = os.path.abspath(__file__)
+_MODELS_FILE = os.path.join(os.path.dirname(_THIS_FILE), "models.py")
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+def _normalize_sql(sql):
+    """Звести SQL до одного рядка, щоб однакові запити агрегувались разом"""
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+def _param_shapes(parameters):
+    """Описати форму параметрів без їх значень (паролі та email не логуються)"""
+    def shape(value):
+        if isinstance(value, (str, bytes)):
+            return f"{type(value).__name__}({len(value)})"
+        return type(value).__name__
+
+    if parameters is None:
+        return None
+    if isinstance(parameters, dict):
+        return {k: shape(v) for k, v in parameters.items()}
+    return [shape(v) for v in parameters]
+
+
+def _calling_function():
+    """
+    Знайти функцію, що ініціювала запит
+    Перевага надається функціям з app/db/models.py
+    """
+    frame = sys._getframe(2)
+    fallback = None
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if filename == _MODELS_FILE:
+            return f"models.{frame.f_code.co_name}"
+        if fallback is None and filename != _THIS_FILE:
+            fallback = f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return fallback or "unknown"
+
+
+class SlowQueryLog:
+    """Журнал повільних запитів з агрегацією повторних порушників"""
+
+    def __init__(self, threshold_ms=100.0, max_entries=500):
+        self.threshold_ms = threshold_ms
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+
+    def observe(self, conn, sql, parameters, duration):
+        """Записати запит, якщо він перевищив поріг"""
+        duration_ms = duration * 1000
+        if self.threshold_ms is None or duration_ms < self.threshold_ms:
+            return
+
+        function = _calling_function()
+        statement = _normalize_sql(sql)
+        shapes = _param_shapes(parameters)
+        plan = self._explain(conn, sql, parameters)
+
+        logger.warning(json.dumps({
+            "event": "slow_query",
+            "function": function,
+            "duration_ms": round(duration_ms, 3),
+            "sql": statement,
+            "params": shapes,
+            "plan": plan,
+        }, ensure_ascii=False))
+
+        key = (function, statement)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self.max_entries:
+                    # Витісняємо найменш затратний запис
+                    weakest = min(self._entries, key=lambda k: self._entries[k]["total_ms"])
+                    del self._entries[weakest]
+                entry = self._entries[key] = {
+                    "function": function,
+                    "sql": statement,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                }
+            entry["count"] += 1
+            entry["total_ms"] += duration_ms
+            entry["max_ms"] = max(entry["max_ms"], duration_ms)
+            entry["params"] = shapes
+            entry["plan"] = plan
+
+    def top(self, limit=20):
+        """Найзатратніші запити за сумарним часом"""
+        with self._lock:
+            entries = [dict(e) for e in self._entries.values()]
+        for e in entries:
+            e["avg_ms"] = e["total_ms"] / e["count"]
+        entries.sort(key=lambda e: e["total_ms"], reverse=True)
+        return entries[:limit]
+
+    @staticmethod
+    def _explain(conn, sql, parameters):
+        if parameters is None or not sql.lstrip().upper().startswith(_EXPLAINABLE):
+            return None
+        try:
+            # Базовий execute, щоб EXPLAIN не потрапив у метрики і журнал
+            rows = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, parameters).fetchall()
+        except sqlite3.Error:
+            return None
+        return [row[3] for row in rows]
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=float(os.environ.get("SLOW_QUERY_THRESHOLD_MS", 100))
+)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Курсор, що вимірює execute/executemany і читання рядків запиту"""
+
+    # [sql, parameters, тривалість] запиту, рядки якого ще читаються
+    _pending = None
+
+    def _finish(self):
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            slow_query_log.observe(self.connection, *pending)
+
+    def _fetch(self, fetch, *args):
+        start = time.perf_counter()
+        try:
+            return fetch(*args)
+        finally:
+            duration = time.perf_counter() - start
+            metrics.record_query_time(duration)
+            if self._pending is not None:
+                self._pending[2] += duration
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            duration = time.perf_counter() - start
+            metrics.record_query(duration)
+            self._pending = [sql, parameters, duration]
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            duration = time.perf_counter() - start
+            metrics.record_query(duration)
+            # Для пакетних запитів план не будується: параметрів багато наборів
+            slow_query_log.observe(self.connection, sql, None, duration)
+
+    def fetchone(self):
+        row = self._fetch(super().fetchone)
+        if row is None:
+            self._finish()
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = self._fetch(super().fetchmany, size)
+        if len(rows) < size:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._fetch(super().fetchall)
+        self._finish()
+        return rows
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return self._fetch(super().__next__)
+        except StopIteration:
+            self._finish()
+            raise
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # Курсор, рядки якого дочитали не до кінця (fetchone для одного рядка)
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """
+    Підключення, яке завжди видає InstrumentedCursor
+    Connection.execute у C-реалізації оминає перевизначений cursor(),
+    тому execute/executemany перевизначено явно
+    """
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
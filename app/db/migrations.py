@@ -0,0 +1,369 @@
+"""
+Версійні міграції схеми
+schema_version зберігає застосовані міграції, нові виконуються по порядку.
+Кожен крок міграції і кожна порція заповнення йде окремою короткою транзакцією,
+а позиція зберігається в migration_progress, тож оновлення схеми не тримає
+блокування запису хвилинами і після переривання продовжується з місця зупинки.
+Міграції також переводять базу в режим WAL (зберігається у файлі бази), тож
+застосунок завжди працює в ньому, а не лише після старту архіватора backup.
+
+Використання:
+    python -m app.db.migrations            # застосувати нові міграції
+    python -m app.db.migrations --status   # показати версію схеми
+"""
+import argparse
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from app.db import models
+
+# steps: SQL-рядки або функції conn -> None, кожен у своїй транзакції
+# backfill: функція (conn, after_id, last_id) -> None, що обробляє порцію game_results
+Migration = namedtuple("Migration", "version name steps backfill", defaults=((), None))
+
+# Рядків game_results в одній порції заповнення і пауза між порціями, с
+BACKFILL_BATCH = 10_000
+BACKFILL_PAUSE = 0.01
+
+
+def _seed_shop_items(conn):
+    if conn.execute("SELECT COUNT(*) FROM shop_items").fetchone()[0]:
+        return
+    default_items = [
+        ('game', 'Color Rush', 'Test your color recognition speed', 50, 1),
+        ('game', 'Tapping Memory', 'Remember and repeat the sequence', 75, 1),
+        ('theme', 'Dark Theme Pro', 'Premium dark theme with custom colors', 100, 1),
+        ('avatar', 'Golden Brain', 'Exclusive golden brain avatar', 200, 1),
+    ]
+    conn.executemany(
+        "INSERT INTO shop_items (item_type, name, description, price, is_active, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+        [(t, n, d, p, a, datetime.utcnow().isoformat()) for t, n, d, p, a in default_items]
+    )
+
+
+def _backfill_leaderboards(conn, after_id, last_id):
+    models._backfill_leaderboards(conn, after_id, last_id, datetime.utcnow())
+
+
+# IF NOT EXISTS лишається, щоб бази, створені до появи міграцій, прийняли історію без помилок
+MIGRATIONS = (
+    Migration(1, "base tables", (
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            role TEXT NOT NULL DEFAULT 'user',
+            balance INTEGER NOT NULL DEFAULT 0,
+            coins INTEGER NOT NULL DEFAULT 300,
+            theme TEXT NOT NULL DEFAULT 'light',
+            current_avatar TEXT DEFAULT 'default',
+            login_streak INTEGER DEFAULT 0,
+            last_login_date TEXT,
+            created_at TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS game_results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            game_name TEXT NOT NULL,
+            level TEXT NOT NULL,
+            score INTEGER NOT NULL,
+            time_spent REAL NOT NULL,
+            rounds INTEGER NOT NULL DEFAULT 1,
+            coins_earned INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS feedback (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            name TEXT,
+            email TEXT,
+            message TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            updated_at TEXT,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS shop_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            item_type TEXT NOT NULL,
+            name TEXT NOT NULL,
+            description TEXT,
+            price INTEGER NOT NULL,
+            is_active INTEGER NOT NULL DEFAULT 1,
+            created_at TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS user_purchases (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            item_id INTEGER NOT NULL,
+            purchased_at TEXT NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users(id),
+            FOREIGN KEY (item_id) REFERENCES shop_items(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            amount INTEGER NOT NULL,
+            transaction_type TEXT NOT NULL,
+            description TEXT,
+            created_at TEXT NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+        """,
+        _seed_shop_items,
+    )),
+    # Кожен CREATE INDEX — одна інструкція SQLite, тож індекси йдуть окремими кроками
+    Migration(2, "base indexes", (
+        "CREATE INDEX IF NOT EXISTS idx_game_results_user_id ON game_results (user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_game_results_game_name ON game_results (game_name)",
+        "CREATE INDEX IF NOT EXISTS idx_user_purchases_user_id ON user_purchases (user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_transactions_user_id ON transactions (user_id)",
+    )),
+    # Кращі результати гравців за вікнами рейтингу (день, тиждень, весь час)
+    # і дерево Фенвіка над ними: кількість гравців за вузлом
+    Migration(3, "leaderboards", (
+        """
+        CREATE TABLE IF NOT EXISTS leaderboard_best (
+            bucket TEXT NOT NULL,
+            game_name TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            score INTEGER NOT NULL,
+            achieved_at TEXT NOT NULL,
+            PRIMARY KEY (bucket, game_name, user_id),
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS leaderboard_rank_tree (
+            bucket TEXT NOT NULL,
+            game_name TEXT NOT NULL,
+            node INTEGER NOT NULL,
+            players INTEGER NOT NULL,
+            PRIMARY KEY (bucket, game_name, node)
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_leaderboard_best_rank "
+        "ON leaderboard_best (bucket, game_name, score DESC, achieved_at)",
+    ), _backfill_leaderboards),
+    # Ескізи розподілу рахунків за грою та рівнем (app.utils.sketch)
+    Migration(4, "score sketches", (
+        """
+        CREATE TABLE IF NOT EXISTS score_sketches (
+            game_name TEXT NOT NULL,
+            level TEXT NOT NULL,
+            sketch BLOB NOT NULL,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (game_name, level)
+        )
+        """,
+    )),
+    # Пошук в адмінці за початком імені без урахування регістру
+    Migration(5, "username search index", (
+        "CREATE INDEX IF NOT EXISTS idx_users_username_nocase ON users (username COLLATE NOCASE)",
+    )),
+    # Фільтри експорту за датою та гравцем
+    Migration(6, "export indexes", (
+        "CREATE INDEX IF NOT EXISTS idx_game_results_created_at ON game_results (created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_game_results_user_created ON game_results (user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_transactions_created_at ON transactions (created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_transactions_user_created ON transactions (user_id, created_at)",
+    )),
+    # Nonce використаних токенів ігрових сесій, спільні для всіх воркерів
+    Migration(7, "used sessions", (
+        """
+        CREATE TABLE IF NOT EXISTS used_sessions (
+            nonce BLOB PRIMARY KEY,
+            expires_at INTEGER NOT NULL
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_used_sessions_expires_at ON used_sessions (expires_at)",
+    )),
+    # День останнього очищення кошиків рейтингу, спільний для всіх воркерів
+    Migration(8, "leaderboard purge marker", (
+        """
+        CREATE TABLE IF NOT EXISTS leaderboard_purge (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            purged_on TEXT NOT NULL
+        )
+        """,
+        "INSERT OR IGNORE INTO leaderboard_purge (id, purged_on) VALUES (1, '')",
+    )),
+    # Лічильники змін рейтингу гри: процес стріму дізнається про результати інших воркерів
+    Migration(9, "leaderboard change counters", (
+        """
+        CREATE TABLE IF NOT EXISTS leaderboard_changes (
+            game_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        ) WITHOUT ROWID
+        """,
+    )),
+)
+
+
+def _ensure_tables(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TEXT NOT NULL
+    )
+    """)
+    # Незавершена міграція: наступний крок і останній оброблений id заповнення
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS migration_progress (
+        version INTEGER PRIMARY KEY,
+        step INTEGER NOT NULL DEFAULT 0,
+        after_id INTEGER NOT NULL DEFAULT 0,
+        last_id INTEGER,
+        updated_at TEXT NOT NULL
+    )
+    """)
+    conn.commit()
+
+
+def get_schema_version(conn):
+    """Найбільша застосована версія (0 для порожньої бази)"""
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def pending_migrations(conn, migrations=MIGRATIONS):
+    applied = {row[0] for row in conn.execute("SELECT version FROM schema_version")}
+    return [m for m in migrations if m.version not in applied]
+
+
+def _advance(conn, migration, batch):
+    """
+    Виконати одну одиницю роботи міграції у вже відкритій транзакції
+    Повертає (одиниці, зроблено, усього) для звіту або None, якщо міграція завершилась
+    """
+    now = datetime.utcnow().isoformat()
+    row = conn.execute(
+        "SELECT step, after_id, last_id FROM migration_progress WHERE version = ?", (migration.version,)
+    ).fetchone()
+    if row is None:
+        # Межа заповнення фіксується на початку: новіші рядки пишуться вже з новою схемою
+        last_id = None
+        if migration.backfill is not None:
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM game_results").fetchone()[0]
+        conn.execute(
+            "INSERT INTO migration_progress (version, last_id, updated_at) VALUES (?, ?, ?)",
+            (migration.version, last_id, now)
+        )
+        step, after_id = 0, 0
+    else:
+        step, after_id, last_id = row
+
+    if step < len(migration.steps):
+        action = migration.steps[step]
+        if callable(action):
+            action(conn)
+        else:
+            conn.execute(action)
+        conn.execute(
+            "UPDATE migration_progress SET step = ?, updated_at = ? WHERE version = ?",
+            (step + 1, now, migration.version)
+        )
+        return "steps", step + 1, len(migration.steps)
+
+    if migration.backfill is not None and after_id < last_id:
+        end = min(after_id + batch, last_id)
+        migration.backfill(conn, after_id, end)
+        conn.execute(
+            "UPDATE migration_progress SET after_id = ?, updated_at = ? WHERE version = ?",
+            (end, now, migration.version)
+        )
+        return "rows", end, last_id
+
+    conn.execute("DELETE FROM migration_progress WHERE version = ?", (migration.version,))
+    conn.execute(
+        "INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+        (migration.version, migration.name, now)
+    )
+    return None
+
+
+def migrate(migrations=MIGRATIONS, batch=BACKFILL_BATCH, pause=BACKFILL_PAUSE, progress=None):
+    """
+    Застосувати нові міграції; progress(migration, unit, done, total) викликається після кожної порції
+    Кілька процесів можуть мігрувати одночасно: кожна одиниця роботи бере
+    блокування запису і перечитує стан, тож виконується рівно один раз
+    Повертає список застосованих версій
+    """
+    conn = models.get_db_connection()
+    applied = []
+    try:
+        # Читачі не чекають на запис, а архіватор копіює лише нові кадри WAL
+        conn.execute("PRAGMA journal_mode=WAL")
+        _ensure_tables(conn)
+        for migration in pending_migrations(conn, migrations):
+            while True:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    if conn.execute(
+                        "SELECT 1 FROM schema_version WHERE version = ?", (migration.version,)
+                    ).fetchone():
+                        conn.rollback()
+                        break
+                    result = _advance(conn, migration, batch)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                if result is None:
+                    applied.append(migration.version)
+                    break
+                if progress:
+                    progress(migration, *result)
+                # Пауза між порціями дає місце запитам додатка
+                if pause and result[0] == "rows":
+                    time.sleep(pause)
+    finally:
+        conn.close()
+    return applied
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply BrainRush schema migrations")
+    parser.add_argument("--db", help="database path (default: instance/brainrush.db)")
+    parser.add_argument("--status", action="store_true", help="show the schema version and pending migrations")
+    parser.add_argument("--batch", type=int, default=BACKFILL_BATCH, help="game_results rows per backfill batch")
+    parser.add_argument("--pause", type=float, default=BACKFILL_PAUSE, help="pause between batches, seconds")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        models.DB_PATH = args.db
+
+    if args.status:
+        conn = models.get_db_connection()
+        try:
+            _ensure_tables(conn)
+            print(f"Schema version {get_schema_version(conn)}")
+            for migration in pending_migrations(conn):
+                print(f"  pending {migration.version}: {migration.name}")
+        finally:
+            conn.close()
+        return 0
+
+    def report(migration, unit, done, total):
+        print(f"{migration.version} {migration.name}: {done}/{total} {unit}", flush=True)
+
+    applied = migrate(batch=args.batch, pause=args.pause, progress=report)
+    print(f"Applied {len(applied)} migration(s)" if applied else "Schema is up to date")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
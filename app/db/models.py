@@ -3,6 +3,10 @@ from datetime import datetime, timedelta
 from werkzeug.security import generate_password_hash, check_password_hash
 import os
 
+from app.db.instrumentation import InstrumentedConnection
+from app.utils import metrics
+from app.utils.sketch import ScoreSketch
+
 DB_PATH = os.path.abspath(
     os.path.join(os.path.dirname(__file__), "..", "..", "instance", "brainrush.db")
 )
@@ -10,125 +14,45 @@ DB_PATH = os.path.abspath(
 def get_db_connection():
     """Створення підключення до бази даних SQLite"""
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    conn = sqlite3.connect(DB_PATH, detect_types=sqlite3.PARSE_DECLTYPES)
+    conn = sqlite3.connect(DB_PATH, detect_types=sqlite3.PARSE_DECLTYPES, factory=InstrumentedConnection)
     conn.row_factory = sqlite3.Row
+    metrics.record_connection()
     return conn
 
-# -----------------------
-# ІНІЦІАЛІЗАЦІЯ
-# -----------------------
-def init_db():
-    """Ініціалізація бази даних з усіма необхідними таблицями"""
-    conn = get_db_connection()
+def _fetch_dicts(conn, sql, params=()):
+    """
+    Рядки запиту як dict у порядку стовпців SELECT
+    Стовпці запиту збігаються з відповіддю API, тож jsonify отримує рядки як є
+    """
     cur = conn.cursor()
+    cur.row_factory = None
+    cur.execute(sql, params)
+    names = [column[0] for column in cur.description]
+    return [dict(zip(names, row)) for row in cur.fetchall()]
 
-    # Таблиця користувачів
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT UNIQUE NOT NULL,
-        password_hash TEXT NOT NULL,
-        role TEXT NOT NULL DEFAULT 'user',
-        balance INTEGER NOT NULL DEFAULT 0,
-        coins INTEGER NOT NULL DEFAULT 300,
-        theme TEXT NOT NULL DEFAULT 'light',
-        current_avatar TEXT DEFAULT 'default',
-        login_streak INTEGER DEFAULT 0,
-        last_login_date TEXT,
-        created_at TEXT NOT NULL
-    )
-    """)
-
-    # Таблиця результатів ігор
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS game_results (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        game_name TEXT NOT NULL,
-        level TEXT NOT NULL,
-        score INTEGER NOT NULL,
-        time_spent REAL NOT NULL,
-        rounds INTEGER NOT NULL DEFAULT 1,
-        coins_earned INTEGER NOT NULL DEFAULT 0,
-        created_at TEXT NOT NULL,
-        FOREIGN KEY (user_id) REFERENCES users(id)
-    )
-    """)
-
-    # Таблиця відгуків
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS feedback (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        name TEXT,
-        email TEXT,
-        message TEXT NOT NULL,
-        created_at TEXT NOT NULL,
-        updated_at TEXT,
-        FOREIGN KEY (user_id) REFERENCES users(id)
-    )
-    """)
-
-    # Таблиця товарів магазину
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS shop_items (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        item_type TEXT NOT NULL,
-        name TEXT NOT NULL,
-        description TEXT,
-        price INTEGER NOT NULL,
-        is_active INTEGER NOT NULL DEFAULT 1,
-        created_at TEXT NOT NULL
-    )
-    """)
-
-    # Таблиця покупок користувачів
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS user_purchases (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        item_id INTEGER NOT NULL,
-        purchased_at TEXT NOT NULL,
-        FOREIGN KEY (user_id) REFERENCES users(id),
-        FOREIGN KEY (item_id) REFERENCES shop_items(id)
-    )
-    """)
+# -----------------------
+# ЗМІНИ ДАНИХ
+# -----------------------
+# Обробники, що викликаються після commit: listener(table, user_id)
+_change_listeners = []
 
-    # Таблиця транзакцій
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS transactions (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        amount INTEGER NOT NULL,
-        transaction_type TEXT NOT NULL,
-        description TEXT,
-        created_at TEXT NOT NULL,
-        FOREIGN KEY (user_id) REFERENCES users(id)
-    )
-    """)
+def add_change_listener(listener):
+    """Підписатися на зміни таблиць (кеш фрагментів шаблонів)"""
+    _change_listeners.append(listener)
+    return listener
 
-    # Створення індексів для оптимізації
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_game_results_user_id ON game_results (user_id)")
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_game_results_game_name ON game_results (game_name)")
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_user_purchases_user_id ON user_purchases (user_id)")
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_transactions_user_id ON transactions (user_id)")
-
-    # Додавання початкових товарів у магазин
-    cur.execute("SELECT COUNT(*) FROM shop_items")
-    if cur.fetchone()[0] == 0:
-        default_items = [
-            ('game', 'Color Rush', 'Test your color recognition speed', 50, 1),
-            ('game', 'Tapping Memory', 'Remember and repeat the sequence', 75, 1),
-            ('theme', 'Dark Theme Pro', 'Premium dark theme with custom colors', 100, 1),
-            ('avatar', 'Golden Brain', 'Exclusive golden brain avatar', 200, 1),
-        ]
-        cur.executemany(
-            "INSERT INTO shop_items (item_type, name, description, price, is_active, created_at) VALUES (?, ?, ?, ?, ?, ?)",
-            [(t, n, d, p, a, datetime.utcnow().isoformat()) for t, n, d, p, a in default_items]
-        )
+def _changed(user_id, *tables):
+    for table in tables:
+        for listener in _change_listeners:
+            listener(table, user_id)
 
-    conn.commit()
-    conn.close()
+# -----------------------
+# ІНІЦІАЛІЗАЦІЯ
+# -----------------------
+def init_db():
+    """Застосувати до бази нові міграції схеми (app.db.migrations)"""
+    from app.db import migrations
+    migrations.migrate()
 
 # -----------------------
 # КОРИСТУВАЧІ
@@ -145,6 +69,7 @@ def create_user(username: str, password: str):
     conn.commit()
     user_id = cur.lastrowid
     conn.close()
+    _changed(user_id, "users")
     return user_id
 
 def get_user_by_username(username: str):
@@ -167,6 +92,54 @@ def set_user_role(user_id: int, role: str):
     conn.execute("UPDATE users SET role = ? WHERE id = ?", (role, user_id))
     conn.commit()
     conn.close()
+    _changed(user_id, "users")
+
+# Стовпці списку користувачів в адмінці (без password_hash)
+USER_LIST_COLUMNS = "id, username, role, coins, created_at"
+
+def get_users_page(after_id=0, limit=50):
+    """Сторінка користувачів за id після after_id (keyset-пагінація)"""
+    conn = get_db_connection()
+    rows = conn.execute(
+        f"SELECT {USER_LIST_COLUMNS} FROM users WHERE id > ? ORDER BY id LIMIT ?",
+        (after_id, limit)
+    ).fetchall()
+    conn.close()
+    return rows
+
+def search_users_by_prefix(prefix, after=None, limit=50):
+    """
+    Користувачі, чиє ім'я починається з prefix (без урахування регістру), за іменем
+    after — (username, id) останнього рядка попередньої сторінки
+    """
+    # NOCASE згортає лише ASCII, тому верхню межу беремо від малої літери
+    last = prefix[-1].lower() if prefix[-1].isascii() else prefix[-1]
+    upper = prefix[:-1] + chr(ord(last) + 1)
+    conn = get_db_connection()
+    if after is None:
+        rows = conn.execute(
+            f"""
+            SELECT {USER_LIST_COLUMNS} FROM users
+            WHERE username >= ? COLLATE NOCASE AND username < ? COLLATE NOCASE
+            ORDER BY username COLLATE NOCASE, id LIMIT ?
+            """,
+            (prefix, upper, limit)
+        ).fetchall()
+    else:
+        # Пошук по індексу починається з імені курсора; однакові без регістру імена
+        # розрізняє id (він є в кінці кожного запису індексу)
+        after_name, after_id = after
+        rows = conn.execute(
+            f"""
+            SELECT {USER_LIST_COLUMNS} FROM users
+            WHERE username >= ? COLLATE NOCASE AND username < ? COLLATE NOCASE
+              AND (username > ? COLLATE NOCASE OR id > ?)
+            ORDER BY username COLLATE NOCASE, id LIMIT ?
+            """,
+            (after_name, upper, after_name, after_id, limit)
+        ).fetchall()
+    conn.close()
+    return rows
 
 def verify_user_password(user_row, password: str) -> bool:
     """Перевірити пароль користувача"""
@@ -180,6 +153,7 @@ def set_user_coins(user_id, new_amount):
     conn.execute("UPDATE users SET coins = ? WHERE id = ?", (new_amount, user_id))
     conn.commit()
     conn.close()
+    _changed(user_id, "users")
 
 def update_user_coins(user_id: int, amount: int, description: str = ""):
     """Оновити баланс монет користувача та записати транзакцію"""
@@ -191,6 +165,7 @@ def update_user_coins(user_id: int, amount: int, description: str = ""):
     )
     conn.commit()
     conn.close()
+    _changed(user_id, "users")
 
 def get_user_coins(user_id: int):
     """Отримати поточний баланс монет користувача"""
@@ -205,6 +180,7 @@ def update_user_theme(user_id: int, theme: str):
     conn.execute("UPDATE users SET theme = ? WHERE id = ?", (theme, user_id))
     conn.commit()
     conn.close()
+    _changed(user_id, "users")
 
     # -----------------------
 # МАГАЗИН
@@ -268,17 +244,36 @@ def purchase_item(user_id: int, item_id: int):
     
     conn.commit()
     conn.close()
+    _changed(user_id, "users", "user_purchases")
     return True, "Purchase successful"
 
+def get_shop_items_for_user(user_id: int):
+    """Активні товари магазину з позначкою покупки користувача (dict у форматі API)"""
+    conn = get_db_connection()
+    items = _fetch_dicts(conn, """
+        SELECT si.id, si.item_type, si.name, si.description, si.price,
+               EXISTS (
+                   SELECT 1 FROM user_purchases up WHERE up.user_id = ? AND up.item_id = si.id
+               ) AS is_purchased,
+               si.created_at
+        FROM shop_items si
+        WHERE si.is_active = 1
+        ORDER BY si.item_type, si.price
+    """, (user_id,))
+    conn.close()
+    for item in items:
+        item["is_purchased"] = bool(item["is_purchased"])
+    return items
+
 def get_user_purchases(user_id: int):
-    """Отримати історію покупок користувача"""
+    """Отримати історію покупок користувача (dict у форматі API)"""
     conn = get_db_connection()
-    purchases = conn.execute("""
-        SELECT si.* FROM shop_items si
+    purchases = _fetch_dicts(conn, """
+        SELECT si.id, si.name, si.item_type, si.price FROM shop_items si
         JOIN user_purchases up ON si.id = up.item_id
         WHERE up.user_id = ?
         ORDER BY up.purchased_at DESC
-    """, (user_id,)).fetchall()
+    """, (user_id,))
     conn.close()
     return purchases
 
@@ -298,23 +293,26 @@ def add_feedback(user_id, name, email, message):
     conn.close()
     return fid
 
+# Стовпці відгуку у форматі відповіді API
+FEEDBACK_COLUMNS = "id, user_id, name, email, message, created_at, updated_at"
+
 def get_feedbacks(limit=200):
-    """Отримати всі відгуки з обмеженням"""
+    """Отримати всі відгуки з обмеженням (dict у форматі API)"""
     conn = get_db_connection()
-    rows = conn.execute("""
-        SELECT * FROM feedback
+    rows = _fetch_dicts(conn, f"""
+        SELECT {FEEDBACK_COLUMNS} FROM feedback
         ORDER BY created_at DESC
         LIMIT ?
-    """, (limit,)).fetchall()
+    """, (limit,))
     conn.close()
     return rows
 
 def get_feedback(feedback_id):
-    """Отримати конкретний відгук за ID"""
+    """Отримати конкретний відгук за ID (dict у форматі API)"""
     conn = get_db_connection()
-    row = conn.execute("SELECT * FROM feedback WHERE id = ?", (feedback_id,)).fetchone()
+    rows = _fetch_dicts(conn, f"SELECT {FEEDBACK_COLUMNS} FROM feedback WHERE id = ?", (feedback_id,))
     conn.close()
-    return row
+    return rows[0] if rows else None
 
 def update_feedback(feedback_id, name, email, message):
     """Оновити існуючий відгук"""
@@ -337,10 +335,42 @@ def delete_feedback(feedback_id):
 # -----------------------
 # РЕЗУЛЬТАТИ ІГОР
 # -----------------------
-def save_game_result(user_id: int, game_name: str, level: str, score: int, time_spent: float, rounds: int = 1):
-    """Зберегти результат гри та нарахувати монети (1 монета за 10 очок)"""
+def _claim_sessions(conn, claims):
+    """
+    Записати nonce токенів (пари nonce, expires_at) у відкритій транзакції
+    False, якщо хоч один уже використано в будь-якому процесі
+    """
+    if not claims:
+        return True
+    conn.execute("DELETE FROM used_sessions WHERE expires_at < ?", (int(datetime.utcnow().timestamp()),))
+    try:
+        conn.executemany("INSERT INTO used_sessions (nonce, expires_at) VALUES (?, ?)", claims)
+    except sqlite3.IntegrityError:
+        conn.rollback()
+        return False
+    return True
+
+def get_used_sessions(nonces):
+    """Які з nonce вже записані в used_sessions"""
+    if not nonces:
+        return set()
+    conn = get_db_connection()
+    placeholders = ",".join("?" * len(nonces))
+    rows = conn.execute(f"SELECT nonce FROM used_sessions WHERE nonce IN ({placeholders})", list(nonces)).fetchall()
+    conn.close()
+    return {r["nonce"] for r in rows}
+
+def save_game_result(user_id: int, game_name: str, level: str, score: int, time_spent: float, rounds: int = 1,
+                     claims=()):
+    """
+    Зберегти результат гри та нарахувати монети (1 монета за 10 очок)
+    claims — nonce токена сесії з часом закінчення дії; None, якщо токен уже використано
+    """
     conn = get_db_connection()
     cur = conn.cursor()
+    if not _claim_sessions(conn, claims):
+        conn.close()
+        return None
     
     # Розрахунок зарахованих монет
     coins_earned = max(1, score // 10)
@@ -355,6 +385,8 @@ def save_game_result(user_id: int, game_name: str, level: str, score: int, time_
     
     # Нарахування монет користувачу
     cur.execute("UPDATE users SET coins = coins + ? WHERE id = ?", (coins_earned, user_id))
+
+    _update_leaderboards(conn, user_id, [(game_name, score)], datetime.utcnow())
     
     # Запис транзакції
     cur.execute(
@@ -364,8 +396,52 @@ def save_game_result(user_id: int, game_name: str, level: str, score: int, time_
     
     conn.commit()
     conn.close()
+    _changed(user_id, "users", "game_results")
     return coins_earned
 
+def save_game_results_batch(user_id: int, results, claims=()):
+    """
+    Зберегти кілька результатів ігор однією транзакцією
+    results: послідовність (game_name, level, score, time_spent, rounds)
+    Повертає список нарахованих монет у порядку результатів
+    або None, якщо якийсь із токенів claims уже використано
+    """
+    now = datetime.utcnow().isoformat()
+    coins = [max(1, score // 10) for _, _, score, _, _ in results]
+
+    conn = get_db_connection()
+    if not _claim_sessions(conn, claims):
+        conn.close()
+        return None
+    conn.executemany(
+        """
+        INSERT INTO game_results (user_id, game_name, level, score, time_spent, rounds, coins_earned, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        [
+            (user_id, game_name, level, score, time_spent, rounds, earned, now)
+            for (game_name, level, score, time_spent, rounds), earned in zip(results, coins)
+        ]
+    )
+
+    # Одне оновлення балансу замість окремого на кожен результат
+    conn.execute("UPDATE users SET coins = coins + ? WHERE id = ?", (sum(coins), user_id))
+
+    _update_leaderboards(conn, user_id, [(game_name, score) for game_name, _, score, _, _ in results], datetime.utcnow())
+
+    conn.executemany(
+        "INSERT INTO transactions (user_id, amount, transaction_type, description, created_at) VALUES (?, ?, ?, ?, ?)",
+        [
+            (user_id, earned, "game_reward", f"Earned in {game_name}", now)
+            for (game_name, _, _, _, _), earned in zip(results, coins)
+        ]
+    )
+
+    conn.commit()
+    conn.close()
+    _changed(user_id, "users", "game_results")
+    return coins
+
 def get_distinct_games_for_user(user_id: int):
     """Отримати список унікальних ігор користувача"""
     conn = get_db_connection()
@@ -417,14 +493,14 @@ def get_total_coins_earned(user_id: int):
 # ТРАНЗАКЦІЇ
 # -----------------------
 def get_user_transactions(user_id: int, limit=50):
-    """Отримати історію транзакцій користувача"""
+    """Отримати історію транзакцій користувача (dict у форматі API)"""
     conn = get_db_connection()
-    transactions = conn.execute("""
-        SELECT * FROM transactions
+    transactions = _fetch_dicts(conn, """
+        SELECT id, amount, transaction_type, description, created_at FROM transactions
         WHERE user_id = ?
         ORDER BY created_at DESC
         LIMIT ?
-    """, (user_id, limit)).fetchall()
+    """, (user_id, limit))
     conn.close()
     return transactions
 
@@ -441,21 +517,525 @@ def get_global_leaderboard(limit=10):
     conn.close()
     return rows
 
-def get_game_leaderboard(game_name, limit=10):
-    """Топ кращих результатів у конкретній грі"""
+LEADERBOARD_WINDOWS = ("day", "week", "all")
+
+def _leaderboard_buckets(now):
+    """Кошики результату: UTC-день, тиждень з понеділка та весь час"""
+    day = now.date()
+    monday = day - timedelta(days=day.weekday())
+    return {"day": f"d:{day.isoformat()}", "week": f"w:{monday.isoformat()}", "all": "all"}
+
+def current_leaderboard_buckets():
+    """Поточні кошики вікон рейтингу: {window: bucket}"""
+    return _leaderboard_buckets(datetime.utcnow())
+
+def _purge_due(conn, now):
+    """
+    Чи це перший запис рейтингу за UTC-день
+    Позначка зберігається в базі, тож з усіх воркерів очищає лише один
+    """
+    today = now.date().isoformat()
+    return conn.execute(
+        "UPDATE leaderboard_purge SET purged_on = ? WHERE id = 1 AND purged_on < ?", (today, today)
+    ).rowcount == 1
+
+def _purge_leaderboards(conn, now):
+    """Видалити кошики днів і тижнів, старіші за попередній"""
+    day = now.date()
+    oldest_day = day - timedelta(days=1)
+    oldest_week = day - timedelta(days=day.weekday() + 7)
+    for table in ("leaderboard_best", "leaderboard_rank_tree"):
+        conn.execute(
+            f"DELETE FROM {table} WHERE (bucket >= 'd:' AND bucket < ?) OR (bucket >= 'w:' AND bucket < ?)",
+            (f"d:{oldest_day.isoformat()}", f"w:{oldest_week.isoformat()}")
+        )
+
+# Розмір дерева рангів: степінь двійки, більша за максимальний рахунок будь-якої гри
+# (перевіряється в app.games.registry при імпорті)
+RANK_TREE_SIZE = 1 << 16
+
+def _rank_tree_slot(score):
+    # Вузли дерева нумеруються з 1, рахунок 0 займає вузол 1
+    score = int(score)
+    if score >= RANK_TREE_SIZE:
+        # Обрізаний рахунок зсунув би місця всіх гравців угорі рейтингу
+        raise ValueError(f"Score {score} does not fit the leaderboard rank tree")
+    return max(score, 0) + 1
+
+def _rank_tree_add(deltas, bucket, game_name, score, players):
+    """Додати зміну кількості гравців з рахунком score до вузлів дерева"""
+    node = _rank_tree_slot(score)
+    while node <= RANK_TREE_SIZE:
+        key = (bucket, game_name, node)
+        deltas[key] = deltas.get(key, 0) + players
+        node += node & -node
+
+def _rank_tree_prefix_nodes(score):
+    """Вузли, сума яких дає кількість гравців з рахунком не більше score"""
+    node = _rank_tree_slot(score)
+    nodes = []
+    while node > 0:
+        nodes.append(node)
+        node -= node & -node
+    return nodes
+
+def _apply_rank_tree(conn, deltas):
+    conn.executemany(
+        """
+        INSERT INTO leaderboard_rank_tree (bucket, game_name, node, players) VALUES (?, ?, ?, ?)
+        ON CONFLICT (bucket, game_name, node) DO UPDATE SET players = players + excluded.players
+        """,
+        [(bucket, game_name, node, players) for (bucket, game_name, node), players in deltas.items() if players]
+    )
+
+def _players_above(conn, bucket, game_name, scores):
+    """
+    Кількість гравців з рахунком, строго більшим за кожен із scores: O(log) вузлів на рахунок
+    Повертає (усього гравців, {score: вище})
+    """
+    prefix = {score: _rank_tree_prefix_nodes(score) for score in set(scores)}
+    # Вузол RANK_TREE_SIZE містить загальну кількість гравців
+    nodes = {RANK_TREE_SIZE}.union(*prefix.values())
+    placeholders = ",".join("?" * len(nodes))
+    counts = dict(conn.execute(
+        f"SELECT node, players FROM leaderboard_rank_tree WHERE bucket = ? AND game_name = ? AND node IN ({placeholders})",
+        (bucket, game_name, *nodes)
+    ).fetchall())
+    total = counts.get(RANK_TREE_SIZE, 0)
+    return total, {score: total - sum(counts.get(node, 0) for node in prefix[score]) for score in prefix}
+
+def _bump_leaderboards(conn, games):
+    """Збільшити лічильники змін рейтингів ігор (у транзакції зміни)"""
+    conn.executemany(
+        """
+        INSERT INTO leaderboard_changes (game_name, version) VALUES (?, 1)
+        ON CONFLICT (game_name) DO UPDATE SET version = version + 1
+        """,
+        [(game_name,) for game_name in sorted(set(games))]
+    )
+
+def get_leaderboard_versions():
+    """Лічильники змін рейтингів: {game_name: version}"""
+    conn = get_db_connection()
+    rows = conn.execute("SELECT game_name, version FROM leaderboard_changes").fetchall()
+    conn.close()
+    return {r["game_name"]: r["version"] for r in rows}
+
+def _update_leaderboards(conn, user_id, scores, now):
+    """
+    Оновити кращі результати гравця у всіх вікнах (scores: пари game_name, score)
+    Пакет зводиться до кращого рахунку на гру, тож кожна пара (вікно, гра) дає
+    не більше одного рядка leaderboard_best і одного шляху в дереві рангів,
+    а зміни вузлів дерева сумуються й записуються одним executemany
+    """
+    if _purge_due(conn, now):
+        _purge_leaderboards(conn, now)
+    achieved_at = now.isoformat()
+    buckets = list(_leaderboard_buckets(now).values())
+
+    best = {}
+    for game_name, score in scores:
+        best[game_name] = max(score, best.get(game_name, score))
+
+    # Попередні кращі результати потрібні, щоб перенести гравця в дереві рангів
+    placeholders = ",".join("?" * len(buckets))
+    previous = {
+        (r["bucket"], r["game_name"]): r["score"]
+        for r in conn.execute(
+            f"SELECT bucket, game_name, score FROM leaderboard_best WHERE user_id = ? AND bucket IN ({placeholders})",
+            (user_id, *buckets)
+        )
+    }
+    improved = []
+    deltas = {}
+    for game_name, score in best.items():
+        for bucket in buckets:
+            old = previous.get((bucket, game_name))
+            if old is not None and score <= old:
+                continue
+            if old is not None:
+                _rank_tree_add(deltas, bucket, game_name, old, -1)
+            _rank_tree_add(deltas, bucket, game_name, score, 1)
+            improved.append((bucket, game_name, user_id, score, achieved_at))
+
+    conn.executemany(
+        """
+        INSERT INTO leaderboard_best (bucket, game_name, user_id, score, achieved_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (bucket, game_name, user_id) DO UPDATE
+        SET score = excluded.score, achieved_at = excluded.achieved_at
+        """,
+        improved
+    )
+    _apply_rank_tree(conn, deltas)
+    _bump_leaderboards(conn, [game_name for _, game_name, _, _, _ in improved])
+
+def _rebuild_leaderboards(conn, now):
+    """Перерахувати leaderboard_best з game_results"""
+    conn.execute("DELETE FROM leaderboard_best")
+    # Бар-колонка created_at береться з рядка з MAX(score)
+    conn.execute("""
+        INSERT INTO leaderboard_best (bucket, game_name, user_id, score, achieved_at)
+        SELECT 'all', game_name, user_id, MAX(score), created_at
+        FROM game_results
+        GROUP BY game_name, user_id
+    """)
+    day = now.date()
+    since = day - timedelta(days=day.weekday() + 7)
+    conn.execute("""
+        INSERT INTO leaderboard_best (bucket, game_name, user_id, score, achieved_at)
+        SELECT 'w:' || date(created_at, 'weekday 0', '-6 days'), game_name, user_id, MAX(score), created_at
+        FROM game_results
+        WHERE created_at >= ?
+        GROUP BY date(created_at, 'weekday 0', '-6 days'), game_name, user_id
+    """, (since.isoformat(),))
+    conn.execute("""
+        INSERT INTO leaderboard_best (bucket, game_name, user_id, score, achieved_at)
+        SELECT 'd:' || substr(created_at, 1, 10), game_name, user_id, MAX(score), created_at
+        FROM game_results
+        WHERE created_at >= ?
+        GROUP BY substr(created_at, 1, 10), game_name, user_id
+    """, ((day - timedelta(days=1)).isoformat(),))
+
+    conn.execute("DELETE FROM leaderboard_rank_tree")
+    deltas = {}
+    for bucket, game_name, score, players in conn.execute(
+        "SELECT bucket, game_name, score, COUNT(*) FROM leaderboard_best GROUP BY bucket, game_name, score"
+    ):
+        _rank_tree_add(deltas, bucket, game_name, score, players)
+    _apply_rank_tree(conn, deltas)
+
+def _backfill_leaderboards(conn, after_id, last_id, now):
+    """
+    Злити в рейтинги результати з id у (after_id, last_id]
+    Кращі результати й дерево рангів оновлюються різницями, як при збереженні,
+    тож порції можна застосовувати поверх живих оновлень і повторно
+    """
+    day = now.date()
+    rows = conn.execute("""
+        SELECT 'all', game_name, user_id, MAX(score), created_at
+        FROM game_results
+        WHERE id > ? AND id <= ?
+        GROUP BY game_name, user_id
+        UNION ALL
+        SELECT 'w:' || date(created_at, 'weekday 0', '-6 days'), game_name, user_id, MAX(score), created_at
+        FROM game_results
+        WHERE id > ? AND id <= ? AND created_at >= ?
+        GROUP BY date(created_at, 'weekday 0', '-6 days'), game_name, user_id
+        UNION ALL
+        SELECT 'd:' || substr(created_at, 1, 10), game_name, user_id, MAX(score), created_at
+        FROM game_results
+        WHERE id > ? AND id <= ? AND created_at >= ?
+        GROUP BY substr(created_at, 1, 10), game_name, user_id
+    """, (
+        after_id, last_id,
+        after_id, last_id, (day - timedelta(days=day.weekday() + 7)).isoformat(),
+        after_id, last_id, (day - timedelta(days=1)).isoformat(),
+    )).fetchall()
+
+    improved = []
+    deltas = {}
+    for bucket, game_name, user_id, score, achieved_at in rows:
+        old = conn.execute(
+            "SELECT score FROM leaderboard_best WHERE bucket = ? AND game_name = ? AND user_id = ?",
+            (bucket, game_name, user_id)
+        ).fetchone()
+        if old is not None and score <= old[0]:
+            continue
+        if old is not None:
+            _rank_tree_add(deltas, bucket, game_name, old[0], -1)
+        _rank_tree_add(deltas, bucket, game_name, score, 1)
+        improved.append((bucket, game_name, user_id, score, achieved_at))
+
+    conn.executemany(
+        """
+        INSERT INTO leaderboard_best (bucket, game_name, user_id, score, achieved_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (bucket, game_name, user_id) DO UPDATE
+        SET score = excluded.score, achieved_at = excluded.achieved_at
+        """,
+        improved
+    )
+    _apply_rank_tree(conn, deltas)
+    return len(improved)
+
+def rebuild_leaderboards():
+    """Перебудувати рейтинги з game_results (після імпорту чи ручних змін)"""
+    conn = get_db_connection()
+    games_query = "SELECT DISTINCT game_name FROM leaderboard_best"
+    games = [r[0] for r in conn.execute(games_query)]
+    _rebuild_leaderboards(conn, datetime.utcnow())
+    # Змінилися рейтинги і ігор, що були до перебудови, і тих, що з'явилися
+    _bump_leaderboards(conn, games + [r[0] for r in conn.execute(games_query)])
+    conn.commit()
+    conn.close()
+    _changed(None, "game_results")
+
+def get_game_leaderboard(game_name, limit=10, window="all"):
+    """Топ кращих результатів у конкретній грі за вікном day, week або all"""
+    if window not in LEADERBOARD_WINDOWS:
+        raise ValueError(f"Unknown leaderboard window: {window}")
+    bucket = _leaderboard_buckets(datetime.utcnow())[window]
     conn = get_db_connection()
     rows = conn.execute("""
-        SELECT u.username, u.current_avatar, MAX(gr.score) as max_score
-        FROM game_results gr
-        JOIN users u ON gr.user_id = u.id
-        WHERE gr.game_name = ?
-        GROUP BY u.id
-        ORDER BY max_score DESC
+        SELECT u.username, u.current_avatar, lb.score AS max_score
+        FROM leaderboard_best lb
+        JOIN users u ON lb.user_id = u.id
+        WHERE lb.bucket = ? AND lb.game_name = ?
+        ORDER BY lb.score DESC, lb.achieved_at, lb.user_id
         LIMIT ?
-    """, (game_name, limit)).fetchall()
+    """, (bucket, game_name, limit)).fetchall()
     conn.close()
     return rows
 
+def get_leaderboard_rank(user_id, game_name, window="all"):
+    """
+    Місце гравця в рейтингу гри: 1 + кількість гравців з більшим рахунком
+    Повертає {"rank", "score", "players"} або None, якщо гравець не грав у вікні
+    """
+    if window not in LEADERBOARD_WINDOWS:
+        raise ValueError(f"Unknown leaderboard window: {window}")
+    bucket = _leaderboard_buckets(datetime.utcnow())[window]
+    conn = get_db_connection()
+    row = conn.execute(
+        "SELECT score FROM leaderboard_best WHERE bucket = ? AND game_name = ? AND user_id = ?",
+        (bucket, game_name, user_id)
+    ).fetchone()
+    if row is None:
+        conn.close()
+        return None
+    players, above = _players_above(conn, bucket, game_name, [row["score"]])
+    conn.close()
+    return {"rank": above[row["score"]] + 1, "score": row["score"], "players": players}
+
+def get_leaderboard_neighbors(user_id, game_name, window="all", count=5):
+    """
+    Гравець і до count сусідів вище та нижче в рейтингу гри
+    Повертає список {"rank", "username", "current_avatar", "score", "is_me"} або None
+    """
+    if window not in LEADERBOARD_WINDOWS:
+        raise ValueError(f"Unknown leaderboard window: {window}")
+    bucket = _leaderboard_buckets(datetime.utcnow())[window]
+    conn = get_db_connection()
+    me = conn.execute(
+        "SELECT score, achieved_at FROM leaderboard_best WHERE bucket = ? AND game_name = ? AND user_id = ?",
+        (bucket, game_name, user_id)
+    ).fetchone()
+    if me is None:
+        conn.close()
+        return None
+
+    # Порядок як у get_game_leaderboard: рахунок, час досягнення, id гравця
+    select = """
+        SELECT lb.user_id, u.username, u.current_avatar, lb.score
+        FROM leaderboard_best lb
+        JOIN users u ON lb.user_id = u.id
+        WHERE lb.bucket = ? AND lb.game_name = ?
+    """
+    position = (me["score"], me["achieved_at"], me["achieved_at"], user_id)
+    above = conn.execute(select + """
+          AND lb.score >= ? AND (lb.score > ? OR lb.achieved_at < ? OR (lb.achieved_at = ? AND lb.user_id < ?))
+        ORDER BY lb.score, lb.achieved_at DESC, lb.user_id DESC
+        LIMIT ?
+    """, (bucket, game_name, me["score"], *position, count)).fetchall()
+    own = conn.execute(select + " AND lb.user_id = ?", (bucket, game_name, user_id)).fetchone()
+    below = conn.execute(select + """
+          AND lb.score <= ? AND (lb.score < ? OR lb.achieved_at > ? OR (lb.achieved_at = ? AND lb.user_id > ?))
+        ORDER BY lb.score DESC, lb.achieved_at, lb.user_id
+        LIMIT ?
+    """, (bucket, game_name, me["score"], *position, count)).fetchall()
+
+    rows = list(reversed(above)) + [own] + below
+    _, ranks = _players_above(conn, bucket, game_name, [r["score"] for r in rows])
+    conn.close()
+    return [
+        {
+            "rank": ranks[r["score"]] + 1,
+            "username": r["username"],
+            "current_avatar": r["current_avatar"],
+            "score": r["score"],
+            "is_me": r["user_id"] == user_id
+        }
+        for r in rows
+    ]
+
+# -----------------------
+# РОЗПОДІЛИ РАХУНКІВ
+# -----------------------
+def get_score_sketches():
+    """Збережені ескізи розподілу: {(game_name, level): ScoreSketch}"""
+    conn = get_db_connection()
+    rows = conn.execute("SELECT game_name, level, sketch FROM score_sketches").fetchall()
+    conn.close()
+    return {(r["game_name"], r["level"]): ScoreSketch.from_bytes(r["sketch"]) for r in rows}
+
+def save_score_sketches(deltas, initial=False):
+    """
+    Злити накопичені зміни {(game_name, level): ScoreSketch} зі збереженими ескізами
+    Зміни додаються, тому кілька процесів можуть зберігати свої незалежно.
+    initial=True записує ескізи, лише якщо таблиця порожня (перше заповнення).
+    Повертає всі ескізи після злиття
+    """
+    conn = get_db_connection()
+    # Блокування на запис одразу, щоб паралельні злиття не загубили зміни
+    conn.execute("BEGIN IMMEDIATE")
+    stored = {
+        (r["game_name"], r["level"]): ScoreSketch.from_bytes(r["sketch"])
+        for r in conn.execute("SELECT game_name, level, sketch FROM score_sketches")
+    }
+    if initial and stored:
+        # Інший процес уже заповнив таблицю
+        conn.rollback()
+        conn.close()
+        return stored
+    now = datetime.utcnow().isoformat()
+    for key, delta in deltas.items():
+        if key in stored:
+            stored[key].merge(delta)
+        else:
+            stored[key] = delta.copy()
+    conn.executemany(
+        """
+        INSERT INTO score_sketches (game_name, level, sketch, updated_at) VALUES (?, ?, ?, ?)
+        ON CONFLICT (game_name, level) DO UPDATE SET sketch = excluded.sketch, updated_at = excluded.updated_at
+        """,
+        [(game_name, level, stored[(game_name, level)].to_bytes(), now) for game_name, level in deltas]
+    )
+    conn.commit()
+    conn.close()
+    return stored
+
+def get_score_counts():
+    """Кількість результатів для кожного рахунку за грою та рівнем (для побудови ескізів)"""
+    conn = get_db_connection()
+    rows = conn.execute(
+        "SELECT game_name, level, score, COUNT(*) AS results FROM game_results GROUP BY game_name, level, score"
+    ).fetchall()
+    conn.close()
+    return rows
+
+# -----------------------
+# АНАЛІТИКА
+# -----------------------
+# Діапазон id, що читається одним запитом при завантаженні стовпцями
+COLUMN_CHUNK_ROWS = 50_000
+COLUMN_TABLES = ("game_results", "transactions")
+
+def _case_index(column, values):
+    """SQL-вираз з індексом значення column у values (-1 для невідомих) та його параметри"""
+    whens = " ".join(f"WHEN ? THEN {i}" for i in range(len(values)))
+    return f"CASE {column} {whens} ELSE -1 END", tuple(values)
+
+def _read_columns(table, expressions, params, after_id):
+    """
+    Рядки table з id > after_id стовпцями NumPy одним послідовним проходом за id
+    Кожен діапазон id читається кортежами цілих (без sqlite3.Row і без рядків
+    group_concat, які довелося б розбирати) і складається в матрицю одним np.array.
+    Крім expressions (цілі вирази) завжди повертаються id та day (дні від 1970-01-01)
+    """
+    # NumPy потрібен лише аналітиці, тож не вантажиться з моделями
+    import numpy as np
+
+    names = ["id", *expressions, "day"]
+    day_expr = "CAST(julianday(created_at) - 2440587.5 AS INTEGER)"
+    selects = ", ".join(["id", *expressions.values(), day_expr])
+    sql = f"SELECT {selects} FROM {table} WHERE id > ? AND id <= ? ORDER BY id"
+    chunks = []
+    conn = get_db_connection()
+    last_id = conn.execute(f"SELECT MAX(id) FROM {table}").fetchone()[0] or 0
+    cur = conn.cursor()
+    cur.row_factory = None
+    for start in range(after_id, last_id, COLUMN_CHUNK_ROWS):
+        rows = cur.execute(sql, (*params, start, min(start + COLUMN_CHUNK_ROWS, last_id))).fetchall()
+        if rows:
+            chunks.append(np.array(rows, dtype=np.int64))
+    conn.close()
+    matrix = np.concatenate(chunks) if chunks else np.empty((0, len(names)), dtype=np.int64)
+    return {name: np.ascontiguousarray(matrix[:, i]) for i, name in enumerate(names)}
+
+def get_game_result_columns(games, levels, after_id=0):
+    """
+    Результати з id > after_id стовпцями NumPy: id, user_id, game і level
+    (індекси в games і levels, -1 для невідомих), score, time_ms, coins, day
+    """
+    game_expr, game_params = _case_index("game_name", games)
+    level_expr, level_params = _case_index("level", levels)
+    expressions = {
+        "user_id": "user_id",
+        "game": game_expr,
+        "level": level_expr,
+        "score": "score",
+        "time_ms": "CAST(round(time_spent * 1000) AS INTEGER)",
+        "coins": "coins_earned",
+    }
+    return _read_columns("game_results", expressions, game_params + level_params, after_id)
+
+def get_transaction_columns(types, after_id=0):
+    """Транзакції з id > after_id стовпцями NumPy: id, user_id, amount, type (індекс у types), day"""
+    type_expr, type_params = _case_index("transaction_type", types)
+    expressions = {"user_id": "user_id", "amount": "amount", "type": type_expr}
+    return _read_columns("transactions", expressions, type_params, after_id)
+
+def get_row_count(table, max_id):
+    """Кількість рядків table з id <= max_id (перевірка, чи не було видалень)"""
+    if table not in COLUMN_TABLES:
+        raise ValueError(f"Unknown table {table}")
+    conn = get_db_connection()
+    count = conn.execute(f"SELECT COUNT(*) AS c FROM {table} WHERE id <= ?", (max_id,)).fetchone()["c"]
+    conn.close()
+    return count
+
+# -----------------------
+# ЕКСПОРТ
+# -----------------------
+EXPORT_COLUMNS = {
+    "game_results": ("id", "user_id", "game_name", "level", "score", "time_spent", "rounds", "coins_earned", "created_at"),
+    "transactions": ("id", "user_id", "amount", "transaction_type", "description", "created_at"),
+}
+EXPORT_BATCH_ROWS = 5000
+
+def iter_export_rows(table, start=None, end=None, user_id=None, batch=EXPORT_BATCH_ROWS):
+    """
+    Рядки table (кортежі стовпців EXPORT_COLUMNS[table]) потоком
+    start і end — межі created_at [start, end) у форматі ISO, user_id — фільтр гравця.
+    Кожна порція — окремий короткий запит з курсором по індексу, тож пам'ять
+    не залежить від кількості рядків, а блокування читання не тримається
+    весь експорт і не зупиняє запис результатів
+    """
+    if table not in EXPORT_COLUMNS:
+        raise ValueError(f"Unknown table {table}")
+    filters, params = [], []
+    if user_id is not None:
+        filters.append("user_id = ?")
+        params.append(user_id)
+    if start:
+        filters.append("created_at >= ?")
+        params.append(start)
+    if end:
+        filters.append("created_at < ?")
+        params.append(end)
+    # З фільтрами порядок індексів (created_at) та (user_id, created_at), інакше — за id
+    key = ("created_at", "id") if filters else ("id",)
+    columns = ", ".join(EXPORT_COLUMNS[table])
+    cursor = None
+    while True:
+        where = list(filters)
+        if cursor is not None:
+            where.append(f"({', '.join(key)}) > ({', '.join('?' * len(key))})")
+        sql = f"SELECT {columns} FROM {table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {', '.join(key)} LIMIT ?"
+        conn = get_db_connection()
+        rows = conn.execute(sql, (*params, *(cursor or ()), batch)).fetchall()
+        conn.close()
+        for row in rows:
+            yield tuple(row)
+        if len(rows) < batch:
+            return
+        last = dict(zip(EXPORT_COLUMNS[table], rows[-1]))
+        cursor = tuple(last[column] for column in key)
+
 # -----------------------
 # DAILY BONUS
 # -----------------------
@@ -495,6 +1075,7 @@ def check_daily_bonus(user_id):
         """, (user_id, bonus_amount, f"Daily bonus (Day {streak})", datetime.utcnow().isoformat()))
         
         conn.commit()
+        _changed(user_id, "users")
         message = f"Daily Bonus! +{bonus_amount} coins (Streak: {streak} days)"
     
     conn.close()
@@ -509,6 +1090,7 @@ def equip_avatar(user_id, avatar_name):
     conn.execute("UPDATE users SET current_avatar = ? WHERE id = ?", (avatar_name, user_id))
     conn.commit()
     conn.close()
+    _changed(user_id, "users")
 
 # -----------------------
 # SETTINGS
@@ -525,9 +1107,17 @@ def delete_user_account(user_id):
     conn = get_db_connection()
     # SQLite з FK constraints ON має видалити каскадно, але для надійності:
     conn.execute("DELETE FROM game_results WHERE user_id = ?", (user_id,))
+    deltas = {}
+    rows = conn.execute("SELECT bucket, game_name, score FROM leaderboard_best WHERE user_id = ?", (user_id,)).fetchall()
+    for r in rows:
+        _rank_tree_add(deltas, r["bucket"], r["game_name"], r["score"], -1)
+    _apply_rank_tree(conn, deltas)
+    _bump_leaderboards(conn, [r["game_name"] for r in rows])
+    conn.execute("DELETE FROM leaderboard_best WHERE user_id = ?", (user_id,))
     conn.execute("DELETE FROM user_purchases WHERE user_id = ?", (user_id,))
     conn.execute("DELETE FROM transactions WHERE user_id = ?", (user_id,))
     conn.execute("DELETE FROM feedback WHERE user_id = ?", (user_id,))
     conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
     conn.commit()
-    conn.close()
\ No newline at end of file
+    conn.close()
+    _changed(user_id, "users", "game_results", "user_purchases")
\ No newline at end of file
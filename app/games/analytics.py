@@ -0,0 +1,183 @@
+"""
+Аналітика для адмін-панелі
+game_results і transactions один раз послідовно читаються в стовпці NumPy,
+далі дочитуються лише нові рядки (таблиці тільки доповнюються).
+Активні гравці, ігри на гравця, динаміка рахунків, час на рівні та рух монет
+рахуються векторними групуваннями (bincount, unique) без циклу по рядках,
+а готовий звіт кешується на ANALYTICS_TTL секунд
+"""
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from app.db import models
+from app.games.registry import GAMES, LEVELS
+
+ANALYTICS_TTL = 60
+TREND_DAYS = 30
+TRANSACTION_TYPES = ("game_reward", "daily_bonus", "purchase", "coins_update")
+# Нижні межі груп гравців за кількістю ігор
+GAMES_PER_USER_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+_EPOCH = date(1970, 1, 1)
+
+
+class ColumnStore:
+    """Стовпці однієї таблиці в пам'яті процесу з дочитуванням нових рядків"""
+
+    def __init__(self, table, load):
+        self.table = table
+        self._load = load
+        self.columns = None
+        self.last_id = 0
+
+    def __len__(self):
+        return 0 if self.columns is None else len(self.columns["id"])
+
+    def _set(self, columns):
+        self.columns = columns
+        if len(columns["id"]):
+            self.last_id = int(columns["id"][-1])
+
+    def sync(self):
+        """Дочитати рядки з id > last_id; після видалень перечитати все"""
+        tail = self._load(self.last_id)
+        if self.columns is None:
+            self._set(tail)
+        elif len(tail["id"]):
+            self._set({name: np.concatenate((values, tail[name])) for name, values in self.columns.items()})
+        # Видалення акаунта прибирає старі рядки, і дочитування їх не помітить
+        if models.get_row_count(self.table, self.last_id) != len(self):
+            self.last_id = 0
+            self._set(self._load(0))
+        return self.columns
+
+
+def _averages(keys, values, size):
+    """Середнє values для кожного ключа 0..size-1 (None, якщо значень немає)"""
+    counts = np.bincount(keys, minlength=size)
+    sums = np.bincount(keys, weights=values, minlength=size)
+    return [round(float(s / c), 1) if c else None for s, c in zip(sums, counts)]
+
+
+def _games_per_user(per_user):
+    edges = np.array(GAMES_PER_USER_BUCKETS)
+    buckets = np.bincount(np.searchsorted(edges, per_user, side="right") - 1, minlength=len(edges))
+    labels = [
+        str(low) if high - low == 1 else f"{low}–{high - 1}"
+        for low, high in zip(GAMES_PER_USER_BUCKETS, GAMES_PER_USER_BUCKETS[1:])
+    ] + [f"{GAMES_PER_USER_BUCKETS[-1]}+"]
+    return {
+        "players": int(len(per_user)),
+        "mean": round(float(per_user.mean()), 1) if len(per_user) else None,
+        "median": float(np.median(per_user)) if len(per_user) else None,
+        "p90": float(np.percentile(per_user, 90)) if len(per_user) else None,
+        "max": int(per_user.max()) if len(per_user) else None,
+        "buckets": [{"label": label, "players": int(n)} for label, n in zip(labels, buckets)],
+    }
+
+
+def compute_report(results, transactions, today=None, days=TREND_DAYS):
+    """
+    Звіт з стовпців get_game_result_columns і get_transaction_columns
+    Динаміка — за останні days днів до today включно, решта — за весь час
+    """
+    today = today or datetime.utcnow().date()
+    start = (today - _EPOCH).days - days + 1
+    games, levels = list(GAMES), len(LEVELS)
+
+    day = results["day"] - start
+    in_window = (day >= 0) & (day < days)
+    known = results["game"] >= 0
+
+    # Активні гравці: унікальні пари (день, гравець) у вікні
+    users, window_days = results["user_id"][in_window], day[in_window]
+    stride = int(users.max()) + 1 if len(users) else 1
+    pairs = np.unique(window_days * stride + users)
+    dau = np.bincount(pairs // stride, minlength=days)
+
+    trend = in_window & known
+    score_trends = np.array(_averages(
+        results["game"][trend] * days + day[trend], results["score"][trend], len(games) * days
+    ), dtype=object).reshape(len(games), days)
+
+    timed = known & (results["level"] >= 0)
+    time_per_level = np.array(_averages(
+        results["game"][timed] * levels + results["level"][timed],
+        results["time_ms"][timed] / 1000, len(games) * levels
+    ), dtype=object).reshape(len(games), levels)
+
+    amount = transactions["amount"]
+    inflow, outflow = np.where(amount > 0, amount, 0), np.where(amount < 0, -amount, 0)
+    tx_day = transactions["day"] - start
+    tx_window = (tx_day >= 0) & (tx_day < days)
+    # Невідомі типи (-1) потрапляють в останню групу "other"
+    tx_type = np.where(transactions["type"] >= 0, transactions["type"], len(TRANSACTION_TYPES))
+    type_in = np.bincount(tx_type, weights=inflow, minlength=len(TRANSACTION_TYPES) + 1)
+    type_out = np.bincount(tx_type, weights=outflow, minlength=len(TRANSACTION_TYPES) + 1)
+
+    # Кількість результатів кожного гравця, що має хоча б один
+    per_user = np.bincount(results["user_id"])
+    per_user = per_user[per_user > 0]
+
+    return {
+        "generated_at": datetime.utcnow().isoformat(),
+        "days": [(today - timedelta(days=days - 1 - i)).isoformat() for i in range(days)],
+        "totals": {
+            "results": int(len(results["id"])),
+            "players": int(len(per_user)),
+            "coins_in": int(inflow.sum()),
+            "coins_out": int(outflow.sum()),
+        },
+        "dau": [int(n) for n in dau],
+        "games_per_user": _games_per_user(per_user),
+        "score_trends": {game: list(row) for game, row in zip(games, score_trends)},
+        "time_per_level": {game: dict(zip(LEVELS, row)) for game, row in zip(games, time_per_level)},
+        "coin_flows": {
+            "inflow": [int(n) for n in np.bincount(tx_day[tx_window], weights=inflow[tx_window], minlength=days)],
+            "outflow": [int(n) for n in np.bincount(tx_day[tx_window], weights=outflow[tx_window], minlength=days)],
+            "by_type": {
+                kind: {"in": int(i), "out": int(o)}
+                for kind, i, o in zip((*TRANSACTION_TYPES, "other"), type_in, type_out)
+                if i or o
+            },
+        },
+    }
+
+
+class AdminAnalytics:
+    """Стовпці поточної бази та кешований звіт"""
+
+    def __init__(self, ttl=ANALYTICS_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db_path = None
+        self._report = None
+        self._computed_at = 0.0
+
+    def _reset(self):
+        self._results = ColumnStore(
+            "game_results", lambda after_id: models.get_game_result_columns(tuple(GAMES), LEVELS, after_id)
+        )
+        self._transactions = ColumnStore(
+            "transactions", lambda after_id: models.get_transaction_columns(TRANSACTION_TYPES, after_id)
+        )
+        self._report = None
+        self._db_path = models.DB_PATH
+
+    def report(self, refresh=False):
+        """Звіт для /admin/; перераховується не частіше ніж раз на ttl секунд"""
+        with self._lock:
+            # Стовпці належать базі: після зміни DB_PATH (тести, бенчмарки) читаємо заново
+            if self._db_path != models.DB_PATH:
+                self._reset()
+            fresh = self._report is not None and time.monotonic() - self._computed_at < self.ttl
+            if refresh or not fresh:
+                self._report = compute_report(self._results.sync(), self._transactions.sync())
+                self._computed_at = time.monotonic()
+            return self._report
+
+
+admin_analytics = AdminAnalytics()
@@ -0,0 +1,131 @@
+"""
+Розподіли рахунків для кожної гри та рівня
+Кожен збережений результат одразу додається до ескізу в пам'яті
+(відповідь на "ти кращий за 87% гравців" без сортування game_results),
+а накопичені зміни періодично зливаються з таблицею score_sketches
+"""
+import math
+import threading
+import time
+
+from app.db import models
+from app.games.ingest import add_result_listener
+from app.games.registry import GAMES, LEVELS
+from app.utils.sketch import ScoreSketch
+
+HISTOGRAM_BUCKETS = 20
+RELATIVE_ACCURACY = 0.01
+# Зміни зберігаються кожні FLUSH_EVERY результатів або FLUSH_SECONDS секунд
+FLUSH_EVERY = 200
+FLUSH_SECONDS = 30
+PERCENTILES = (25, 50, 75, 90, 95, 99)
+
+
+def new_sketch(game_name):
+    """Порожній ескіз з кошиками гістограми під максимальний рахунок гри"""
+    width = max(1, math.ceil(GAMES[game_name].max_score / HISTOGRAM_BUCKETS))
+    return ScoreSketch(width, HISTOGRAM_BUCKETS, RELATIVE_ACCURACY)
+
+
+class DistributionStore:
+    """Ескізи поточної бази: збережені плюс ще не злиті зміни процесу"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._db_path = None
+        self._view = {}
+        self._pending = {}
+        self._pending_results = 0
+        self._flushed_at = time.monotonic()
+
+    def _ensure_loaded(self):
+        """
+        Ескізи належать базі: після зміни DB_PATH (тести, бенчмарки) завантажуємо заново
+        Повертає True, якщо ескізи щойно побудовано з game_results
+        """
+        if self._db_path == models.DB_PATH:
+            return False
+        self._pending.clear()
+        self._pending_results = 0
+        self._view = models.get_score_sketches()
+        built = False
+        if not self._view:
+            self._view = self._build_from_results()
+            built = bool(self._view)
+        self._db_path = models.DB_PATH
+        self._flushed_at = time.monotonic()
+        return built
+
+    def _build_from_results(self):
+        """Перше заповнення з game_results одним агрегованим запитом"""
+        sketches = {}
+        for row in models.get_score_counts():
+            key = (row["game_name"], row["level"])
+            if row["game_name"] not in GAMES or row["level"] not in LEVELS:
+                continue
+            if key not in sketches:
+                sketches[key] = new_sketch(row["game_name"])
+            sketches[key].add(row["score"], row["results"])
+        return models.save_score_sketches(sketches, initial=True) if sketches else {}
+
+    def add(self, results):
+        """Додати збережені результати (GameResult) до ескізів"""
+        with self._lock:
+            # Щойно збережені результати вже є в game_results, з яких побудовано ескізи
+            if self._ensure_loaded():
+                return
+            for result in results:
+                key = (result.game_name, result.level)
+                for sketches in (self._view, self._pending):
+                    if key not in sketches:
+                        sketches[key] = new_sketch(result.game_name)
+                    sketches[key].add(result.score)
+            self._pending_results += len(results)
+            due = (self._pending_results >= FLUSH_EVERY
+                   or time.monotonic() - self._flushed_at >= FLUSH_SECONDS)
+            if due:
+                self._flush()
+
+    def _flush(self):
+        if self._pending:
+            # Після злиття беремо збережені ескізи: там і зміни інших процесів
+            self._view = models.save_score_sketches(self._pending)
+            self._pending.clear()
+        self._pending_results = 0
+        self._flushed_at = time.monotonic()
+
+    def flush(self):
+        with self._lock:
+            if self._db_path == models.DB_PATH:
+                self._flush()
+
+    def get(self, game_name, level):
+        """Ескіз гри та рівня або None, якщо результатів ще немає"""
+        with self._lock:
+            self._ensure_loaded()
+            return self._view.get((game_name, level))
+
+    def on_results(self, user_id, results, coins):
+        """Обробник збережених результатів (ingest.add_result_listener)"""
+        self.add(results)
+
+
+def describe(sketch, score=None):
+    """Перцентилі, гістограма та (для score) частка гірших результатів"""
+    data = {
+        "count": sketch.count,
+        "relative_accuracy": sketch.sketch.relative_accuracy,
+        "percentiles": {f"p{p}": round(sketch.sketch.quantile(p / 100)) for p in PERCENTILES},
+        "histogram": {
+            "bucket_width": sketch.histogram.width,
+            "counts": list(sketch.histogram.counts)
+        }
+    }
+    if score is not None:
+        data["score"] = score
+        data["beats"] = round(sketch.sketch.rank(score), 4)
+    return data
+
+
+distribution_store = DistributionStore()
+add_result_listener(distribution_store.on_results)
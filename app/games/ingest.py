@@ -0,0 +1,214 @@
+"""
+Прийом результатів ігор
+Розбір і перевірка вхідних даних в одному місці для всіх ігор
+та збереження одиночних і пакетних результатів.
+Кожен результат має містити токен сесії, виданий на старті гри,
+а для ігор з пулами раундів — ще й відповіді гравця, для Color Rush
+і Tapping Memory — транскрипт раундів
+"""
+from collections import namedtuple
+
+from flask import current_app, jsonify, request
+from flask_login import current_user
+
+from app.db.models import get_used_sessions, save_game_result, save_game_results_batch
+from app.games.pools import POOLED_GAMES, AnswerError, get_pools, verify_answers
+from app.games.registry import LEVELS, MAX_TIME, get_game
+from app.games.session import SessionError, issue_token, new_nonce, replay_cache, verify_token
+from app.games.transcripts import TRANSCRIPT_GAMES, verify_transcripts
+
+# Порядок полів збігається з аргументами save_game_results_batch
+GameResult = namedtuple("GameResult", "game_name level score time_spent rounds")
+
+# Обробники, що викликаються після збереження: listener(user_id, results, coins)
+_listeners = []
+
+
+class ResultError(ValueError):
+    """Некоректний результат гри"""
+
+
+def _is_number(value):
+    # bool є підкласом int, тому відкидаємо його явно
+    return not isinstance(value, bool) and isinstance(value, (int, float))
+
+
+def parse_result(game_name, data):
+    """Перевірити дані результату та повернути GameResult"""
+    if not isinstance(data, dict):
+        raise ResultError("Result must be an object")
+    game = get_game(game_name)
+    if game is None:
+        raise ResultError("Unknown game")
+
+    level = data.get("level")
+    if level not in LEVELS:
+        raise ResultError("Invalid level")
+
+    score = data.get("score", 0)
+    if not _is_number(score) or score != int(score) or not game.min_score <= score <= game.max_score:
+        raise ResultError("Invalid score")
+
+    time_spent = data.get("time", 0.0)
+    if not _is_number(time_spent) or not 0 <= time_spent <= MAX_TIME:
+        raise ResultError("Invalid time")
+
+    rounds = data.get("rounds", game.default_rounds)
+    if not _is_number(rounds) or rounds != int(rounds) or not 1 <= rounds <= game.max_rounds:
+        raise ResultError("Invalid rounds")
+
+    return GameResult(game.name, level, int(score), float(time_spent), int(rounds))
+
+
+def check_session(data, result, user_id):
+    """Перевірити токен сесії (і відповіді на раунди пулу) без звернення до бази"""
+    session = verify_token(current_app.secret_key, data.get("token"), current_app.config["GAME_SESSION_TTL"])
+    if (session.game_name, session.level, session.user_id) != (result.game_name, result.level, user_id):
+        raise SessionError("Session token does not match result")
+    if result.game_name in POOLED_GAMES:
+        verify_answers(get_pools(current_app.secret_key), session, result, data.get("answers"))
+    return session
+
+
+def _session_claims(sessions):
+    ttl = current_app.config["GAME_SESSION_TTL"]
+    return [(s.nonce, s.issued_at + ttl) for s in sessions]
+
+
+def claim_sessions(sessions):
+    """
+    Позначити токени використаними в кеші процесу, повертає індекси повторно надісланих
+    SessionError, якщо кеш заповнений. Остаточна перевірка — під час збереження
+    """
+    claims = _session_claims(sessions)
+    return replay_cache.claim([nonce for nonce, _ in claims], [expires_at for _, expires_at in claims])
+
+
+def used_session_indexes(sessions):
+    """Індекси токенів, уже використаних будь-яким процесом"""
+    used = get_used_sessions([s.nonce for s in sessions])
+    return [i for i, s in enumerate(sessions) if s.nonce in used]
+
+
+def parse_batch(items, user_id):
+    """
+    Перевірити пакет результатів (поля game і token у кожному елементі)
+    Повертає (results, sessions, errors), де errors — список {"index", "error"}
+    """
+    parsed = []
+    errors = {}
+    for index, item in enumerate(items):
+        try:
+            game_name = item.get("game") if isinstance(item, dict) else None
+            result = parse_result(game_name, item)
+            parsed.append((index, result, check_session(item, result, user_id), item))
+        except (ResultError, SessionError, AnswerError) as e:
+            errors[index] = str(e)
+
+    # Транскрипти кожної гри перевіряються одним векторизованим проходом
+    for game_name in TRANSCRIPT_GAMES:
+        entries = [entry for entry in parsed if entry[1].game_name == game_name]
+        messages = verify_transcripts(
+            game_name, [result for _, result, _, _ in entries], [item.get("transcript") for _, _, _, item in entries]
+        )
+        for (index, _, _, _), message in zip(entries, messages):
+            if message:
+                errors[index] = message
+
+    accepted = [entry for entry in parsed if entry[0] not in errors]
+    return (
+        [result for _, result, _, _ in accepted],
+        [session for _, _, session, _ in accepted],
+        [{"index": index, "error": errors[index]} for index in sorted(errors)],
+    )
+
+
+def add_result_listener(listener):
+    """Підписатися на збережені результати (рейтинги, кеші, метрики)"""
+    _listeners.append(listener)
+    return listener
+
+
+def _notify(user_id, results, coins):
+    for listener in _listeners:
+        listener(user_id, results, coins)
+
+
+def ingest_result(user_id, result, session=None):
+    """
+    Зберегти один результат, повертає кількість нарахованих монет
+    або None, якщо токен сесії вже використано
+    """
+    claims = _session_claims([session]) if session else ()
+    coins = save_game_result(user_id, *result, claims=claims)
+    if coins is not None:
+        _notify(user_id, [result], [coins])
+    return coins
+
+
+def ingest_batch(user_id, results, sessions=()):
+    """Зберегти пакет результатів однією транзакцією, повертає список монет або None"""
+    coins = save_game_results_batch(user_id, results, claims=_session_claims(sessions) if sessions else ())
+    if coins is not None:
+        _notify(user_id, results, coins)
+    return coins
+
+
+def start_session_view(game_name):
+    """
+    Спільний обробник POST /game/<game>/start: видає токен сесії,
+    а для ігор з пулами — ще й раунди з кільця пулу
+    """
+    game = get_game(game_name)
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"status": "error", "message": "Request must be an object"}), 400
+    level = data.get("level")
+    if level not in LEVELS:
+        return jsonify({"status": "error", "message": "Invalid level"}), 400
+    count = data.get("count", game.max_rounds)
+    if isinstance(count, bool) or not isinstance(count, int) or not 1 <= count <= game.max_rounds:
+        return jsonify({"status": "error", "message": "Invalid count"}), 400
+    if not game.has_access(current_user.id):
+        return jsonify({"status": "error", "message": "Game not purchased"}), 403
+
+    nonce = new_nonce()
+    response = {
+        "status": "success",
+        "token": issue_token(current_app.secret_key, game_name, level, current_user.id, nonce=nonce),
+        "expires_in": current_app.config["GAME_SESSION_TTL"]
+    }
+    if game_name in POOLED_GAMES:
+        response["rounds"] = get_pools(current_app.secret_key).rounds(game_name, level, nonce, count)
+    return jsonify(response)
+
+
+def save_result_view(game_name):
+    """Спільний обробник POST /game/<game>/save_result"""
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"status": "error", "message": "No JSON data received"}), 400
+
+    try:
+        result = parse_result(game_name, data)
+        session = check_session(data, result, current_user.id)
+    except (ResultError, SessionError, AnswerError) as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    if game_name in TRANSCRIPT_GAMES:
+        error = verify_transcripts(game_name, [result], [data.get("transcript")])[0]
+        if error:
+            return jsonify({"status": "error", "message": error}), 400
+
+    try:
+        replayed = claim_sessions([session])
+    except SessionError as e:
+        return jsonify({"status": "error", "message": str(e)}), 503
+    coins_earned = None if replayed else ingest_result(current_user.id, result, session)
+    if coins_earned is None:
+        return jsonify({"status": "error", "message": "Session token already used"}), 400
+    return jsonify({
+        "status": "success",
+        "message": "Result saved successfully",
+        "coins_earned": coins_earned
+    })
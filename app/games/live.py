@@ -0,0 +1,247 @@
+"""
+Живі оновлення рейтингів через server-sent events
+Хаб тримає знімок топ-K кожної гри та підписників /leaderboard/stream.
+Після збереження результату, що потрапляє в топ, хаб перечитує рейтинг гри,
+кодує лише змінені місця одним повідомленням і кладе ті самі байти
+в черги всіх підписників вікна. Результати, збережені іншими процесами,
+хаб помічає, опитуючи лічильники змін рейтингів у базі (leaderboard_changes).
+Знімки day і week прив'язані до кошика (UTC-день, тиждень): з новим кошиком
+вони перечитуються, а підписники отримують новий повний знімок.
+Кожне з'єднання тримає воркер, тому стрім обслуговує окремий процес
+з асинхронним воркером (gevent), див. сервіс stream у docker-compose.yml
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from app.db.models import (
+    LEADERBOARD_WINDOWS, current_leaderboard_buckets, get_game_leaderboard, get_leaderboard_versions
+)
+from app.games.ingest import add_result_listener
+from app.games.registry import GAMES
+
+TOP_K = 10
+# Секунди між коментарями keep-alive, щоб проксі не закривали з'єднання
+HEARTBEAT_SECONDS = 15
+# Повідомлення в черзі підписника; хто не встигає читати — відключається
+MAX_PENDING = 64
+MAX_SUBSCRIBERS = 10_000
+# Секунди між опитуваннями лічильників змін, поки є підписники
+POLL_SECONDS = 1.0
+
+HEARTBEAT = b": keep-alive\n\n"
+# Маркер у черзі, після якого генератор підписника завершується
+_CLOSED = object()
+
+
+def encode_event(event, data):
+    """Закодувати подію SSE один раз для всіх підписників"""
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    return f"event: {event}\ndata: {body}\n\n".encode()
+
+
+class Subscriber:
+    """Черга готових повідомлень одного з'єднання"""
+
+    def __init__(self, hub, window):
+        self.hub = hub
+        self.window = window
+        self.pending = deque()
+        self.ready = threading.Event()
+
+    def push(self, message):
+        """False, якщо підписник не встигає читати"""
+        if len(self.pending) >= MAX_PENDING:
+            return False
+        self.pending.append(message)
+        self.ready.set()
+        return True
+
+    def close(self):
+        self.pending.append(_CLOSED)
+        self.ready.set()
+
+    def stream(self, heartbeat=HEARTBEAT_SECONDS):
+        """Генератор тіла відповіді text/event-stream"""
+        try:
+            yield b"retry: 3000\n\n"
+            yield self.hub.snapshot(self.window)
+            while True:
+                if not self.ready.wait(heartbeat):
+                    yield HEARTBEAT
+                    continue
+                self.ready.clear()
+                while self.pending:
+                    message = self.pending.popleft()
+                    if message is _CLOSED:
+                        return
+                    yield message
+        finally:
+            self.hub.unsubscribe(self)
+
+
+class LeaderboardHub:
+    """Рознесення змін топ-K рейтингів по підписниках"""
+
+    def __init__(self, top_k=TOP_K, poll_seconds=None):
+        self.top_k = top_k
+        self.poll_seconds = poll_seconds
+        self._lock = threading.Lock()
+        self._subscribers = {window: set() for window in LEADERBOARD_WINDOWS}
+        # (window, game) -> [(username, score), ...]
+        self._boards = {}
+        self._snapshots = {}
+        # Кошики, для яких зібрано знімки, і вікна, чий кошик змінився з останнього опитування
+        self._buckets = current_leaderboard_buckets()
+        self._rolled = set()
+        # Лічильники змін на момент останнього опитування; None — без підписників
+        self._versions = None
+        self._poller = None
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+    def subscribe(self, window="all"):
+        """Новий підписник або None, якщо досягнуто MAX_SUBSCRIBERS"""
+        if self.subscriber_count() >= MAX_SUBSCRIBERS:
+            return None
+        if self._versions is None:
+            # Точка відліку до знімка: зміни після неї прийдуть опитуванням
+            self._versions = get_leaderboard_versions()
+        subscriber = Subscriber(self, window)
+        with self._lock:
+            self._subscribers[window].add(subscriber)
+            if self.poll_seconds and self._poller is None:
+                self._poller = threading.Thread(target=self._poll_forever, name="leaderboard-poller", daemon=True)
+                self._poller.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers[subscriber.window].discard(subscriber)
+            if not any(self._subscribers.values()):
+                # Без підписників знімки не оновлюються, тому забуваємо їх
+                self._boards.clear()
+                self._snapshots.clear()
+                self._versions = None
+
+    def _roll_over(self):
+        """Забути знімки вікон, чий кошик змінився (новий день чи тиждень); під self._lock"""
+        buckets = current_leaderboard_buckets()
+        if buckets == self._buckets:
+            return
+        for window, bucket in buckets.items():
+            if self._buckets.get(window) != bucket:
+                for game_name in GAMES:
+                    self._boards.pop((window, game_name), None)
+                self._snapshots.pop(window, None)
+                self._rolled.add(window)
+        self._buckets = buckets
+
+    def _board(self, window, game_name):
+        key = (window, game_name)
+        if key not in self._boards:
+            rows = get_game_leaderboard(game_name, self.top_k, window)
+            self._boards[key] = [(r["username"], r["max_score"]) for r in rows]
+        return self._boards[key]
+
+    def snapshot(self, window):
+        """Повний топ-K усіх ігор вікна (перша подія кожного з'єднання)"""
+        with self._lock:
+            self._roll_over()
+            if window not in self._snapshots:
+                boards = {
+                    game_name: [
+                        {"rank": rank, "username": username, "score": score}
+                        for rank, (username, score) in enumerate(self._board(window, game_name), start=1)
+                    ]
+                    for game_name in GAMES
+                }
+                self._snapshots[window] = encode_event("snapshot", {"window": window, "boards": boards})
+            return self._snapshots[window]
+
+    def publish(self, window, message):
+        """Покласти закодоване повідомлення в черги всіх підписників вікна"""
+        with self._lock:
+            subscribers = list(self._subscribers[window])
+        slow = [s for s in subscribers if not s.push(message)]
+        for subscriber in slow:
+            subscriber.close()
+            self.unsubscribe(subscriber)
+
+    def refresh(self, window, game_name):
+        """Перечитати топ гри та розіслати змінені місця"""
+        with self._lock:
+            self._roll_over()
+            old = self._board(window, game_name)
+            rows = get_game_leaderboard(game_name, self.top_k, window)
+            new = [(r["username"], r["max_score"]) for r in rows]
+            if new == old:
+                return
+            self._boards[(window, game_name)] = new
+            self._snapshots.pop(window, None)
+        changes = [
+            {"rank": rank, "username": username, "score": score}
+            for rank, (username, score) in enumerate(new, start=1)
+            if rank > len(old) or old[rank - 1] != (username, score)
+        ]
+        self.publish(window, encode_event("leaderboard", {
+            "window": window, "game": game_name, "size": len(new), "changes": changes
+        }))
+
+    def qualifies(self, window, game_name, score):
+        """Чи може рахунок змінити топ-K (без запиту до бази, якщо знімок є)"""
+        with self._lock:
+            self._roll_over()
+            board = self._board(window, game_name)
+            return len(board) < self.top_k or score > board[-1][1]
+
+    def poll(self):
+        """Розіслати зміни рейтингів, збережені будь-яким процесом після останнього опитування"""
+        with self._lock:
+            windows = [window for window, subscribers in self._subscribers.items() if subscribers]
+            previous = self._versions
+            self._roll_over()
+            rolled, self._rolled = self._rolled, set()
+        if not windows or previous is None:
+            return
+        # Новий день чи тиждень: весь топ вікна інший, тож розсилається повний знімок
+        for window in windows:
+            if window in rolled:
+                self.publish(window, self.snapshot(window))
+        windows = [window for window in windows if window not in rolled]
+        versions = get_leaderboard_versions()
+        self._versions = versions
+        for game_name, version in versions.items():
+            if previous.get(game_name) != version:
+                for window in windows:
+                    self.refresh(window, game_name)
+
+    def _poll_forever(self):
+        while True:
+            time.sleep(self.poll_seconds)
+            try:
+                self.poll()
+            except sqlite3.Error:
+                # База зайнята або ще без схеми: наступне опитування повторить
+                pass
+
+    def on_results(self, user_id, results, coins):
+        """Обробник збережених результатів (ingest.add_result_listener)"""
+        best = {}
+        for result in results:
+            best[result.game_name] = max(result.score, best.get(result.game_name, result.score))
+        for window in LEADERBOARD_WINDOWS:
+            with self._lock:
+                if not self._subscribers[window]:
+                    continue
+            for game_name, score in best.items():
+                if self.qualifies(window, game_name, score):
+                    self.refresh(window, game_name)
+
+
+leaderboard_hub = LeaderboardHub(poll_seconds=POLL_SECONDS)
+add_result_listener(leaderboard_hub.on_results)
@@ -0,0 +1,247 @@
+"""
+Пули раундів для Arithmetic та Sequence Recall
+Сервер один раз генерує приклади та послідовності цифр із seed, похідного
+від SECRET_KEY, і зберігає їх у компактних масивах. Кожна сесія отримує
+раунди з кільця, зсув у якому визначається nonce токена, тому видача
+раундів нічого не коштує, а відповіді можна перевірити без бази
+"""
+import hashlib
+import hmac
+import math
+import random
+import threading
+from array import array
+
+from app.games.registry import GAMES, LEVELS
+
+ARITHMETIC_POOL_SIZE = 4096
+SEQUENCE_POOL_SIZE = 1024
+# Послідовності від 2 цифр, по одній довжині на раунд; після max_rounds
+# пройдених раундів пул вичерпано і гра закінчується
+MIN_SEQUENCE_LENGTH = 2
+MAX_SEQUENCE_LENGTH = MIN_SEQUENCE_LENGTH + GAMES["sequence_recall"].max_rounds - 1
+
+OPERATORS = "+-*/"
+# Базові бали за рівнем, як у static/js
+ARITHMETIC_BASE_POINTS = {"easy": 5, "medium": 10, "hard": 20}
+SEQUENCE_BASE_POINTS = {"easy": 10, "medium": 20, "hard": 30}
+# Допустима похибка відповіді (клієнт округлює до 0.1)
+ANSWER_TOLERANCE = 0.1 + 1e-9
+
+POOLED_GAMES = ("arithmetic", "sequence_recall")
+
+
+class AnswerError(ValueError):
+    """Відповіді не відповідають раундам сесії або рахунку"""
+
+
+def _round1(value):
+    """Округлення до 0.1 як Math.round у JS (половина вгору)"""
+    return math.floor(value * 10 + 0.5)
+
+
+def _apply(a, op, b):
+    if op == "+":
+        return a + b
+    if op == "-":
+        return a - b
+    if op == "*":
+        return a * b
+    return a / b
+
+
+class ArithmeticPool:
+    """Приклади одного рівня: операнди, оператори та відповіді (×10) в масивах"""
+
+    # Кількість операндів у прикладі
+    ARITY = {"easy": 2, "medium": 3, "hard": 4}
+
+    def __init__(self, level, size, rng):
+        self.level = level
+        self.size = size
+        self.arity = self.ARITY[level]
+        self.operands = array("h")
+        self.operators = array("b")
+        self.answers = array("i")
+        generate = getattr(self, f"_generate_{level}")
+        while len(self.answers) < size:
+            problem = generate(rng)
+            if problem is None:
+                continue
+            operands, operators, answer = problem
+            self.operands.extend(operands)
+            self.operators.extend(OPERATORS.index(op) for op in operators)
+            self.answers.append(_round1(answer))
+
+    # Генерація повторює правила static/js/arithmetic.js
+    @staticmethod
+    def _generate_easy(rng):
+        a, b = rng.randint(1, 50), rng.randint(1, 50)
+        op = rng.choice("+-")
+        return (a, b), op, _apply(a, op, b)
+
+    @staticmethod
+    def _generate_medium(rng):
+        a, b, c = rng.randint(5, 50), rng.randint(5, 50), rng.randint(5, 20)
+        op1 = rng.choice("+-*")
+        if op1 == "*":
+            b = rng.randint(1, 10)
+        op2 = rng.choice("+-*")
+        if op2 == "*":
+            c = rng.randint(3, 12)
+        # Множення має вищий пріоритет
+        if op2 == "*":
+            answer = _apply(a, op1, b * c)
+        else:
+            answer = _apply(_apply(a, op1, b), op2, c)
+        return (a, b, c), op1 + op2, answer
+
+    @staticmethod
+    def _generate_hard(rng):
+        a, b, c, d = rng.randint(10, 100), rng.randint(10, 100), rng.randint(5, 25), rng.randint(1, 10)
+        op1 = rng.choice(OPERATORS)
+        if op1 == "*":
+            b = rng.randint(2, 4)
+        elif op1 == "/":
+            b = rng.randint(2, 3)
+        op2 = rng.choice(OPERATORS)
+        if op2 == "*":
+            c = rng.randint(2, 6)
+        elif op2 == "/":
+            c = rng.randint(2, 5)
+        op3 = rng.choice(OPERATORS)
+        if op3 == "*":
+            d = rng.randint(2, 10)
+        elif op3 == "/":
+            d = rng.randint(2, 5)
+        right = _apply(c, op3, d)
+        # Ділення на нуль у браузері дало б Infinity — такі приклади пропускаємо
+        if op2 == "/" and right == 0:
+            return None
+        return (a, b, c, d), op1 + op2 + op3, _apply(_apply(a, op1, b), op2, right)
+
+    def expression(self, index):
+        start = index * self.arity
+        n = self.operands[start:start + self.arity]
+        ops = [OPERATORS[o] for o in self.operators[index * (self.arity - 1):(index + 1) * (self.arity - 1)]]
+        if self.arity == 2:
+            return f"{n[0]} {ops[0]} {n[1]}"
+        if self.arity == 3:
+            return f"{n[0]} {ops[0]} {n[1]} {ops[1]} {n[2]}"
+        return f"({n[0]} {ops[0]} {n[1]}) {ops[1]} ({n[2]} {ops[2]} {n[3]})"
+
+    def answer(self, index):
+        return self.answers[index] / 10
+
+
+class SequencePool:
+    """Послідовності цифр для кожної довжини, по size штук у суцільних bytes"""
+
+    # Відображення байта на ASCII-цифру (зсув розподілу ~0.4%, для гри неістотний)
+    _DIGITS = bytes(48 + i % 10 for i in range(256))
+
+    def __init__(self, size, rng):
+        self.size = size
+        self.by_length = {
+            length: rng.randbytes(size * length).translate(self._DIGITS)
+            for length in range(MIN_SEQUENCE_LENGTH, MAX_SEQUENCE_LENGTH + 1)
+        }
+
+    def sequence(self, length, index):
+        start = index * length
+        return self.by_length[length][start:start + length].decode()
+
+
+class RoundPools:
+    """Усі пули, згенеровані з одного seed"""
+
+    def __init__(self, seed, arithmetic_size=ARITHMETIC_POOL_SIZE, sequence_size=SEQUENCE_POOL_SIZE):
+        rng = random.Random(seed)
+        self.arithmetic = {level: ArithmeticPool(level, arithmetic_size, rng) for level in LEVELS}
+        self.sequences = SequencePool(sequence_size, rng)
+
+    @staticmethod
+    def _offset(nonce, size):
+        # Початок сесії в кільці визначається її nonce
+        return int.from_bytes(nonce[:4], "big") % size
+
+    def arithmetic_indexes(self, level, nonce, count):
+        pool = self.arithmetic[level]
+        offset = self._offset(nonce, pool.size)
+        return [(offset + i) % pool.size for i in range(count)]
+
+    def rounds(self, game_name, level, nonce, count):
+        """Раунди сесії: вирази для Arithmetic або рядки цифр для Sequence Recall"""
+        if game_name == "arithmetic":
+            pool = self.arithmetic[level]
+            return [pool.expression(i) for i in self.arithmetic_indexes(level, nonce, count)]
+        offset = self._offset(nonce, self.sequences.size)
+        count = min(count, MAX_SEQUENCE_LENGTH - MIN_SEQUENCE_LENGTH + 1)
+        return [
+            self.sequences.sequence(MIN_SEQUENCE_LENGTH + i, (offset + i) % self.sequences.size)
+            for i in range(count)
+        ]
+
+
+_pools = {}
+_lock = threading.Lock()
+
+
+def get_pools(secret):
+    """Пули для секрету застосунку (генеруються один раз на процес)"""
+    key = secret.encode() if isinstance(secret, str) else secret
+    seed = int.from_bytes(hmac.new(key, b"round-pools", hashlib.sha256).digest()[:8], "big")
+    pools = _pools.get(seed)
+    if pools is None:
+        with _lock:
+            pools = _pools.get(seed)
+            if pools is None:
+                pools = _pools[seed] = RoundPools(seed)
+    return pools
+
+
+def sequence_round_points(level, length):
+    """Бали за раунд Sequence Recall (як calculateRoundPoints у JS)"""
+    base = SEQUENCE_BASE_POINTS[level]
+    return base + (length - MIN_SEQUENCE_LENGTH) * math.floor(base * 0.5 + 0.5)
+
+
+def verify_answers(pools, session, result, answers):
+    """Перевірити відповіді гравця на раунди сесії та узгодженість рахунку"""
+    if not isinstance(answers, list) or len(answers) > GAMES[result.game_name].max_rounds:
+        raise AnswerError("Answers are required")
+
+    if result.game_name == "arithmetic":
+        if len(answers) > result.rounds:
+            raise AnswerError("Too many answers")
+        pool = pools.arithmetic[result.level]
+        correct = 0
+        for answer, index in zip(answers, pools.arithmetic_indexes(result.level, session.nonce, len(answers))):
+            if answer is None:
+                continue
+            if isinstance(answer, bool) or not isinstance(answer, (int, float)):
+                raise AnswerError("Invalid answer")
+            if abs(answer - pool.answer(index)) <= ANSWER_TOLERANCE:
+                correct += 1
+        # Максимум за приклад — потрійні базові бали за миттєву відповідь
+        if result.score > correct * ARITHMETIC_BASE_POINTS[result.level] * 3:
+            raise AnswerError("Score does not match answers")
+        return correct
+
+    expected = pools.rounds(result.game_name, result.level, session.nonce, len(answers))
+    correct = 0
+    for answer, sequence in zip(answers, expected):
+        if not isinstance(answer, str):
+            raise AnswerError("Invalid answer")
+        if answer != sequence:
+            break
+        correct += 1
+    # Помилитися можна лише в останній спробі; rounds = пройдені раунди + 1,
+    # а якщо пройдено всі раунди пулу — rounds = пройдені раунди
+    exhausted = correct == GAMES[result.game_name].max_rounds and result.rounds == correct
+    if len(answers) > correct + 1 or (result.rounds != correct + 1 and not exhausted):
+        raise AnswerError("Answers do not match rounds")
+    points = sum(sequence_round_points(result.level, MIN_SEQUENCE_LENGTH + i) for i in range(correct))
+    if result.score != points:
+        raise AnswerError("Score does not match answers")
+    return correct
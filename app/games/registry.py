@@ -0,0 +1,84 @@
+"""
+Реєстр ігор BrainRush
+Єдине місце з описом кожної гри: назва, політика доступу,
+кількість раундів за замовчуванням та межі допустимого результату
+"""
+from app.db.models import RANK_TREE_SIZE, get_all_shop_items, user_has_purchased
+
+LEVELS = ("easy", "medium", "hard")
+# Максимальна тривалість однієї гри в секундах
+MAX_TIME = 3600
+
+
+class GameDefinition:
+    """Опис однієї гри та її обмежень"""
+
+    def __init__(self, name, title, endpoint, shop_item=None, default_rounds=1,
+                 max_rounds=1, min_score=0, max_score=0):
+        self.name = name
+        self.title = title
+        # Endpoint сторінки гри для url_for
+        self.endpoint = endpoint
+        # Назва товару в магазині; None означає безкоштовну гру
+        self.shop_item = shop_item
+        self.default_rounds = default_rounds
+        self.max_rounds = max_rounds
+        self.min_score = min_score
+        self.max_score = max_score
+
+    @property
+    def is_free(self):
+        return self.shop_item is None
+
+    def find_shop_item(self):
+        """Товар магазину, що відкриває гру"""
+        if self.is_free:
+            return None
+        for item in get_all_shop_items():
+            if item["item_type"] == "game" and item["name"] == self.shop_item:
+                return item
+        return None
+
+    def has_access(self, user_id):
+        """Чи може користувач грати в цю гру"""
+        if self.is_free:
+            return True
+        item = self.find_shop_item()
+        return item is not None and user_has_purchased(user_id, item["id"])
+
+
+# Межі балів взяті з правил нарахування в static/js для найскладнішого рівня
+GAMES = {
+    game.name: game for game in (
+        # 15 прикладів × 60 балів (hard, base 20 × 3 за швидкість)
+        GameDefinition("arithmetic", "Arithmetic", "arithmetic.arithmetic_game",
+                       default_rounds=1, max_rounds=15, max_score=900),
+        # Послідовність до 51 елемента: сума 30 + (n - 2) × 15
+        GameDefinition("sequence_recall", "Sequence Recall", "sequence_recall.sequence_recall_game",
+                       default_rounds=1, max_rounds=50, max_score=20000),
+        # Завжди 10 раундів × 45 балів (hard, base 30 × 1.5)
+        GameDefinition("color_rush", "Color Rush", "color_rush.color_rush_game",
+                       shop_item="Color Rush", default_rounds=10, max_rounds=10, max_score=450),
+        # Послідовність до 51 клітинки: сума 13 + n × 10
+        GameDefinition("tapping_memory", "Tapping Memory", "tapping_memory.tapping_memory_game",
+                       shop_item="Tapping Memory", default_rounds=1, max_rounds=50, max_score=15000),
+    )
+}
+
+
+def check_rank_tree(games):
+    """Кожен допустимий рахунок має власний вузол у дереві рангів рейтингу"""
+    too_large = sorted(game.name for game in games.values() if game.max_score >= RANK_TREE_SIZE)
+    if too_large:
+        raise ValueError(
+            f"max_score of {', '.join(too_large)} does not fit the leaderboard rank tree "
+            f"(scores up to {RANK_TREE_SIZE - 1}); increase models.RANK_TREE_SIZE"
+        )
+
+
+check_rank_tree(GAMES)
+
+
+def get_game(name):
+    """Опис гри за назвою або None"""
+    return GAMES.get(name)
@@ -0,0 +1,131 @@
+"""
+Токени ігрових сесій
+Сервер видає підписаний HMAC-SHA256 токен на старті гри (гра, рівень,
+користувач, час видачі, nonce). save_result перевіряє його без звернення
+до бази. Кеш nonce у пам'яті відсікає повтори в межах процесу, а спільна
+для всіх воркерів перевірка — унікальний nonce у used_sessions, що
+записується в одній транзакції з результатом (models.save_game_result)
+"""
+import base64
+import hashlib
+import hmac
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from app.games.registry import GAMES, LEVELS
+
+TOKEN_VERSION = 1
+# версія, гра, рівень, користувач, час видачі, nonce
+_PAYLOAD = struct.Struct(">BBBII8s")
+# Обрізаний MAC: 128 біт достатньо для підпису короткоживучих токенів
+MAC_SIZE = 16
+NONCE_SIZE = 8
+
+_GAME_NAMES = tuple(GAMES)
+
+GameSession = namedtuple("GameSession", "game_name level user_id issued_at nonce")
+
+
+class SessionError(ValueError):
+    """Недійсний токен ігрової сесії"""
+
+
+def _sign(payload, secret):
+    key = secret.encode() if isinstance(secret, str) else secret
+    return hmac.new(key, payload, hashlib.sha256).digest()[:MAC_SIZE]
+
+
+def new_nonce():
+    return os.urandom(NONCE_SIZE)
+
+
+def issue_token(secret, game_name, level, user_id, now=None, nonce=None):
+    """Видати токен для нової гри"""
+    issued_at = int(time.time() if now is None else now)
+    payload = _PAYLOAD.pack(
+        TOKEN_VERSION, _GAME_NAMES.index(game_name), LEVELS.index(level),
+        user_id, issued_at, nonce or new_nonce()
+    )
+    return base64.urlsafe_b64encode(payload + _sign(payload, secret)).rstrip(b"=").decode()
+
+
+def verify_token(secret, token, max_age, now=None):
+    """Перевірити підпис і термін дії токена, повертає GameSession"""
+    if not isinstance(token, str) or len(token) > 64:
+        raise SessionError("Invalid session token")
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except ValueError:
+        raise SessionError("Invalid session token")
+    if len(raw) != _PAYLOAD.size + MAC_SIZE:
+        raise SessionError("Invalid session token")
+
+    payload, mac = raw[:_PAYLOAD.size], raw[_PAYLOAD.size:]
+    if not hmac.compare_digest(mac, _sign(payload, secret)):
+        raise SessionError("Invalid session token")
+
+    version, game_index, level_index, user_id, issued_at, nonce = _PAYLOAD.unpack(payload)
+    if version != TOKEN_VERSION or game_index >= len(_GAME_NAMES) or level_index >= len(LEVELS):
+        raise SessionError("Invalid session token")
+
+    age = (time.time() if now is None else now) - issued_at
+    if age > max_age or age < -60:
+        raise SessionError("Session token expired")
+
+    return GameSession(_GAME_NAMES[game_index], LEVELS[level_index], user_id, issued_at, nonce)
+
+
+class NonceCache:
+    """
+    Використані nonce з часом закінчення дії в межах процесу
+    Після закінчення дії токен і так відхиляється, тому запис можна забути.
+    Живі записи не витісняються: коли кеш заповнений, нові сесії відхиляються
+    """
+
+    def __init__(self, max_entries=100_000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _purge(self, now):
+        # TTL однаковий для всіх токенів, тому найстаріші записи на початку
+        while self._entries:
+            nonce, expires_at = next(iter(self._entries.items()))
+            if expires_at > now:
+                break
+            self._entries.popitem(last=False)
+
+    def claim(self, nonces, expires_at, now=None):
+        """
+        Позначити nonce використаними
+        Або всі одразу, або жоден: повертає індекси вже використаних nonce.
+        SessionError, якщо в кеші немає місця для нових nonce
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            self._purge(now)
+            seen = set()
+            used = []
+            for i, nonce in enumerate(nonces):
+                if nonce in self._entries or nonce in seen:
+                    used.append(i)
+                seen.add(nonce)
+            if not used:
+                if len(self._entries) + len(nonces) > self.max_entries:
+                    raise SessionError("Too many active game sessions, try again later")
+                for nonce, expiry in zip(nonces, expires_at):
+                    self._entries[nonce] = expiry
+            return used
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+replay_cache = NonceCache()
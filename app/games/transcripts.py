@@ -0,0 +1,165 @@
+"""
+Перевірка транскриптів раундів для Color Rush та Tapping Memory
+Клієнт надсилає разом з рахунком час реакції кожного раунду (rt, мс)
+та його успішність (ok, 0/1). Увесь пакет транскриптів перевіряється
+одним векторизованим проходом NumPy: рахунок перераховується за правилами
+static/js, неможливі часи реакції та надто рівномірні (ботоподібні)
+транскрипти відхиляються ще до запису в game_results
+"""
+import numpy as np
+
+from app.games.registry import GAMES, LEVELS
+
+TRANSCRIPT_GAMES = ("color_rush", "tapping_memory")
+
+# Швидше за це людина не розрізняє колір слова серед кількох варіантів
+MIN_REACTION_MS = 150
+# Мінімальний час на одне натискання клітинки
+MIN_TAP_MS = 80
+# Людський час реакції завжди коливається; менший розкид (мс) означає бота
+MIN_REACTION_STD_MS = 5
+MIN_ROUNDS_FOR_UNIFORMITY = 5
+# Допустима розбіжність поля time з сумою часу раундів (секунди)
+TIME_TOLERANCE = 0.01
+# Запас понад ліміт раунду (мс): таймер і цикл подій на повільних пристроях
+# запізнюються, тож влучання трохи після ліміту ще чесне
+LIMIT_SLACK_MS = 100
+
+# Параметри рівнів як у static/js, у порядку LEVELS
+COLOR_RUSH_BASE = np.array([10, 20, 30], dtype=np.float64)
+COLOR_RUSH_LIMIT_MS = np.array([5000, 4000, 2500], dtype=np.float64)
+COLOR_RUSH_PENALTY = np.array([5, 10, 15], dtype=np.float64)
+TAPPING_BASE = np.array([5, 8, 13], dtype=np.int64)
+TAPPING_LIMIT_S = np.array([9, 7, 5], dtype=np.float64)
+TAPPING_LIMIT_STEP_S = 1.2
+
+
+def _round_half_up(values):
+    # Math.round у JS округлює половину вгору
+    return np.floor(values + 0.5)
+
+
+def _pack(transcripts, max_rounds):
+    """
+    Розкласти транскрипти в матриці n × max_rounds
+    Повертає (rt, ok, lengths, errors) з помилками формату за індексом
+    """
+    n = len(transcripts)
+    rt = np.zeros((n, max_rounds), dtype=np.float64)
+    ok = np.zeros((n, max_rounds), dtype=np.int8)
+    lengths = np.zeros(n, dtype=np.int64)
+    errors = [None] * n
+    for i, transcript in enumerate(transcripts):
+        if not isinstance(transcript, dict):
+            errors[i] = "Transcript is required"
+            continue
+        times, hits = transcript.get("rt"), transcript.get("ok")
+        if not isinstance(times, list) or not isinstance(hits, list) or len(times) != len(hits):
+            errors[i] = "Invalid transcript"
+            continue
+        if not 1 <= len(times) <= max_rounds:
+            errors[i] = "Invalid transcript length"
+            continue
+        try:
+            rt[i, :len(times)] = times
+            ok[i, :len(hits)] = hits
+        except (TypeError, ValueError):
+            errors[i] = "Invalid transcript"
+            continue
+        lengths[i] = len(times)
+    return rt, ok, lengths, errors
+
+
+def _uniform_reactions(reaction, mask):
+    """Транскрипти з підозріло однаковим часом реакції"""
+    count = mask.sum(axis=1)
+    safe = np.maximum(count, 1)
+    mean = np.where(mask, reaction, 0).sum(axis=1) / safe
+    var = np.where(mask, (reaction - mean[:, None]) ** 2, 0).sum(axis=1) / safe
+    return (count >= MIN_ROUNDS_FOR_UNIFORMITY) & (np.sqrt(var) < MIN_REACTION_STD_MS)
+
+
+def _check_color_rush(levels, scores, rounds, rt, ok, lengths):
+    n, width = rt.shape
+    column = np.arange(width)
+    valid = column < lengths[:, None]
+    hit = valid & (ok == 1)
+    base = COLOR_RUSH_BASE[levels][:, None]
+    limit = COLOR_RUSH_LIMIT_MS[levels][:, None]
+    penalty = COLOR_RUSH_PENALTY[levels][:, None]
+
+    # Хибна відповідь (не тайм-аут) завершує гру, тому може бути лише останньою
+    wrong = valid & (ok == 0) & (rt < limit)
+    is_last = column == (lengths - 1)[:, None]
+
+    # Бали за раунд як calculateScoreForTime у color_rush.js
+    bonus = np.maximum(0, (limit - rt) / limit)
+    gained = np.maximum(_round_half_up(base / 2), _round_half_up(base + bonus * base / 2))
+    step = np.where(hit, gained, np.where(valid, -penalty, 0))
+    # Рахунок не опускається нижче нуля: s_n = S_n - min(0, min S_k)
+    prefix = np.cumsum(step, axis=1)
+    expected = prefix[:, -1] - np.minimum(0, prefix.min(axis=1))
+
+    last_wrong = (wrong & is_last).any(axis=1)
+    checks = (
+        ((valid & ((ok < 0) | (ok > 1) | (rt < 0) | ~np.isfinite(rt))).any(axis=1), "Invalid transcript"),
+        ((wrong & ~is_last).any(axis=1), "Transcript continues after a wrong answer"),
+        ((lengths != GAMES["color_rush"].max_rounds) & ~last_wrong, "Transcript is incomplete"),
+        (rounds != GAMES["color_rush"].max_rounds, "Rounds do not match transcript"),
+        ((hit & ((rt < MIN_REACTION_MS) | (rt > limit + LIMIT_SLACK_MS))).any(axis=1), "Impossible reaction time"),
+        (_uniform_reactions(rt, hit), "Reaction times too uniform"),
+        (expected != scores, "Score does not match transcript"),
+    )
+    return checks
+
+
+def _check_tapping_memory(levels, scores, rounds, times, rt, ok, lengths):
+    n, width = rt.shape
+    column = np.arange(width)
+    valid = column < lengths[:, None]
+    hit = valid & (ok == 1)
+    is_last = column == (lengths - 1)[:, None]
+    # Довжина послідовності в раунді: 2, 3, 4...
+    length = column + 2
+    limit_ms = np.floor(TAPPING_LIMIT_S[levels][:, None] + (length - 2) * TAPPING_LIMIT_STEP_S) * 1000
+
+    expected = np.where(hit, TAPPING_BASE[levels][:, None] + length * 10, 0).sum(axis=1)
+    correct = hit.sum(axis=1)
+    recall_time = np.where(hit, rt, 0).sum(axis=1) / 1000
+
+    checks = (
+        ((valid & ((ok < 0) | (ok > 1) | (rt < 0) | ~np.isfinite(rt))).any(axis=1), "Invalid transcript"),
+        ((valid & (ok == 0) & ~is_last).any(axis=1), "Transcript continues after a wrong answer"),
+        (rounds != correct + 1, "Rounds do not match transcript"),
+        ((hit & ((rt < length * MIN_TAP_MS) | (rt > limit_ms + LIMIT_SLACK_MS))).any(axis=1), "Impossible reaction time"),
+        (_uniform_reactions(rt / length, hit), "Reaction times too uniform"),
+        (expected != scores, "Score does not match transcript"),
+        (np.abs(recall_time - times) > TIME_TOLERANCE, "Time does not match transcript"),
+    )
+    return checks
+
+
+def verify_transcripts(game_name, results, transcripts):
+    """
+    Перевірити транскрипти однієї гри одним векторизованим проходом
+    results: послідовність GameResult; повертає список помилок (None — транскрипт коректний)
+    """
+    if not results:
+        return []
+    rt, ok, lengths, errors = _pack(transcripts, GAMES[game_name].max_rounds)
+    levels = np.array([LEVELS.index(r.level) for r in results], dtype=np.int64)
+    scores = np.array([r.score for r in results], dtype=np.float64)
+    rounds = np.array([r.rounds for r in results], dtype=np.int64)
+
+    if game_name == "color_rush":
+        checks = _check_color_rush(levels, scores, rounds, rt, ok, lengths)
+    else:
+        times = np.array([r.time_spent for r in results], dtype=np.float64)
+        checks = _check_tapping_memory(levels, scores, rounds, times, rt, ok, lengths)
+
+    # Перша помилка для кожного транскрипту; помилки формату мають пріоритет
+    for failed, message in checks:
+        for i in np.flatnonzero(failed):
+            if errors[i] is None:
+                errors[i] = message
+    return errors
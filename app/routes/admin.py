@@ -1,22 +1,95 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, Response, abort, render_template, stream_template, stream_with_context, request, redirect, url_for, flash, get_flashed_messages, send_from_directory
 from app.utils.decorators import admin_required
-from app.db.models import get_db_connection, get_user_by_id, set_user_role, get_feedbacks, get_feedback, update_feedback, delete_feedback
+from app.db.export import EXPORT_FORMATS, export_chunks, parse_filters
+from app.db.models import EXPORT_COLUMNS, get_users_page, search_users_by_prefix, set_user_role, get_feedbacks, get_feedback, update_feedback, delete_feedback
+from app.db.instrumentation import slow_query_log
+from app.games.analytics import admin_analytics
+from app.games.registry import GAMES, LEVELS
+from app.utils.profiler import list_profiles, profiles_dir
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
 
+USERS_PAGE_SIZE = 50
+MAX_USER_SEARCH = 50
+
 @admin_bp.route("/")
 @admin_required
 def admin_dashboard():
-    return render_template("admin/dashboard.html")
+    analytics = admin_analytics.report(refresh=request.args.get("refresh") == "1")
+    return render_template(
+        "admin/dashboard.html",
+        profiles=list_profiles(),
+        analytics=analytics,
+        analytics_ttl=admin_analytics.ttl,
+        export_tables=EXPORT_COLUMNS,
+        export_formats=EXPORT_FORMATS,
+        games=GAMES,
+        levels=LEVELS
+    )
+
+@admin_bp.route("/profiles/<path:name>")
+@admin_required
+def admin_profile_download(name):
+    """Завантажити збережений профіль (collapsed stacks)"""
+    return send_from_directory(profiles_dir(), name, mimetype="text/plain", as_attachment=True)
+
+@admin_bp.route("/perf")
+@admin_required
+def admin_perf():
+    """Топ повільних SQL-запитів за сумарним часом"""
+    limit = request.args.get("limit", 20, type=int)
+    return render_template(
+        "admin/perf.html",
+        entries=slow_query_log.top(limit),
+        threshold_ms=slow_query_log.threshold_ms
+    )
+
+@admin_bp.route("/export/<table>.<any(csv, ndjson):fmt>")
+@admin_required
+def admin_export(table, fmt):
+    """Потоковий експорт таблиці (?from=&to=&user_id= фільтри, ?gzip=1 стискання)"""
+    if table not in EXPORT_COLUMNS:
+        abort(404)
+    try:
+        filters = parse_filters(request.args.get("from"), request.args.get("to"), request.args.get("user_id"))
+    except ValueError:
+        abort(400)
+    compress = request.args.get("gzip") == "1"
+    filename = f"{table}.{fmt}.gz" if compress else f"{table}.{fmt}"
+    return Response(
+        stream_with_context(export_chunks(table, fmt, filters, compress)),
+        mimetype="application/gzip" if compress else EXPORT_FORMATS[fmt],
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            # nginx не буферизує потік
+            "X-Accel-Buffering": "no"
+        }
+    )
 
 @admin_bp.route("/users")
 @admin_required
 def admin_users():
-    """Список всіх користувачів"""
-    conn = get_db_connection()
-    users = conn.execute("SELECT * FROM users ORDER BY id").fetchall()
-    conn.close()
-    return render_template("admin/users.html", users=users)
+    """Список користувачів: keyset-пагінація, пошук за початком імені, потоковий рендер"""
+    query = request.args.get("q", "").strip()[:MAX_USER_SEARCH]
+    after_id = request.args.get("after_id", 0, type=int)
+    after_name = request.args.get("after_name")
+    # Зайвий рядок показує, чи є наступна сторінка
+    if query:
+        after = (after_name, after_id) if after_name else None
+        users = search_users_by_prefix(query, after, USERS_PAGE_SIZE + 1)
+    else:
+        users = get_users_page(after_id, USERS_PAGE_SIZE + 1)
+
+    next_page = None
+    if len(users) > USERS_PAGE_SIZE:
+        users = users[:USERS_PAGE_SIZE]
+        last = users[-1]
+        next_page = {"q": query, "after_name": last["username"], "after_id": last["id"]} if query else {"after_id": last["id"]}
+
+    # Флеш-повідомлення забираються з сесії до відправки заголовків,
+    # інакше сесія без них уже не збережеться і вони покажуться знову
+    get_flashed_messages(with_categories=True)
+    return stream_template("admin/users.html", users=users, query=query, next_page=next_page)
 
 @admin_bp.route("/users/set_role/<int:user_id>", methods=["POST"])
 @admin_required
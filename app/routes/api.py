@@ -1,9 +1,9 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request
 from flask_login import login_required, current_user
 from functools import wraps
 from app.db.models import (
     get_user_by_id,
-    get_all_shop_items,
+    get_shop_items_for_user,
     get_shop_item,
     purchase_item,
     get_user_purchases,
@@ -13,16 +13,30 @@ from app.db.models import (
     get_feedback,
     update_feedback,
     delete_feedback,
-    save_game_result,
     get_stats_for_game,
     get_total_games,
     get_total_points,
     get_total_coins_earned,
     get_distinct_games_for_user,
-    get_user_transactions
+    get_user_transactions,
+    get_game_leaderboard,
+    get_leaderboard_rank,
+    get_leaderboard_neighbors,
+    LEADERBOARD_WINDOWS
 )
+from app.games.ingest import claim_sessions, ingest_batch, parse_batch, used_session_indexes
+from app.games.session import SessionError
+from app.games.distributions import describe, distribution_store
+from app.games.registry import LEVELS, get_game
+from app.utils.negotiation import add_vary_accept, jsonify
 
 api_bp = Blueprint("api", __name__, url_prefix="/api/v1")
+# JSON або MessagePack за заголовком Accept
+api_bp.after_request(add_vary_accept)
+
+MAX_BATCH_SIZE = 500
+MAX_LEADERBOARD_LIMIT = 100
+MAX_LEADERBOARD_NEIGHBORS = 25
 
 # Декоратор для API автентифікації
 def api_login_required(f):
@@ -90,24 +104,8 @@ def get_user(user_id):
 @api_login_required
 def get_shop_items():
     """Отримати список усіх доступних товарів у магазині"""
-    items = get_all_shop_items()
-    user_purchases = get_user_purchases(current_user.id)
-    purchased_ids = [p["id"] for p in user_purchases]
-
-    result = []
-    for item in items:
-        result.append({
-            "id": item["id"],
-            "item_type": item["item_type"],
-            "name": item["name"],
-            "description": item["description"],
-            "price": item["price"],
-            "is_purchased": item["id"] in purchased_ids,
-            "created_at": item["created_at"]
-        })
-
     return jsonify({
-        "items": result,
+        "items": get_shop_items_for_user(current_user.id),
         "user_coins": get_user_coins(current_user.id)
     }), 200
 
@@ -151,18 +149,7 @@ def api_purchase_item(item_id):
 @api_login_required
 def get_purchases():
     """Отримати історію куплених товарів користувача"""
-    purchases = get_user_purchases(current_user.id)
-
-    result = []
-    for p in purchases:
-        result.append({
-            "id": p["id"],
-            "name": p["name"],
-            "item_type": p["item_type"],
-            "price": p["price"]
-        })
-
-    return jsonify({"purchases": result}), 200
+    return jsonify({"purchases": get_user_purchases(current_user.id)}), 200
 
 # -----------------------
 # ЕНДПОІНТИ ВІДГУКІВ
@@ -173,20 +160,7 @@ def api_get_feedbacks():
     """Отримати список усіх відгуків з можливістю лімітування"""
     limit = request.args.get("limit", 50, type=int)
     feedbacks = get_feedbacks(limit)
-
-    result = []
-    for fb in feedbacks:
-        result.append({
-            "id": fb["id"],
-            "user_id": fb["user_id"],
-            "name": fb["name"],
-            "email": fb["email"],
-            "message": fb["message"],
-            "created_at": fb["created_at"],
-            "updated_at": fb["updated_at"]
-        })
-
-    return jsonify({"feedback": result, "count": len(result)}), 200
+    return jsonify({"feedback": feedbacks, "count": len(feedbacks)}), 200
 
 @api_bp.route("/feedback/<int:feedback_id>", methods=["GET"])
 @api_login_required
@@ -196,15 +170,7 @@ def api_get_feedback(feedback_id):
     if not fb:
         return jsonify({"error": "Feedback not found"}), 404
 
-    return jsonify({
-        "id": fb["id"],
-        "user_id": fb["user_id"],
-        "name": fb["name"],
-        "email": fb["email"],
-        "message": fb["message"],
-        "created_at": fb["created_at"],
-        "updated_at": fb["updated_at"]
-    }), 200
+    return jsonify(fb), 200
 
 @api_bp.route("/feedback", methods=["POST"])
 @api_login_required
@@ -278,6 +244,44 @@ def api_delete_feedback(feedback_id):
         "message": "Feedback successfully deleted"
     }), 200
 
+# -----------------------
+# ЕНДПОІНТИ РЕЗУЛЬТАТІВ ІГОР
+# -----------------------
+@api_bp.route("/results/batch", methods=["POST"])
+@api_login_required
+def api_save_results_batch():
+    """Зберегти пакет результатів ігор (офлайн-черга клієнта) однією транзакцією"""
+    data = request.get_json(silent=True)
+    items = data.get("results") if isinstance(data, dict) else data
+
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Results array is required"}), 400
+    if len(items) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"Batch too large (max {MAX_BATCH_SIZE})"}), 400
+
+    results, sessions, errors = parse_batch(items, current_user.id)
+
+    # Пакет атомарний: жоден результат не зберігається, якщо є помилки
+    if not errors:
+        try:
+            replayed = claim_sessions(sessions)
+        except SessionError as e:
+            return jsonify({"error": str(e)}), 503
+        coins = None if replayed else ingest_batch(current_user.id, results, sessions)
+        if coins is None:
+            # Токен міг бути використаний іншим воркером
+            replayed = replayed or used_session_indexes(sessions)
+            errors = [{"index": i, "error": "Session token already used"} for i in replayed]
+    if errors:
+        return jsonify({"error": "Invalid results", "details": errors}), 400
+
+    return jsonify({
+        "success": True,
+        "saved": len(coins),
+        "coins_earned": coins,
+        "total_coins_earned": sum(coins)
+    }), 201
+
 # -----------------------
 # ЕНДПОІНТИ СТАТИСТИКИ
 # -----------------------
@@ -307,24 +311,94 @@ def get_game_stats(game_name):
 
     return jsonify({"game": game_name, "stats": result}), 200
 
+@api_bp.route("/stats/game/<game_name>/distribution", methods=["GET"])
+@api_login_required
+def get_game_distribution(game_name):
+    """Перцентилі та гістограма рахунків гри на рівні; з ?score= — яку частку гравців він перевершує"""
+    if get_game(game_name) is None:
+        return jsonify({"error": "Game not found"}), 404
+    level = request.args.get("level")
+    if level not in LEVELS:
+        return jsonify({"error": f"Level must be one of: {', '.join(LEVELS)}"}), 400
+    score = request.args.get("score", type=int)
+
+    sketch = distribution_store.get(game_name, level)
+    if sketch is None or sketch.count == 0:
+        return jsonify({"error": "No results for this game and level"}), 404
+    return jsonify({"game": game_name, "level": level, **describe(sketch, score)}), 200
+
+# -----------------------
+# ЕНДПОІНТИ РЕЙТИНГІВ
+# -----------------------
+def _leaderboard_error(game_name, window):
+    """Перевірити гру та вікно рейтингу, повертає відповідь з помилкою або None"""
+    if get_game(game_name) is None:
+        return jsonify({"error": "Game not found"}), 404
+    if window not in LEADERBOARD_WINDOWS:
+        return jsonify({"error": f"Window must be one of: {', '.join(LEADERBOARD_WINDOWS)}"}), 400
+    return None
+
+@api_bp.route("/leaderboard/<game_name>", methods=["GET"])
+def api_game_leaderboard(game_name):
+    """Топ гравців гри за вікном day, week або all"""
+    window = request.args.get("window", "all")
+    error = _leaderboard_error(game_name, window)
+    if error:
+        return error
+    limit = request.args.get("limit", 10, type=int)
+    if not 1 <= limit <= MAX_LEADERBOARD_LIMIT:
+        return jsonify({"error": f"Limit must be between 1 and {MAX_LEADERBOARD_LIMIT}"}), 400
+
+    rows = get_game_leaderboard(game_name, limit, window)
+    entries = [
+        {"rank": rank, "username": r["username"], "avatar": r["current_avatar"], "score": r["max_score"]}
+        for rank, r in enumerate(rows, start=1)
+    ]
+    return jsonify({"game": game_name, "window": window, "entries": entries}), 200
+
+@api_bp.route("/leaderboard/<game_name>/rank/me", methods=["GET"])
+@api_login_required
+def api_my_rank(game_name):
+    """Місце поточного користувача в рейтингу гри"""
+    window = request.args.get("window", "all")
+    error = _leaderboard_error(game_name, window)
+    if error:
+        return error
+
+    rank = get_leaderboard_rank(current_user.id, game_name, window)
+    if rank is None:
+        return jsonify({"error": "No result in this leaderboard"}), 404
+    return jsonify({"game": game_name, "window": window, **rank}), 200
+
+@api_bp.route("/leaderboard/<game_name>/rank/around-me", methods=["GET"])
+@api_login_required
+def api_rank_around_me(game_name):
+    """Поточний користувач і його сусіди в рейтингу гри"""
+    window = request.args.get("window", "all")
+    error = _leaderboard_error(game_name, window)
+    if error:
+        return error
+    count = request.args.get("count", 5, type=int)
+    if not 0 <= count <= MAX_LEADERBOARD_NEIGHBORS:
+        return jsonify({"error": f"Count must be between 0 and {MAX_LEADERBOARD_NEIGHBORS}"}), 400
+
+    rows = get_leaderboard_neighbors(current_user.id, game_name, window, count)
+    if rows is None:
+        return jsonify({"error": "No result in this leaderboard"}), 404
+    entries = [
+        {"rank": r["rank"], "username": r["username"], "avatar": r["current_avatar"],
+         "score": r["score"], "is_me": r["is_me"]}
+        for r in rows
+    ]
+    return jsonify({"game": game_name, "window": window, "entries": entries}), 200
+
 @api_bp.route("/transactions", methods=["GET"])
 @api_login_required
 def get_transactions():
     """Отримати історію нарахувань та списань монет користувача"""
     limit = request.args.get("limit", 50, type=int)
     transactions = get_user_transactions(current_user.id, limit)
-
-    result = []
-    for t in transactions:
-        result.append({
-            "id": t["id"],
-            "amount": t["amount"],
-            "transaction_type": t["transaction_type"],
-            "description": t["description"],
-            "created_at": t["created_at"]
-        })
-
-    return jsonify({"transactions": result, "count": len(result)}), 200
+    return jsonify({"transactions": transactions, "count": len(transactions)}), 200
 
 @api_bp.route("/user/theme", methods=["POST"])
 @api_login_required
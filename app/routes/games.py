@@ -1,5 +1,6 @@
 from flask import Blueprint, render_template, redirect, url_for
 from flask_login import login_required
+from app.games.registry import GAMES
 
 games_bp = Blueprint("games", __name__, url_prefix="/games")
 
@@ -9,21 +10,10 @@ def games_list():
     # Список всіх доступних ігор з їх назвами та URL
     games = [
         {
-            "name": "Arithmetic",
-            "url": url_for("arithmetic.arithmetic_game")
-        },
-        {
-            "name": "Sequence Recall",
-            "url": url_for("sequence_recall.sequence_recall_game")
-        },
-        {
-            "name": "Color Rush",
-            "url": url_for("color_rush.color_rush_game")
-        },
-        {
-            "name": "Tapping Memory",
-            "url": url_for("tapping_memory.tapping_memory_game")
+            "name": game.title,
+            "url": url_for(game.endpoint)
         }
+        for game in GAMES.values()
     ]
     
-    return render_template("games.html", games=games)
\ No newline at end of file
+    return render_template("games.html", games=games)
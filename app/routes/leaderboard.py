@@ -1,19 +1,38 @@
-from flask import Blueprint, render_template
-from app.db.models import get_global_leaderboard, get_game_leaderboard
+from functools import partial
+
+from flask import Blueprint, Response, abort, current_app, render_template, request
+from app.db.models import LEADERBOARD_WINDOWS, get_global_leaderboard, get_game_leaderboard
+from app.games.live import leaderboard_hub
 
 leaderboard_bp = Blueprint("leaderboard", __name__, url_prefix="/leaderboard")
 
 @leaderboard_bp.route("/")
 def leaderboard_list():
-    global_top = get_global_leaderboard()
-    arithmetic_top = get_game_leaderboard("arithmetic")
-    color_top = get_game_leaderboard("color_rush")
-    sequence_top = get_game_leaderboard("sequence_recall")
-    tapping_top = get_game_leaderboard("tapping_memory")
-    
+    window = request.args.get("window", "all")
+    if window not in LEADERBOARD_WINDOWS:
+        window = "all"
+
+    # Запити виконуються з шаблону лише тоді, коли фрагмент не закешований
     return render_template("leaderboard.html", 
-                           global_top=global_top,
-                           arithmetic_top=arithmetic_top,
-                           color_top=color_top,
-                           sequence_top=sequence_top,
-                           tapping_top=tapping_top)
\ No newline at end of file
+                           window=window,
+                           windows=LEADERBOARD_WINDOWS,
+                           global_top=get_global_leaderboard,
+                           game_top=partial(get_game_leaderboard, window=window))
+
+@leaderboard_bp.route("/stream")
+def leaderboard_stream():
+    """Server-sent events зі змінами топу ігор"""
+    # Без асинхронного сервісу stream кожне з'єднання тримало б синхронний воркер
+    if not current_app.config.get("ENABLE_LIVE_LEADERBOARD"):
+        abort(404)
+    window = request.args.get("window", "all")
+    if window not in LEADERBOARD_WINDOWS:
+        abort(400)
+    subscriber = leaderboard_hub.subscribe(window)
+    if subscriber is None:
+        abort(503)
+    return Response(subscriber.stream(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        # nginx не буферизує потік
+        "X-Accel-Buffering": "no"
+    })
@@ -0,0 +1,22 @@
+import hmac
+
+from flask import Blueprint, Response, abort, current_app, request
+from flask_login import current_user
+from app.utils.decorators import is_admin_user
+from app.utils.metrics import render_prometheus
+
+metrics_bp = Blueprint("metrics", __name__)
+
+def _scrape_allowed():
+    """Prometheus з Authorization: Bearer METRICS_TOKEN або адмін у браузері"""
+    token = current_app.config.get("METRICS_TOKEN")
+    if token and hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return True
+    return is_admin_user()
+
+@metrics_bp.route("/metrics")
+def prometheus_metrics():
+    """Метрики застосунку у форматі Prometheus"""
+    if not _scrape_allowed():
+        abort(403 if current_user.is_authenticated else 401)
+    return Response(render_prometheus(), mimetype="text/plain; version=0.0.4")
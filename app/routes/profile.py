@@ -1,3 +1,5 @@
+from functools import partial
+
 from flask import Blueprint, abort, flash, redirect, render_template, request, url_for
 from flask_login import login_required, current_user, logout_user
 from werkzeug.security import generate_password_hash
@@ -15,6 +17,14 @@ from app.db.models import (
 
 profile_bp = Blueprint("profile", __name__, url_prefix="/profile")
 
+def _available_avatars(user_id):
+    """Доступні аватари: стандартний і куплені"""
+    available_avatars = ['default']
+    for p in get_user_purchases(user_id):
+        if p['item_type'] == 'avatar':
+            available_avatars.append(p['id'])
+    return available_avatars
+
 @profile_bp.route("/")
 @login_required
 def my_profile():
@@ -34,25 +44,16 @@ def user_profile(user_id):
     if selected_game:
         stats_by_game = get_stats_for_game(user_id, selected_game)
 
-    total_games = get_total_games(user_id)
-    total_points = get_total_points(user_id)
-    
-    # Отримуємо доступні аватари (куплені + стандартний)
-    available_avatars = ['default']
-    purchases = get_user_purchases(user_id)
-    for p in purchases:
-        if p['item_type'] == 'avatar':
-            available_avatars.append(p['id'])
-
+    # Підсумки й аватари рахуються з шаблону лише тоді, коли фрагмент не закешований
     return render_template(
         "profile.html",
         user=user_row,
-        total_games=total_games,
-        total_points=total_points,
+        total_games=partial(get_total_games, user_id),
+        total_points=partial(get_total_points, user_id),
         games_list=games_list,
         selected_game=selected_game,
         stats_by_game=stats_by_game,
-        available_avatars=available_avatars,
+        available_avatars=partial(_available_avatars, user_id),
         is_own_profile=(current_user.id == user_id)
     )
 
@@ -8,6 +8,7 @@ from app.db.models import (
     get_user_purchases,
     get_user_coins
 )
+from app.games.registry import get_game
 
 # Створення blueprint магазину з URL префіксом
 shop_bp = Blueprint("shop", __name__, url_prefix="/shop")
@@ -50,26 +51,18 @@ def purchase(item_id):
 @shop_bp.route("/api/check_access/<game_name>", methods=["GET"])
 @login_required
 def check_game_access(game_name):
-    # Список ігор, які доступні безкоштовно
-    free_games = ["arithmetic", "sequence_recall"]
+    game = get_game(game_name.lower())
     
-    # Перевірка чи запитана гра знаходиться у списку безкоштовних ігор
-    if game_name.lower() in free_games:
+    # Безкоштовні ігри доступні всім
+    if game is not None and game.is_free:
         return jsonify({
             "has_access": True, 
             "is_free": True,
             "message": "This game is free to play!"
         })
     
-    # Для платних ігор перевірка чи користувач придбав її
-    shop_items = get_all_shop_items()
-    game_item = None
-    
     # Пошук товару гри в магазині
-    for item in shop_items:
-        if item["item_type"] == "game" and item["name"].lower().replace(" ", "_") == game_name.lower():
-            game_item = item
-            break
+    game_item = game.find_shop_item() if game is not None else None
     
     # Гра не знайдена в магазині
     if not game_item:
@@ -1,7 +1,6 @@
 from flask import Blueprint, jsonify
 from flask_swagger_ui import get_swaggerui_blueprint
 import os
-import yaml
 
 swagger_bp = Blueprint('swagger', __name__, url_prefix='/api')
 
@@ -19,18 +18,29 @@ swaggerui_blueprint = get_swaggerui_blueprint(
     }
 )
 
+SWAGGER_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'swagger.yaml')
+
+# (mtime, специфікація): розбір YAML займає десятки мс, тож робиться лише після зміни файлу
+_spec_cache = (None, None)
+
+
+def _load_spec():
+    global _spec_cache
+    mtime = os.path.getmtime(SWAGGER_FILE)
+    if _spec_cache[0] != mtime:
+        # yaml потрібен лише тут, тож не імпортується при старті воркера
+        import yaml
+
+        with open(SWAGGER_FILE, 'r', encoding='utf-8') as f:
+            _spec_cache = (mtime, yaml.safe_load(f))
+    return _spec_cache[1]
+
+
 @swagger_bp.route('/swagger.yaml')
 def swagger_spec():
     """Повертає OpenAPI специфікацію у форматі YAML"""
-    swagger_file = os.path.join(
-        os.path.dirname(os.path.dirname(__file__)),
-        'swagger.yaml'
-    )
-
     try:
-        with open(swagger_file, 'r', encoding='utf-8') as f:
-            spec = yaml.safe_load(f)
-        return jsonify(spec)
+        return jsonify(_load_spec())
     except FileNotFoundError:
         return jsonify({"error": "Swagger specification not found"}), 404
 
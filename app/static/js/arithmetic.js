@@ -9,6 +9,9 @@ let currentCount = 0;
 let isGameActive = false;
 let questionStartTime = 0;
 let questionTimer = null;
+let sessionToken = null;
+let problems = [];
+let answers = [];
 
 const startBtn = document.getElementById("start-btn");
 const submitBtn = document.getElementById("submit-btn");
@@ -44,6 +47,28 @@ function startGame() {
     const countSelect = document.getElementById("count-select")
     totalProblems = parseInt(countSelect.value) || 5;
 
+    answers = [];
+
+    // Сервер видає токен сесії та приклади з пулу; без них гру не почати
+    sessionToken = null;
+    startBtn.disabled = true;
+    fetch("/game/arithmetic/start", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ level: level, count: totalProblems })
+    })
+    .then(response => response.json())
+    .then(data => {
+        startBtn.disabled = false;
+        if (!data.token) return;
+        sessionToken = data.token;
+        problems = data.rounds;
+        beginGame();
+    })
+    .catch(() => { startBtn.disabled = false; });
+}
+
+function beginGame() {
     isGameActive = true;
 
     // Оновлення UI
@@ -78,7 +103,7 @@ function nextProblem() {
     }
     if (questionTimer) clearTimeout(questionTimer);
 
-    currentProblem = generateProblem();
+    currentProblem = getProblem(currentCount);
     currentCount++;
     document.getElementById("problem").textContent = currentProblem.expression;
     document.getElementById("current-count").textContent = currentCount;
@@ -101,6 +126,7 @@ function checkAnswer() {
     if (isNaN(userAnswer)) return;
 
     if (questionTimer) clearTimeout(questionTimer);
+    answers.push(userAnswer);
 
     const feedback = document.getElementById("feedback");
     const correctAnswer = Math.round(currentProblem.answer * 10) / 10;
@@ -129,6 +155,7 @@ function checkAnswer() {
     }, 700);
 }
 function handleTimeout() {
+    answers.push(null);
     const feedback = document.getElementById("feedback");
     const penalty = Math.round(getBasePoints(level) / 2);
     score -= penalty;
@@ -161,9 +188,12 @@ function finishGame(silent = false) {
             },
             body: JSON.stringify({
                 level: level,
-                score: score,
+                // Штрафи можуть увести рахунок у мінус, сервер приймає бали від 0
+                score: Math.max(0, score),
                 time: seconds,
-                rounds: totalProblems
+                rounds: totalProblems,
+                answers: answers,
+                token: sessionToken
             })
         })
         .then(response => response.json())
@@ -180,57 +210,13 @@ function restartGame() {
     document.getElementById("result-area").style.display = "none";
 }
 
-function generateProblem() {
-    let a, b, op, expression, answer;
-    const opsEasy = ['+', '-'];
-    const opsMedium = ['+', '-', '*'];
-    const opsHard = ['+', '-', '*', '/'];
-
-    if (level === 'easy') {
-        a = randInt(1, 50);
-        b = randInt(1, 50);
-        op = randomChoice(opsEasy);
-        expression = `${a} ${op} ${b}`;
-        answer = Math.round(eval(expression) * 10) / 10; // 0.1
-    } else if (level === 'medium') {
-        a = randInt(5, 50);
-        b = randInt(5, 50);
-        let c = randInt(5, 20);
-        let op1 = randomChoice(opsMedium);
-        if (op1 === '*') b = randInt(1, 10);
-        let op2 = randomChoice(opsMedium);
-        if (op2 === '*') c = randInt(3, 12);
-        expression = `${a} ${op1} ${b} ${op2} ${c}`;
-        answer = Math.round(eval(expression) * 10) / 10;
-    } else {
-        a = randInt(10, 100);
-        b = randInt(10, 100);
-        let c = randInt(5, 25);
-        let d = randInt(1, 10);
-        let op1 = randomChoice(opsHard);
-        if (op1 === '*') b = randInt(2, 4);
-        else if (op1 === '/') b = randInt(2, 3);
-        let op2 = randomChoice(opsHard);
-        if (op2 === '*') c = randInt(2, 6);
-        else if (op2 === '/') c = randInt(2, 5);
-        let op3 = randomChoice(opsHard);
-        if (op3 === '*') d = randInt(2, 10);
-        else if (op3 === '/') d = randInt(2, 5);
-        expression = `(${a} ${op1} ${b}) ${op2} (${c} ${op3} ${d})`;
-        answer = Math.round(eval(expression) * 10) / 10;
-    }
-
+function getProblem(index) {
+    // Приклади приходять із сервера; відповідь рахуємо для миттєвого зворотного зв'язку
+    const expression = problems[index];
+    const answer = Math.round(eval(expression) * 10) / 10;
     return { expression, answer };
 }
 
-function randInt(min, max) {
-    return Math.floor(Math.random() * (max - min + 1)) + min;
-}
-
-function randomChoice(arr) {
-    return arr[Math.floor(Math.random() * arr.length)];
-}
-
 function getTimeLimitForLevel() {
     if (level === 'easy') return 10;
     if (level === 'medium') return 20;
@@ -1,5 +1,8 @@
 ﻿// BrainRush: Color Rush
 let score = 0;
+let sessionToken = null;
+// Транскрипт раундів: час реакції (мс) та успішність для перевірки на сервері
+let transcript = { rt: [], ok: [] };
 let round = 0;
 let seconds = 0;
 let timerInterval;
@@ -57,8 +60,20 @@ function startGame() {
     score = 0;
     round = 0;
     seconds = 0;
+    transcript = { rt: [], ok: [] };
     isGameActive = true;
 
+    // Токен сесії від сервера: без нього результат не буде збережено
+    sessionToken = null;
+    fetch("/game/color_rush/start", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ level: level })
+    })
+    .then(response => response.json())
+    .then(data => { sessionToken = data.token || null; })
+    .catch(() => { });
+
     document.getElementById("setup-area").style.display = "none";
     document.getElementById("game-area").style.display = "block";
     document.getElementById("result-area").style.display = "none";
@@ -125,9 +140,12 @@ function handleAnswer(event) {
 
     const userAnswer = event.target.dataset.color;
     const isCorrect = (userAnswer.toLowerCase() === correctColor.toLowerCase());
+    const elapsedMs = performance.now() - roundStartTime;
+    transcript.rt.push(elapsedMs);
+    transcript.ok.push(isCorrect ? 1 : 0);
 
     if (isCorrect) {
-        const timeTaken = (performance.now() - roundStartTime) / 1000;
+        const timeTaken = elapsedMs / 1000;
         
         const roundScore = calculateScoreForTime(level, timeTaken);
         score += roundScore;
@@ -155,6 +173,8 @@ function handleTimeout() {
     if (!isGameActive || !isRoundActive) return;
 
     isRoundActive = false;
+    transcript.rt.push(LEVEL_CONFIGS[level].timeLimit * 1000);
+    transcript.ok.push(0);
 
     const penalty = LEVEL_CONFIGS[level].penalty;
     score = Math.max(0, score - penalty);
@@ -250,7 +270,9 @@ function saveResultToServer(finalScore, finalTime, totalRounds, gameLevel) {
             level: gameLevel,
             score: finalScore,
             time: finalTime,
-            rounds: totalRounds
+            rounds: totalRounds,
+            transcript: transcript,
+            token: sessionToken
         })
     })
     .then(response => {
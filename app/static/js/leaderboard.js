@@ -0,0 +1,45 @@
+// BrainRush: живе оновлення рейтингів через /leaderboard/stream
+(function () {
+    const grid = document.querySelector('[data-stream]');
+    if (!grid || !window.EventSource) return;
+
+    function renderRow(entry) {
+        const li = document.createElement('li');
+        li.textContent = entry.username + ' ';
+        const span = document.createElement('span');
+        span.textContent = entry.score;
+        li.appendChild(span);
+        return li;
+    }
+
+    function renderBoard(list, entries) {
+        list.replaceChildren(...entries.map(renderRow));
+        if (!entries.length) {
+            const li = document.createElement('li');
+            li.textContent = 'No data';
+            list.appendChild(li);
+        }
+    }
+
+    const source = new EventSource(grid.dataset.stream);
+
+    source.addEventListener('snapshot', (e) => {
+        const data = JSON.parse(e.data);
+        for (const [game, entries] of Object.entries(data.boards)) {
+            const list = grid.querySelector(`ul[data-game="${game}"]`);
+            if (list) renderBoard(list, entries);
+        }
+    });
+
+    // Сервер надсилає лише змінені місця та новий розмір топу
+    source.addEventListener('leaderboard', (e) => {
+        const data = JSON.parse(e.data);
+        const list = grid.querySelector(`ul[data-game="${data.game}"]`);
+        if (!list) return;
+        const rows = Array.from(list.querySelectorAll('li')).filter((li) => li.querySelector('span'));
+        for (const change of data.changes) {
+            rows[change.rank - 1] = renderRow(change);
+        }
+        list.replaceChildren(...rows.slice(0, data.size));
+    });
+})();
@@ -2,6 +2,9 @@
 let level = 'easy';
 let score = 0; 
 let seconds = 0;
+let sessionToken = null;
+let sequences = [];
+let answers = [];
 let isGameActive = false;
 let timerInterval;
 
@@ -112,10 +115,32 @@ function startGame() {
     seconds = 0;
     currentLength = 2;
     stage = 'setup';
-    isGameActive = true;
+    answers = [];
     
     displaySpeed = getLevelConfig(level).speed;
 
+    // Сервер видає токен сесії та послідовності з пулу; без них гру не почати
+    sessionToken = null;
+    startBtn.disabled = true;
+    fetch("/game/sequence_recall/start", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ level: level })
+    })
+    .then(response => response.json())
+    .then(data => {
+        startBtn.disabled = false;
+        if (!data.token) return;
+        sessionToken = data.token;
+        sequences = data.rounds;
+        beginGame();
+    })
+    .catch(() => { startBtn.disabled = false; });
+}
+
+function beginGame() {
+    isGameActive = true;
+
     document.getElementById("level-text").textContent = level;
     document.getElementById("points").textContent = score;
     document.getElementById("current-count").textContent = currentLength;
@@ -196,6 +221,7 @@ function handleRecallTimeout() {
     if (stage !== 'recalling') return; 
 
     if (recallTimer) clearTimeout(recallTimer); 
+    answers.push(userSequence.join(''));
     
     numberDisplay.textContent = 'Time Up!';
     instructionText.textContent = `Time expired!`;
@@ -217,6 +243,7 @@ function submitAttempt() {
     if (stage !== 'recalling') return;
     
     if (recallTimer) clearTimeout(recallTimer);
+    answers.push(userSequence.join(''));
     
     const isCorrect = userSequence.join('') === currentSequence.join('');
     
@@ -240,7 +267,15 @@ function endRound(isSuccess) {
         
         currentLength++;
         document.getElementById("points").textContent = score;
-        
+
+        // Усі послідовності сесії пройдено: гра закінчена
+        if (currentLength - 2 >= sequences.length) {
+            setTimeout(() => {
+                finishGame();
+            }, 1500);
+            return;
+        }
+
         setTimeout(() => {
             feedback.textContent = "";
             startRound();
@@ -260,11 +295,8 @@ function endRound(isSuccess) {
 
 
 function generateSequence(length) {
-    const sequence = [];
-    for (let i = 0; i < length; i++) {
-        sequence.push(Math.floor(Math.random() * 10).toString());
-    }
-    return sequence;
+    // Послідовність довжини length — раунд length - 2 з пулу сервера
+    return sequences[length - 2].split('');
 }
 
 function updateUserInputDisplay() {
@@ -308,7 +340,10 @@ function finishGame(silent = false) {
                 level: level,
                 score: score,
                 time: seconds,
-                rounds: currentLength - 1
+                // Спроби: пройдені раунди плюс остання (хибна чи перервана), якщо пул не вичерпано
+                rounds: Math.min(currentLength - 1, sequences.length),
+                answers: answers,
+                token: sessionToken
             })
         })
         .then(response => response.json())
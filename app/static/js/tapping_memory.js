@@ -1,6 +1,9 @@
 ﻿// BrainRush: Tapping Memory
 let level = 'easy';
 let score = 0;
+let sessionToken = null;
+// Транскрипт раундів: час відтворення (мс) та успішність для перевірки на сервері
+let transcript = { rt: [], ok: [] };
 let isGameActive = false;
 let totalTimeTaken = 0;
 let roundStartTime;
@@ -141,6 +144,8 @@ function handleTimeout() {
 
     isRecalling = false;
     if (actionArea) actionArea.style.display = 'none';
+    transcript.rt.push(performance.now() - roundStartTime);
+    transcript.ok.push(0);
 
     if (feedbackEl) {
         feedbackEl.textContent = `⏰ Time expired! Sequence length was ${currentLength}.`;
@@ -157,8 +162,20 @@ function startGame() {
     score = 0;
     currentLength = 2;
     totalTimeTaken = 0;
+    transcript = { rt: [], ok: [] };
     isGameActive = true;
 
+    // Токен сесії від сервера: без нього результат не буде збережено
+    sessionToken = null;
+    fetch("/game/tapping_memory/start", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ level: level })
+    })
+    .then(response => response.json())
+    .then(data => { sessionToken = data.token || null; })
+    .catch(() => { });
+
     if (scoreEl) scoreEl.textContent = score;
     if (currentLengthEl) currentLengthEl.textContent = currentLength;
     if (feedbackEl) { feedbackEl.textContent = ""; feedbackEl.className = "feedback"; }
@@ -261,7 +278,8 @@ function submitAttempt() {
     isRecalling = false;
     if (actionArea) actionArea.style.display = 'none';
 
-    const timeTaken = (performance.now() - roundStartTime) / 1000;
+    const elapsedMs = performance.now() - roundStartTime;
+    const timeTaken = elapsedMs / 1000;
 
     let isCorrect = true;
     for (let i = 0; i < currentLength; i++) {
@@ -274,6 +292,9 @@ function submitAttempt() {
         }
     }
 
+    transcript.rt.push(elapsedMs);
+    transcript.ok.push(isCorrect ? 1 : 0);
+
     if (isCorrect) {
         const config = LEVEL_CONFIGS[level];
         const points = config.basePoints + (currentLength * 10);
@@ -329,7 +350,7 @@ function finishGame(silent = false) {
         fetch("/game/tapping_memory/save_result", {
             method: "POST",
             headers: { "Content-Type": "application/json" },
-            body: JSON.stringify({ level: level, score: score, time: totalTimeTaken, rounds: finalLength, avg_time: avgTime.toFixed(2) })
+            body: JSON.stringify({ level: level, score: score, time: totalTimeTaken, rounds: finalLength, avg_time: avgTime.toFixed(2), transcript: transcript, token: sessionToken })
         }).catch(() => { });
     } else {
         const setup = document.getElementById("setup-area");
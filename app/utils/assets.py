@@ -0,0 +1,263 @@
+"""
+Збірка статичних файлів з хешем вмісту в назві
+CSS і JS з app/static мінімізуються, записуються в static/dist під назвою
+з хешем вмісту разом з .gz (і .br, якщо встановлено brotli) для gzip_static
+у nginx, а manifest.json зіставляє логічну назву з файлом збірки.
+У шаблонах asset_url('css/style.css') повертає URL файлу збірки, а без
+збірки (розробка) — URL вихідного файлу.
+
+Використання:
+    python -m app.utils.assets build
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+
+from flask import current_app, url_for
+
+try:
+    import brotli
+except ImportError:  # .br не генеруються, nginx віддає .gz
+    brotli = None
+
+STATIC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "static"))
+BUILD_DIR = "dist"
+MANIFEST_NAME = "manifest.json"
+SOURCE_DIRS = ("css", "js")
+# Логічна назва → кілька вихідних файлів, що склеюються в один.
+# Кожна сторінка зараз підключає один свій CSS і один JS, тож решта файлів
+# збирається поодинці під власною назвою
+BUNDLES = {}
+HASH_LENGTH = 12
+# Файли збірки незмінні: назва змінюється разом із вмістом
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+_TOKEN = re.compile(
+    r'(?P<string>"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|`(?:\\.|[^`\\])*`)'
+    r'|(?P<block>/\*.*?\*/)'
+    r'|(?P<line>//[^\n]*)'
+    r'|(?P<space>\s+)'
+    r'|(?P<slash>/)'
+    r'|(?P<other>[^"\'`/\s]+)',
+    re.S,
+)
+# Пробіл поруч із цими символами можна прибрати без зміни змісту
+_JS_TIGHT = set("{}()[];,:=<>!&|?*%^~")
+_CSS_TIGHT = set("{};,>")
+# Після перенесення рядка з цими символами ASI не спрацює, тож його можна прибрати
+_JS_BREAK_AFTER = set("{;,([")
+_JS_BREAK_BEFORE = set("}),]")
+# Після цих символів і слів "/" починає regex-літерал, а не ділення
+_REGEX_AFTER = set("(,=:[!&|?{};+-*%<>~^")
+_REGEX_KEYWORDS = {"return", "typeof", "case", "do", "else", "in", "of", "void", "throw", "new", "delete"}
+_REGEX = re.compile(r"/(?:\\.|\[(?:\\.|[^\]\\\n])*\]|[^/\\\n\[])+/[a-z]*")
+
+
+def _tokens(source, js):
+    """(вид, текст) без коментарів; коментар стає пробілом або переносом"""
+    pos = 0
+    last = ""
+    while pos < len(source):
+        if js and source.startswith("/", pos) and source[pos:pos + 2] not in ("//", "/*") and (
+            not last or last[-1] in _REGEX_AFTER or last in _REGEX_KEYWORDS
+        ):
+            match = _REGEX.match(source, pos)
+            if match:
+                yield "regex", match.group(0)
+                last = "/"
+                pos = match.end()
+                continue
+        match = _TOKEN.match(source, pos)
+        kind, text = match.lastgroup, match.group(0)
+        pos = match.end()
+        if kind == "line" and not js:
+            # У CSS "//" не є коментарем (наприклад, url(//host/...))
+            kind, text = "other", "/"
+            pos = match.start() + 1
+        if kind in ("block", "line"):
+            kind, text = "space", "\n" if kind == "line" or "\n" in text else " "
+        yield kind, text
+        if kind != "space":
+            last = text
+
+
+def _squeeze(tokens, js):
+    """Склеїти токени, залишивши пробіли й переноси лише там, де вони щось значать"""
+    tight = _JS_TIGHT if js else _CSS_TIGHT
+    out = []
+    pending = ""
+    for kind, text in tokens:
+        if kind == "space":
+            pending = "\n" if js and ("\n" in text or pending == "\n") else " "
+            continue
+        if not js and kind == "other":
+            text = text.replace(";}", "}")
+            if text.startswith("}") and out and out[-1].endswith(";") and out[-1][-2:-1] != "\\":
+                out[-1] = out[-1][:-1]
+        if pending and out:
+            prev, first = out[-1][-1], text[0]
+            if pending == "\n" and prev not in _JS_BREAK_AFTER and first not in _JS_BREAK_BEFORE:
+                out.append("\n")
+            elif prev not in tight and first not in tight:
+                out.append(" ")
+        pending = ""
+        out.append(text)
+    return "".join(out)
+
+
+def minify_css(source):
+    """Прибрати коментарі та зайві пробіли CSS, не чіпаючи рядків"""
+    return _squeeze(_tokens(source, js=False), js=False) + "\n"
+
+
+def minify_js(source):
+    """
+    Консервативна мінімізація JS: коментарі, відступи й порожні рядки
+    Переноси рядків лишаються там, де від них може залежати ASI
+    """
+    return _squeeze(_tokens(source, js=True), js=True) + "\n"
+
+
+def discover_bundles(static_dir=STATIC_DIR):
+    """Логічні назви всіх збираних файлів: BUNDLES плюс решта CSS/JS поодинці"""
+    bundles = dict(BUNDLES)
+    bundled = {source for sources in bundles.values() for source in sources}
+    for folder in SOURCE_DIRS:
+        for root, _, files in os.walk(os.path.join(static_dir, folder)):
+            for name in files:
+                if not name.endswith((".css", ".js")):
+                    continue
+                path = os.path.relpath(os.path.join(root, name), static_dir).replace(os.sep, "/")
+                if path not in bundled:
+                    bundles.setdefault(path, (path,))
+    return dict(sorted(bundles.items()))
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def build(static_dir=STATIC_DIR, bundles=None):
+    """
+    Зібрати всі бандли в static_dir/dist і записати manifest.json
+    Файли попередньої збірки лишаються (їх ще можуть запитувати старі сторінки),
+    старіші видаляються. Повертає {логічна назва: звіт про розміри}
+    """
+    bundles = bundles or discover_bundles(static_dir)
+    build_dir = os.path.join(static_dir, BUILD_DIR)
+    manifest_path = os.path.join(build_dir, MANIFEST_NAME)
+    previous = load_manifest(manifest_path)
+
+    manifest = {}
+    report = {}
+    for name, sources in bundles.items():
+        parts = []
+        for source in sources:
+            with open(os.path.join(static_dir, source), encoding="utf-8") as f:
+                parts.append(f.read())
+        minify = minify_css if name.endswith(".css") else minify_js
+        data = "".join(minify(part) for part in parts).encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+        stem, ext = os.path.splitext(name)
+        target = f"{BUILD_DIR}/{stem}.{digest}{ext}"
+        path = os.path.join(static_dir, target)
+        _write(path, data)
+        # mtime=0: однаковий вміст дає однаковий .gz
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        _write(path + ".gz", compressed)
+        sizes = {"source": sum(len(part.encode("utf-8")) for part in parts), "minified": len(data), "gzip": len(compressed)}
+        if brotli is not None:
+            compressed = brotli.compress(data, quality=11)
+            _write(path + ".br", compressed)
+            sizes["brotli"] = len(compressed)
+        manifest[name] = target
+        report[name] = sizes
+
+    _write(manifest_path, json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8") + b"\n")
+    _remove_stale(static_dir, set(manifest.values()) | set(previous.values()))
+    return report
+
+
+def _remove_stale(static_dir, keep):
+    build_dir = os.path.join(static_dir, BUILD_DIR)
+    for root, _, files in os.walk(build_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            target = os.path.relpath(path, static_dir).replace(os.sep, "/")
+            base = re.sub(r"\.(gz|br)$", "", target)
+            if name != MANIFEST_NAME and base not in keep:
+                os.remove(path)
+
+
+def load_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+class AssetManifest:
+    """Маніфест збірки з перечитуванням при зміні файлу"""
+
+    def __init__(self, path):
+        self.path = path
+        self._mtime = None
+        self._entries = {}
+
+    def resolve(self, name):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime != self._mtime:
+            self._entries = load_manifest(self.path) if mtime is not None else {}
+            self._mtime = mtime
+        return self._entries.get(name, name)
+
+
+def asset_url(name):
+    """URL статичного файлу за логічною назвою через маніфест збірки"""
+    manifest = current_app.extensions["asset_manifest"]
+    return url_for("static", filename=manifest.resolve(name))
+
+
+def init_assets(app):
+    """Підключити asset_url до шаблонів і довгий кеш для файлів збірки"""
+    path = app.config.get("ASSET_MANIFEST") or os.path.join(app.static_folder, BUILD_DIR, MANIFEST_NAME)
+    app.extensions["asset_manifest"] = AssetManifest(path)
+    app.jinja_env.globals["asset_url"] = asset_url
+
+    default_max_age = app.get_send_file_max_age
+
+    def get_send_file_max_age(filename):
+        if filename and filename.replace(os.sep, "/").startswith(BUILD_DIR + "/"):
+            return IMMUTABLE_MAX_AGE
+        return default_max_age(filename)
+
+    app.get_send_file_max_age = get_send_file_max_age
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build fingerprinted BrainRush static assets")
+    parser.add_argument("command", choices=("build",))
+    parser.add_argument("--static", default=STATIC_DIR, help="static directory (default: app/static)")
+    args = parser.parse_args(argv)
+
+    report = build(args.static)
+    for name, sizes in report.items():
+        extra = f", br {sizes['brotli']}" if "brotli" in sizes else ""
+        print(f"{name}: {sizes['source']} -> {sizes['minified']} bytes (gz {sizes['gzip']}{extra})")
+    if brotli is None:
+        print("brotli is not installed: .br files were not generated", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+Стиснення відповідей у застосунку
+Кодування обирається за Accept-Encoding серед доступних: br (пакет brotli),
+zstd (пакет zstandard) і gzip. Відповіді, менші за COMPRESS_MIN_SIZE,
+лишаються як є. Тіла відповідей, які можна кешувати (GET, 200, без
+Set-Cookie, no-store і private, для анонімного користувача або явно
+Cache-Control: public), стискаються один раз сильнішим рівнем і
+зберігаються в LRU процесу за хешем вмісту: та сама сторінка рейтингу чи
+swagger.yaml наступного разу віддається без повторного стиснення, а новий
+вміст просто дає новий ключ. Решта стискається швидким рівнем на кожен запит.
+Кожна відповідь стисного типу має Vary: Accept-Encoding.
+"""
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import current_app, request
+from flask_login import current_user
+
+try:
+    import brotli
+except ImportError:  # без br
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # без zstd
+    zstandard = None
+
+MIN_SIZE = 1024
+CACHE_ENTRIES = 256
+COMPRESSIBLE_TYPES = frozenset((
+    "text/html", "text/css", "text/plain", "text/xml", "text/javascript",
+    "application/javascript", "application/json", "application/xml", "image/svg+xml",
+))
+
+
+def _gzip(data, level):
+    # mtime=0: однаковий вміст дає однакові байти
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+# Кодування → (функція, рівень для динамічних, рівень для кешованих).
+# Порядок — перевага сервера, коли клієнт приймає кілька з однаковою q
+CODECS = {}
+if brotli is not None:
+    CODECS["br"] = (lambda data, level: brotli.compress(data, quality=level), 4, 9)
+if zstandard is not None:
+    CODECS["zstd"] = (lambda data, level: zstandard.ZstdCompressor(level=level).compress(data), 3, 12)
+CODECS["gzip"] = (_gzip, 6, 9)
+
+
+class CompressedCache:
+    """LRU стиснутих тіл за (хеш вмісту, кодування)"""
+
+    def __init__(self, max_entries=CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def set(self, key, body):
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _compressible(response):
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    # Файли (send_file) і потоки (SSE) не буферизуються в пам'яті
+    if response.direct_passthrough or response.is_streamed:
+        return False
+    return "Content-Encoding" not in response.headers and response.mimetype in COMPRESSIBLE_TYPES
+
+
+def _cacheable(response):
+    cache_control = response.cache_control
+    return (
+        request.method in ("GET", "HEAD")
+        and response.status_code == 200
+        and not cache_control.no_store
+        and not cache_control.private
+        and "Set-Cookie" not in response.headers
+        # Сторінки залогіненого користувача персональні: кожна лише займала б місце в кеші
+        and (cache_control.public or not current_user.is_authenticated)
+    )
+
+
+def _after_request(response):
+    if not _compressible(response):
+        return response
+    # Навіть нестиснута відповідь залежить від Accept-Encoding
+    response.vary.add("Accept-Encoding")
+    data = response.get_data()
+    if len(data) < current_app.config.get("COMPRESS_MIN_SIZE", MIN_SIZE):
+        return response
+    encoding = request.accept_encodings.best_match(CODECS)
+    if encoding is None:
+        return response
+
+    compress, dynamic_level, cached_level = CODECS[encoding]
+    cache = current_app.extensions.get("compression_cache")
+    if cache is not None and _cacheable(response):
+        key = (hashlib.blake2b(data, digest_size=16).digest(), encoding)
+        body = cache.get(key)
+        if body is None:
+            body = compress(data, cached_level)
+            cache.set(key, body)
+    else:
+        body = compress(data, dynamic_level)
+    if len(body) >= len(data):
+        return response
+
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    # ETag описує конкретне представлення, тож у стиснутого він інший
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak)
+    return response
+
+
+def init_compression(app):
+    """Стискати відповіді застосунку; COMPRESS_CACHE_SIZE=0 вимикає кеш"""
+    if not app.config.get("ENABLE_COMPRESSION", True):
+        return
+    size = app.config.get("COMPRESS_CACHE_SIZE", CACHE_ENTRIES)
+    if size:
+        app.extensions["compression_cache"] = CompressedCache(size)
+    app.after_request(_after_request)
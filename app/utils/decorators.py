@@ -2,6 +2,11 @@ from functools import wraps
 from flask import abort
 from flask_login import current_user, login_required
 
+def is_admin_user():
+    """Чи поточний користувач — авторизований адмін"""
+    return current_user.is_authenticated and current_user.is_admin
+
+
 def admin_required(f):
     """
     Декоратор для маршрутів доступних тільки адмінам
@@ -11,7 +16,7 @@ def admin_required(f):
     @wraps(f)
     @login_required
     def decorated_view(*args, **kwargs):
-        if not current_user.is_admin:
+        if not is_admin_user():
             abort(403)
         return f(*args, **kwargs)
     return decorated_view
@@ -0,0 +1,192 @@
+"""
+Кеш фрагментів шаблонів
+Тег {% cache key, ttl %} ... {% endcache %} зберігає відрендерений HTML
+у LRU в пам'яті процесу. При попаданні тіло блоку не виконується зовсім,
+тому запити, що викликаються з нього (ледачі функції з view), теж пропускаються.
+
+Ключ доповнюється назвою шаблону та глядачем (id користувача і тема),
+якщо не вказано shared=true. depends — теги залежностей: назва таблиці
+("users") або таблиця з id користувача ("user_purchases:7"). Після змін
+у models.py записи з відповідними тегами стають недійсними. Інші воркери
+про зміну не дізнаються, тому TTL обмежує застарілість між процесами;
+значення з поточного запиту (current_user.coins) краще класти в сам ключ.
+
+    {% cache ("avatars", user.current_avatar), 300, depends="user_purchases:%d" % user.id %}
+"""
+import itertools
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+from flask import current_app
+from flask_login import current_user
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+from app.db.models import add_change_listener
+
+MAX_ENTRIES = 1024
+
+# Кеші всіх застосунків процесу, яким розсилаються зміни моделей
+_caches = weakref.WeakSet()
+
+
+class FragmentCache:
+    """LRU відрендерених фрагментів з TTL і версіями залежностей"""
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        # key → (html, expires_at, ((tag, version), ...))
+        self._entries = OrderedDict()
+        # Версії ведуться лише для тегів, на які посилаються записи або рендеринги,
+        # тож їх не більше, ніж тегів у max_entries записах
+        self._versions = {}
+        self._refs = {}
+        # Спільний лічильник: тег, забутий і створений знову, не повторить старої версії
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _release(self, stamp):
+        for tag, _ in stamp:
+            refs = self._refs.get(tag)
+            if refs is None:
+                continue
+            if refs > 1:
+                self._refs[tag] = refs - 1
+            else:
+                del self._refs[tag]
+                del self._versions[tag]
+
+    def _valid(self, stamp):
+        return all(self._versions.get(tag) == version for tag, version in stamp)
+
+    def get(self, key, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                html, expires_at, stamp = entry
+                if expires_at > now and self._valid(stamp):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return html
+                del self._entries[key]
+                self._release(stamp)
+            self.misses += 1
+            return None
+
+    def stamp(self, depends):
+        """
+        Поточні версії залежностей
+        Береться до рендерингу: зміна під час рендерингу робить запис недійсним.
+        Тримає теги до set() або release()
+        """
+        with self._lock:
+            for tag in depends:
+                if tag not in self._versions:
+                    self._versions[tag] = next(self._counter)
+                self._refs[tag] = self._refs.get(tag, 0) + 1
+            return tuple((tag, self._versions[tag]) for tag in depends)
+
+    def release(self, stamp):
+        """Відпустити теги stamp, якщо рендеринг не дійшов до set()"""
+        with self._lock:
+            self._release(stamp)
+
+    def set(self, key, html, ttl, stamp=(), now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if not self._valid(stamp):
+                # Залежність змінилася під час рендерингу: такий запис одразу недійсний
+                self._release(stamp)
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._release(old[2])
+            self._entries[key] = (html, now + ttl, stamp)
+            while len(self._entries) > self.max_entries:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._release(evicted)
+
+    def invalidate(self, *tags):
+        """Зробити недійсними записи, що залежать від будь-якого з тегів"""
+        with self._lock:
+            for tag in tags:
+                if tag in self._versions:
+                    self._versions[tag] = next(self._counter)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            self._refs.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+@add_change_listener
+def _on_model_change(table, user_id):
+    tags = (table,) if user_id is None else (table, f"{table}:{user_id}")
+    for cache in list(_caches):
+        cache.invalidate(*tags)
+
+
+def _viewer():
+    if current_user and current_user.is_authenticated:
+        return current_user.id, current_user.theme
+    return None, "light"
+
+
+class FragmentCacheExtension(Extension):
+    """{% cache key, ttl[, depends=tags][, shared=true] %} ... {% endcache %}"""
+
+    tags = {"cache"}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = parser.parse_expression()
+        parser.stream.expect("comma")
+        ttl = parser.parse_expression()
+        options = {"depends": nodes.Const(()), "shared": nodes.Const(False)}
+        while parser.stream.skip_if("comma"):
+            name = parser.stream.expect("name")
+            if name.value not in options:
+                parser.fail(f"Unknown cache option '{name.value}'", name.lineno)
+            parser.stream.expect("assign")
+            options[name.value] = parser.parse_expression()
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        # Однакові ключі в різних шаблонах не перетинаються
+        args = [nodes.Const(parser.name), key, ttl, options["depends"], options["shared"]]
+        return nodes.CallBlock(self.call_method("_render", args), [], [], body).set_lineno(lineno)
+
+    def _render(self, template, key, ttl, depends, shared, caller):
+        cache = current_app.extensions.get("fragment_cache")
+        if cache is None:
+            return caller()
+        if isinstance(depends, str):
+            depends = (depends,)
+        full_key = (template, key, None if shared else _viewer())
+        html = cache.get(full_key)
+        if html is None:
+            stamp = cache.stamp(depends)
+            try:
+                html = caller()
+            except BaseException:
+                cache.release(stamp)
+                raise
+            cache.set(full_key, html, ttl, stamp)
+        return html
+
+
+def init_fragment_cache(app):
+    """Підключити {% cache %} до шаблонів; FRAGMENT_CACHE_SIZE=0 вимикає кеш"""
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    size = app.config.get("FRAGMENT_CACHE_SIZE", MAX_ENTRIES)
+    if size:
+        cache = FragmentCache(size)
+        app.extensions["fragment_cache"] = cache
+        _caches.add(cache)
@@ -0,0 +1,53 @@
+"""
+JSON-провайдер Flask на orjson
+orjson кодує dict/list/str/int у C одразу в UTF-8 bytes, тож тіло відповіді
+jsonify не проходить через json.dumps і окреме кодування рядка.
+Дати, Decimal, UUID і __html__ обробляються тим самим default, що й у Flask,
+ключі сортуються (sort_keys), а в debug відповідь форматується з відступом.
+Без orjson, з аргументами, яких він не підтримує, або на значеннях поза
+його межами (цілі більші за 64 біти) працює стандартний провайдер Flask.
+Різниця одна: не-ASCII символи записуються як UTF-8, а не \\uXXXX.
+"""
+try:
+    import orjson
+except ImportError:  # працює стандартний json
+    orjson = None
+
+from flask.json.provider import DefaultJSONProvider
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """DefaultJSONProvider, що кодує й розбирає JSON через orjson, якщо він є"""
+
+    def _orjson_dumps(self, obj, option=0):
+        if orjson is None:
+            raise TypeError("orjson is not installed")
+        # datetime віддається default, щоб формат дат лишився як у Flask (HTTP date)
+        option |= orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        try:
+            return self._orjson_dumps(obj).decode()
+        except TypeError:
+            return super().dumps(obj)
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        # orjson.JSONDecodeError — підклас json.JSONDecodeError (ValueError)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        option = orjson.OPT_APPEND_NEWLINE | (orjson.OPT_INDENT_2 if indent else 0) if orjson else 0
+        try:
+            body = self._orjson_dumps(obj, option)
+        except TypeError:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,257 @@
+"""
+Метрики запитів у пам'яті процесу
+Латентність, кількість SQL-запитів і підключень та розмір відповіді
+для кожного endpoint, експорт у форматі Prometheus.
+Кожен воркер gunicorn рахує своє, тому з METRICS_DIR воркери раз на
+FLUSH_SECONDS скидають свої лічильники у файл <pid>.json у спільному
+каталозі, а /metrics підсумовує файли живих воркерів
+"""
+import glob
+import json
+import os
+import threading
+import time
+
+from flask import g, has_request_context, request
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+# Секунди між записами лічильників воркера у METRICS_DIR
+FLUSH_SECONDS = 1.0
+
+
+class Histogram:
+    """Кумулятивна гістограма з фіксованими межами (як у Prometheus)"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def merge(self, counts, count, total):
+        for i, value in enumerate(counts):
+            self.counts[i] += value
+        self.count += count
+        self.sum += total
+
+
+class EndpointStats:
+    """Накопичена статистика одного endpoint"""
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.connections = 0
+        self.response_bytes = 0
+        self.statuses = {}
+
+    def to_dict(self):
+        return {
+            "latency": [list(self.latency.counts), self.latency.count, self.latency.sum],
+            "queries": [list(self.queries.counts), self.queries.count, self.queries.sum],
+            "connections": self.connections,
+            "response_bytes": self.response_bytes,
+            "statuses": dict(self.statuses),
+        }
+
+    def merge(self, data):
+        self.latency.merge(*data["latency"])
+        self.queries.merge(*data["queries"])
+        self.connections += data["connections"]
+        self.response_bytes += data["response_bytes"]
+        for status, count in data["statuses"].items():
+            self.statuses[int(status)] = self.statuses.get(int(status), 0) + count
+
+
+_lock = threading.Lock()
+_stats = {}
+# Спільний каталог воркерів (METRICS_DIR) і час останнього запису туди
+_dir = None
+_flushed_at = 0.0
+
+
+def reset():
+    """Очистити всі накопичені метрики (використовується в тестах)"""
+    with _lock:
+        _stats.clear()
+    if _dir:
+        for path in glob.glob(os.path.join(_dir, "*.json")):
+            os.remove(path)
+
+
+def _snapshot():
+    with _lock:
+        return {f"{endpoint} {method}": stats.to_dict() for (endpoint, method), stats in _stats.items()}
+
+
+def flush():
+    """Записати лічильники цього воркера в METRICS_DIR (атомарно, через заміну файлу)"""
+    global _flushed_at
+    if not _dir:
+        return
+    _flushed_at = time.monotonic()
+    data = _snapshot()
+    path = os.path.join(_dir, f"{os.getpid()}.json")
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(data, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _collect():
+    """Статистика для експорту: свого процесу або сума файлів живих воркерів з METRICS_DIR"""
+    if _dir:
+        flush()
+        snapshots = []
+        for path in glob.glob(os.path.join(_dir, "*.json")):
+            pid = int(os.path.basename(path)[:-len(".json")])
+            if not _alive(pid):
+                # Перезапущений воркер: його лічильники зникають, Prometheus бачить це як скидання
+                os.remove(path)
+                continue
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+    else:
+        snapshots = [_snapshot()]
+    merged = {}
+    for snapshot in snapshots:
+        for key, values in snapshot.items():
+            endpoint, method = key.rsplit(" ", 1)
+            merged.setdefault((endpoint, method), EndpointStats()).merge(values)
+    return sorted(merged.items())
+
+
+def record_connection():
+    """Зареєструвати нове підключення до БД у поточному запиті"""
+    if has_request_context() and "_metrics_start" in g:
+        g._metrics_connections += 1
+
+
+def record_query(duration):
+    """Зареєструвати виконаний SQL-запит у поточному запиті"""
+    if has_request_context() and "_metrics_start" in g:
+        g._metrics_queries += 1
+        g._metrics_db_time += duration
+
+
+def record_query_time(duration):
+    """Додати час читання рядків уже врахованого запиту (fetch*, ітерація)"""
+    if has_request_context() and "_metrics_start" in g:
+        g._metrics_db_time += duration
+
+
+def _before_request():
+    g._metrics_start = time.perf_counter()
+    g._metrics_queries = 0
+    g._metrics_connections = 0
+    g._metrics_db_time = 0.0
+
+
+def _after_request(response):
+    if "_metrics_start" not in g:
+        return response
+
+    duration = time.perf_counter() - g._metrics_start
+    endpoint = request.endpoint or "unmatched"
+    key = (endpoint, request.method)
+    # Для потокових відповідей розмір невідомий заздалегідь
+    size = 0 if response.is_streamed else response.calculate_content_length() or 0
+
+    with _lock:
+        stats = _stats.get(key)
+        if stats is None:
+            stats = _stats[key] = EndpointStats()
+        stats.latency.observe(duration)
+        stats.queries.observe(g._metrics_queries)
+        stats.connections += g._metrics_connections
+        stats.response_bytes += size
+        stats.statuses[response.status_code] = stats.statuses.get(response.status_code, 0) + 1
+    if _dir and time.monotonic() - _flushed_at >= FLUSH_SECONDS:
+        flush()
+
+    response.headers.add(
+        "Server-Timing",
+        f'app;dur={duration * 1000:.2f}, '
+        f'db;dur={g._metrics_db_time * 1000:.2f};desc="{g._metrics_queries} queries", '
+        f'conn;desc="{g._metrics_connections} connections"'
+    )
+    return response
+
+
+def init_metrics(app):
+    """Підключити збір метрик до застосунку; METRICS_DIR — спільний каталог воркерів"""
+    global _dir
+    _dir = app.config.get("METRICS_DIR") or None
+    if _dir:
+        os.makedirs(_dir, exist_ok=True)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+
+
+def _labels(endpoint, method, **extra):
+    pairs = [("endpoint", endpoint), ("method", method)] + list(extra.items())
+    return ",".join(f'{k}="{v}"' for k, v in pairs)
+
+
+def _render_histogram(lines, name, histogram, labels):
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+    lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+
+def render_prometheus():
+    """Сформувати текст метрик у форматі Prometheus exposition"""
+    lines = [
+        "# HELP brainrush_request_duration_seconds Request latency per endpoint",
+        "# TYPE brainrush_request_duration_seconds histogram",
+    ]
+    items = _collect()
+    for (endpoint, method), stats in items:
+        _render_histogram(lines, "brainrush_request_duration_seconds",
+                          stats.latency, _labels(endpoint, method))
+
+    lines.append("# HELP brainrush_request_sql_statements SQL statements executed per request")
+    lines.append("# TYPE brainrush_request_sql_statements histogram")
+    for (endpoint, method), stats in items:
+        _render_histogram(lines, "brainrush_request_sql_statements",
+                          stats.queries, _labels(endpoint, method))
+
+    lines.append("# HELP brainrush_db_connections_total Database connections opened")
+    lines.append("# TYPE brainrush_db_connections_total counter")
+    for (endpoint, method), stats in items:
+        lines.append(f"brainrush_db_connections_total{{{_labels(endpoint, method)}}} {stats.connections}")
+
+    lines.append("# HELP brainrush_response_bytes_total Response body bytes returned")
+    lines.append("# TYPE brainrush_response_bytes_total counter")
+    for (endpoint, method), stats in items:
+        lines.append(f"brainrush_response_bytes_total{{{_labels(endpoint, method)}}} {stats.response_bytes}")
+
+    lines.append("# HELP brainrush_requests_total Requests by status code")
+    lines.append("# TYPE brainrush_requests_total counter")
+    for (endpoint, method), stats in items:
+        for status, count in sorted(stats.statuses.items()):
+            lines.append(f"brainrush_requests_total{{{_labels(endpoint, method, status=status)}}} {count}")
+
+    return "\n".join(lines) + "\n"
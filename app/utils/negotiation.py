@@ -0,0 +1,44 @@
+"""
+Узгодження формату відповіді API за заголовком Accept
+jsonify з цього модуля — заміна flask.jsonify для blueprint /api/v1:
+клієнт з Accept: application/msgpack отримує те саме значення в MessagePack
+(компактніше і дешевше кодується й розбирається), решта — JSON.
+Без пакета msgpack завжди відповідає JSON.
+"""
+from flask import current_app, jsonify as json_response, request
+
+try:
+    import msgpack
+except ImportError:  # лише JSON
+    msgpack = None
+
+JSON_MIMETYPE = "application/json"
+MSGPACK_MIMETYPE = "application/msgpack"
+# Назва, яку досі надсилають деякі клієнтські бібліотеки
+MSGPACK_ALIASES = (MSGPACK_MIMETYPE, "application/x-msgpack")
+
+
+def wants_msgpack():
+    """Чи віддає клієнт перевагу MessagePack перед JSON"""
+    if msgpack is None:
+        return False
+    best = request.accept_mimetypes.best_match((JSON_MIMETYPE, *MSGPACK_ALIASES))
+    return best in MSGPACK_ALIASES
+
+
+def jsonify(*args, **kwargs):
+    """flask.jsonify з відповіддю в MessagePack, якщо клієнт її просить"""
+    if not wants_msgpack():
+        return json_response(*args, **kwargs)
+    if args and kwargs:
+        raise TypeError("jsonify() behavior undefined when passed both args and kwargs")
+    obj = args[0] if len(args) == 1 else args or kwargs
+    # Дати, Decimal і UUID перетворюються так само, як у JSON-відповіді
+    body = msgpack.packb(obj, default=current_app.json.default)
+    return current_app.response_class(body, mimetype=MSGPACK_MIMETYPE)
+
+
+def add_vary_accept(response):
+    """Відповідь залежить від Accept: кеші мають зберігати варіанти окремо"""
+    response.vary.add("Accept")
+    return response
@@ -0,0 +1,157 @@
+"""
+Семплювальний профайлер запитів
+Вмикається адміністратором для окремого запиту (заголовок X-Profile: 1
+або параметр ?_profile=1) чи для частки трафіку (PROFILE_SAMPLE_RATE).
+Результат зберігається у форматі collapsed stacks, сумісному з flamegraph.pl
+та speedscope, у instance/profiles з ротацією. Для потокових відповідей
+(SSE, експорт) семплювання триває, доки тіло не віддано повністю
+"""
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+from flask import current_app, g, request
+
+from app.utils.decorators import is_admin_user
+
+PROFILE_EXTENSION = ".folded"
+
+
+class StackSampler:
+    """Фоновий потік, що періодично знімає стек потоку запиту"""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[self._collapse(frame)] += 1
+
+    @staticmethod
+    def _collapse(frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(stack))
+
+    def collapsed(self):
+        """Рядки формату 'frame;frame;frame count'"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+def profiles_dir(app=None):
+    app = app or current_app
+    return os.path.join(app.instance_path, "profiles")
+
+
+def list_profiles(directory=None):
+    """Збережені профілі, найновіші першими"""
+    directory = directory or profiles_dir()
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in os.listdir(directory):
+        if not name.endswith(PROFILE_EXTENSION):
+            continue
+        stat = os.stat(os.path.join(directory, name))
+        profiles.append({
+            "name": name,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "captured_at": datetime.utcfromtimestamp(stat.st_mtime).isoformat(),
+        })
+    profiles.sort(key=lambda p: (p["mtime"], p["name"]), reverse=True)
+    return profiles
+
+
+def _rotate(directory, keep):
+    for profile in list_profiles(directory)[keep:]:
+        try:
+            os.remove(os.path.join(directory, profile["name"]))
+        except OSError:
+            pass
+
+
+def _should_profile():
+    config = current_app.config
+    requested = request.headers.get("X-Profile") == "1" or request.args.get("_profile") == "1"
+    if requested and is_admin_user():
+        return True
+    rate = config.get("PROFILE_SAMPLE_RATE", 0.0)
+    return rate > 0 and random.random() < rate
+
+
+def _before_request():
+    if not _should_profile():
+        return
+    interval = current_app.config.get("PROFILE_INTERVAL_MS", 5) / 1000
+    sampler = StackSampler(threading.get_ident(), interval)
+    sampler.start()
+    g._profiler = sampler
+    g._profiler_started = time.time()
+
+
+def _finish(response=None):
+    sampler = g.pop("_profiler", None)
+    if sampler is None:
+        return None
+
+    directory = profiles_dir()
+    keep = current_app.config.get("PROFILE_KEEP", 50)
+    endpoint = (request.endpoint or "unmatched").replace(".", "-")
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime(g._profiler_started))
+    name = f"{stamp}_{endpoint}_{uuid.uuid4().hex[:8]}{PROFILE_EXTENSION}"
+
+    def save():
+        sampler.stop()
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            f.write(sampler.collapsed())
+        _rotate(directory, keep)
+
+    if response is not None and response.is_streamed:
+        # Тіло генерується вже після after_request — зберігаємо, коли його віддано
+        response.call_on_close(save)
+    else:
+        save()
+    return name
+
+
+def _after_request(response):
+    name = _finish(response)
+    if name:
+        response.headers["X-Profile-Id"] = name
+    return response
+
+
+def _teardown_request(exc):
+    # Якщо обробник впав, after_request не виконується — зупиняємо потік тут
+    if exc is not None:
+        _finish()
+
+
+def init_profiler(app):
+    """Підключити профайлер до застосунку"""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
@@ -0,0 +1,151 @@
+"""
+Потокові ескізи розподілу рахунків
+DDSketch дає квантилі з гарантованою відносною похибкою, займає
+кілька сотень лічильників незалежно від кількості значень і зливається
+з іншим ескізом додаванням лічильників, тож кожен процес може
+накопичувати зміни окремо. Поруч — гістограма з фіксованими кошиками
+"""
+import math
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+
+# версія, відносна точність, ширина кошика, кількість кошиків, нулі, мін. індекс, кількість індексів
+_HEADER = struct.Struct("<BdIHQiI")
+SKETCH_VERSION = 1
+
+
+class DDSketch:
+    """Ескіз для невід'ємних значень з відносною похибкою relative_accuracy"""
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.zero_count = 0
+        self.bins = {}
+        self._cumulative = None
+
+    @property
+    def count(self):
+        return self.zero_count + sum(self.bins.values())
+
+    def _key(self, value):
+        # Значення з (gamma^(k-1), gamma^k] потрапляють у кошик k
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, key):
+        # Середина кошика з відносною похибкою не більше relative_accuracy
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, value, count=1):
+        if value <= 0:
+            self.zero_count += count
+        else:
+            key = self._key(value)
+            self.bins[key] = self.bins.get(key, 0) + count
+        self._cumulative = None
+
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        self.zero_count += other.zero_count
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self._cumulative = None
+
+    def _index(self):
+        # Відсортовані кошики та накопичені лічильники кешуються до наступної зміни
+        if self._cumulative is None:
+            keys = sorted(self.bins)
+            self._keys = keys
+            self._cumulative = list(accumulate((self.bins[k] for k in keys), initial=self.zero_count))
+        return self._keys, self._cumulative
+
+    def quantile(self, q):
+        """Значення квантиля q з [0, 1] або None для порожнього ескізу"""
+        keys, cumulative = self._index()
+        total = cumulative[-1]
+        if total == 0:
+            return None
+        rank = q * (total - 1)
+        if rank < self.zero_count:
+            return 0.0
+        # cumulative[i + 1] — кількість значень до кошика keys[i] включно
+        position = bisect_right(cumulative, rank, lo=1) - 1
+        return self._value(keys[min(position, len(keys) - 1)])
+
+    def rank(self, value):
+        """Частка значень, менших за value (наближено, з точністю до кошика)"""
+        keys, cumulative = self._index()
+        total = cumulative[-1]
+        if total == 0:
+            return None
+        if value <= 0:
+            return 0.0
+        return cumulative[bisect_left(keys, self._key(value))] / total
+
+
+class FixedHistogram:
+    """Гістограма з buckets кошиками ширини width; останній кошик відкритий"""
+
+    def __init__(self, width, buckets):
+        self.width = width
+        self.counts = array("Q", bytes(8 * buckets))
+
+    def add(self, value, count=1):
+        self.counts[min(max(int(value) // self.width, 0), len(self.counts) - 1)] += count
+
+    def merge(self, other):
+        if (other.width, len(other.counts)) != (self.width, len(self.counts)):
+            raise ValueError("Cannot merge histograms with different buckets")
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+
+
+class ScoreSketch:
+    """Розподіл рахунків однієї гри й рівня: DDSketch і гістограма"""
+
+    def __init__(self, bucket_width, buckets, relative_accuracy=0.01):
+        self.sketch = DDSketch(relative_accuracy)
+        self.histogram = FixedHistogram(bucket_width, buckets)
+
+    @property
+    def count(self):
+        return self.sketch.count
+
+    def add(self, score, count=1):
+        self.sketch.add(score, count)
+        self.histogram.add(score, count)
+
+    def merge(self, other):
+        self.sketch.merge(other.sketch)
+        self.histogram.merge(other.histogram)
+
+    def copy(self):
+        return ScoreSketch.from_bytes(self.to_bytes())
+
+    def to_bytes(self):
+        sketch = self.sketch
+        low = min(sketch.bins, default=0)
+        high = max(sketch.bins, default=-1)
+        dense = array("Q", (sketch.bins.get(k, 0) for k in range(low, high + 1)))
+        header = _HEADER.pack(
+            SKETCH_VERSION, sketch.relative_accuracy, self.histogram.width,
+            len(self.histogram.counts), sketch.zero_count, low, len(dense)
+        )
+        return header + self.histogram.counts.tobytes() + dense.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        version, accuracy, width, buckets, zero_count, low, size = _HEADER.unpack_from(data)
+        if version != SKETCH_VERSION:
+            raise ValueError(f"Unsupported sketch version {version}")
+        result = cls(width, buckets, accuracy)
+        offset = _HEADER.size
+        result.histogram.counts = array("Q", data[offset:offset + 8 * buckets])
+        dense = array("Q", data[offset + 8 * buckets:offset + 8 * (buckets + size)])
+        result.sketch.zero_count = zero_count
+        result.sketch.bins = {low + i: count for i, count in enumerate(dense) if count}
+        return result
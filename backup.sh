@@ -1,13 +1,12 @@
 #!/bin/bash
 
 # BrainRush Database Backup Script
-# Використання: ./backup.sh [restore]
+# Використання: ./backup.sh [backup | restore <файл або каталог покоління WAL>]
 
 set -e
 
 BACKUP_DIR="./backups"
-TIMESTAMP=$(date +%Y%m%d_%H%M%S)
-CONTAINER_NAME="brainrush_app"
+CONTAINER_NAME="brainrush_prod_app"
 DB_PATH="/app/instance/brainrush.db"
 
 # Створюємо директорію для бекапів якщо не існує
@@ -23,16 +22,16 @@ backup() {
         exit 1
     fi
     
-    # Створюємо бекап
-    docker exec "$CONTAINER_NAME" cp "$DB_PATH" "/tmp/backup_${TIMESTAMP}.db"
-    docker cp "${CONTAINER_NAME}:/tmp/backup_${TIMESTAMP}.db" "${BACKUP_DIR}/brainrush_backup_${TIMESTAMP}.db"
-    docker exec "$CONTAINER_NAME" rm "/tmp/backup_${TIMESTAMP}.db"
+    # Гаряча копія через SQLite backup API: перевірена integrity_check і стиснена gzip
+    REMOTE_FILE=$(docker exec "$CONTAINER_NAME" python -m app.db.backup --db "$DB_PATH" full --dest /tmp/brainrush_backups --keep 1)
+    docker cp "${CONTAINER_NAME}:${REMOTE_FILE}" "${BACKUP_DIR}/"
+    docker exec "$CONTAINER_NAME" rm "$REMOTE_FILE"
     
-    echo "✅ Backup created: ${BACKUP_DIR}/brainrush_backup_${TIMESTAMP}.db"
+    echo "✅ Backup created: ${BACKUP_DIR}/$(basename "$REMOTE_FILE")"
     
     # Видаляємо старі бекапи (зберігаємо останні 7)
     cd "$BACKUP_DIR"
-    ls -t brainrush_backup_*.db | tail -n +8 | xargs -r rm
+    ls -t brainrush-*.db.gz | tail -n +8 | xargs -r rm
     echo "🧹 Old backups cleaned (keeping last 7)"
 }
 
@@ -42,13 +41,13 @@ restore() {
         echo "❌ Error: Please specify backup file"
         echo "Usage: ./backup.sh restore <backup_file>"
         echo "Available backups:"
-        ls -1 "$BACKUP_DIR"/brainrush_backup_*.db 2>/dev/null || echo "  No backups found"
+        ls -1d "$BACKUP_DIR"/brainrush-*.db.gz "$BACKUP_DIR"/wal/* 2>/dev/null || echo "  No backups found"
         exit 1
     fi
     
     BACKUP_FILE="$1"
     
-    if [ ! -f "$BACKUP_FILE" ]; then
+    if [ ! -e "$BACKUP_FILE" ]; then
         echo "❌ Error: Backup file not found: $BACKUP_FILE"
         exit 1
     fi
@@ -63,14 +62,20 @@ restore() {
     
     echo "🔄 Restoring database from $BACKUP_FILE..."
     
-    # Зупиняємо контейнер
-    docker-compose stop web
+    # Зупиняємо контейнери, що відкривають базу
+    docker-compose stop web backup
     
-    # Копіюємо бекап
-    docker cp "$BACKUP_FILE" "${CONTAINER_NAME}:${DB_PATH}"
+    # Відновлюємо у тимчасовий файл (з перевіркою цілісності), потім замінюємо базу
+    # разом зі старими -wal/-shm
+    SOURCE="$(cd "$(dirname "$BACKUP_FILE")" && pwd)/$(basename "$BACKUP_FILE")"
+    docker-compose run --rm --no-deps -v "${SOURCE}:/restore/$(basename "$SOURCE"):ro" web sh -c "
+        rm -f ${DB_PATH}.restore &&
+        python -m app.db.backup restore /restore/$(basename "$SOURCE") ${DB_PATH}.restore &&
+        rm -f ${DB_PATH}-wal ${DB_PATH}-shm &&
+        mv ${DB_PATH}.restore ${DB_PATH}"
     
-    # Запускаємо контейнер
-    docker-compose start web
+    # Запускаємо контейнери
+    docker-compose start web backup
     
     echo "✅ Database restored successfully"
 }
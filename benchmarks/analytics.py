@@ -0,0 +1,99 @@
+"""
+Бенчмарк аналітики адмін-панелі
+Засіює базу, вимірює перше завантаження game_results і transactions
+у стовпці NumPy разом з обчисленням звіту, відповідь з кешу та
+оновлення після вставки нових результатів (дочитується лише хвіст)
+
+Використання:
+    python -m benchmarks.analytics --results 10000000
+    python -m benchmarks.analytics --db /tmp/bench.db --json
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.seed import SeedConfig, seed_database
+
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def _append_results(db_path, rows):
+    conn = sqlite3.connect(db_path)
+    user_id = conn.execute("SELECT MIN(id) FROM users").fetchone()[0]
+    now = datetime.utcnow().isoformat()
+    conn.executemany(
+        "INSERT INTO game_results (user_id, game_name, level, score, time_spent, rounds, coins_earned, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        ((user_id, "arithmetic", "medium", 250, 42.0, 10, 25, now) for _ in range(rows))
+    )
+    conn.commit()
+    conn.close()
+
+
+def run_benchmark(db_path, tail=10_000):
+    """Прогнати сценарій на готовій базі і повернути звіт"""
+    from app.db import models
+    from app.games.analytics import AdminAnalytics
+
+    original_path = models.DB_PATH
+    models.DB_PATH = db_path
+    try:
+        analytics = AdminAnalytics()
+        cold = _timed(analytics.report)
+        report = analytics.report()
+        cached = _timed(analytics.report)
+        _append_results(db_path, tail)
+        incremental = _timed(lambda: analytics.report(refresh=True))
+        recomputed = analytics.report()
+    finally:
+        models.DB_PATH = original_path
+
+    rows = report["totals"]["results"]
+    return {
+        "results": rows,
+        "cold_seconds": round(cold, 3),
+        "cold_rows_per_second": round(rows / cold),
+        "cached_ms": round(cached * 1000, 3),
+        "tail_rows": tail,
+        "incremental_seconds": round(incremental, 3),
+        "incremental_ok": recomputed["totals"]["results"] == rows + tail,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="BrainRush admin analytics benchmark")
+    parser.add_argument("--db", help="existing database to use instead of seeding a new one (--tail rows are appended)")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--results", type=int, default=1_000_000)
+    parser.add_argument("--tail", type=int, default=10_000, help="results inserted before the incremental refresh")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = args.db
+        if not db_path:
+            db_path = os.path.join(tmpdir, "bench.db")
+            seed_database(db_path, SeedConfig(users=args.users, results=args.results))
+        report = run_benchmark(db_path, args.tail)
+
+    if args.json:
+        print(json.dumps(report, indent=2, sort_keys=True))
+    else:
+        print(f"Cold load of {report['results']} results: {report['cold_seconds']:.2f}s "
+              f"({report['cold_rows_per_second']} rows/s)")
+        print(f"Cached report: {report['cached_ms']:.3f} ms")
+        print(f"Refresh after {report['tail_rows']} new results: {report['incremental_seconds']:.3f}s")
+    return 0 if report["incremental_ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
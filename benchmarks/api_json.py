@@ -0,0 +1,154 @@
+"""
+Бенчмарк серіалізації відповідей /api/v1
+Сторінка з 1000 транзакцій: рядки sqlite3.Row з копіюванням полів у dict
+і стандартний JSON-провайдер Flask проти dict-рядків з models.py
+і провайдера на orjson. Окремо вимірюється повний запит
+GET /api/v1/transactions?limit=1000 з кожним провайдером, а також розмір,
+кодування й розбір тієї ж сторінки в MessagePack (Accept: application/msgpack).
+
+Використання:
+    python -m benchmarks.api_json --rows 1000
+    python -m benchmarks.api_json --json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_PASSWORD = "benchpass123"
+
+
+def _median_ms(func, rounds):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return round(statistics.median(timings) * 1000, 3)
+
+
+def _legacy_rows(models, user_id, limit):
+    """Як було: SELECT * і копіювання кожного поля sqlite3.Row у dict"""
+    conn = models.get_db_connection()
+    rows = conn.execute(
+        "SELECT * FROM transactions WHERE user_id = ? ORDER BY created_at DESC LIMIT ?",
+        (user_id, limit)
+    ).fetchall()
+    conn.close()
+    return [
+        {
+            "id": t["id"],
+            "amount": t["amount"],
+            "transaction_type": t["transaction_type"],
+            "description": t["description"],
+            "created_at": t["created_at"]
+        }
+        for t in rows
+    ]
+
+
+def _seed(models, rows):
+    user_id = models.create_user("benchjson", BENCH_PASSWORD)
+    now = datetime.utcnow().isoformat()
+    conn = models.get_db_connection()
+    conn.executemany(
+        "INSERT INTO transactions (user_id, amount, transaction_type, description, created_at) VALUES (?, ?, ?, ?, ?)",
+        [(user_id, i % 50 - 10, "game_reward", f"Earned in arithmetic #{i}", now) for i in range(rows)]
+    )
+    conn.commit()
+    conn.close()
+    return user_id
+
+
+def run_benchmark(rows=1000, rounds=50):
+    """Прогнати сценарії на тимчасовій базі і повернути звіт (мс, медіани)"""
+    from flask.json.provider import DefaultJSONProvider
+    from app import create_app
+    from app.db import models
+    from app.utils import json_provider, negotiation
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        original_path = models.DB_PATH
+        models.DB_PATH = os.path.join(tmpdir, "api_json.db")
+        try:
+            models.init_db()
+            user_id = _seed(models, rows)
+            app = create_app({"TESTING": True})
+            providers = {"stdlib": DefaultJSONProvider(app), "orjson": app.json}
+
+            report = {"rows": rows, "orjson_available": json_provider.orjson is not None}
+            with app.app_context():
+                legacy = _legacy_rows(models, user_id, rows)
+                shaped = models.get_user_transactions(user_id, rows)
+                assert legacy == shaped
+                report["fetch_ms"] = {
+                    "row_copy": _median_ms(lambda: _legacy_rows(models, user_id, rows), rounds),
+                    "dict_rows": _median_ms(lambda: models.get_user_transactions(user_id, rows), rounds),
+                }
+                payload = {"transactions": shaped, "count": len(shaped)}
+                report["encode_ms"] = {
+                    name: _median_ms(lambda p=provider: p.response(payload), rounds)
+                    for name, provider in providers.items()
+                }
+                report["bytes"] = {
+                    name: len(provider.response(payload).get_data()) for name, provider in providers.items()
+                }
+                body = providers["orjson"].response(payload).get_data()
+                report["decode_ms"] = {
+                    "stdlib": _median_ms(lambda: json.loads(body), rounds),
+                    "orjson": _median_ms(lambda: providers["orjson"].loads(body), rounds),
+                }
+                if negotiation.msgpack is not None:
+                    packed = negotiation.msgpack.packb(payload)
+                    assert negotiation.msgpack.unpackb(packed) == payload
+                    report["encode_ms"]["msgpack"] = _median_ms(lambda: negotiation.msgpack.packb(payload), rounds)
+                    report["decode_ms"]["msgpack"] = _median_ms(lambda: negotiation.msgpack.unpackb(packed), rounds)
+                    report["bytes"]["msgpack"] = len(packed)
+
+            client = app.test_client()
+            client.post("/auth/login", data={"username": "benchjson", "password": BENCH_PASSWORD})
+            url = f"/api/v1/transactions?limit={rows}"
+            report["request_ms"] = {}
+            for name, provider in providers.items():
+                app.json = provider
+                assert client.get(url).status_code == 200
+                report["request_ms"][name] = _median_ms(lambda: client.get(url), rounds)
+            if negotiation.msgpack is not None:
+                headers = {"Accept": negotiation.MSGPACK_MIMETYPE}
+                assert client.get(url, headers=headers).mimetype == negotiation.MSGPACK_MIMETYPE
+                report["request_ms"]["msgpack"] = _median_ms(lambda: client.get(url, headers=headers), rounds)
+        finally:
+            models.DB_PATH = original_path
+
+    report["old_path_ms"] = round(report["fetch_ms"]["row_copy"] + report["encode_ms"]["stdlib"], 3)
+    report["new_path_ms"] = round(report["fetch_ms"]["dict_rows"] + report["encode_ms"]["orjson"], 3)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="BrainRush /api/v1 JSON serialization benchmark")
+    parser.add_argument("--rows", type=int, default=1000, help="transactions on the page")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.rows, args.rounds)
+    if args.json:
+        print(json.dumps(report, indent=2, sort_keys=True))
+        return 0
+    fetch = report["fetch_ms"]
+    print(f"{report['rows']} transactions (orjson {'available' if report['orjson_available'] else 'missing'})")
+    print(f"Fetch: Row + field copy {fetch['row_copy']:.2f} ms, dict rows {fetch['dict_rows']:.2f} ms")
+    print(f"Fetch + encode: {report['old_path_ms']:.2f} ms -> {report['new_path_ms']:.2f} ms")
+    for metric in ("encode_ms", "decode_ms", "request_ms"):
+        print(f"{metric}: " + ", ".join(f"{name} {value:.2f}" for name, value in report[metric].items()))
+    print("bytes: " + ", ".join(f"{name} {value}" for name, value in report["bytes"].items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
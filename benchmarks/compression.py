@@ -0,0 +1,106 @@
+"""
+Бенчмарк стиснення відповідей у застосунку
+Для публічних сторінок (рейтинг, swagger.yaml) на синтетичній базі:
+розмір без стиснення і в кожному доступному кодуванні, час стиснення
+на кожен запит проти попадання в кеш стиснутих тіл (хеш вмісту + LRU)
+і повний запит без стиснення, зі стисненням на кожен запит і з кешем.
+
+Використання:
+    python -m benchmarks.compression --users 200 --results 20000
+    python -m benchmarks.compression --json
+"""
+import argparse
+import hashlib
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.seed import SeedConfig, seed_database
+
+PAGES = ("/leaderboard/", "/api/swagger.yaml")
+
+
+def _median_ms(func, rounds):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return round(statistics.median(timings) * 1000, 3)
+
+
+def run_benchmark(db_path, rounds=50):
+    """Прогнати сценарії на готовій базі і повернути звіт (мс, медіани)"""
+    from app import create_app
+    from app.db import models
+    from app.utils import compression
+
+    original_path = models.DB_PATH
+    models.DB_PATH = db_path
+    try:
+        apps = {
+            "identity": create_app({"TESTING": True, "ENABLE_COMPRESSION": False}),
+            "dynamic": create_app({"TESTING": True, "COMPRESS_CACHE_SIZE": 0}),
+            "cached": create_app({"TESTING": True}),
+        }
+        best = next(iter(compression.CODECS))
+        headers = {"Accept-Encoding": ", ".join(compression.CODECS)}
+        report = {"encodings": list(compression.CODECS), "pages": {}}
+        for page in PAGES:
+            clients = {name: app.test_client() for name, app in apps.items()}
+            identity = clients["identity"].get(page)
+            assert identity.status_code == 200, (page, identity.status_code)
+            data = identity.get_data()
+
+            result = {"bytes": {"identity": len(data)}, "compress_ms": {}, "request_ms": {}}
+            for encoding, (compress, dynamic_level, cached_level) in compression.CODECS.items():
+                result["bytes"][encoding] = len(compress(data, cached_level))
+                result["compress_ms"][encoding] = _median_ms(lambda: compress(data, dynamic_level), rounds)
+            # Попадання: хеш тіла і пошук у кеші замість стиснення
+            cache = compression.CompressedCache()
+            key = (hashlib.blake2b(data, digest_size=16).digest(), best)
+            cache.set(key, b"")
+            result["compress_ms"]["cache_hit"] = _median_ms(
+                lambda: cache.get((hashlib.blake2b(data, digest_size=16).digest(), best)), rounds
+            )
+
+            for name, client in clients.items():
+                response = client.get(page, headers=headers)
+                assert response.headers.get("Content-Encoding") == (None if name == "identity" else best)
+                result["request_ms"][name] = _median_ms(lambda c=client: c.get(page, headers=headers), rounds)
+            report["pages"][page] = result
+        report["cache_hits"] = apps["cached"].extensions["compression_cache"].hits
+    finally:
+        models.DB_PATH = original_path
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="BrainRush response compression benchmark")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--results", type=int, default=20_000)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, "compression.db")
+        seed_database(db_path, SeedConfig(users=args.users, results=args.results))
+        report = run_benchmark(db_path, args.rounds)
+
+    if args.json:
+        print(json.dumps(report, indent=2, sort_keys=True))
+        return 0
+    print(f"Encodings: {', '.join(report['encodings'])}")
+    for page, result in report["pages"].items():
+        print(page)
+        for metric in ("bytes", "compress_ms", "request_ms"):
+            print(f"  {metric}: " + ", ".join(f"{name} {value}" for name, value in result[metric].items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
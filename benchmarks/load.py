@@ -0,0 +1,301 @@
+"""
+Навантажувальний бенчмарк усього застосунку
+Засіває синтетичну базу, проганяє сценарії гравців через справжній Flask
+застосунок (test client або локальний WSGI-сервер з кількома потоками)
+та звітує пропускну здатність і p50/p95/p99 для кожного кроку
+
+Використання:
+    python -m benchmarks.load --users 1000 --results 100000 --journeys 200
+    python -m benchmarks.load --save benchmarks/baseline.json
+    python -m benchmarks.load --compare benchmarks/baseline.json
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.cookiejar import CookieJar
+
+from app.games.pools import ARITHMETIC_BASE_POINTS, MIN_SEQUENCE_LENGTH, sequence_round_points
+from benchmarks.seed import BENCH_PASSWORD, GAMES, LEVELS, SeedConfig, seed_database
+
+ARITHMETIC_ROUNDS = 10
+_EXPRESSION = re.compile(r"^[\d\s+\-*/()]+$")
+
+
+def percentile(sorted_values, pct):
+    """Percentile методом найближчого рангу"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+class TestClientSession:
+    """Сесія гравця через Flask test client (без мережі)"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, data=None, json_body=None):
+        response = self.client.open(path, method=method, data=data, json=json_body, follow_redirects=True)
+        return response.status_code, response.get_json(silent=True)
+
+
+class HttpSession:
+    """Сесія гравця через HTTP до локального WSGI-сервера"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+
+    def request(self, method, path, data=None, json_body=None):
+        headers = {}
+        body = None
+        if json_body is not None:
+            body = json.dumps(json_body).encode()
+            headers["Content-Type"] = "application/json"
+        elif data is not None:
+            body = urllib.parse.urlencode(data).encode()
+        req = urllib.request.Request(self.base_url + path, data=body, method=method, headers=headers)
+        try:
+            with self.opener.open(req) as response:
+                payload = response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            payload = e.read()
+            status = e.code
+        try:
+            return status, json.loads(payload)
+        except ValueError:
+            return status, None
+
+
+class Recorder:
+    """Збирає латентність кожного кроку сценарію"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+        self.errors = {}
+
+    def timed(self, step, session, method, path, **kwargs):
+        start = time.perf_counter()
+        status, payload = session.request(method, path, **kwargs)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.samples.setdefault(step, []).append(elapsed)
+            if status >= 400:
+                self.errors[step] = self.errors.get(step, 0) + 1
+        return status, payload
+
+
+def _evaluate(expression):
+    # Вирази з пулу сервера містять лише цифри, оператори та дужки
+    if not _EXPRESSION.match(expression):
+        raise ValueError(f"Unexpected expression: {expression!r}")
+    return round(eval(expression, {"__builtins__": {}}), 1)
+
+
+def play_rounds(game, level, rounds, rng):
+    """Відповіді гравця на раунди з пулу та узгоджені з ними рахунок і кількість раундів"""
+    if game == "arithmetic":
+        correct = rng.randint(0, len(rounds))
+        answers = [_evaluate(e) for e in rounds[:correct]] + [None] * (len(rounds) - correct)
+        base = ARITHMETIC_BASE_POINTS[level]
+        return answers, rng.randint(correct * base, correct * base * 3), len(rounds)
+    correct = rng.randint(0, 8)
+    score = sum(sequence_round_points(level, MIN_SEQUENCE_LENGTH + i) for i in range(correct))
+    return rounds[:correct] + [""], score, correct + 1
+
+
+def play_journey(session, recorder, username, rng):
+    """Сценарій одного гравця: вхід, старт гри, збереження, рейтинг, профіль, магазин"""
+    recorder.timed("login", session, "POST", "/auth/login",
+                   data={"username": username, "password": BENCH_PASSWORD})
+    recorder.timed("games", session, "GET", "/games/")
+
+    game = rng.choice(GAMES[:2])
+    level = rng.choice(LEVELS)
+    recorder.timed("play", session, "GET", f"/game/{game}/")
+    _, started = recorder.timed("start", session, "POST", f"/game/{game}/start",
+                                json_body={"level": level, "count": ARITHMETIC_ROUNDS})
+    started = started or {}
+    answers, score, rounds = play_rounds(game, level, started.get("rounds", []), rng)
+    recorder.timed("save_result", session, "POST", f"/game/{game}/save_result", json_body={
+        "level": level,
+        "score": score,
+        "time": round(rng.uniform(10, 120), 2),
+        "rounds": rounds,
+        "answers": answers,
+        "token": started.get("token"),
+    })
+
+    recorder.timed("leaderboard", session, "GET", "/leaderboard/")
+    recorder.timed("profile", session, "GET", "/profile/")
+    recorder.timed("shop", session, "GET", "/shop/")
+    recorder.timed("logout", session, "GET", "/auth/logout")
+
+
+def _serve(app):
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def run_benchmark(db_path, users, journeys=100, mode="client", threads=4, seed=42):
+    """Прогнати сценарії та повернути звіт у вигляді словника"""
+    from app import create_app
+    from app.db import models
+
+    models.DB_PATH = db_path
+    app = create_app()
+
+    recorder = Recorder()
+    server = None
+    if mode == "wsgi":
+        server, base_url = _serve(app)
+        make_session = lambda: HttpSession(base_url)
+    else:
+        threads = 1
+        make_session = lambda: TestClientSession(app)
+
+    def worker(worker_id):
+        rng = random.Random(seed + worker_id)
+        for _ in range(worker_id, journeys, threads):
+            username = f"bench{rng.randrange(users)}"
+            play_journey(make_session(), recorder, username, rng)
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    wall = time.perf_counter() - start
+
+    if server is not None:
+        server.shutdown()
+
+    endpoints = {}
+    total = 0
+    for step, samples in recorder.samples.items():
+        samples.sort()
+        total += len(samples)
+        endpoints[step] = {
+            "count": len(samples),
+            "errors": recorder.errors.get(step, 0),
+            "throughput": round(len(samples) / wall, 2),
+            "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+            "p50_ms": round(percentile(samples, 50) * 1000, 3),
+            "p95_ms": round(percentile(samples, 95) * 1000, 3),
+            "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        }
+
+    return {
+        "mode": mode,
+        "threads": threads,
+        "journeys": journeys,
+        "wall_seconds": round(wall, 3),
+        "throughput": round(total / wall, 2),
+        "endpoints": endpoints,
+    }
+
+
+def compare(report, baseline, tolerance):
+    """
+    Порівняти звіт з базовим
+    Повертає список кроків, у яких p95 погіршився більше ніж на tolerance
+    """
+    regressions = []
+    for step, current in sorted(report["endpoints"].items()):
+        previous = baseline.get("endpoints", {}).get(step)
+        if not previous or not previous["p95_ms"]:
+            print(f"  {step:<12} new")
+            continue
+        ratio = current["p95_ms"] / previous["p95_ms"]
+        flag = ""
+        if ratio > 1 + tolerance:
+            regressions.append(step)
+            flag = "  REGRESSION"
+        print(f"  {step:<12} p95 {previous['p95_ms']:>9.2f} -> {current['p95_ms']:>9.2f} ms ({ratio:5.2f}x){flag}")
+    return regressions
+
+
+def print_report(report):
+    print(f"{'step':<12} {'count':>6} {'err':>4} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for step, s in sorted(report["endpoints"].items()):
+        print(f"{step:<12} {s['count']:>6} {s['errors']:>4} {s['throughput']:>9.1f} "
+              f"{s['p50_ms']:>9.2f} {s['p95_ms']:>9.2f} {s['p99_ms']:>9.2f}")
+    print(f"Total: {report['throughput']:.1f} req/s over {report['wall_seconds']:.2f}s ({report['mode']})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="BrainRush synthetic load benchmark")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--results", type=int, default=100_000)
+    parser.add_argument("--transactions", type=int)
+    parser.add_argument("--purchases", type=int)
+    parser.add_argument("--feedback", type=int)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--journeys", type=int, default=100)
+    parser.add_argument("--mode", choices=("client", "wsgi"), default="client")
+    parser.add_argument("--threads", type=int, default=4, help="concurrent players in wsgi mode")
+    parser.add_argument("--db", help="reuse an already seeded database instead of a temporary one")
+    parser.add_argument("--save", help="write the report as a JSON baseline")
+    parser.add_argument("--compare", help="compare against a JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 slowdown (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    config = SeedConfig(args.users, args.results, args.transactions,
+                        args.purchases, args.feedback, seed=args.seed)
+    tmpdir = None
+    db_path = args.db
+    if not db_path:
+        tmpdir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(tmpdir.name, "bench.db")
+        print(f"Seeding {config.users} users / {config.results} results...")
+        seed_database(db_path, config)
+
+    report = run_benchmark(db_path, config.users, args.journeys, args.mode, args.threads, args.seed)
+    report["seed"] = config.as_dict()
+    print_report(report)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.save}")
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("seed") != report["seed"]:
+            print("Warning: baseline was recorded with a different dataset")
+        if (baseline.get("mode"), baseline.get("threads")) != (report["mode"], report["threads"]):
+            print("Warning: baseline was recorded in a different mode")
+        print(f"Comparison with {args.compare}:")
+        if compare(report, baseline, args.tolerance):
+            exit_code = 1
+
+    if tmpdir is not None:
+        tmpdir.cleanup()
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,311 @@
+"""
+Мікробенчмарки для кожної публічної функції app/db/models.py
+Кожна функція вимірюється на базах різного розміру (за замовчуванням
+10k, 1M та 10M рядків game_results), після чого будується звіт
+масштабування: нахил log(latency) / log(rows) близько 1 означає, що
+функція сканує таблицю і росте лінійно
+
+Використання:
+    python -m benchmarks.models_bench
+    python -m benchmarks.models_bench --sizes 10000,100000 --only get_game_leaderboard
+    python -m benchmarks.models_bench --cache-dir /tmp/bench-dbs --json report.json
+"""
+import argparse
+import inspect
+import json
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from app.db import models
+from app.db.instrumentation import slow_query_log
+from app.utils.sketch import ScoreSketch
+from benchmarks.seed import BENCH_PASSWORD, GAMES, LEVELS, TRANSACTION_TYPES, SeedConfig, seed_database
+
+DEFAULT_SIZES = (10_000, 1_000_000, 10_000_000)
+RESULTS_PER_USER = 100
+# Нахил, з якого функція вважається лінійною щодо розміру таблиці
+LINEAR_SLOPE = 0.5
+TAIL_ROWS = 1000
+
+# Інфраструктурні функції, які не мають сенсу як мікробенчмарк
+SKIP = {"get_db_connection", "init_db", "add_change_listener"}
+
+
+class Case:
+    """
+    Мікробенчмарк однієї функції
+    setup() виконується перед кожним викликом поза виміром і повертає аргументи;
+    для генераторів (drain=True) вимірюється прохід по всіх рядках
+    """
+
+    def __init__(self, func, setup, drain=False):
+        self.func = func
+        self.setup = setup
+        self.drain = drain
+
+    @property
+    def name(self):
+        return self.func.__name__
+
+
+class Fixture:
+    """Дані засіяної бази, потрібні для побудови аргументів"""
+
+    def __init__(self, users):
+        conn = models.get_db_connection()
+        first = conn.execute("SELECT MIN(id) FROM users").fetchone()[0]
+        self.item_id = conn.execute("SELECT id FROM shop_items ORDER BY price DESC LIMIT 1").fetchone()[0]
+        self.feedback_id = conn.execute("SELECT MAX(id) FROM feedback").fetchone()[0]
+        # Аналітика дочитує лише хвіст таблиць: вимірюємо останні TAIL_ROWS рядків
+        self.results_tail = conn.execute("SELECT COALESCE(MAX(id), 0) FROM game_results").fetchone()[0] - TAIL_ROWS
+        self.transactions_tail = conn.execute("SELECT COALESCE(MAX(id), 0) FROM transactions").fetchone()[0] - TAIL_ROWS
+        conn.close()
+        # Гравець із середини діапазону — типова кількість результатів
+        self.user_id = first + users // 2
+        self.user_row = models.get_user_by_id(self.user_id)
+        self.password_hash = generate_password_hash(BENCH_PASSWORD)
+        self.counter = 0
+
+    def unique(self, prefix):
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def new_user(self):
+        return models.create_user(self.unique("mb"), BENCH_PASSWORD)
+
+    def new_feedback(self):
+        return models.add_feedback(self.user_id, "bench", "", "bench message")
+
+    def reset_purchase(self):
+        conn = models.get_db_connection()
+        conn.execute("DELETE FROM user_purchases WHERE user_id = ? AND item_id = ?", (self.user_id, self.item_id))
+        conn.execute("UPDATE users SET coins = 100000 WHERE id = ?", (self.user_id,))
+        conn.commit()
+        conn.close()
+        return (self.user_id, self.item_id)
+
+    def score_sketch(self):
+        sketch = ScoreSketch(45, 20)
+        sketch.add(250)
+        return sketch
+
+    def reset_daily_bonus(self):
+        yesterday = (datetime.utcnow() - timedelta(days=1)).date().isoformat()
+        conn = models.get_db_connection()
+        conn.execute("UPDATE users SET last_login_date = ? WHERE id = ?", (yesterday, self.user_id))
+        conn.commit()
+        conn.close()
+        return (self.user_id,)
+
+
+def build_cases(fx):
+    """Сценарії для всіх публічних функцій моделі"""
+    m = models
+    u = fx.user_id
+    return [
+        Case(m.create_user, lambda: (fx.unique("mb"), BENCH_PASSWORD)),
+        Case(m.get_user_by_username, lambda: (f"bench{u}",)),
+        Case(m.get_user_by_id, lambda: (u,)),
+        Case(m.set_user_role, lambda: (u, "user")),
+        Case(m.get_users_page, lambda: (u,)),
+        Case(m.search_users_by_prefix, lambda: ("bench1",)),
+        Case(m.verify_user_password, lambda: (fx.user_row, BENCH_PASSWORD)),
+        Case(m.set_user_coins, lambda: (u, 1000)),
+        Case(m.update_user_coins, lambda: (u, 1, "bench")),
+        Case(m.get_user_coins, lambda: (u,)),
+        Case(m.update_user_theme, lambda: (u, "dark")),
+        Case(m.get_all_shop_items, lambda: ()),
+        Case(m.get_shop_item, lambda: (fx.item_id,)),
+        Case(m.user_has_purchased, lambda: (u, fx.item_id)),
+        Case(m.purchase_item, fx.reset_purchase),
+        Case(m.get_shop_items_for_user, lambda: (u,)),
+        Case(m.get_user_purchases, lambda: (u,)),
+        Case(m.add_feedback, lambda: (u, "bench", "", "bench message")),
+        Case(m.get_feedbacks, lambda: ()),
+        Case(m.get_feedback, lambda: (fx.feedback_id,)),
+        Case(m.update_feedback, lambda: (fx.feedback_id, "bench", "", "updated")),
+        Case(m.delete_feedback, lambda: (fx.new_feedback(),)),
+        Case(m.save_game_result, lambda: (u, "arithmetic", "medium", 250, 42.0, 10)),
+        Case(m.save_game_results_batch, lambda: (u, [("arithmetic", "medium", 250, 42.0, 10)] * 50)),
+        Case(m.get_used_sessions, lambda: ([b"benchnon"] * 10,)),
+        Case(m.get_distinct_games_for_user, lambda: (u,)),
+        Case(m.get_stats_for_game, lambda: (u, "arithmetic")),
+        Case(m.get_total_games, lambda: (u,)),
+        Case(m.get_total_points, lambda: (u,)),
+        Case(m.get_total_coins_earned, lambda: (u,)),
+        Case(m.get_user_transactions, lambda: (u,)),
+        Case(m.get_global_leaderboard, lambda: ()),
+        Case(m.get_game_leaderboard, lambda: ("arithmetic",)),
+        Case(m.rebuild_leaderboards, lambda: ()),
+        Case(m.get_leaderboard_rank, lambda: (u, "arithmetic")),
+        Case(m.get_leaderboard_neighbors, lambda: (u, "arithmetic")),
+        Case(m.get_leaderboard_versions, lambda: ()),
+        Case(m.current_leaderboard_buckets, lambda: ()),
+        Case(m.get_score_sketches, lambda: ()),
+        Case(m.save_score_sketches, lambda: ({("arithmetic", "medium"): fx.score_sketch()},)),
+        Case(m.get_score_counts, lambda: ()),
+        Case(m.get_game_result_columns, lambda: (GAMES, LEVELS, fx.results_tail)),
+        Case(m.get_transaction_columns, lambda: (TRANSACTION_TYPES, fx.transactions_tail)),
+        Case(m.get_row_count, lambda: ("game_results", fx.results_tail)),
+        Case(m.iter_export_rows, lambda: ("game_results", None, None, u), drain=True),
+        Case(m.check_daily_bonus, fx.reset_daily_bonus),
+        Case(m.equip_avatar, lambda: (u, "default")),
+        Case(m.change_user_password, lambda: (u, fx.password_hash)),
+        Case(m.delete_user_account, lambda: (fx.new_user(),)),
+    ]
+
+
+def public_functions():
+    """Публічні функції models.py, визначені в самому модулі"""
+    return sorted(
+        name for name, obj in inspect.getmembers(models, inspect.isfunction)
+        if not name.startswith("_") and obj.__module__ == models.__name__ and name not in SKIP
+    )
+
+
+def measure(case, min_time=0.2, max_rounds=200, min_rounds=5):
+    """Повернути список тривалостей викликів (секунди)"""
+    timings = []
+    deadline = time.perf_counter() + min_time
+    while len(timings) < max_rounds and (len(timings) < min_rounds or time.perf_counter() < deadline):
+        args = case.setup()
+        start = time.perf_counter()
+        result = case.func(*args)
+        if case.drain:
+            for _ in result:
+                pass
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def scaling_slope(points):
+    """Нахил регресії log(latency) на log(rows) методом найменших квадратів"""
+    if len(points) < 2:
+        return None
+    xs = [math.log(rows) for rows, _ in points]
+    ys = [math.log(max(latency, 1e-9)) for _, latency in points]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    if var_x == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x
+
+
+def prepare_database(size, cache_dir, seed):
+    users = max(100, size // RESULTS_PER_USER)
+    path = os.path.join(cache_dir, f"models_bench_{size}_{seed}.db")
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        print(f"Seeding {size} game_results ({users} users)...", flush=True)
+        seed_database(path, SeedConfig(users=users, results=size, transactions=size, seed=seed))
+        print(f"  done in {time.perf_counter() - start:.1f}s", flush=True)
+    return path, users
+
+
+def run(sizes, cache_dir, seed=42, only=None, min_time=0.2):
+    """Прогнати всі сценарії для кожного розміру бази"""
+    original_path = models.DB_PATH
+    original_threshold = slow_query_log.threshold_ms
+    # EXPLAIN для повільних запитів спотворив би виміри
+    slow_query_log.threshold_ms = None
+    results = {}
+    try:
+        for size in sizes:
+            path, users = prepare_database(size, cache_dir, seed)
+            models.DB_PATH = path
+            fx = Fixture(users)
+            for case in build_cases(fx):
+                if only and case.name not in only:
+                    continue
+                timings = measure(case, min_time=min_time)
+                results.setdefault(case.name, {})[size] = {
+                    "rounds": len(timings),
+                    "min_ms": min(timings) * 1000,
+                    "median_ms": statistics.median(timings) * 1000,
+                }
+    finally:
+        models.DB_PATH = original_path
+        slow_query_log.threshold_ms = original_threshold
+    return results
+
+
+def scaling_report(results):
+    """Додати нахил масштабування та позначку лінійності для кожної функції"""
+    report = {}
+    for name, by_size in results.items():
+        points = sorted((size, stats["median_ms"]) for size, stats in by_size.items())
+        slope = scaling_slope(points)
+        report[name] = {
+            "sizes": {str(size): stats for size, stats in sorted(by_size.items())},
+            "slope": None if slope is None else round(slope, 3),
+            "linear": slope is not None and slope >= LINEAR_SLOPE,
+        }
+    return report
+
+
+def print_report(report, sizes):
+    header = f"{'function':<28}" + "".join(f"{size:>12,}" for size in sizes) + f"{'slope':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, row in sorted(report.items(), key=lambda r: -(r[1]["slope"] or 0)):
+        cells = "".join(
+            f"{row['sizes'][str(size)]['median_ms']:>10.3f}ms" if str(size) in row["sizes"] else f"{'-':>12}"
+            for size in sizes
+        )
+        slope = "-" if row["slope"] is None else f"{row['slope']:.2f}"
+        flag = "  LINEAR" if row["linear"] else ""
+        print(f"{name:<28}{cells}{slope:>8}{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmarks for app/db/models.py")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="comma separated game_results row counts")
+    parser.add_argument("--only", help="comma separated function names")
+    parser.add_argument("--cache-dir", help="keep seeded databases here between runs")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per function per size")
+    parser.add_argument("--json", help="write the scaling report as JSON")
+    parser.add_argument("--fail-on-linear", action="store_true",
+                        help="exit with status 1 if any function scales linearly")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    only = set(args.only.split(",")) if args.only else None
+
+    tmpdir = None
+    cache_dir = args.cache_dir
+    if not cache_dir:
+        tmpdir = tempfile.TemporaryDirectory()
+        cache_dir = tmpdir.name
+    os.makedirs(cache_dir, exist_ok=True)
+
+    results = run(sizes, cache_dir, args.seed, only, args.min_time)
+    report = scaling_report(results)
+    print_report(report, sizes)
+
+    uncovered = set(public_functions()) - set(results) if not only else set()
+    if uncovered:
+        print(f"Warning: no microbenchmark for {', '.join(sorted(uncovered))}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    if tmpdir is not None:
+        tmpdir.cleanup()
+    if args.fail_on_linear and any(row["linear"] for row in report.values()):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
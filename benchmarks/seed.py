@@ -0,0 +1,200 @@
+"""
+Генерація синтетичної бази даних для бенчмарків
+Розподіли наближені до реальних: активність гравців має важкий хвіст
+(Парето), популярність ігор та рівнів нерівномірна, бали залежать від рівня
+
+Використання:
+    python -m benchmarks.seed /tmp/bench.db --users 1000 --results 100000
+"""
+import argparse
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from app.db import models
+
+BENCH_PASSWORD = "benchpass123"
+
+GAMES = ("arithmetic", "sequence_recall", "color_rush", "tapping_memory")
+GAME_WEIGHTS = (0.4, 0.3, 0.2, 0.1)
+LEVELS = ("easy", "medium", "hard")
+LEVEL_WEIGHTS = (0.5, 0.35, 0.15)
+# Середній бал та розкид для кожного рівня
+LEVEL_SCORES = {"easy": (120, 40), "medium": (200, 60), "hard": (320, 90)}
+TRANSACTION_TYPES = ("game_reward", "daily_bonus", "purchase", "coins_update")
+TRANSACTION_WEIGHTS = (0.75, 0.2, 0.03, 0.02)
+
+CHUNK = 50_000
+
+
+class SeedConfig:
+    """Розміри таблиць для синтетичної бази"""
+
+    def __init__(self, users=1000, results=100_000, transactions=None,
+                 purchases=None, feedback=None, days=180, seed=42):
+        self.users = users
+        self.results = results
+        self.transactions = results + users if transactions is None else transactions
+        self.purchases = users // 3 if purchases is None else purchases
+        self.feedback = users // 10 if feedback is None else feedback
+        self.days = days
+        self.seed = seed
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+def _chunks(rows, size=CHUNK):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _timestamp(rng, now, days):
+    return (now - timedelta(seconds=rng.random() * days * 86400)).isoformat()
+
+
+def seed_database(db_path, config=None, progress=None):
+    """
+    Створити схему та заповнити базу синтетичними даними
+    Повертає SeedConfig, використаний для генерації
+    """
+    config = config or SeedConfig()
+    rng = random.Random(config.seed)
+    now = datetime.utcnow()
+
+    original_path = models.DB_PATH
+    models.DB_PATH = db_path
+    try:
+        models.init_db()
+    finally:
+        models.DB_PATH = original_path
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA journal_mode = MEMORY")
+
+    def report(table, count):
+        if progress:
+            progress(table, count)
+
+    # Один хеш на всіх: scrypt на кожного користувача зайняв би хвилини
+    password_hash = generate_password_hash(BENCH_PASSWORD)
+    conn.executemany(
+        "INSERT INTO users (username, password_hash, coins, login_streak, last_login_date, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            (f"bench{i}", password_hash, int(rng.lognormvariate(6, 1)), rng.randint(0, 30),
+             (now - timedelta(days=rng.randint(0, config.days))).date().isoformat(),
+             _timestamp(rng, now, config.days))
+            for i in range(config.users)
+        )
+    )
+    report("users", config.users)
+    first_user = conn.execute("SELECT MIN(id) FROM users WHERE username LIKE 'bench%'").fetchone()[0]
+    user_ids = list(range(first_user, first_user + config.users))
+
+    # Активність гравців: невелика частка гравців дає більшість результатів
+    activity = [rng.paretovariate(1.2) for _ in user_ids]
+    cum_activity = []
+    total = 0.0
+    for weight in activity:
+        total += weight
+        cum_activity.append(total)
+
+    def results():
+        players = rng.choices(user_ids, cum_weights=cum_activity, k=config.results)
+        games = rng.choices(GAMES, weights=GAME_WEIGHTS, k=config.results)
+        levels = rng.choices(LEVELS, weights=LEVEL_WEIGHTS, k=config.results)
+        for user_id, game, level in zip(players, games, levels):
+            mean, spread = LEVEL_SCORES[level]
+            score = max(0, int(rng.gauss(mean, spread)))
+            rounds = 10 if game == "color_rush" else rng.randint(1, 10)
+            yield (user_id, game, level, score, round(rng.uniform(10, 120), 2), rounds,
+                   max(1, score // 10), _timestamp(rng, now, config.days))
+
+    for chunk in _chunks(results()):
+        conn.executemany(
+            "INSERT INTO game_results (user_id, game_name, level, score, time_spent, rounds, coins_earned, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            chunk
+        )
+    report("game_results", config.results)
+
+    def transactions():
+        players = rng.choices(user_ids, cum_weights=cum_activity, k=config.transactions)
+        kinds = rng.choices(TRANSACTION_TYPES, weights=TRANSACTION_WEIGHTS, k=config.transactions)
+        for user_id, kind in zip(players, kinds):
+            amount = -rng.choice((50, 75, 100, 200)) if kind == "purchase" else rng.randint(1, 50)
+            yield (user_id, amount, kind, kind.replace("_", " ").capitalize(), _timestamp(rng, now, config.days))
+
+    for chunk in _chunks(transactions()):
+        conn.executemany(
+            "INSERT INTO transactions (user_id, amount, transaction_type, description, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            chunk
+        )
+    report("transactions", config.transactions)
+
+    item_ids = [row[0] for row in conn.execute("SELECT id FROM shop_items")]
+    pairs = set()
+    limit = min(config.purchases, len(user_ids) * len(item_ids))
+    while len(pairs) < limit:
+        pairs.add((rng.choice(user_ids), rng.choice(item_ids)))
+    conn.executemany(
+        "INSERT INTO user_purchases (user_id, item_id, purchased_at) VALUES (?, ?, ?)",
+        ((user_id, item_id, _timestamp(rng, now, config.days)) for user_id, item_id in sorted(pairs))
+    )
+    report("user_purchases", len(pairs))
+
+    conn.executemany(
+        "INSERT INTO feedback (user_id, name, email, message, created_at) VALUES (?, ?, ?, ?, ?)",
+        (
+            (user_id, f"bench{user_id - first_user}", "", f"Synthetic feedback #{i}", _timestamp(rng, now, config.days))
+            for i, user_id in enumerate(rng.choices(user_ids, k=config.feedback))
+        )
+    )
+    report("feedback", config.feedback)
+
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+    # Результати вставлено напряму, тож рейтинги будуються окремо
+    models.DB_PATH = db_path
+    try:
+        models.rebuild_leaderboards()
+    finally:
+        models.DB_PATH = original_path
+    return config
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seed a synthetic BrainRush database")
+    parser.add_argument("db_path")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--results", type=int, default=100_000)
+    parser.add_argument("--transactions", type=int)
+    parser.add_argument("--purchases", type=int)
+    parser.add_argument("--feedback", type=int)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    config = SeedConfig(args.users, args.results, args.transactions,
+                        args.purchases, args.feedback, args.days, args.seed)
+    start = time.perf_counter()
+    seed_database(args.db_path, config, progress=lambda t, n: print(f"  {t}: {n} rows"))
+    print(f"Seeded {args.db_path} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
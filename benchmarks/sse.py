@@ -0,0 +1,148 @@
+"""
+Бенчмарк живого рейтингу під асинхронним воркером
+Піднімає застосунок на gevent WSGIServer, відкриває тисячі простоюючих
+з'єднань до /leaderboard/stream, зберігає результат, що змінює топ,
+і вимірює, за скільки зміна доходить до кожного підписника
+
+Потребує gevent (pip install gevent), як і продакшн-воркер для стріму
+Використання:
+    python -m benchmarks.sse --connections 5000
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from benchmarks.load import percentile
+from benchmarks.seed import SeedConfig, seed_database
+
+
+def _raise_fd_limit(needed):
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < needed:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(needed, hard), hard))
+    return resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+
+
+def run_benchmark(db_path, connections=1000, idle=1.0, timeout=30.0):
+    """Прогнати сценарій і повернути звіт; gevent має бути вже пропатчений"""
+    import gevent
+    from gevent import socket
+    from gevent.pywsgi import WSGIServer
+
+    from app import create_app
+    from app.db import models
+    from app.games.ingest import GameResult, ingest_result
+    from app.games.live import leaderboard_hub
+
+    models.DB_PATH = db_path
+    app = create_app({"ENABLE_LIVE_LEADERBOARD": True})
+    server = WSGIServer(("127.0.0.1", 0), app, log=None, error_log=None)
+    server.start()
+    address = ("127.0.0.1", server.server_port)
+
+    ready = []
+    received = {}
+
+    def client(n):
+        sock = socket.create_connection(address)
+        sock.sendall(b"GET /leaderboard/stream HTTP/1.1\r\nHost: bench\r\n\r\n")
+        buffer = b""
+        snapshot = False
+        try:
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    return
+                buffer += chunk
+                if not snapshot and b"event: snapshot" in buffer:
+                    snapshot = True
+                    ready.append(n)
+                if b"event: leaderboard" in buffer:
+                    received[n] = time.perf_counter()
+                    return
+                # Зберігаємо лише хвіст, щоб маркер події не розрізало між читаннями
+                buffer = buffer[-64:]
+        finally:
+            sock.close()
+
+    start = time.perf_counter()
+    clients = [gevent.spawn(client, n) for n in range(connections)]
+    deadline = time.perf_counter() + timeout
+    while len(ready) < connections and time.perf_counter() < deadline:
+        gevent.sleep(0.05)
+    connect_seconds = time.perf_counter() - start
+
+    gevent.sleep(idle)
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    # Результат, що гарантовано стає першим місцем Arithmetic
+    top = models.get_game_leaderboard("arithmetic", 1)
+    user = models.get_user_by_username("bench0")
+    score = (top[0]["max_score"] if top else 0) + 1
+    changed_at = time.perf_counter()
+    ingest_result(user["id"], GameResult("arithmetic", "hard", score, 10.0, 10))
+
+    deadline = time.perf_counter() + timeout
+    while len(received) < len(ready) and time.perf_counter() < deadline:
+        gevent.sleep(0.01)
+
+    subscribers = leaderboard_hub.subscriber_count()
+    gevent.killall(clients, block=True, timeout=5)
+    server.stop(timeout=1)
+
+    latencies = sorted(t - changed_at for t in received.values())
+    return {
+        "connections": connections,
+        "subscribed": len(ready),
+        "hub_subscribers": subscribers,
+        "delivered": len(latencies),
+        "connect_seconds": round(connect_seconds, 3),
+        "max_rss_mb": round(rss_mb, 1),
+        "fanout_p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "fanout_p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "fanout_max_ms": round(latencies[-1] * 1000, 3) if latencies else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="BrainRush live leaderboard fan-out benchmark")
+    parser.add_argument("--connections", type=int, default=5000)
+    parser.add_argument("--idle", type=float, default=1.0, help="seconds to keep connections idle before the change")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        from gevent import monkey
+    except ImportError:
+        print("gevent is required: pip install gevent", file=sys.stderr)
+        return 2
+    # До імпорту застосунку, щоб threading і socket стали кооперативними
+    monkey.patch_all()
+
+    # Клієнт і сервер в одному процесі: два дескриптори на з'єднання
+    limit = _raise_fd_limit(args.connections * 2 + 256)
+    if limit < args.connections * 2 + 256:
+        print(f"Warning: open file limit {limit} is too low for {args.connections} connections")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, "bench.db")
+        seed_database(db_path, SeedConfig(users=100, results=5000))
+        report = run_benchmark(db_path, args.connections, args.idle, args.timeout)
+
+    if args.json:
+        print(json.dumps(report, indent=2, sort_keys=True))
+    else:
+        print(f"{report['subscribed']}/{report['connections']} connections subscribed in {report['connect_seconds']:.2f}s "
+              f"(max RSS {report['max_rss_mb']:.0f} MB)")
+        print(f"Change delivered to {report['delivered']}: p50 {report['fanout_p50_ms']:.2f} ms, "
+              f"p99 {report['fanout_p99_ms']:.2f} ms, max {report['fanout_max_ms']} ms")
+    return 0 if report["delivered"] == report["connections"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
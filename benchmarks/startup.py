@@ -0,0 +1,142 @@
+"""
+Бенчмарк старту воркера
+Холодний старт: окремий інтерпретатор імпортує app, викликає create_app
+і обслуговує перший запит. Старт з preload: create_app виконується один раз,
+далі кожен воркер — fork готового процесу (gunicorn --preload), що обслуговує
+перший запит. create_app не звертається до бази, схему створює init_db.
+
+Використання:
+    python -m benchmarks.startup --runs 10
+    python -m benchmarks.startup --json --target-ms 150
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+TARGET_MS = 150
+
+# Виконується в окремому інтерпретаторі; друкує мітки часу в мс
+_COLD_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+from app.db import models
+models.DB_PATH = sys.argv[1]
+application = app.create_app({"TESTING": True})
+created = time.perf_counter()
+response = application.test_client().get("/")
+served = time.perf_counter()
+assert response.status_code == 200, response.status_code
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "first_request_ms": (served - created) * 1000,
+}))
+"""
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+def measure_cold(db_path, runs):
+    """Медіани холодного старту в окремих інтерпретаторах"""
+    samples = {"interpreter_ms": [], "import_ms": [], "create_app_ms": [], "first_request_ms": []}
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        samples["interpreter_ms"].append((time.perf_counter() - start) * 1000)
+        result = subprocess.run(
+            [sys.executable, "-c", _COLD_SCRIPT, db_path],
+            check=True, capture_output=True, text=True
+        )
+        for key, value in json.loads(result.stdout).items():
+            samples[key].append(value)
+    report = {key: round(statistics.median(values), 2) for key, values in samples.items()}
+    report["boot_ms"] = round(report["import_ms"] + report["create_app_ms"] + report["first_request_ms"], 2)
+    return report
+
+
+def measure_preload(db_path, workers):
+    """Медіана часу від fork готового застосунку до відповіді воркера на перший запит"""
+    from app import create_app
+    from app.db import models
+
+    models.DB_PATH = db_path
+    application = create_app({"TESTING": True})
+    samples = []
+    for _ in range(workers):
+        read_fd, write_fd = os.pipe()
+        start = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            status = application.test_client().get("/").status_code
+            os.write(write_fd, str(status).encode())
+            os._exit(0)
+        os.close(write_fd)
+        status = os.read(read_fd, 16)
+        samples.append(time.perf_counter() - start)
+        os.close(read_fd)
+        os.waitpid(pid, 0)
+        if status != b"200":
+            raise RuntimeError(f"Forked worker answered {status!r}")
+    return {"workers": workers, "boot_ms": _ms(statistics.median(samples)), "max_ms": _ms(max(samples))}
+
+
+def run_benchmark(runs=5, workers=4, target_ms=TARGET_MS):
+    """Прогнати обидва сценарії на порожній ініціалізованій базі"""
+    from app.db import models
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, "startup.db")
+        original_path = models.DB_PATH
+        models.DB_PATH = db_path
+        try:
+            models.init_db()
+            cold = measure_cold(db_path, runs)
+            preload = measure_preload(db_path, workers) if hasattr(os, "fork") else None
+        finally:
+            models.DB_PATH = original_path
+
+    return {
+        "target_ms": target_ms,
+        "cold": cold,
+        "preload": preload,
+        "cold_ok": cold["boot_ms"] <= target_ms,
+        "preload_ok": preload is not None and preload["boot_ms"] <= target_ms,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="BrainRush worker startup benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="cold starts to measure")
+    parser.add_argument("--workers", type=int, default=4, help="forked workers to measure")
+    parser.add_argument("--target-ms", type=float, default=TARGET_MS)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.runs, args.workers, args.target_ms)
+    if args.json:
+        print(json.dumps(report, indent=2, sort_keys=True))
+    else:
+        cold = report["cold"]
+        print(f"Interpreter alone: {cold['interpreter_ms']:.1f} ms")
+        print(f"Cold worker: import {cold['import_ms']:.1f} ms + create_app {cold['create_app_ms']:.1f} ms "
+              f"+ first request {cold['first_request_ms']:.1f} ms = {cold['boot_ms']:.1f} ms")
+        if report["preload"]:
+            print(f"Preloaded worker (fork + first request): {report['preload']['boot_ms']:.1f} ms "
+                  f"(max {report['preload']['max_ms']:.1f} ms)")
+        print(f"Target {args.target_ms:.0f} ms: cold {'ok' if report['cold_ok'] else 'missed'}, "
+              f"preload {'ok' if report['preload_ok'] else 'missed'}")
+    return 0 if report["preload_ok"] or report["cold_ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
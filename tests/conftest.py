@@ -140,4 +140,94 @@ def sample_game_results(app, test_user):
 def shop_items(app):
     """Fixture для отримання товарів магазину"""
     with app.app_context():
-        return models.get_all_shop_items()
\ No newline at end of file
+        return models.get_all_shop_items()
+
+@pytest.fixture
+def game_token(app, test_user):
+    """Fixture для видачі токенів ігрових сесій для test_user"""
+    from app.games.session import issue_token
+
+    def issue(game, level):
+        return issue_token(app.secret_key, game, level, test_user["id"])
+    return issue
+
+@pytest.fixture
+def game_result(app, game_token):
+    """
+    Fixture для побудови коректного результату гри з токеном сесії
+    Для Arithmetic та Sequence Recall додає правильні відповіді на раунди пулу,
+    для Color Rush та Tapping Memory — транскрипт, що дає рівно score балів
+    """
+    import math
+    from app.games import pools
+    from app.games.session import verify_token
+
+    def build(game, level, score=0, **fields):
+        token = game_token(game, level)
+        payload = {"level": level, "score": score, "token": token}
+        if game in pools.POOLED_GAMES:
+            nonce = verify_token(app.secret_key, token, 60).nonce
+            round_pools = pools.get_pools(app.secret_key)
+            if game == "arithmetic":
+                correct = math.ceil(score / (pools.ARITHMETIC_BASE_POINTS[level] * 3))
+                indexes = round_pools.arithmetic_indexes(level, nonce, correct)
+                payload["answers"] = [round_pools.arithmetic[level].answer(i) for i in indexes]
+                payload["rounds"] = max(correct, 1)
+            else:
+                correct, points = 0, 0
+                while points < score:
+                    points += pools.sequence_round_points(level, pools.MIN_SEQUENCE_LENGTH + correct)
+                    correct += 1
+                assert points == score, "score is not reachable in Sequence Recall"
+                payload["answers"] = round_pools.rounds(game, level, nonce, correct) + [""]
+                payload["rounds"] = correct + 1
+        elif game == "color_rush":
+            payload.update(_color_rush_transcript(level, score))
+        else:
+            payload.update(_tapping_transcript(level, score))
+        payload.update(fields)
+        return payload
+    return build
+
+
+def _color_rush_transcript(level, score):
+    """k правильних відповідей (і хибна в кінці, якщо раундів менше 10)"""
+    from app.games import transcripts as t
+    index = ("easy", "medium", "hard").index(level)
+    base, limit, penalty = (int(t.COLOR_RUSH_BASE[index]), t.COLOR_RUSH_LIMIT_MS[index],
+                            int(t.COLOR_RUSH_PENALTY[index]))
+    max_extra = int(base / 2 * 0.9)
+    for correct in range(10, -1, -1):
+        total = score if correct == 10 else score + penalty
+        if correct * base <= total <= correct * (base + max_extra) and (correct or score == 0):
+            break
+    else:
+        raise AssertionError("score is not reachable in Color Rush")
+    rt, ok = [], []
+    extra = total - correct * base
+    for i in range(correct):
+        gain = extra // correct + (i < extra % correct)
+        # Невеликий розкид у межах округлення, щоб не виглядати ботом
+        rt.append(limit - gain * 2 * limit / base - (i % 5) * 0.08 * limit / base)
+        ok.append(1)
+    if correct < 10:
+        rt.append(limit / 2)
+        ok.append(0)
+    return {"transcript": {"rt": rt, "ok": ok}, "rounds": 10}
+
+
+def _tapping_transcript(level, score):
+    """Правильні раунди довжиною 2, 3, ... та хибна остання спроба"""
+    from app.games import transcripts as t
+    base = int(t.TAPPING_BASE[("easy", "medium", "hard").index(level)])
+    rt, ok, points = [], [], 0
+    while points < score:
+        length = len(rt) + 2
+        points += base + length * 10
+        rt.append(length * (300 + 45 * (len(rt) % 4)))
+        ok.append(1)
+    assert points == score, "score is not reachable in Tapping Memory"
+    time_spent = sum(rt) / 1000
+    rt.append(1000)
+    ok.append(0)
+    return {"transcript": {"rt": rt, "ok": ok}, "rounds": len(rt), "time": time_spent}
@@ -0,0 +1,173 @@
+"""
+Тести аналітики адмін-панелі
+Покриває: читання game_results і transactions у стовпці NumPy,
+векторні групування звіту, кеш з TTL, дочитування нових рядків,
+перечитування після видалень, сторінку /admin/
+"""
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from app.db import models
+from app.games import analytics
+from app.games.registry import GAMES, LEVELS
+
+
+def _insert_result(user_id, game_name, level, score, time_spent, created_at):
+    conn = models.get_db_connection()
+    conn.execute(
+        "INSERT INTO game_results (user_id, game_name, level, score, time_spent, rounds, coins_earned, created_at) "
+        "VALUES (?, ?, ?, ?, ?, 1, ?, ?)",
+        (user_id, game_name, level, score, time_spent, max(1, score // 10), created_at.isoformat())
+    )
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def history(app):
+    """Два гравці з результатами за сьогодні та вчора"""
+    today = datetime.utcnow().replace(hour=12)
+    yesterday = today - timedelta(days=1)
+    with app.app_context():
+        alice = models.create_user("alice", "password123")
+        bob = models.create_user("bob", "password123")
+        _insert_result(alice, "arithmetic", "easy", 100, 30.0, yesterday)
+        _insert_result(alice, "arithmetic", "hard", 300, 50.5, today)
+        _insert_result(alice, "arithmetic", "easy", 200, 10.0, today)
+        _insert_result(bob, "color_rush", "medium", 90, 20.0, today)
+        _insert_result(bob, "retired_game", "easy", 10, 5.0, today)
+        models.update_user_coins(alice, 40, "gift")
+        models.purchase_item(alice, models.get_all_shop_items()[0]["id"])
+    return {"alice": alice, "bob": bob, "today": today.date()}
+
+
+class TestResultColumns:
+    """Тести читання таблиць у стовпці"""
+
+    def test_columns(self, app, history, monkeypatch):
+        """Тест що стовпці збігаються з рядками при читанні кількома діапазонами id"""
+        monkeypatch.setattr(models, "COLUMN_CHUNK_ROWS", 2)
+        with app.app_context():
+            columns = models.get_game_result_columns(tuple(GAMES), LEVELS)
+        assert list(columns["id"]) == [1, 2, 3, 4, 5]
+        assert list(columns["user_id"]) == [history["alice"]] * 3 + [history["bob"]] * 2
+        assert list(columns["game"]) == [0, 0, 0, 2, -1]
+        assert list(columns["level"]) == [0, 2, 0, 1, 0]
+        assert list(columns["score"]) == [100, 300, 200, 90, 10]
+        assert list(columns["time_ms"]) == [30000, 50500, 10000, 20000, 5000]
+        today = (history["today"] - datetime(1970, 1, 1).date()).days
+        assert list(columns["day"]) == [today - 1] + [today] * 4
+
+    def test_tail(self, app, history):
+        """Тест читання лише рядків після after_id"""
+        with app.app_context():
+            columns = models.get_game_result_columns(tuple(GAMES), LEVELS, after_id=3)
+            empty = models.get_game_result_columns(tuple(GAMES), LEVELS, after_id=5)
+        assert list(columns["id"]) == [4, 5]
+        assert len(empty["id"]) == 0 and empty["score"].dtype == np.int64
+
+    def test_transaction_columns(self, app, history):
+        """Тест стовпців транзакцій з індексом типу"""
+        with app.app_context():
+            columns = models.get_transaction_columns(analytics.TRANSACTION_TYPES)
+        assert list(columns["type"]) == [3, 2]
+        assert columns["amount"][0] == 40 and columns["amount"][1] < 0
+
+    def test_row_count_rejects_unknown_table(self, app):
+        """Тест що назва таблиці обмежена відомими"""
+        with app.app_context():
+            with pytest.raises(ValueError):
+                models.get_row_count("users", 10)
+
+
+class TestReport:
+    """Тести обчислення звіту"""
+
+    @pytest.fixture
+    def report(self, app, history):
+        with app.app_context():
+            results = models.get_game_result_columns(tuple(GAMES), LEVELS)
+            transactions = models.get_transaction_columns(analytics.TRANSACTION_TYPES)
+        return analytics.compute_report(results, transactions, today=history["today"], days=7)
+
+    def test_totals_and_active_players(self, report, history):
+        """Тест підсумків і щоденних активних гравців"""
+        assert report["totals"]["results"] == 5
+        assert report["totals"]["players"] == 2
+        assert report["days"][-1] == history["today"].isoformat()
+        assert report["dau"] == [0, 0, 0, 0, 0, 1, 2]
+
+    def test_games_per_user(self, report):
+        """Тест розподілу кількості ігор на гравця"""
+        games_per_user = report["games_per_user"]
+        assert games_per_user["mean"] == 2.5
+        assert games_per_user["max"] == 3
+        assert {b["label"]: b["players"] for b in games_per_user["buckets"]}["2–4"] == 2
+
+    def test_score_trends_and_time(self, report):
+        """Тест середнього рахунку за днями та часу на рівні"""
+        assert report["score_trends"]["arithmetic"][-2:] == [100.0, 250.0]
+        assert report["score_trends"]["sequence_recall"][-1] is None
+        assert report["time_per_level"]["arithmetic"] == {"easy": 20.0, "medium": None, "hard": 50.5}
+        assert report["time_per_level"]["color_rush"]["medium"] == 20.0
+
+    def test_coin_flows(self, report):
+        """Тест надходжень і витрат монет"""
+        flows = report["coin_flows"]
+        assert flows["by_type"]["coins_update"] == {"in": 40, "out": 0}
+        assert flows["by_type"]["purchase"]["in"] == 0
+        assert flows["outflow"][-1] == flows["by_type"]["purchase"]["out"] > 0
+        assert sum(flows["inflow"]) == report["totals"]["coins_in"] == 40
+        assert "game_reward" not in flows["by_type"]
+
+    def test_empty_database(self, app):
+        """Тест звіту для бази без результатів"""
+        with app.app_context():
+            results = models.get_game_result_columns(tuple(GAMES), LEVELS)
+            transactions = models.get_transaction_columns(analytics.TRANSACTION_TYPES)
+        report = analytics.compute_report(results, transactions)
+        assert report["totals"] == {"results": 0, "players": 0, "coins_in": 0, "coins_out": 0}
+        assert report["games_per_user"]["mean"] is None
+        assert report["dau"] == [0] * analytics.TREND_DAYS
+
+
+class TestAdminAnalytics:
+    """Тести кешу та дочитування"""
+
+    def test_cached_within_ttl(self, app, history):
+        """Тест що звіт кешується, а refresh дочитує нові результати"""
+        store = analytics.AdminAnalytics(ttl=3600)
+        with app.app_context():
+            first = store.report()
+            models.save_game_result(history["bob"], "arithmetic", "easy", 50, 10.0)
+            assert store.report() is first
+            refreshed = store.report(refresh=True)
+        assert refreshed["totals"]["results"] == 6
+        assert store._results.last_id == 6
+
+    def test_reload_after_delete(self, app, history):
+        """Тест що видалення акаунта перечитує стовпці повністю"""
+        store = analytics.AdminAnalytics(ttl=0)
+        with app.app_context():
+            store.report()
+            models.delete_user_account(history["bob"])
+            report = store.report()
+        assert report["totals"]["results"] == 3
+        assert report["totals"]["players"] == 1
+
+
+class TestAdminDashboard:
+    """Тести сторінки /admin/"""
+
+    def test_dashboard_shows_analytics(self, app, history, authenticated_admin):
+        """Тест що панель показує аналітику"""
+        response = authenticated_admin.get('/admin/?refresh=1')
+        assert response.status_code == 200
+        html = response.get_data(as_text=True)
+        assert "Analytics" in html
+        assert "Average time per level" in html
+        assert "50.5" in html
+
+    def test_dashboard_requires_admin(self, authenticated_client):
+        """Тест що аналітика недоступна звичайному користувачу"""
+        assert authenticated_client.get('/admin/').status_code == 403
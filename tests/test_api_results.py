@@ -0,0 +1,117 @@
+"""
+Integration тести для API результатів ігор
+Пакетне збереження результатів
+"""
+import json
+import pytest
+from app.db import models
+
+
+def batch(*results):
+    return {"results": list(results)}
+
+
+@pytest.fixture
+def result(game_result):
+    """Результат гри з дійсним токеном сесії та відповідями"""
+    def make(game, level, **fields):
+        return {"game": game, **game_result(game, level, **fields)}
+    return make
+
+
+class TestBatchResultsAPI:
+    """Тести для POST /api/v1/results/batch"""
+
+    def test_batch_saves_all_results(self, authenticated_client, app, test_user, result):
+        """Тест збереження пакета з різних ігор"""
+        with app.app_context():
+            initial_coins = models.get_user_coins(test_user["id"])
+
+        response = authenticated_client.post('/api/v1/results/batch', json=batch(
+            result("arithmetic", "easy", score=100, time=30.5, rounds=10),
+            result("color_rush", "hard", score=250, time=60, rounds=10),
+            result("sequence_recall", "medium", score=0, time=12.0),
+        ))
+
+        assert response.status_code == 201
+        data = json.loads(response.data)
+        assert data["saved"] == 3
+        assert data["coins_earned"] == [10, 25, 1]
+        assert data["total_coins_earned"] == 36
+
+        with app.app_context():
+            assert models.get_total_games(test_user["id"]) == 3
+            assert models.get_user_coins(test_user["id"]) == initial_coins + 36
+            rewards = [t for t in models.get_user_transactions(test_user["id"])
+                       if t["transaction_type"] == "game_reward"]
+            assert len(rewards) == 3
+
+    def test_batch_accepts_bare_array(self, authenticated_client, result):
+        """Тест що пакет можна надіслати як масив"""
+        response = authenticated_client.post('/api/v1/results/batch', json=[
+            result("tapping_memory", "easy", score=60)
+        ])
+        assert response.status_code == 201
+
+    def test_batch_is_atomic(self, authenticated_client, app, test_user, result):
+        """Тест що пакет з помилкою не зберігає нічого"""
+        response = authenticated_client.post('/api/v1/results/batch', json=batch(
+            result("arithmetic", "easy", score=100, time=30),
+            {"game": "chess", "level": "easy", "score": 100, "time": 30},
+            result("arithmetic", "easy", score=-5, time=30),
+        ))
+
+        assert response.status_code == 400
+        data = json.loads(response.data)
+        assert [d["index"] for d in data["details"]] == [1, 2]
+
+        with app.app_context():
+            assert models.get_total_games(test_user["id"]) == 0
+
+    @pytest.mark.parametrize("payload", [
+        {},
+        {"results": []},
+        {"results": "arithmetic"},
+        {"results": [{"game": "arithmetic", "score": "100"}]},
+        {"results": [{"game": "arithmetic", "score": True}]},
+        {"results": [{"game": "arithmetic", "rounds": 0}]},
+    ])
+    def test_batch_invalid_payload(self, authenticated_client, payload):
+        """Тест валідації некоректних пакетів"""
+        response = authenticated_client.post('/api/v1/results/batch', json=payload)
+        assert response.status_code == 400
+
+    def test_batch_requires_session_tokens(self, authenticated_client, result, game_token):
+        """Тест що результати без дійсного токена відхиляються"""
+        response = authenticated_client.post('/api/v1/results/batch', json=batch(
+            {"game": "arithmetic", "level": "easy", "score": 10},
+            {"game": "arithmetic", "level": "easy", "score": 10, "token": game_token("arithmetic", "hard")},
+            {"game": "arithmetic", "level": "easy", "score": 10, "token": "forged"},
+        ))
+        assert response.status_code == 400
+        assert [d["index"] for d in response.get_json()["details"]] == [0, 1, 2]
+
+    def test_batch_rejects_replayed_tokens(self, authenticated_client, app, test_user, result):
+        """Тест що токен не можна використати повторно, навіть в одному пакеті"""
+        item = result("arithmetic", "easy", score=10)
+        response = authenticated_client.post('/api/v1/results/batch', json=batch(item, item))
+        assert response.status_code == 400
+        assert [d["index"] for d in response.get_json()["details"]] == [1]
+
+        assert authenticated_client.post('/api/v1/results/batch', json=batch(item)).status_code == 201
+        assert authenticated_client.post('/api/v1/results/batch', json=batch(item)).status_code == 400
+        with app.app_context():
+            assert models.get_total_games(test_user["id"]) == 1
+
+    def test_batch_too_large(self, authenticated_client):
+        """Тест обмеження розміру пакета"""
+        item = {"game": "arithmetic", "level": "easy", "score": 10, "time": 1}
+        response = authenticated_client.post('/api/v1/results/batch', json=batch(*[item] * 501))
+        assert response.status_code == 400
+
+    def test_batch_unauthenticated(self, client):
+        """Тест що пакет вимагає авторизації"""
+        response = client.post('/api/v1/results/batch', json=batch(
+            {"game": "arithmetic", "level": "easy", "score": 10, "time": 1}
+        ))
+        assert response.status_code == 401
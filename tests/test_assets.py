@@ -0,0 +1,135 @@
+"""
+Тести збірки статичних файлів
+Покриває: мінімізацію CSS/JS, назви з хешем і маніфест, .gz, очищення
+старих збірок, asset_url у шаблонах і кешування файлів збірки
+"""
+import gzip
+import json
+import os
+import shutil
+import subprocess
+import pytest
+from app.utils import assets
+
+
+@pytest.fixture
+def static_dir(tmp_path):
+    path = tmp_path / "static"
+    shutil.copytree(assets.STATIC_DIR, path, ignore=shutil.ignore_patterns(assets.BUILD_DIR))
+    return str(path)
+
+
+def _manifest(static_dir):
+    return assets.load_manifest(os.path.join(static_dir, assets.BUILD_DIR, assets.MANIFEST_NAME))
+
+
+class TestMinify:
+    """Тести мінімізатора"""
+
+    def test_css(self):
+        """Тест що коментарі та пробіли прибираються, а рядки й селектори лишаються"""
+        source = '/* тема */\na  :hover > b {\n  content: "a  ;  }";\n  margin: 0 auto;\n}\n@media (max-width: 600px) {\n  a { color: red; }\n}\n'
+        assert assets.minify_css(source) == (
+            'a :hover>b{content: "a  ;  }";margin: 0 auto}@media (max-width: 600px){a{color: red}}\n'
+        )
+
+    def test_js_keeps_strings_regex_and_asi(self):
+        """Тест що рядки, шаблони й regex не змінюються, а переноси для ASI лишаються"""
+        source = (
+            "// коментар\n"
+            "const a = 'x  // y'\n"
+            "const b = `${a}  /* z */`\n"
+            "const re = /[/]+\\s*/g;  /* блок */\n"
+            "let c = a / 2\n"
+            "return /x/.test(b)\n"
+            "[1, 2].forEach(f)\n"
+        )
+        assert assets.minify_js(source) == (
+            "const a='x  // y'\n"
+            "const b=`${a}  /* z */`\n"
+            "const re=/[/]+\\s*/g;let c=a / 2\n"
+            "return /x/.test(b)\n"
+            "[1,2].forEach(f)\n"
+        )
+
+    @pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+    def test_built_js_is_valid(self, static_dir):
+        """Тест що мінімізовані скрипти ігор розбираються node"""
+        assets.build(static_dir)
+        for name, target in _manifest(static_dir).items():
+            if name.endswith(".js"):
+                result = subprocess.run(["node", "--check", os.path.join(static_dir, target)], capture_output=True, text=True)
+                assert result.returncode == 0, (name, result.stderr)
+
+
+class TestBuild:
+    """Тести збірки"""
+
+    def test_hashed_files_and_manifest(self, static_dir):
+        """Тест що кожен CSS/JS потрапляє в маніфест з хешем у назві та .gz поруч"""
+        report = assets.build(static_dir)
+        manifest = _manifest(static_dir)
+        assert {"css/style.css", "css/games/arithmetic.css", "js/arithmetic.js"} <= set(manifest)
+        assert set(report) == set(manifest)
+        target = manifest["js/arithmetic.js"]
+        assert target.startswith("dist/js/arithmetic.") and target.endswith(".js")
+        path = os.path.join(static_dir, target)
+        with open(path, "rb") as f, gzip.open(path + ".gz") as gz:
+            assert gz.read() == f.read()
+        assert report["js/arithmetic.js"]["minified"] < report["js/arithmetic.js"]["source"]
+
+    def test_deterministic(self, static_dir):
+        """Тест що повторна збірка без змін дає ті самі файли"""
+        assets.build(static_dir)
+        first = _manifest(static_dir)
+        with open(os.path.join(static_dir, first["css/style.css"]) + ".gz", "rb") as f:
+            gz = f.read()
+        assets.build(static_dir)
+        assert _manifest(static_dir) == first
+        with open(os.path.join(static_dir, first["css/style.css"]) + ".gz", "rb") as f:
+            assert f.read() == gz
+
+    def test_bundles_and_cleanup(self, static_dir):
+        """Тест склеювання бандла і що лишається лише попередня збірка"""
+        bundles = {"css/game.css": ("css/games.css", "css/games/arithmetic.css")}
+        targets = []
+        for rule in ("a{color:red}", "a{color:blue}", "a{color:green}"):
+            with open(os.path.join(static_dir, "css/games.css"), "w") as f:
+                f.write(rule)
+            assets.build(static_dir, bundles)
+            targets.append(_manifest(static_dir)["css/game.css"])
+        with open(os.path.join(static_dir, targets[-1])) as f:
+            assert f.read().startswith("a{color:green}\n")
+        exists = [os.path.exists(os.path.join(static_dir, t)) for t in targets]
+        assert exists == [False, True, True]
+
+    def test_cli(self, static_dir, capsys):
+        """Тест командного рядка зі звітом про розміри"""
+        assert assets.main(["build", "--static", static_dir]) == 0
+        assert "js/arithmetic.js:" in capsys.readouterr().out
+
+
+class TestAssetUrl:
+    """Тести asset_url і кешування"""
+
+    def test_falls_back_to_source(self, app, tmp_path):
+        """Тест що без збірки asset_url повертає вихідний файл"""
+        app.extensions["asset_manifest"] = assets.AssetManifest(str(tmp_path / "missing.json"))
+        with app.test_request_context():
+            assert assets.asset_url("css/style.css") == "/static/css/style.css"
+
+    def test_resolves_through_manifest(self, app, client, tmp_path):
+        """Тест що сторінки посилаються на файли збірки, а маніфест перечитується після збірки"""
+        path = tmp_path / "manifest.json"
+        app.extensions["asset_manifest"] = assets.AssetManifest(str(path))
+        path.write_text(json.dumps({"css/style.css": "dist/css/style.abc.css"}))
+        assert "/static/dist/css/style.abc.css" in client.get('/').get_data(as_text=True)
+        path.write_text(json.dumps({"css/style.css": "dist/css/style.defgh.css"}))
+        os.utime(path, ns=(0, 10 ** 18))
+        assert "/static/dist/css/style.defgh.css" in client.get('/').get_data(as_text=True)
+
+    def test_build_files_cached_forever(self, app):
+        """Тест що файли збірки кешуються на рік, а вихідні — за замовчуванням"""
+        with app.app_context():
+            assert app.get_send_file_max_age("dist/css/style.abc.css") == assets.IMMUTABLE_MAX_AGE
+            assert app.get_send_file_max_age("css/style.css") is None
@@ -0,0 +1,143 @@
+"""
+Тести гарячого резервного копіювання
+Покриває: повну копію через backup API з перевіркою і стисненням,
+ротацію, відновлення, інкрементний архів кадрів WAL, CLI
+"""
+import gzip
+import os
+import sqlite3
+import pytest
+from app.db import backup, models
+
+
+def _dump(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {
+            table: conn.execute(f"SELECT * FROM {table} ORDER BY id").fetchall()
+            for table in ("users", "game_results", "transactions")
+        }
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def players(app):
+    """Гравець з кількома результатами"""
+    with app.app_context():
+        user_id = models.create_user("alice", "password123")
+        for score in (10, 20, 30):
+            models.save_game_result(user_id, "arithmetic", "easy", score, 12.5)
+    return user_id
+
+
+@pytest.fixture
+def archiver(app, tmp_path):
+    archiver = backup.WalArchiver(models.DB_PATH, str(tmp_path))
+    archiver.start()
+    yield archiver
+    archiver.close()
+
+
+class TestFullBackup:
+    """Тести повної копії"""
+
+    def test_backup_and_restore(self, app, players, tmp_path):
+        """Тест що стиснена копія відновлюється в ту саму базу"""
+        path = backup.full_backup(models.DB_PATH, str(tmp_path), pages=1, sleep=0)
+        assert path.endswith(".db.gz")
+        assert gzip.open(path).read(16) == b"SQLite format 3\x00"
+        restored = backup.restore(path, str(tmp_path / "restored.db"))
+        assert _dump(restored) == _dump(models.DB_PATH)
+
+    def test_retention(self, app, players, tmp_path):
+        """Тест що зберігаються лише keep найновіших копій"""
+        paths = [backup.full_backup(models.DB_PATH, str(tmp_path), keep=2, compress=False) for _ in range(3)]
+        assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(p) for p in paths[1:])
+
+    def test_corrupt_backup_rejected(self, app, tmp_path):
+        """Тест що пошкоджена копія не проходить перевірку і не відновлюється"""
+        corrupt = tmp_path / "brainrush-corrupt.db"
+        corrupt.write_bytes(b"SQLite format 3\x00" + b"\xff" * 4096)
+        with pytest.raises(backup.BackupError):
+            backup.check_integrity(str(corrupt))
+        with pytest.raises(backup.BackupError):
+            backup.restore(str(corrupt), str(tmp_path / "restored.db"))
+        assert not (tmp_path / "restored.db").exists()
+
+    def test_missing_database(self, tmp_path):
+        """Тест що відсутня база не підміняється порожньою"""
+        with pytest.raises(backup.BackupError):
+            backup.full_backup(str(tmp_path / "missing.db"), str(tmp_path / "out"))
+        assert not (tmp_path / "missing.db").exists()
+
+
+class TestWalArchiver:
+    """Тести інкрементного архіву"""
+
+    def test_start_switches_to_wal(self, archiver):
+        """Тест що архіватор переводить базу в WAL і робить базову копію"""
+        conn = models.get_db_connection()
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        conn.close()
+        assert sorted(os.listdir(archiver.generation)) == ["base.db.gz", "meta.json"]
+
+    def test_segments_scale_with_changes(self, archiver, players):
+        """Тест що сегмент містить лише змінені сторінки, а не всю базу"""
+        conn = models.get_db_connection()
+        conn.executemany(
+            "INSERT INTO game_results (user_id, game_name, level, score, time_spent, rounds, coins_earned, created_at) "
+            "VALUES (?, 'arithmetic', 'easy', ?, 1.0, 1, 1, '2026-03-01T12:00:00')", ((players, i) for i in range(20000))
+        )
+        conn.commit()
+        pages = conn.execute("PRAGMA page_count").fetchone()[0]
+        conn.close()
+        archiver.sync()
+        assert archiver.sync() == 0
+        models.save_game_result(players, "arithmetic", "hard", 40, 10.0)
+        frames = archiver.sync()
+        assert 0 < frames < 30 < pages / 10
+        assert f"{archiver._segment:08d}.wal.gz" in os.listdir(archiver.generation)
+
+    def test_restore_generation(self, app, archiver, players, tmp_path):
+        """Тест що базова копія плюс сегменти дають поточний стан бази, зокрема після перезапусків WAL"""
+        with app.app_context():
+            for round_ in range(5):
+                for i in range(300):
+                    models.save_game_result(players, "arithmetic", "medium", round_ * 1000 + i, 5.0)
+                models.update_user_coins(players, round_, "gift")
+                archiver.sync()
+            models.delete_user_account(players)
+            archiver.sync()
+        restored = backup.restore(archiver.generation, str(tmp_path / "restored.db"))
+        assert _dump(restored) == _dump(models.DB_PATH)
+
+    def test_broken_chain_detected(self, archiver, players):
+        """Тест що пропущений перезапуск WAL виявляється, а нове покоління відновлює архів"""
+        archiver.sync()
+        archiver._salt = (archiver._salt[0] + 7, 0)
+        models.save_game_result(players, "arithmetic", "easy", 1, 1.0)
+        with pytest.raises(backup.BackupError):
+            archiver.sync()
+        first = archiver.generation
+        assert archiver.new_generation() != first
+        assert archiver.sync() >= 0
+
+    def test_generations_pruned(self, archiver):
+        """Тест що зберігаються лише keep поколінь"""
+        archiver.keep = 1
+        archiver.new_generation()
+        assert os.listdir(archiver.root) == [os.path.basename(archiver.generation)]
+
+
+class TestBackupCLI:
+    """Тести командного рядка"""
+
+    def test_full_and_restore(self, app, players, tmp_path, capsys):
+        """Тест команд full і restore"""
+        assert backup.main(["--db", models.DB_PATH, "full", "--dest", str(tmp_path)]) == 0
+        path = capsys.readouterr().out.strip()
+        target = str(tmp_path / "restored.db")
+        assert backup.main(["restore", path, target]) == 0
+        assert _dump(target) == _dump(models.DB_PATH)
+        assert backup.main(["restore", path, target]) == 1
@@ -0,0 +1,155 @@
+"""
+Smoke-тести для бенчмарків
+Перевіряють, що генератор даних і сценарії працюють з поточним застосунком
+"""
+import json
+import sqlite3
+import subprocess
+import sys
+import pytest
+from benchmarks.seed import SeedConfig, seed_database
+from benchmarks.load import compare, percentile, run_benchmark
+
+
+class TestSeed:
+    """Тести генератора синтетичної бази"""
+
+    def test_seed_table_sizes(self, tmp_path):
+        """Тест що таблиці заповнюються заданою кількістю рядків"""
+        db_path = str(tmp_path / "bench.db")
+        seed_database(db_path, SeedConfig(users=20, results=500, transactions=300, purchases=10, feedback=5))
+
+        conn = sqlite3.connect(db_path)
+        counts = {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("users", "game_results", "transactions", "user_purchases", "feedback")
+        }
+        conn.close()
+        assert counts == {
+            "users": 20, "game_results": 500, "transactions": 300,
+            "user_purchases": 10, "feedback": 5
+        }
+
+    def test_seed_is_reproducible(self, tmp_path):
+        """Тест що однаковий seed дає однакові дані"""
+        scores = []
+        for name in ("a.db", "b.db"):
+            db_path = str(tmp_path / name)
+            seed_database(db_path, SeedConfig(users=10, results=200, seed=7))
+            conn = sqlite3.connect(db_path)
+            scores.append(conn.execute("SELECT user_id, game_name, score FROM game_results ORDER BY id").fetchall())
+            conn.close()
+        assert scores[0] == scores[1]
+
+
+class TestLoad:
+    """Тести навантажувального сценарію"""
+
+    def test_journeys_run_without_errors(self, tmp_path):
+        """Тест що всі кроки сценарію проходять без помилок"""
+        from app.db import models
+        original = models.DB_PATH
+        db_path = str(tmp_path / "bench.db")
+        seed_database(db_path, SeedConfig(users=5, results=100))
+        try:
+            report = run_benchmark(db_path, users=5, journeys=3)
+        finally:
+            models.DB_PATH = original
+
+        steps = report["endpoints"]
+        assert set(steps) == {"login", "games", "play", "start", "save_result", "leaderboard", "profile", "shop", "logout"}
+        assert all(s["errors"] == 0 for s in steps.values())
+        assert all(s["count"] == 3 for s in steps.values())
+
+    def test_percentile(self):
+        """Тест percentile методом найближчого рангу"""
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 95) == 95
+        assert percentile(values, 99) == 99
+        assert percentile([], 50) == 0.0
+
+    def test_compare_flags_regression(self):
+        """Тест виявлення регресії p95"""
+        baseline = {"endpoints": {"shop": {"p95_ms": 10.0}, "profile": {"p95_ms": 10.0}}}
+        report = {"endpoints": {"shop": {"p95_ms": 15.0}, "profile": {"p95_ms": 10.5}}}
+        assert compare(report, baseline, tolerance=0.2) == ["shop"]
+
+
+class TestModelsBench:
+    """Тести мікробенчмарків моделі"""
+
+    def test_every_model_function_has_case(self, app, test_user):
+        """Тест що кожна публічна функція models.py має мікробенчмарк"""
+        from benchmarks.models_bench import Fixture, build_cases, public_functions
+        with app.app_context():
+            from app.db import models
+            models.add_feedback(test_user["id"], "bench", "", "message")
+            covered = {case.name for case in build_cases(Fixture(users=1))}
+        assert set(public_functions()) <= covered
+
+    def test_scaling_slope(self):
+        """Тест оцінки нахилу масштабування"""
+        from benchmarks.models_bench import scaling_slope
+        linear = [(10_000, 1.0), (1_000_000, 100.0)]
+        constant = [(10_000, 1.0), (1_000_000, 1.0)]
+        assert scaling_slope(linear) == pytest.approx(1.0)
+        assert scaling_slope(constant) == pytest.approx(0.0)
+        assert scaling_slope([(10_000, 1.0)]) is None
+
+
+class TestLiveLeaderboard:
+    """Тести бенчмарку SSE-стріму"""
+
+    def test_fanout_reaches_every_connection(self):
+        """Тест що зміна доходить до всіх з'єднань під gevent (окремий процес через monkey-patching)"""
+        pytest.importorskip("gevent")
+        result = subprocess.run(
+            [sys.executable, "-m", "benchmarks.sse", "--connections", "200", "--idle", "0.1", "--json"],
+            capture_output=True, text=True, timeout=120
+        )
+        assert result.returncode == 0, result.stderr
+        report = json.loads(result.stdout)
+        assert report["subscribed"] == report["delivered"] == 200
+
+
+class TestAnalyticsBench:
+    """Тести бенчмарку аналітики адмін-панелі"""
+
+    def test_incremental_refresh(self, tmp_path):
+        """Тест що оновлення після вставки дочитує нові результати"""
+        from benchmarks.analytics import run_benchmark as run_analytics
+        db_path = str(tmp_path / "bench.db")
+        seed_database(db_path, SeedConfig(users=20, results=500))
+        report = run_analytics(db_path, tail=50)
+        assert report["results"] == 500
+        assert report["incremental_ok"]
+
+
+class TestApiJsonBench:
+    """Тести бенчмарку серіалізації /api/v1"""
+
+    def test_transaction_page(self):
+        """Тест що обидва шляхи дають однакові дані і звіт містить усі етапи"""
+        from benchmarks.api_json import run_benchmark as run_api_json
+        report = run_api_json(rows=100, rounds=2)
+        assert report["rows"] == 100
+        assert set(report["encode_ms"]) == set(report["request_ms"]) == {"stdlib", "orjson", "msgpack"}
+        assert report["bytes"]["msgpack"] < report["bytes"]["orjson"]
+        assert report["new_path_ms"] > 0
+
+
+class TestCompressionBench:
+    """Тести бенчмарку стиснення відповідей"""
+
+    def test_public_pages(self, tmp_path):
+        """Тест що кожна сторінка стискається і повторні запити беруть тіло з кешу"""
+        from benchmarks.compression import PAGES, run_benchmark as run_compression
+        db_path = str(tmp_path / "bench.db")
+        seed_database(db_path, SeedConfig(users=20, results=500))
+        report = run_compression(db_path, rounds=2)
+        assert set(report["pages"]) == set(PAGES)
+        for result in report["pages"].values():
+            assert result["bytes"]["gzip"] < result["bytes"]["identity"]
+            assert set(result["request_ms"]) == {"identity", "dynamic", "cached"}
+        assert report["cache_hits"] >= 2 * len(PAGES)
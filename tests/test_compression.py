@@ -0,0 +1,201 @@
+"""
+Тести стиснення відповідей
+Покриває: вибір кодування за Accept-Encoding, поріг розміру, Vary,
+кеш стиснутих тіл для публічних сторінок і пропуск потокових відповідей
+"""
+import gzip
+import pytest
+from app import create_app
+from app.utils import compression
+
+GZIP = {"Accept-Encoding": "gzip"}
+
+
+def _fake_codec(marker):
+    """Кодування для тестів: тіло стискається gzip і позначається маркером"""
+    return (lambda data, level: marker + gzip.compress(data, mtime=0), 1, 1)
+
+
+class TestCompressedCache:
+    """Тести LRU стиснутих тіл"""
+
+    def test_lru_eviction(self):
+        """Тест що найдавніше використаний запис витісняється першим"""
+        cache = compression.CompressedCache(max_entries=2)
+        cache.set("a", b"1")
+        cache.set("b", b"2")
+        assert cache.get("a") == b"1"
+        cache.set("c", b"3")
+        assert cache.get("b") is None
+        assert cache.get("a") == b"1" and cache.get("c") == b"3"
+        assert (cache.hits, cache.misses) == (3, 1)
+
+
+class TestCompression:
+    """Тести middleware стиснення"""
+
+    def test_gzip_page(self, client):
+        """Тест що публічна сторінка стискається gzip і розпаковується в той самий HTML"""
+        plain = client.get('/leaderboard/')
+        response = client.get('/leaderboard/', headers=GZIP)
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response.vary
+        assert int(response.headers["Content-Length"]) == len(response.data) < len(plain.data)
+        assert gzip.decompress(response.data) == plain.data
+
+    def test_identity_without_accept_encoding(self, client):
+        """Тест що без Accept-Encoding відповідь не стискається, але має Vary"""
+        response = client.get('/leaderboard/')
+        assert "Content-Encoding" not in response.headers
+        assert "Accept-Encoding" in response.vary
+        assert b"<html" in response.data.lower()
+
+    @pytest.mark.parametrize("accept", ["identity", "gzip;q=0", "br, zstd"])
+    def test_unacceptable_encodings(self, client, accept, monkeypatch):
+        """Тест що кодування, яке клієнт не приймає або якого немає, не використовується"""
+        monkeypatch.setattr(compression, "CODECS", {"gzip": compression.CODECS["gzip"]})
+        response = client.get('/leaderboard/', headers={"Accept-Encoding": accept})
+        assert "Content-Encoding" not in response.headers
+
+    def test_below_threshold(self, client):
+        """Тест що відповідь, меншу за поріг, не стискає навіть клієнт з gzip"""
+        response = client.get('/api/v1/user/profile', headers=GZIP)
+        assert response.status_code == 401
+        assert "Content-Encoding" not in response.headers
+        assert "Accept-Encoding" in response.vary
+
+    def test_threshold_from_config(self, app):
+        """Тест що поріг береться з COMPRESS_MIN_SIZE"""
+        @app.route('/_small')
+        def small_page():
+            return "z" * 500
+
+        client = app.test_client()
+        assert "Content-Encoding" not in client.get('/_small', headers=GZIP).headers
+        app.config["COMPRESS_MIN_SIZE"] = 100
+        response = client.get('/_small', headers=GZIP)
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(response.data) == b"z" * 500
+
+    def test_not_smaller_sent_as_is(self, app):
+        """Тест що тіло, яке стиснення не зменшує, віддається без стиснення"""
+        app.config["COMPRESS_MIN_SIZE"] = 10
+        response = app.test_client().get('/api/v1/user/profile', headers=GZIP)
+        assert "Content-Encoding" not in response.headers
+        assert response.get_json() == {"error": "Authentication required"}
+
+    def test_server_preference(self, client, monkeypatch):
+        """Тест що за однакової q обирається кодування, яке сервер ставить першим (br, zstd, gzip)"""
+        codecs = {"br": _fake_codec(b"BR"), "zstd": _fake_codec(b"ZS"), "gzip": compression.CODECS["gzip"]}
+        monkeypatch.setattr(compression, "CODECS", codecs)
+        assert client.get('/leaderboard/', headers={"Accept-Encoding": "gzip, zstd, br"}).headers["Content-Encoding"] == "br"
+        assert client.get('/leaderboard/', headers={"Accept-Encoding": "gzip, zstd"}).headers["Content-Encoding"] == "zstd"
+        response = client.get('/leaderboard/', headers={"Accept-Encoding": "br;q=0.5, gzip"})
+        assert response.headers["Content-Encoding"] == "gzip"
+
+    @pytest.mark.parametrize("module, encoding", [("brotli", "br"), ("zstandard", "zstd")])
+    def test_optional_codecs(self, client, module, encoding):
+        """Тест br і zstd, якщо встановлено відповідний пакет"""
+        pytest.importorskip(module)
+        response = client.get('/leaderboard/', headers={"Accept-Encoding": encoding})
+        assert response.headers["Content-Encoding"] == encoding
+
+    def test_cached_body_reused(self, app, client, monkeypatch):
+        """Тест що та сама публічна сторінка стискається один раз"""
+        calls = []
+        compress, dynamic_level, cached_level = compression.CODECS["gzip"]
+        monkeypatch.setitem(compression.CODECS, "gzip", (
+            lambda data, level: calls.append(level) or compress(data, level), dynamic_level, cached_level
+        ))
+        first = client.get('/api/swagger.yaml', headers=GZIP)
+        second = client.get('/api/swagger.yaml', headers=GZIP)
+        assert first.data == second.data
+        assert calls == [cached_level]
+        assert app.extensions["compression_cache"].hits == 1
+
+    def test_private_response_not_cached(self, app, monkeypatch):
+        """Тест що відповіді з no-store або Set-Cookie стискаються швидким рівнем і не кешуються"""
+        calls = []
+        compress, dynamic_level, cached_level = compression.CODECS["gzip"]
+        monkeypatch.setitem(compression.CODECS, "gzip", (
+            lambda data, level: calls.append(level) or compress(data, level), dynamic_level, cached_level
+        ))
+        app.config["COMPRESS_MIN_SIZE"] = 10
+
+        @app.route('/_private')
+        def private_page():
+            return "x" * 100, {"Cache-Control": "no-store"}
+
+        @app.route('/_cookie')
+        def cookie_page():
+            response = app.make_response("x" * 100)
+            response.set_cookie("seen", "1")
+            return response
+
+        client = app.test_client()
+        for path in ('/_private', '/_private', '/_cookie'):
+            response = client.get(path, headers=GZIP)
+            assert gzip.decompress(response.data) == b"x" * 100
+        assert calls == [dynamic_level] * 3
+        assert len(app.extensions["compression_cache"]) == 0
+
+    def test_authenticated_page_not_cached(self, app, authenticated_client, monkeypatch):
+        """Тест що сторінка залогіненого користувача стискається швидким рівнем і не кешується"""
+        calls = []
+        compress, dynamic_level, cached_level = compression.CODECS["gzip"]
+        monkeypatch.setitem(compression.CODECS, "gzip", (
+            lambda data, level: calls.append(level) or compress(data, level), dynamic_level, cached_level
+        ))
+        response = authenticated_client.get('/leaderboard/', headers=GZIP)
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert calls == [dynamic_level]
+        assert len(app.extensions["compression_cache"]) == 0
+
+    def test_public_page_cached_for_authenticated(self, app, test_user):
+        """Тест що явний Cache-Control: public кешується і для залогіненого користувача"""
+        app.config["COMPRESS_MIN_SIZE"] = 10
+
+        @app.route('/_public')
+        def public_page():
+            return "p" * 100, {"Cache-Control": "public, max-age=60"}
+
+        client = app.test_client()
+        client.post('/auth/login', data={"username": test_user["username"], "password": test_user["password"]})
+        app.extensions["compression_cache"].clear()
+        client.get('/_public', headers=GZIP)
+        assert len(app.extensions["compression_cache"]) == 1
+
+    def test_etag_per_encoding(self, app, client):
+        """Тест що стиснуте представлення має власний ETag"""
+        app.config["COMPRESS_MIN_SIZE"] = 10
+
+        @app.route('/_tagged')
+        def tagged():
+            return "y" * 100, {"ETag": '"abc"'}
+
+        assert client.get('/_tagged').headers["ETag"] == '"abc"'
+        assert client.get('/_tagged', headers=GZIP).headers["ETag"] == '"abc-gzip"'
+
+    def test_stream_not_compressed(self, app, client):
+        """Тест що потік рейтингу (SSE) не буферизується для стиснення"""
+        app.config["ENABLE_LIVE_LEADERBOARD"] = True
+        response = client.get('/leaderboard/stream', headers=GZIP, buffered=False)
+        try:
+            assert response.mimetype == "text/event-stream"
+            assert "Content-Encoding" not in response.headers
+        finally:
+            response.close()
+
+    def test_static_file_not_compressed(self, client):
+        """Тест що файли з send_file віддаються як є (у продакшні їх віддає nginx)"""
+        response = client.get('/static/css/style.css', headers=GZIP)
+        assert response.status_code == 200
+        assert "Content-Encoding" not in response.headers
+        response.close()
+
+    def test_disabled(self):
+        """Тест що ENABLE_COMPRESSION=False вимикає стиснення"""
+        app = create_app({"TESTING": True, "ENABLE_COMPRESSION": False})
+        response = app.test_client().get('/api/swagger.yaml', headers=GZIP)
+        assert "Content-Encoding" not in response.headers
+        assert "compression_cache" not in app.extensions
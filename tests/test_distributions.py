@@ -0,0 +1,136 @@
+"""
+Тести розподілів рахунків
+Покриває: точність DDSketch, злиття та серіалізацію ескізів,
+оновлення при збереженні результатів, збереження в score_sketches,
+API розподілу
+"""
+import random
+import time
+import pytest
+from app.db import models
+from app.games import distributions
+from app.games.ingest import GameResult, ingest_batch, ingest_result
+from app.utils.sketch import DDSketch, ScoreSketch
+
+
+@pytest.fixture
+def store(app):
+    """Спільний DistributionStore; кожна тестова база завантажується в нього заново"""
+    return distributions.distribution_store
+
+
+class TestDDSketch:
+    """Тести ескізу квантилів"""
+
+    def test_quantiles_within_relative_accuracy(self):
+        """Тест що квантилі мають відносну похибку не більше 1%"""
+        rng = random.Random(3)
+        values = sorted(max(1, int(rng.lognormvariate(5, 1))) for _ in range(20000))
+        sketch = DDSketch(0.01)
+        for value in values:
+            sketch.add(value)
+        for q in (0.1, 0.5, 0.9, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            assert abs(sketch.quantile(q) - exact) <= 0.01 * exact + 1e-9
+
+    def test_rank(self):
+        """Тест частки значень, менших за заданий рахунок"""
+        sketch = DDSketch(0.01)
+        for value in range(0, 1000):
+            sketch.add(value)
+        assert sketch.rank(0) == 0.0
+        assert sketch.rank(500) == pytest.approx(0.5, abs=0.01)
+        assert DDSketch().rank(10) is None
+        assert DDSketch().quantile(0.5) is None
+
+    def test_merge_and_serialization(self):
+        """Тест що злиття дорівнює спільному ескізу і переживає серіалізацію"""
+        a, b, both = ScoreSketch(10, 20), ScoreSketch(10, 20), ScoreSketch(10, 20)
+        for value in range(300):
+            (a if value % 3 else b).add(value)
+            both.add(value)
+        a.merge(b)
+        restored = ScoreSketch.from_bytes(a.to_bytes())
+        assert restored.to_bytes() == both.to_bytes()
+        assert restored.count == 300
+        assert list(restored.histogram.counts)[:3] == [10, 10, 10]
+        assert restored.histogram.counts[-1] == 300 - 190
+
+    def test_merge_rejects_different_buckets(self):
+        """Тест що ескізи з різними кошиками не зливаються"""
+        with pytest.raises(ValueError):
+            ScoreSketch(10, 20).merge(ScoreSketch(5, 20))
+
+
+class TestDistributionStore:
+    """Тести оновлення та збереження ескізів"""
+
+    def test_results_update_sketch(self, app, test_user, store):
+        """Тест що збережений результат одразу видно в розподілі"""
+        with app.app_context():
+            ingest_result(test_user["id"], GameResult("arithmetic", "hard", 300, 20.0, 10))
+            ingest_batch(test_user["id"], [GameResult("arithmetic", "hard", 100, 20.0, 10)] * 3)
+            sketch = store.get("arithmetic", "hard")
+        assert sketch.count == 4
+        assert sketch.sketch.rank(200) == 0.75
+
+    def test_flush_merges_into_table(self, app, test_user, store, monkeypatch):
+        """Тест що зміни двох процесів додаються в score_sketches"""
+        monkeypatch.setattr(distributions, "FLUSH_EVERY", 2)
+        other = distributions.DistributionStore()
+        with app.app_context():
+            store.add([GameResult("color_rush", "easy", 100, 0.0, 10)] * 2)
+            other.add([GameResult("color_rush", "easy", 140, 0.0, 10)] * 2)
+            saved = models.get_score_sketches()[("color_rush", "easy")]
+        assert saved.count == 4
+        assert other.get("color_rush", "easy").count == 4
+
+    def test_built_from_existing_results(self, app, test_user, store):
+        """Тест що для бази без ескізів вони будуються з game_results"""
+        with app.app_context():
+            for score in (10, 20, 30):
+                models.save_game_result(test_user["id"], "sequence_recall", "easy", score, 5.0, 1)
+            sketch = store.get("sequence_recall", "easy")
+            assert sketch.count == 3
+            assert ("sequence_recall", "easy") in models.get_score_sketches()
+
+    def test_query_is_fast(self, app, test_user, store):
+        """Тест що відповідь на запит не залежить від кількості результатів"""
+        with app.app_context():
+            store.add([GameResult("arithmetic", "easy", s % 900, 0.0, 1) for s in range(50000)])
+            sketch = store.get("arithmetic", "easy")
+        sketch.sketch.rank(450)
+        start = time.perf_counter()
+        for score in range(1000):
+            sketch.sketch.rank(score)
+        assert (time.perf_counter() - start) / 1000 < 0.0005
+
+
+class TestDistributionAPI:
+    """Тести для GET /api/v1/stats/game/<game>/distribution"""
+
+    def test_distribution(self, authenticated_client, app, test_user, store):
+        """Тест перцентилів, гістограми та частки гірших результатів"""
+        with app.app_context():
+            ingest_batch(test_user["id"], [GameResult("arithmetic", "hard", s, 1.0, 1) for s in range(0, 900, 9)])
+        response = authenticated_client.get('/api/v1/stats/game/arithmetic/distribution?level=hard&score=450')
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["count"] == 100
+        assert data["percentiles"]["p50"] == pytest.approx(445, rel=0.02)
+        assert data["histogram"]["bucket_width"] == 45
+        assert sum(data["histogram"]["counts"]) == 100
+        assert data["beats"] == pytest.approx(0.5, abs=0.02)
+
+    @pytest.mark.parametrize("url, status", [
+        ('/api/v1/stats/game/chess/distribution?level=easy', 404),
+        ('/api/v1/stats/game/arithmetic/distribution', 400),
+        ('/api/v1/stats/game/tapping_memory/distribution?level=easy', 404),
+    ])
+    def test_invalid_requests(self, authenticated_client, store, url, status):
+        """Тест перевірки гри, рівня та порожнього розподілу"""
+        assert authenticated_client.get(url).status_code == status
+
+    def test_requires_login(self, client):
+        """Тест що розподіл потребує автентифікації"""
+        assert client.get('/api/v1/stats/game/arithmetic/distribution?level=easy').status_code == 401
@@ -0,0 +1,158 @@
+"""
+Тести експорту game_results і transactions
+Покриває: порції з курсором по індексах, фільтри дат і гравця,
+CSV/NDJSON, gzip на льоту, /admin/export, CLI
+"""
+from datetime import datetime, timedelta
+import csv
+import gzip
+import io
+import json
+import pytest
+from app.db import export, models
+
+
+def _insert_result(user_id, score, created_at):
+    conn = models.get_db_connection()
+    conn.execute(
+        "INSERT INTO game_results (user_id, game_name, level, score, time_spent, rounds, coins_earned, created_at) "
+        "VALUES (?, 'arithmetic', 'easy', ?, 12.5, 1, 1, ?)",
+        (user_id, score, created_at.isoformat())
+    )
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def results(app):
+    """Два гравці з результатами за три дні"""
+    day = datetime(2026, 3, 1, 12)
+    with app.app_context():
+        alice = models.create_user("alice", "password123")
+        bob = models.create_user("bob", "password123")
+        for i in range(3):
+            _insert_result(alice, 10 + i, day + timedelta(days=i))
+            _insert_result(bob, 20 + i, day + timedelta(days=i, hours=1))
+    return {"alice": alice, "bob": bob}
+
+
+class TestExportRows:
+    """Тести читання рядків для експорту"""
+
+    def test_batches_cover_all_rows(self, app, results):
+        """Тест що порції з курсором віддають кожен рядок рівно один раз"""
+        with app.app_context():
+            rows = list(models.iter_export_rows("game_results", batch=2))
+            filtered = list(models.iter_export_rows("game_results", start="2026-03-01", batch=4))
+        assert [row[0] for row in rows] == [1, 2, 3, 4, 5, 6]
+        assert sorted(row[0] for row in filtered) == [1, 2, 3, 4, 5, 6]
+
+    def test_filters(self, app, results):
+        """Тест фільтрів дат (обидві включно) та гравця"""
+        with app.app_context():
+            filters = export.parse_filters("2026-03-02", "2026-03-02", str(results["bob"]))
+            rows = list(models.iter_export_rows("game_results", **filters))
+        assert [(row[1], row[4]) for row in rows] == [(results["bob"], 21)]
+
+    def test_filters_use_indexes(self, app, results):
+        """Тест що фільтри йдуть по індексах без сортування"""
+        with app.app_context():
+            conn = models.get_db_connection()
+            plan = " ".join(r["detail"] for r in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM game_results WHERE user_id = ? AND created_at >= ? "
+                "AND (created_at, id) > (?, ?) ORDER BY created_at, id LIMIT 10", (1, "2026", "2026", 0)
+            ))
+            conn.close()
+        assert "idx_game_results_user_created" in plan
+        assert "TEMP B-TREE" not in plan
+
+    @pytest.mark.parametrize("args", [("2026-13-01", None, None), (None, "yesterday", None), (None, None, "bob")])
+    def test_invalid_filters(self, args):
+        """Тест некоректних дат та id гравця"""
+        with pytest.raises(ValueError):
+            export.parse_filters(*args)
+
+    def test_unknown_table(self, app):
+        """Тест що експортувати можна лише відомі таблиці"""
+        with app.app_context():
+            with pytest.raises(ValueError):
+                next(models.iter_export_rows("users"))
+
+
+class TestExportFormats:
+    """Тести кодування рядків"""
+
+    def test_csv(self, app, results):
+        """Тест CSV з заголовком"""
+        with app.app_context():
+            data = b"".join(export.export_chunks("game_results", "csv")).decode()
+        rows = list(csv.reader(io.StringIO(data)))
+        assert rows[0] == list(models.EXPORT_COLUMNS["game_results"])
+        assert len(rows) == 7 and rows[1][4] == "10"
+
+    def test_ndjson_gzip(self, app, results):
+        """Тест NDJSON, стисненого gzip на льоту"""
+        with app.app_context():
+            data = gzip.decompress(b"".join(export.export_chunks("transactions", "ndjson", compress=True)))
+        assert data == b""
+        with app.app_context():
+            models.update_user_coins(results["alice"], 5, "gift")
+            data = gzip.decompress(b"".join(export.export_chunks("transactions", "ndjson", compress=True)))
+        [row] = [json.loads(line) for line in data.decode().splitlines()]
+        assert row["amount"] == 5 and row["transaction_type"] == "coins_update"
+
+    def test_csv_streams_in_chunks(self, app, results, monkeypatch):
+        """Тест що CSV віддається кількома шматками, а не одним"""
+        monkeypatch.setattr(export, "ROWS_PER_CHUNK", 2)
+        with app.app_context():
+            chunks = list(export.export_chunks("game_results", "csv"))
+        assert len(chunks) == 3
+
+
+class TestExportRoute:
+    """Тести /admin/export"""
+
+    def test_export_csv(self, authenticated_admin, results):
+        """Тест потокового CSV з фільтром гравця"""
+        response = authenticated_admin.get(f'/admin/export/game_results.csv?user_id={results["alice"]}')
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.mimetype == "text/csv"
+        assert "game_results.csv" in response.headers["Content-Disposition"]
+        assert len(response.get_data(as_text=True).splitlines()) == 4
+
+    def test_export_gzip(self, authenticated_admin, results):
+        """Тест стисненого NDJSON"""
+        response = authenticated_admin.get('/admin/export/game_results.ndjson?gzip=1&from=2026-03-03')
+        assert response.mimetype == "application/gzip"
+        assert "game_results.ndjson.gz" in response.headers["Content-Disposition"]
+        lines = gzip.decompress(response.get_data()).decode().splitlines()
+        assert [json.loads(line)["score"] for line in lines] == [12, 22]
+
+    @pytest.mark.parametrize("url, status", [
+        ('/admin/export/users.csv', 404),
+        ('/admin/export/game_results.xml', 404),
+        ('/admin/export/game_results.csv?from=03/01/2026', 400),
+    ])
+    def test_invalid_requests(self, authenticated_admin, url, status):
+        """Тест невідомих таблиць, форматів і фільтрів"""
+        assert authenticated_admin.get(url).status_code == status
+
+    def test_requires_admin(self, authenticated_client):
+        """Тест що експорт доступний лише адміну"""
+        assert authenticated_client.get('/admin/export/game_results.csv').status_code == 403
+
+
+class TestExportCLI:
+    """Тести командного рядка"""
+
+    def test_cli_writes_file(self, app, results, tmp_path):
+        """Тест експорту у файл з фільтром дат"""
+        output = tmp_path / "results.csv.gz"
+        code = export.main([
+            "game_results", "--from", "2026-03-02", "--to", "2026-03-02",
+            "--gzip", "--db", models.DB_PATH, "-o", str(output)
+        ])
+        assert code == 0
+        rows = list(csv.reader(io.StringIO(gzip.decompress(output.read_bytes()).decode())))
+        assert [row[4] for row in rows[1:]] == ["11", "21"]
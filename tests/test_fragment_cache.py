@@ -0,0 +1,168 @@
+"""
+Тести кешу фрагментів шаблонів
+Покриває: LRU і TTL, версії залежностей, тег {% cache %} (пропуск тіла
+при попаданні, ключі за глядачем і темою, shared), скидання після змін
+у models.py, запити сторінки рейтингу при попаданні
+"""
+import re
+from flask import render_template_string
+from app.db import models
+from app.utils.fragment_cache import FragmentCache
+
+
+def _queries(response):
+    return int(re.search(r'desc="(\d+) queries"', response.headers["Server-Timing"]).group(1))
+
+
+class TestFragmentCache:
+    """Тести сховища"""
+
+    def test_lru_eviction(self):
+        """Тест що при переповненні витісняється найдавніше використаний запис"""
+        cache = FragmentCache(max_entries=2)
+        cache.set("a", "A", 60)
+        cache.set("b", "B", 60)
+        assert cache.get("a") == "A"
+        cache.set("c", "C", 60)
+        assert cache.get("b") is None
+        assert (cache.get("a"), cache.get("c")) == ("A", "C")
+
+    def test_ttl(self):
+        """Тест що запис недійсний після закінчення TTL"""
+        cache = FragmentCache()
+        cache.set("a", "A", 10, now=100)
+        assert cache.get("a", now=109) == "A"
+        assert cache.get("a", now=110) is None
+        assert len(cache) == 0
+
+    def test_invalidate_by_tag(self):
+        """Тест що зміна залежності скидає лише записи з цим тегом"""
+        cache = FragmentCache()
+        cache.set("top", "T", 60, cache.stamp(["users"]))
+        cache.set("avatars", "A", 60, cache.stamp(["user_purchases:1"]))
+        cache.invalidate("user_purchases:1", "user_purchases")
+        assert cache.get("top") == "T"
+        assert cache.get("avatars") is None
+
+    def test_change_during_render(self):
+        """Тест що зміна між stamp і set не лишає в кеші застарілий фрагмент"""
+        cache = FragmentCache()
+        stamp = cache.stamp(["users"])
+        cache.invalidate("users")
+        cache.set("top", "T", 60, stamp)
+        assert cache.get("top") is None
+        assert cache._versions == {}
+
+    def test_versions_bounded_by_entries(self):
+        """Тест що версії тегів забуваються разом з останнім записом, що на них посилається"""
+        cache = FragmentCache(max_entries=2)
+        for user_id in range(100):
+            tag = f"user_purchases:{user_id}"
+            cache.set(tag, "A", 60, cache.stamp([tag, "users"]))
+        assert set(cache._versions) == {"user_purchases:98", "user_purchases:99", "users"}
+        cache.invalidate("users")
+        assert cache.get("user_purchases:99") is None
+        assert set(cache._versions) == {"user_purchases:98", "users"}
+
+    def test_forgotten_tag_not_reused(self):
+        """Тест що тег, забутий і створений знову, не підтверджує старий stamp"""
+        cache = FragmentCache()
+        stale = cache.stamp(["users"])
+        cache.invalidate("users")
+        cache.release(stale)
+        cache.release(cache.stamp(["users"]))
+        assert cache._versions == {}
+        fresh = cache.stamp(["users"])
+        assert fresh != stale
+
+    def test_failed_render_releases_tags(self, app):
+        """Тест що виняток у тілі блоку не лишає версій тегів"""
+        cache = app.extensions["fragment_cache"]
+        source = '{% cache "k", 60, depends="users" %}{{ fail() }}{% endcache %}'
+        with app.test_request_context():
+            try:
+                render_template_string(source, fail=lambda: 1 / 0)
+            except ZeroDivisionError:
+                pass
+        assert "users" not in cache._versions
+
+
+class TestCacheTag:
+    """Тести тегу {% cache %}"""
+
+    def _render(self, source, **context):
+        return render_template_string(source, **context)
+
+    def test_hit_skips_body(self, app):
+        """Тест що при попаданні тіло блоку не виконується"""
+        calls = []
+        source = '{% cache "k", 60 %}{{ load() }}{% endcache %}'
+        with app.test_request_context():
+            first = self._render(source, load=lambda: calls.append(1) or len(calls))
+            second = self._render(source, load=lambda: calls.append(1) or len(calls))
+        assert first == second == "1"
+        assert calls == [1]
+
+    def test_scoped_by_user_and_theme(self, app, test_user):
+        """Тест що ключ включає користувача і тему, а shared — ні"""
+        source = '{% cache "k", 60 %}{{ value }}{% endcache %}|{% cache "s", 60, shared=true %}{{ value }}{% endcache %}'
+        with app.test_request_context():
+            assert self._render(source, value="anon") == "anon|anon"
+        client = app.test_client()
+        client.post('/auth/login', data={"username": test_user["username"], "password": test_user["password"]})
+        with client:
+            client.get('/')
+            assert self._render(source, value="light") == "light|anon"
+            models.update_user_theme(test_user["id"], "dark")
+            client.get('/')
+            assert self._render(source, value="dark") == "dark|anon"
+
+    def test_depends_on_model_changes(self, app, test_user):
+        """Тест що зміна таблиці в models.py скидає залежні фрагменти"""
+        source = '{% cache "k", 60, depends=["users:%d" % uid] %}{{ value }}{% endcache %}'
+        with app.test_request_context():
+            assert self._render(source, uid=test_user["id"], value=1) == "1"
+            models.update_user_coins(test_user["id"] + 1, 10)
+            assert self._render(source, uid=test_user["id"], value=2) == "1"
+            models.update_user_coins(test_user["id"], 10)
+            assert self._render(source, uid=test_user["id"], value=3) == "3"
+
+    def test_disabled(self, app):
+        """Тест що без кешу (FRAGMENT_CACHE_SIZE=0) блок рендериться щоразу"""
+        app.extensions.pop("fragment_cache")
+        source = '{% cache "k", 60 %}{{ value }}{% endcache %}'
+        with app.test_request_context():
+            assert self._render(source, value=1) == "1"
+            assert self._render(source, value=2) == "2"
+
+
+class TestCachedPages:
+    """Тести закешованих сторінок"""
+
+    def test_leaderboard_hit_skips_queries(self, authenticated_client, test_user):
+        """Тест що повторна сторінка рейтингу не читає топи з бази, а новий результат їх оновлює"""
+        # Перший запит після входу ще показує flash щоденного бонусу
+        authenticated_client.get('/')
+        first = authenticated_client.get('/leaderboard/')
+        second = authenticated_client.get('/leaderboard/')
+        assert _queries(second) < _queries(first)
+        assert second.data == first.data
+
+        models.save_game_result(test_user["id"], "arithmetic", "easy", 170, 30.0, 10)
+        html = authenticated_client.get('/leaderboard/').get_data(as_text=True)
+        assert "<span>170</span>" in html
+
+    def test_header_follows_coins(self, authenticated_client, test_user):
+        """Тест що баланс у шапці оновлюється після зміни монет"""
+        authenticated_client.get('/')
+        models.set_user_coins(test_user["id"], 4321)
+        assert "4321" in authenticated_client.get('/').get_data(as_text=True)
+
+    def test_profile_avatars_after_purchase(self, authenticated_client, test_user, shop_items):
+        """Тест що куплений аватар з'являється у списку після покупки"""
+        authenticated_client.get(f'/profile/{test_user["id"]}')
+        avatar = next(item for item in models.get_all_shop_items() if item["item_type"] == "avatar")
+        models.set_user_coins(test_user["id"], avatar["price"])
+        assert models.purchase_item(test_user["id"], avatar["id"])[0]
+        html = authenticated_client.get(f'/profile/{test_user["id"]}').get_data(as_text=True)
+        assert f'<option value="{avatar["id"]}"' in html
@@ -0,0 +1,415 @@
+"""
+Тести для реєстру ігор та прийому результатів
+Покриває: межі результатів, політику доступу, спільний save_result,
+токени ігрових сесій, пули раундів, транскрипти раундів
+"""
+import json
+import pytest
+from app.db import models
+from app.games import ingest
+from app.games.registry import GAMES, get_game
+from app.games import pools
+from app.games.transcripts import LIMIT_SLACK_MS, verify_transcripts
+from app.games.session import NonceCache, SessionError, issue_token, verify_token
+
+
+class TestGameRegistry:
+    """Тести реєстру ігор"""
+
+    def test_all_games_registered(self):
+        """Тест що всі чотири гри описані в реєстрі"""
+        assert set(GAMES) == {"arithmetic", "sequence_recall", "color_rush", "tapping_memory"}
+
+    def test_free_games_accessible(self, app, test_user):
+        """Тест що безкоштовні ігри доступні без покупки"""
+        with app.app_context():
+            assert get_game("arithmetic").has_access(test_user["id"])
+            assert get_game("sequence_recall").has_access(test_user["id"])
+
+    def test_paid_game_requires_purchase(self, app, test_user):
+        """Тест що платна гра відкривається після покупки"""
+        with app.app_context():
+            game = get_game("color_rush")
+            assert not game.has_access(test_user["id"])
+
+            item = game.find_shop_item()
+            models.set_user_coins(test_user["id"], item["price"])
+            models.purchase_item(test_user["id"], item["id"])
+            assert game.has_access(test_user["id"])
+
+
+class TestResultParsing:
+    """Тести розбору результату"""
+
+    def test_defaults_from_registry(self):
+        """Тест що кількість раундів за замовчуванням береться з реєстру"""
+        result = ingest.parse_result("color_rush", {"level": "easy", "score": 120, "time": 30})
+        assert result == ("color_rush", "easy", 120, 30.0, 10)
+
+    @pytest.mark.parametrize("data", [
+        {"level": "unknown", "score": 10},
+        {"level": "easy", "score": -1},
+        {"level": "easy", "score": 901},
+        {"level": "easy", "score": "100"},
+        {"level": "easy", "score": 10.5},
+        {"level": "easy", "score": 10, "time": -1},
+        {"level": "easy", "score": 10, "rounds": 16},
+        {"level": "easy", "score": 10, "rounds": True},
+    ])
+    def test_invalid_result_rejected(self, data):
+        """Тест відхилення результатів поза межами гри"""
+        with pytest.raises(ingest.ResultError):
+            ingest.parse_result("arithmetic", data)
+
+    def test_unknown_game_rejected(self):
+        """Тест відхилення невідомої гри"""
+        with pytest.raises(ingest.ResultError):
+            ingest.parse_result("chess", {"level": "easy"})
+
+    def test_batch_reports_indexes(self, app, test_user, game_result):
+        """Тест що помилки пакета містять індекси елементів"""
+        with app.app_context():
+            results, sessions, errors = ingest.parse_batch([
+                {"game": "arithmetic", **game_result("arithmetic", "easy", score=10)},
+                "not an object",
+                {"game": "tapping_memory", "level": "hard", "score": 20000},
+            ], test_user["id"])
+        assert len(results) == len(sessions) == 1
+        assert [e["index"] for e in errors] == [1, 2]
+
+
+class TestSaveResultRoutes:
+    """Тести спільного обробника save_result"""
+
+    # Tapping Memory набирає лише суми балів за раунди: 25, 60, 105...
+    @pytest.mark.parametrize("game, score", [
+        ("arithmetic", 100), ("sequence_recall", 100), ("color_rush", 100), ("tapping_memory", 105)
+    ])
+    def test_save_result_returns_coins(self, authenticated_client, game_result, game, score):
+        """Тест що всі ігри відповідають однаково і повертають монети"""
+        response = authenticated_client.post(
+            f'/game/{game}/save_result',
+            data=json.dumps(game_result(game, 'easy', score=score)),
+            content_type='application/json'
+        )
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['status'] == 'success'
+        assert data['coins_earned'] == 10
+
+    def test_save_result_rejects_invalid(self, authenticated_client, app, test_user, game_token):
+        """Тест що некоректний результат не зберігається"""
+        response = authenticated_client.post(
+            '/game/color_rush/save_result',
+            data=json.dumps({'level': 'easy', 'score': 10_000, 'token': game_token('color_rush', 'easy')}),
+            content_type='application/json'
+        )
+        assert response.status_code == 400
+        with app.app_context():
+            assert models.get_total_games(test_user["id"]) == 0
+
+    def test_listener_notified(self, authenticated_client, game_result, monkeypatch):
+        """Тест що підписники отримують збережені результати"""
+        received = []
+        monkeypatch.setattr(ingest, "_listeners", [])
+        ingest.add_result_listener(lambda user_id, results, coins: received.append((results, coins)))
+
+        authenticated_client.post('/game/arithmetic/save_result', json=game_result('arithmetic', 'hard', score=50))
+        authenticated_client.post('/api/v1/results/batch', json=[
+            {'game': 'sequence_recall', **game_result('sequence_recall', 'easy', score=25)},
+            {'game': 'arithmetic', **game_result('arithmetic', 'easy', score=70)},
+        ])
+
+        assert [len(results) for results, _ in received] == [1, 2]
+        assert received[1][1] == [2, 7]
+
+
+class TestGameSession:
+    """Тести токенів ігрових сесій"""
+
+    def test_token_roundtrip(self):
+        """Тест що токен компактний і містить дані сесії"""
+        token = issue_token("secret", "color_rush", "hard", 42, now=1000)
+        assert len(token) <= 48
+        session = verify_token("secret", token, max_age=60, now=1030)
+        assert (session.game_name, session.level, session.user_id, session.issued_at) == ("color_rush", "hard", 42, 1000)
+
+    @pytest.mark.parametrize("secret, now", [("other-secret", 1030), ("secret", 1061)])
+    def test_wrong_secret_or_expired_rejected(self, secret, now):
+        """Тест відхилення чужого підпису та простроченого токена"""
+        token = issue_token("secret", "arithmetic", "easy", 1, now=1000)
+        with pytest.raises(SessionError):
+            verify_token(secret, token, max_age=60, now=now)
+
+    def test_tampered_token_rejected(self):
+        """Тест що зміна будь-якого байта ламає підпис"""
+        token = issue_token("secret", "arithmetic", "easy", 1)
+        tampered = ("B" if token[3] != "B" else "C").join((token[:3], token[4:]))
+        for bad in (tampered, token[:-2], "", None, "!" * 46):
+            with pytest.raises(SessionError):
+                verify_token("secret", bad, max_age=60)
+
+    def test_nonce_cache_expires_entries(self):
+        """Тест що використані nonce забуваються після закінчення дії"""
+        cache = NonceCache()
+        assert cache.claim([b"a", b"b"], [100, 100], now=0) == []
+        assert cache.claim([b"c", b"a"], [200, 200], now=50) == [1]
+        assert cache.claim([b"a"], [300], now=150) == []
+        assert len(cache) == 1
+
+    def test_full_nonce_cache_rejects_new_sessions(self):
+        """Тест що заповнений кеш відхиляє нові nonce, а не витісняє живі"""
+        cache = NonceCache(max_entries=2)
+        assert cache.claim([b"a", b"b"], [100, 100], now=0) == []
+        with pytest.raises(SessionError):
+            cache.claim([b"c"], [100], now=10)
+        assert cache.claim([b"a"], [100], now=20) == [0]
+        assert cache.claim([b"c"], [200], now=150) == []
+
+    def test_start_endpoint(self, authenticated_client, test_user, app):
+        """Тест видачі токена на старті гри"""
+        response = authenticated_client.post('/game/sequence_recall/start', json={'level': 'hard'})
+        assert response.status_code == 200
+        session = verify_token(app.secret_key, response.get_json()['token'], max_age=60)
+        assert (session.game_name, session.level, session.user_id) == ("sequence_recall", "hard", test_user["id"])
+
+    def test_start_requires_valid_level_and_access(self, authenticated_client):
+        """Тест що токен не видається для невідомого рівня чи некупленої гри"""
+        assert authenticated_client.post('/game/arithmetic/start', json={'level': 'insane'}).status_code == 400
+        assert authenticated_client.post('/game/color_rush/start', json={'level': 'easy'}).status_code == 403
+
+    def test_save_requires_token(self, authenticated_client, app, test_user):
+        """Тест що результат без токена не потрапляє в game_results"""
+        response = authenticated_client.post('/game/arithmetic/save_result', json={'level': 'easy', 'score': 10})
+        assert response.status_code == 400
+        with app.app_context():
+            assert models.get_total_games(test_user["id"]) == 0
+
+    def test_token_bound_to_game_level_and_user(self, authenticated_client, app, test_user):
+        """Тест що токен іншої гри, рівня чи користувача не приймається"""
+        tokens = [
+            issue_token(app.secret_key, "sequence_recall", "easy", test_user["id"]),
+            issue_token(app.secret_key, "arithmetic", "hard", test_user["id"]),
+            issue_token(app.secret_key, "arithmetic", "easy", test_user["id"] + 1),
+        ]
+        for token in tokens:
+            response = authenticated_client.post('/game/arithmetic/save_result', json={
+                'level': 'easy', 'score': 10, 'token': token
+            })
+            assert response.status_code == 400
+
+    def test_replayed_token_rejected(self, authenticated_client, game_result, app, test_user):
+        """Тест що один токен зберігає лише один результат"""
+        payload = game_result('arithmetic', 'easy', score=10)
+        assert authenticated_client.post('/game/arithmetic/save_result', json=payload).status_code == 200
+        assert authenticated_client.post('/game/arithmetic/save_result', json=payload).status_code == 400
+        with app.app_context():
+            assert models.get_total_games(test_user["id"]) == 1
+
+    def test_replay_in_other_worker_rejected(self, authenticated_client, game_result, app, test_user, monkeypatch):
+        """Тест що токен, використаний іншим процесом, відхиляється через used_sessions"""
+        single = game_result('arithmetic', 'easy', score=10)
+        batch = [{'game': 'arithmetic', **game_result('arithmetic', 'easy', score=20)}, {'game': 'arithmetic', **single}]
+        assert authenticated_client.post('/game/arithmetic/save_result', json=single).status_code == 200
+        # Інший воркер: власний порожній кеш nonce
+        monkeypatch.setattr(ingest, "replay_cache", NonceCache())
+        assert authenticated_client.post('/game/arithmetic/save_result', json=single).status_code == 400
+        response = authenticated_client.post('/api/v1/results/batch', json=batch)
+        assert response.status_code == 400
+        assert response.get_json()["details"] == [{"index": 1, "error": "Session token already used"}]
+        with app.app_context():
+            assert models.get_total_games(test_user["id"]) == 1
+
+    def test_full_replay_cache_returns_503(self, authenticated_client, game_result, monkeypatch):
+        """Тест що при заповненому кеші nonce результат не приймається"""
+        monkeypatch.setattr(ingest, "replay_cache", NonceCache(max_entries=0))
+        response = authenticated_client.post('/game/arithmetic/save_result', json=game_result('arithmetic', 'easy', score=10))
+        assert response.status_code == 503
+
+
+class TestRoundPools:
+    """Тести пулів раундів Arithmetic та Sequence Recall"""
+
+    @pytest.fixture(scope="class")
+    def round_pools(self):
+        return pools.RoundPools(seed=7, arithmetic_size=512, sequence_size=64)
+
+    def test_pools_are_deterministic(self, round_pools):
+        """Тест що однаковий seed дає однакові раунди"""
+        other = pools.RoundPools(seed=7, arithmetic_size=512, sequence_size=64)
+        nonce = b"\x00\x00\x01\x00noncepad"
+        for level in ("easy", "medium", "hard"):
+            assert round_pools.rounds("arithmetic", level, nonce, 15) == other.rounds("arithmetic", level, nonce, 15)
+        assert round_pools.rounds("sequence_recall", "easy", nonce, 50) == other.rounds("sequence_recall", "easy", nonce, 50)
+
+    @pytest.mark.parametrize("level", ["easy", "medium", "hard"])
+    def test_arithmetic_answers_match_expressions(self, round_pools, level):
+        """Тест що збережені відповіді збігаються з обчисленням виразу"""
+        pool = round_pools.arithmetic[level]
+        for index in range(pool.size):
+            assert abs(eval(pool.expression(index)) - pool.answer(index)) <= 0.05 + 1e-9
+
+    def test_sequences_grow_by_round(self, round_pools):
+        """Тест що кожен раунд Sequence Recall на одну цифру довший"""
+        rounds = round_pools.rounds("sequence_recall", "hard", b"\xff" * 8, 50)
+        assert [len(r) for r in rounds] == list(range(2, 52))
+        assert all(r.isdigit() for r in rounds)
+
+    def test_sessions_start_at_different_offsets(self, round_pools):
+        """Тест що різні nonce отримують різні раунди"""
+        first = round_pools.rounds("arithmetic", "hard", b"\x00\x00\x00\x01" + b"\x00" * 4, 5)
+        second = round_pools.rounds("arithmetic", "hard", b"\x00\x00\x00\x09" + b"\x00" * 4, 5)
+        assert first != second
+
+    def test_start_returns_pool_rounds(self, authenticated_client, app):
+        """Тест що старт гри повертає раунди сесії"""
+        data = authenticated_client.post('/game/arithmetic/start', json={'level': 'medium', 'count': 5}).get_json()
+        nonce = verify_token(app.secret_key, data['token'], 60).nonce
+        assert data['rounds'] == pools.get_pools(app.secret_key).rounds('arithmetic', 'medium', nonce, 5)
+
+        assert authenticated_client.post('/game/arithmetic/start', json={'level': 'easy', 'count': 99}).status_code == 400
+
+    @pytest.mark.parametrize("body", [["easy"], "easy", 5])
+    def test_start_rejects_non_object(self, authenticated_client, body):
+        """Тест що масив чи скаляр замість об'єкта дає 400, а не 500"""
+        response = authenticated_client.post('/game/arithmetic/start', json=body)
+        assert response.status_code == 400
+        assert response.get_json() == {"status": "error", "message": "Request must be an object"}
+
+    def test_answers_required(self, authenticated_client, game_result):
+        """Тест що без відповідей результат гри з пулом не приймається"""
+        payload = game_result('arithmetic', 'easy', score=30)
+        del payload['answers']
+        assert authenticated_client.post('/game/arithmetic/save_result', json=payload).status_code == 400
+
+    def test_arithmetic_score_bounded_by_correct_answers(self, authenticated_client, game_result):
+        """Тест що рахунок не може перевищувати максимум за правильні відповіді"""
+        payload = game_result('arithmetic', 'easy', score=30)
+        payload['answers'][0] += 5
+        response = authenticated_client.post('/game/arithmetic/save_result', json=payload)
+        assert response.status_code == 400
+        assert response.get_json()['message'] == 'Score does not match answers'
+
+    def test_sequence_score_must_match_rounds(self, authenticated_client, game_result):
+        """Тест що рахунок Sequence Recall перераховується з відповідей"""
+        payload = game_result('sequence_recall', 'medium', score=90)
+        payload['score'] = 100
+        assert authenticated_client.post('/game/sequence_recall/save_result', json=payload).status_code == 400
+
+    def test_sequence_perfect_run_saved(self, app, authenticated_client, game_token):
+        """Тест що ідеальна гра Sequence Recall на всі max_rounds раундів зберігається"""
+        max_rounds = GAMES["sequence_recall"].max_rounds
+        token = game_token("sequence_recall", "hard")
+        nonce = verify_token(app.secret_key, token, 60).nonce
+        answers = pools.get_pools(app.secret_key).rounds("sequence_recall", "hard", nonce, max_rounds)
+        assert len(answers[-1]) == pools.MAX_SEQUENCE_LENGTH
+        score = sum(pools.sequence_round_points("hard", len(answer)) for answer in answers)
+        assert score <= GAMES["sequence_recall"].max_score
+        payload = {"level": "hard", "score": score, "time": 900, "rounds": max_rounds,
+                   "answers": answers, "token": token}
+        response = authenticated_client.post('/game/sequence_recall/save_result', json=payload)
+        assert response.status_code == 200, response.get_json()
+
+    def test_sequence_full_run_needs_all_rounds(self, app, authenticated_client, game_token):
+        """Тест що rounds = пройдені раунди приймається лише для вичерпаного пулу"""
+        token = game_token("sequence_recall", "easy")
+        nonce = verify_token(app.secret_key, token, 60).nonce
+        answers = pools.get_pools(app.secret_key).rounds("sequence_recall", "easy", nonce, 3)
+        score = sum(pools.sequence_round_points("easy", len(answer)) for answer in answers)
+        payload = {"level": "easy", "score": score, "time": 30, "rounds": 3, "answers": answers, "token": token}
+        assert authenticated_client.post('/game/sequence_recall/save_result', json=payload).status_code == 400
+
+    def test_sequence_wrong_answer_before_last_rejected(self, authenticated_client, game_result):
+        """Тест що хибна відповідь посередині гри не приймається"""
+        payload = game_result('sequence_recall', 'easy', score=45)
+        payload['answers'][1] = '00'
+        assert authenticated_client.post('/game/sequence_recall/save_result', json=payload).status_code == 400
+
+
+def _color_rush(rt, ok=None, score=0, level="easy"):
+    ok = [1] * len(rt) if ok is None else ok
+    return ingest.GameResult("color_rush", level, score, 0.0, 10), {"rt": rt, "ok": ok}
+
+
+class TestTranscripts:
+    """Тести векторизованої перевірки транскриптів"""
+
+    # Easy: база 10, ліміт 5 с; 1000 мс дає round(10 + 0.8 * 5) = 14 балів
+    RT = [1000, 1210, 980, 1500, 870, 1320, 1100, 940, 1250, 1010]
+
+    def test_color_rush_score_recomputed(self):
+        """Тест що рахунок Color Rush перераховується з часу реакції"""
+        result, transcript = _color_rush([1000] + [4600 + 10 * i for i in range(9)], score=14 + 9 * 10)
+        assert verify_transcripts("color_rush", [result], [transcript]) == [None]
+        result, transcript = _color_rush([1000] + [4600 + 10 * i for i in range(9)], score=110)
+        assert verify_transcripts("color_rush", [result], [transcript]) == ["Score does not match transcript"]
+
+    def test_color_rush_penalties_clamped_at_zero(self):
+        """Тест що тайм-аути не опускають рахунок нижче нуля"""
+        rt = [5000] * 3 + [4600 + 10 * i for i in range(7)]
+        result, transcript = _color_rush(rt, [0] * 3 + [1] * 7, score=70)
+        assert verify_transcripts("color_rush", [result], [transcript]) == [None]
+
+    @pytest.mark.parametrize("rt, ok, error", [
+        ([100] + RT[1:], None, "Impossible reaction time"),
+        (RT, [1, 0] + [1] * 8, "Transcript continues after a wrong answer"),
+        (RT[:5], None, "Transcript is incomplete"),
+        ([1000] * 10, None, "Reaction times too uniform"),
+        (RT, [1] * 9, "Invalid transcript"),
+        (RT, [1] * 9 + [2], "Invalid transcript"),
+    ])
+    def test_color_rush_rejected(self, rt, ok, error):
+        """Тест що неможливі транскрипти відхиляються"""
+        result, transcript = _color_rush(rt, ok)
+        assert verify_transcripts("color_rush", [result], [transcript]) == [error]
+
+    def test_color_rush_wrong_answer_ends_game(self):
+        """Тест що хибна відповідь в останньому раунді завершує гру зі штрафом"""
+        result, transcript = _color_rush([1000, 2000], [1, 0], score=14 - 5)
+        assert verify_transcripts("color_rush", [result], [transcript]) == [None]
+
+    @pytest.mark.parametrize("over, error", [
+        (60, None), (LIMIT_SLACK_MS, None), (LIMIT_SLACK_MS + 1, "Impossible reaction time"),
+    ])
+    def test_hit_just_over_limit(self, over, error):
+        """Тест що влучання трохи після ліміту раунду (затримка таймера) приймається в межах запасу"""
+        # Easy: ліміт 5000 мс; після ліміту бонусу немає, раунд дає базові 10 балів
+        result, transcript = _color_rush([1000] + [4600 + 10 * i for i in range(8)] + [5000 + over], score=14 + 9 * 10)
+        assert verify_transcripts("color_rush", [result], [transcript]) == [error]
+        # Tapping Memory easy: ліміт першого раунду 9 с
+        result = ingest.GameResult("tapping_memory", "easy", 25 + 35, (9000 + over + 1000) / 1000, 3)
+        transcript = {"rt": [9000 + over, 1000, 2000], "ok": [1, 1, 0]}
+        assert verify_transcripts("tapping_memory", [result], [transcript]) == [error]
+
+    def test_tapping_memory_checks(self):
+        """Тест перевірки раундів і часу Tapping Memory"""
+        result = ingest.GameResult("tapping_memory", "easy", 25 + 35, 1.6, 3)
+        valid = {"rt": [600, 1000, 2000], "ok": [1, 1, 0]}
+        assert verify_transcripts("tapping_memory", [result], [valid]) == [None]
+
+        fast = {"rt": [100, 1000, 2000], "ok": [1, 1, 0]}
+        slow = {"rt": [9500, 1000, 2000], "ok": [1, 1, 0]}
+        assert verify_transcripts("tapping_memory", [result] * 2, [fast, slow]) == ["Impossible reaction time"] * 2
+        assert verify_transcripts("tapping_memory", [result._replace(time_spent=5.0)], [valid]) == [
+            "Time does not match transcript"
+        ]
+        assert verify_transcripts("tapping_memory", [result._replace(rounds=2)], [valid]) == [
+            "Rounds do not match transcript"
+        ]
+
+    def test_batch_reports_each_transcript(self):
+        """Тест що пакет перевіряється одним проходом з помилкою для кожного елемента"""
+        good = _color_rush([1000] + [4600 + 10 * i for i in range(9)], score=104)
+        bad = _color_rush([1000] * 10, score=140)
+        results, transcripts = zip(*([good, bad, (good[0], None)] * 1000))
+        errors = verify_transcripts("color_rush", list(results), list(transcripts))
+        assert errors[:3] == [None, "Reaction times too uniform", "Transcript is required"]
+        assert errors.count(None) == 1000
+
+    def test_save_result_requires_transcript(self, authenticated_client, game_result):
+        """Тест що результат Color Rush без транскрипту не зберігається"""
+        payload = game_result("color_rush", "easy", score=100)
+        del payload["transcript"]
+        response = authenticated_client.post('/game/color_rush/save_result', json=payload)
+        assert response.status_code == 400
+        assert response.get_json()["message"] == "Transcript is required"
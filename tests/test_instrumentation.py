@@ -0,0 +1,265 @@
+"""
+Тести для інструментування продуктивності
+Покриває: метрики запитів, Server-Timing, /metrics
+"""
+import json
+import os
+import pytest
+from app.utils import metrics
+
+TOKEN = {"Authorization": "Bearer scrape-token"}
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+@pytest.fixture
+def scrape(app, client):
+    """GET /metrics з токеном Prometheus"""
+    app.config["METRICS_TOKEN"] = "scrape-token"
+    return lambda: client.get('/metrics', headers=TOKEN)
+
+
+class TestRequestMetrics:
+    """Тести для збору метрик запитів"""
+
+    def test_server_timing_header(self, client):
+        """Тест що кожна відповідь містить Server-Timing"""
+        response = client.get('/')
+        timing = response.headers.get('Server-Timing')
+        assert timing is not None
+        assert 'app;dur=' in timing
+        assert 'queries' in timing
+
+    def test_query_count_in_server_timing(self, authenticated_client):
+        """Тест що SQL-запити рахуються для сторінок з БД"""
+        response = authenticated_client.get('/shop/')
+        assert response.status_code == 200
+        timing = response.headers['Server-Timing']
+        assert '"0 queries"' not in timing
+        assert '"0 connections"' not in timing
+
+    def test_metrics_endpoint_format(self, client, scrape):
+        """Тест Prometheus-формату на /metrics"""
+        client.get('/')
+        client.get('/about/')
+        response = scrape()
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+
+        body = response.data.decode()
+        assert '# TYPE brainrush_request_duration_seconds histogram' in body
+        assert 'brainrush_request_duration_seconds_count{endpoint="main.index",method="GET"} 1' in body
+        assert 'brainrush_request_duration_seconds_bucket{endpoint="about.about_page",method="GET",le="+Inf"} 1' in body
+        assert 'brainrush_requests_total{endpoint="main.index",method="GET",status="200"} 1' in body
+
+    def test_response_bytes_recorded(self, client, scrape):
+        """Тест підрахунку байтів відповіді"""
+        response = client.get('/about/')
+        body = scrape().data.decode()
+        expected = f'brainrush_response_bytes_total{{endpoint="about.about_page",method="GET"}} {len(response.data)}'
+        assert expected in body
+
+    def test_metrics_require_token_or_admin(self, app, client, authenticated_client, scrape):
+        """Тест що /metrics закритий: 401 анонімно, 403 звичайному гравцю, 200 з токеном"""
+        assert app.test_client().get('/metrics').status_code == 401
+        assert authenticated_client.get('/metrics').status_code == 403
+        assert authenticated_client.get('/metrics', headers={"Authorization": "Bearer wrong"}).status_code == 403
+        assert scrape().status_code == 200
+
+    def test_metrics_for_admin(self, authenticated_admin):
+        """Тест що адмін бачить /metrics без токена"""
+        assert authenticated_admin.get('/metrics').status_code == 200
+
+    def test_workers_summed_from_metrics_dir(self, tmp_path, monkeypatch):
+        """Тест що з METRICS_DIR /metrics підсумовує файли живих воркерів і прибирає файли мертвих"""
+        from app import create_app
+        app = create_app({"TESTING": True, "METRICS_DIR": str(tmp_path), "METRICS_TOKEN": "scrape-token"})
+        monkeypatch.setattr(metrics, "_alive", lambda pid: pid != 999999999)
+        other = metrics.EndpointStats()
+        other.latency.observe(0.2)
+        other.statuses[200] = 1
+        snapshot = json.dumps({"about.about_page GET": other.to_dict()})
+        (tmp_path / "1.json").write_text(snapshot)
+        (tmp_path / "999999999.json").write_text(snapshot)
+
+        client = app.test_client()
+        client.get('/about/')
+        body = client.get('/metrics', headers=TOKEN).data.decode()
+        assert 'brainrush_request_duration_seconds_count{endpoint="about.about_page",method="GET"} 2' in body
+        assert 'brainrush_requests_total{endpoint="about.about_page",method="GET",status="200"} 2' in body
+        assert sorted(os.listdir(tmp_path)) == ["1.json", f"{os.getpid()}.json"]
+
+    def test_histogram_is_cumulative(self):
+        """Тест що гістограма кумулятивна, як вимагає Prometheus"""
+        histogram = metrics.Histogram((1, 5, 10))
+        histogram.observe(3)
+        histogram.observe(7)
+        assert histogram.counts == [0, 1, 2]
+        assert histogram.count == 2
+        assert histogram.sum == 10
+
+
+class TestSlowQueryLog:
+    """Тести журналу повільних запитів"""
+
+    @pytest.fixture(autouse=True)
+    def log_everything(self, app):
+        """Поріг 0 мс: create_app встановлює поріг з конфігурації, тому після app"""
+        from app.db.instrumentation import slow_query_log
+        original = slow_query_log.threshold_ms
+        slow_query_log.threshold_ms = 0
+        slow_query_log.reset()
+        yield slow_query_log
+        slow_query_log.threshold_ms = original
+        slow_query_log.reset()
+
+    def test_slow_query_captured_with_plan(self, app, test_user, log_everything):
+        """Тест що запит потрапляє в журнал з функцією та планом"""
+        from app.db import models
+        with app.app_context():
+            models.get_game_leaderboard("arithmetic")
+
+        entries = [e for e in log_everything.top(100) if e["function"] == "models.get_game_leaderboard"]
+        assert len(entries) == 1
+        entry = entries[0]
+        assert entry["count"] == 1
+        assert entry["params"] == ["str(3)", "str(10)", "int"]
+        assert entry["plan"]
+        assert any("idx_leaderboard_best_rank" in step for step in entry["plan"])
+
+    def test_repeated_queries_aggregated(self, app, test_user, log_everything):
+        """Тест агрегації повторних запитів"""
+        from app.db import models
+        with app.app_context():
+            for _ in range(3):
+                models.get_user_coins(test_user["id"])
+
+        entry = next(e for e in log_everything.top(100) if e["function"] == "models.get_user_coins")
+        assert entry["count"] == 3
+        assert entry["max_ms"] <= entry["total_ms"]
+
+    def test_row_reading_time_counted(self, app, log_everything):
+        """Тест що час читання рядків (fetchall, ітерація) входить у тривалість запиту"""
+        import time
+        from app.db import models
+        log_everything.threshold_ms = 40
+        conn = models.get_db_connection()
+        # Кожен рядок обчислюється ~10 мс: execute робить лише перший крок
+        conn.create_function("slow", 1, lambda x: time.sleep(0.01) or x)
+        sql = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 8) SELECT slow(i) FROM n"
+        assert len(conn.execute(sql).fetchall()) == 8
+        assert len(list(conn.execute(sql + " -- iterated"))) == 8
+        conn.close()
+
+        entries = {e["sql"]: e for e in log_everything.top(100)}
+        assert entries[sql]["total_ms"] >= 70
+        assert entries[sql + " -- iterated"]["total_ms"] >= 70
+
+    def test_server_timing_includes_fetch(self, app, monkeypatch):
+        """Тест що db;dur у Server-Timing включає читання рядків"""
+        from app.db import instrumentation
+        calls = []
+        monkeypatch.setattr(instrumentation.metrics, "record_query_time", lambda duration: calls.append(duration))
+        app.test_client().get('/leaderboard/')
+        assert calls
+
+    def test_threshold_filters_fast_queries(self, app, test_user, log_everything):
+        """Тест що запити нижче порогу не логуються"""
+        from app.db import models
+        log_everything.threshold_ms = 60_000
+        log_everything.reset()
+        with app.app_context():
+            models.get_user_coins(test_user["id"])
+        assert log_everything.top() == []
+
+    def test_admin_perf_page(self, authenticated_admin):
+        """Тест звіту /admin/perf"""
+        response = authenticated_admin.get('/admin/perf')
+        assert response.status_code == 200
+        assert b'Slow Queries' in response.data
+
+    def test_admin_perf_requires_admin(self, authenticated_client):
+        """Тест що звіт доступний лише адміну"""
+        response = authenticated_client.get('/admin/perf')
+        assert response.status_code == 403
+
+
+class TestRequestProfiler:
+    """Тести семплювального профайлера"""
+
+    @pytest.fixture
+    def profile_dir(self, app, tmp_path):
+        app.instance_path = str(tmp_path)
+        return tmp_path / "profiles"
+
+    def test_admin_can_profile_request(self, authenticated_admin, profile_dir):
+        """Тест профілювання запиту адміністратором через заголовок"""
+        response = authenticated_admin.get('/leaderboard/', headers={'X-Profile': '1'})
+        assert response.status_code == 200
+        name = response.headers['X-Profile-Id']
+        assert name.endswith('.folded')
+        assert (profile_dir / name).exists()
+
+    def test_regular_user_cannot_profile(self, authenticated_client, profile_dir):
+        """Тест що звичайний користувач не може ввімкнути профайлер"""
+        response = authenticated_client.get('/leaderboard/?_profile=1')
+        assert 'X-Profile-Id' not in response.headers
+        assert not profile_dir.exists()
+
+    def test_sample_rate_profiles_anonymous_traffic(self, app, client, profile_dir):
+        """Тест профілювання частки трафіку"""
+        app.config['PROFILE_SAMPLE_RATE'] = 1.0
+        response = client.get('/about/')
+        assert 'X-Profile-Id' in response.headers
+
+    def test_profiles_rotated(self, app, client, profile_dir):
+        """Тест ротації старих профілів"""
+        app.config['PROFILE_SAMPLE_RATE'] = 1.0
+        app.config['PROFILE_KEEP'] = 2
+        for _ in range(4):
+            client.get('/about/')
+        assert len(list(profile_dir.iterdir())) == 2
+
+    def test_streamed_response_profiled(self, authenticated_admin, profile_dir, sample_game_results):
+        """Тест що потокова відповідь профілюється до кінця тіла"""
+        response = authenticated_admin.get(
+            '/admin/export/game_results.csv', headers={'X-Profile': '1'}, buffered=False
+        )
+        name = response.headers['X-Profile-Id']
+        assert not (profile_dir / name).exists()
+        assert response.get_data()
+        response.close()
+        assert (profile_dir / name).exists()
+
+    def test_collapsed_stack_format(self):
+        """Тест формату collapsed stacks"""
+        import threading
+        import time
+        from app.utils.profiler import StackSampler
+
+        sampler = StackSampler(threading.get_ident(), 0.001)
+        sampler.start()
+        deadline = time.time() + 0.05
+        while time.time() < deadline:
+            sum(range(1000))
+        sampler.stop()
+
+        lines = sampler.collapsed().splitlines()
+        assert lines
+        stack, count = lines[0].rsplit(" ", 1)
+        assert int(count) > 0
+        assert "test_collapsed_stack_format" in stack
+
+    def test_dashboard_lists_profiles(self, authenticated_admin, profile_dir):
+        """Тест відображення профілів в адмін-панелі"""
+        name = authenticated_admin.get('/about/', headers={'X-Profile': '1'}).headers['X-Profile-Id']
+        response = authenticated_admin.get('/admin/')
+        assert name.encode() in response.data
+
+        download = authenticated_admin.get(f'/admin/profiles/{name}')
+        assert download.status_code == 200
@@ -0,0 +1,73 @@
+"""
+Тести JSON-провайдера на orjson
+Покриває: збіг зі стандартним провайдером Flask, запасний шлях для значень
+поза межами orjson, розбір тіла запиту, рядки моделей у форматі API
+"""
+from datetime import datetime
+from decimal import Decimal
+import json
+import pytest
+from flask.json.provider import DefaultJSONProvider
+from app.db import models
+from app.utils import json_provider
+
+pytestmark = pytest.mark.skipif(json_provider.orjson is None, reason="orjson is not installed")
+
+
+@pytest.fixture
+def providers(app):
+    return json_provider.OrjsonProvider(app), DefaultJSONProvider(app)
+
+
+class TestOrjsonProvider:
+    """Тести кодування і розбору"""
+
+    @pytest.mark.parametrize("value", [
+        {"b": 1, "a": [1.5, None, True, "текст"]},
+        {"when": datetime(2025, 1, 2, 3, 4, 5), "amount": Decimal("1.50")},
+        {1: "non-str key"},
+        {"big": 2 ** 70},
+    ])
+    def test_matches_stdlib(self, providers, value):
+        """Тест що відповідь розбирається в те саме, що й у стандартного провайдера"""
+        fast, stdlib = providers
+        body = fast.response(value).get_data()
+        assert json.loads(body) == json.loads(stdlib.response(value).get_data())
+        assert fast.loads(fast.dumps(value)) == json.loads(stdlib.dumps(value))
+
+    def test_compact_sorted_utf8(self, providers):
+        """Тест що ключі відсортовані, без пробілів, а не-ASCII записано як UTF-8"""
+        fast, _ = providers
+        assert fast.response({"b": "ї", "a": 1}).get_data() == '{"a":1,"b":"ї"}\n'.encode()
+
+    def test_invalid_json_body(self, authenticated_client):
+        """Тест що некоректне тіло запиту дає 400, як і раніше"""
+        response = authenticated_client.post(
+            '/api/v1/feedback', data=b'{"message": ', content_type='application/json'
+        )
+        assert response.status_code == 400
+
+
+class TestApiRows:
+    """Тести рядків моделей у форматі відповіді"""
+
+    def test_transactions_are_response_dicts(self, authenticated_client, app, test_user):
+        """Тест що models повертає dict з полями відповіді, а API віддає їх без змін"""
+        with app.app_context():
+            models.update_user_coins(test_user["id"], 5, "bonus")
+            rows = models.get_user_transactions(test_user["id"])
+        assert isinstance(rows[0], dict)
+        assert list(rows[0]) == ["id", "amount", "transaction_type", "description", "created_at"]
+        data = authenticated_client.get('/api/v1/transactions').get_json()
+        assert data["transactions"] == rows and data["count"] == len(rows)
+
+    def test_shop_items_for_user(self, authenticated_client, app, test_user, shop_items):
+        """Тест позначки покупки, обчисленої в SQL"""
+        with app.app_context():
+            item = models.get_all_shop_items()[0]
+            models.set_user_coins(test_user["id"], item["price"])
+            models.purchase_item(test_user["id"], item["id"])
+        items = authenticated_client.get('/api/v1/shop/items').get_json()["items"]
+        assert {i["id"]: i["is_purchased"] for i in items}[item["id"]] is True
+        assert sum(i["is_purchased"] for i in items) == 1
+        assert set(items[0]) == {"id", "item_type", "name", "description", "price", "is_purchased", "created_at"}
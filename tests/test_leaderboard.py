@@ -0,0 +1,410 @@
+"""
+Тести рейтингів ігор
+Покриває: вікна day/week/all, оновлення кращих результатів при збереженні,
+очищення застарілих кошиків, перебудову з game_results, API рейтингу,
+місце гравця через дерево Фенвіка, SSE-стрім змін топу
+"""
+from datetime import datetime, timedelta
+import json
+import random
+import pytest
+from app.db import models
+from app.games import live
+from app.games.ingest import GameResult, ingest_result
+from app.games.registry import GAMES, GameDefinition, check_rank_tree
+
+
+@pytest.fixture
+def players(app):
+    """Три гравці з результатами в Arithmetic"""
+    with app.app_context():
+        ids = [models.create_user(f"player{i}", "password123") for i in range(3)]
+        models.save_game_result(ids[0], "arithmetic", "easy", 120, 30.0, 10)
+        models.save_game_result(ids[0], "arithmetic", "easy", 80, 30.0, 10)
+        models.save_game_results_batch(ids[1], [("arithmetic", "hard", 300, 40.0, 10)] * 2)
+        models.save_game_result(ids[2], "color_rush", "easy", 50, 20.0, 10)
+    return ids
+
+
+def _insert_old_result(user_id, game_name, score, created_at):
+    conn = models.get_db_connection()
+    conn.execute(
+        "INSERT INTO game_results (user_id, game_name, level, score, time_spent, rounds, coins_earned, created_at) "
+        "VALUES (?, ?, 'easy', ?, 10.0, 1, 1, ?)",
+        (user_id, game_name, score, created_at.isoformat())
+    )
+    conn.commit()
+    conn.close()
+
+
+class TestLeaderboardWindows:
+    """Тести кошиків рейтингів у models.py"""
+
+    @pytest.mark.parametrize("window", models.LEADERBOARD_WINDOWS)
+    def test_best_score_per_player(self, app, players, window):
+        """Тест що кожне вікно містить один кращий результат гравця"""
+        with app.app_context():
+            rows = models.get_game_leaderboard("arithmetic", window=window)
+        assert [(r["username"], r["max_score"]) for r in rows] == [("player1", 300), ("player0", 120)]
+
+    def test_unknown_window_rejected(self, app):
+        """Тест що невідоме вікно не приймається"""
+        with app.app_context(), pytest.raises(ValueError):
+            models.get_game_leaderboard("arithmetic", window="year")
+
+    def test_old_results_only_in_all_time(self, app, players):
+        """Тест що старі результати після перебудови потрапляють лише в all"""
+        with app.app_context():
+            _insert_old_result(players[2], "arithmetic", 500, datetime.utcnow() - timedelta(days=30))
+            models.rebuild_leaderboards()
+            all_time = models.get_game_leaderboard("arithmetic")
+            today = models.get_game_leaderboard("arithmetic", window="day")
+            week = models.get_game_leaderboard("arithmetic", window="week")
+        assert all_time[0]["username"] == "player2"
+        assert "player2" not in [r["username"] for r in today + week]
+        assert [r["max_score"] for r in today] == [300, 120]
+
+    @staticmethod
+    def _stale_buckets(players, purged_on):
+        conn = models.get_db_connection()
+        conn.executemany(
+            "INSERT INTO leaderboard_best (bucket, game_name, user_id, score, achieved_at) VALUES (?, 'arithmetic', ?, 1, '')",
+            [("d:2000-01-01", players[0]), ("w:2000-01-03", players[0])]
+        )
+        conn.execute("UPDATE leaderboard_purge SET purged_on = ?", (purged_on,))
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def _buckets():
+        conn = models.get_db_connection()
+        buckets = {r["bucket"] for r in conn.execute("SELECT DISTINCT bucket FROM leaderboard_best")}
+        conn.close()
+        return buckets
+
+    def test_expired_buckets_purged(self, app, players):
+        """Тест що кошики старших днів і тижнів видаляються першим збереженням за день"""
+        with app.app_context():
+            self._stale_buckets(players, "2000-01-01")
+            models.save_game_result(players[0], "arithmetic", "easy", 10, 5.0, 1)
+            assert self._buckets() == set(models._leaderboard_buckets(datetime.utcnow()).values())
+
+    def test_purge_once_per_day_across_processes(self, app, players):
+        """Тест що день очищення береться з бази, а не зі стану процесу"""
+        with app.app_context():
+            self._stale_buckets(players, datetime.utcnow().date().isoformat())
+            models.save_game_result(players[0], "arithmetic", "easy", 10, 5.0, 1)
+            assert "d:2000-01-01" in self._buckets()
+
+    def test_batch_updates_tree_once_per_game(self, app, players, monkeypatch):
+        """Тест що пакет змінює дерево рангів так само, як один його кращий результат"""
+        applied = []
+        apply_rank_tree = models._apply_rank_tree
+        monkeypatch.setattr(models, "_apply_rank_tree", lambda conn, deltas: (
+            applied.append({k: v for k, v in deltas.items() if v}), apply_rank_tree(conn, deltas)
+        ))
+        with app.app_context():
+            user_id = models.create_user("batcher", "password123")
+            models.save_game_results_batch(user_id, [("arithmetic", "easy", s, 10.0, 1) for s in range(0, 500, 10)])
+            other = models.create_user("single", "password123")
+            models.save_game_result(other, "arithmetic", "easy", 490, 10.0, 1)
+        assert applied[0] == applied[1]
+
+    def test_week_bucket_starts_on_monday(self):
+        """Тест що тижневий кошик починається з понеділка"""
+        buckets = models._leaderboard_buckets(datetime(2026, 10, 25, 23, 59))
+        assert buckets == {"day": "d:2026-10-25", "week": "w:2026-10-19", "all": "all"}
+
+    def test_deleted_user_removed(self, app, players):
+        """Тест що видалений акаунт зникає з рейтингу"""
+        with app.app_context():
+            models.delete_user_account(players[1])
+            rows = models.get_game_leaderboard("arithmetic", window="week")
+        assert [r["username"] for r in rows] == ["player0"]
+
+
+@pytest.fixture
+def crowd(app):
+    """200 гравців з випадковими результатами (без хешування паролів)"""
+    rng = random.Random(7)
+    with app.app_context():
+        conn = models.get_db_connection()
+        conn.executemany(
+            "INSERT INTO users (username, password_hash, created_at) VALUES (?, '', '')",
+            [(f"crowd{i}",) for i in range(200)]
+        )
+        conn.commit()
+        ids = [r["id"] for r in conn.execute("SELECT id FROM users WHERE username LIKE 'crowd%' ORDER BY id")]
+        conn.close()
+        for user_id in ids:
+            models.save_game_results_batch(user_id, [
+                ("arithmetic", "easy", rng.choice([0, 50, 120, 120, 300, rng.randint(0, 900)]), 10.0, 1)
+                for _ in range(rng.randint(1, 3))
+            ])
+    return ids
+
+
+def _brute_force_rank(user_id, game_name="arithmetic"):
+    conn = models.get_db_connection()
+    best = dict(conn.execute(
+        "SELECT user_id, MAX(score) FROM game_results WHERE game_name = ? GROUP BY user_id", (game_name,)
+    ).fetchall())
+    conn.close()
+    return 1 + sum(score > best[user_id] for score in best.values()), len(best)
+
+
+class TestLeaderboardRank:
+    """Тести місця гравця та сусідів у рейтингу"""
+
+    def test_rank_matches_full_scan(self, app, crowd):
+        """Тест що ранг з дерева збігається з підрахунком по всіх результатах"""
+        with app.app_context():
+            for user_id in crowd[::7]:
+                result = models.get_leaderboard_rank(user_id, "arithmetic")
+                assert (result["rank"], result["players"]) == _brute_force_rank(user_id)
+
+    def test_rank_follows_improvements_and_deletes(self, app, crowd):
+        """Тест що дерево оновлюється при новому рекорді та видаленні акаунту"""
+        with app.app_context():
+            models.save_game_result(crowd[0], "arithmetic", "hard", 900, 10.0, 1)
+            assert models.get_leaderboard_rank(crowd[0], "arithmetic", window="day")["rank"] == 1
+            models.delete_user_account(crowd[1])
+            for user_id in crowd[2::11]:
+                result = models.get_leaderboard_rank(user_id, "arithmetic", window="week")
+                assert (result["rank"], result["players"]) == _brute_force_rank(user_id)
+
+    def test_rebuild_matches_incremental_tree(self, app, crowd):
+        """Тест що перебудоване дерево збігається з оновлюваним при збереженні"""
+        with app.app_context():
+            conn = models.get_db_connection()
+            query = "SELECT bucket, game_name, node, players FROM leaderboard_rank_tree WHERE players != 0 ORDER BY 1, 2, 3"
+            incremental = [tuple(r) for r in conn.execute(query)]
+            conn.close()
+            models.rebuild_leaderboards()
+            conn = models.get_db_connection()
+            rebuilt = [tuple(r) for r in conn.execute(query)]
+            conn.close()
+        assert incremental == rebuilt
+
+    def test_rank_at_tree_boundary(self, app, players):
+        """Тест рангів на межі дерева: найбільший рахунок має власний вузол, більший відхиляється"""
+        top = models.RANK_TREE_SIZE - 1
+        with app.app_context():
+            models.save_game_result(players[0], "arithmetic", "easy", top, 10.0, 1)
+            models.save_game_result(players[1], "arithmetic", "easy", top - 1, 10.0, 1)
+            assert models.get_leaderboard_rank(players[0], "arithmetic")["rank"] == 1
+            assert models.get_leaderboard_rank(players[1], "arithmetic")["rank"] == 2
+            with pytest.raises(ValueError):
+                models.save_game_result(players[2], "arithmetic", "easy", top + 1, 10.0, 1)
+            assert models.get_leaderboard_rank(players[2], "arithmetic") is None
+
+    def test_every_game_fits_rank_tree(self):
+        """Тест що max_score кожної гри вміщується в дерево, а більший не проходить перевірку"""
+        assert max(game.max_score for game in GAMES.values()) < models.RANK_TREE_SIZE
+        too_large = GameDefinition("huge", "Huge", "main.index", max_score=models.RANK_TREE_SIZE)
+        with pytest.raises(ValueError, match="huge"):
+            check_rank_tree({**GAMES, "huge": too_large})
+
+    def test_no_result(self, app, crowd):
+        """Тест що гравець без результату не має місця"""
+        with app.app_context():
+            assert models.get_leaderboard_rank(crowd[0], "color_rush") is None
+            assert models.get_leaderboard_neighbors(crowd[0], "color_rush") is None
+
+    def test_neighbors_follow_leaderboard_order(self, app, crowd):
+        """Тест що сусіди — це сусідні рядки повного рейтингу"""
+        with app.app_context():
+            board = models.get_game_leaderboard("arithmetic", limit=1000)
+            usernames = [r["username"] for r in board]
+            for index in (0, 57, 120, len(board) - 1):
+                user_id = crowd[int(board[index]["username"][5:])]
+                rows = models.get_leaderboard_neighbors(user_id, "arithmetic", count=3)
+                assert [r["username"] for r in rows] == usernames[max(0, index - 3):index + 4]
+                assert [r["is_me"] for r in rows].count(True) == 1
+                ranks, _ = zip(*(_brute_force_rank(crowd[int(r["username"][5:])]) for r in rows))
+                assert [r["rank"] for r in rows] == list(ranks)
+
+
+class TestLeaderboardAPI:
+    """Тести для GET /api/v1/leaderboard/<game>"""
+
+    def test_leaderboard_entries(self, client, players):
+        """Тест що API повертає ранги та кращі результати"""
+        response = client.get('/api/v1/leaderboard/arithmetic?window=day')
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["window"] == "day"
+        assert [(e["rank"], e["username"], e["score"]) for e in data["entries"]] == [
+            (1, "player1", 300), (2, "player0", 120)
+        ]
+
+    def test_limit(self, client, players):
+        """Тест параметра limit"""
+        data = client.get('/api/v1/leaderboard/arithmetic?limit=1').get_json()
+        assert len(data["entries"]) == 1
+
+    @pytest.mark.parametrize("url, status", [
+        ('/api/v1/leaderboard/chess', 404),
+        ('/api/v1/leaderboard/arithmetic?window=year', 400),
+        ('/api/v1/leaderboard/arithmetic?limit=0', 400),
+        ('/api/v1/leaderboard/arithmetic?limit=1000', 400),
+    ])
+    def test_invalid_requests(self, client, url, status):
+        """Тест перевірки гри, вікна та ліміту"""
+        assert client.get(url).status_code == status
+
+    def test_page_window(self, client, players):
+        """Тест що сторінка рейтингу приймає вікно"""
+        response = client.get('/leaderboard/?window=week')
+        assert response.status_code == 200
+        assert b'player1' in response.data
+        assert client.get('/leaderboard/?window=bogus').status_code == 200
+
+    def test_rank_me(self, authenticated_client, app, test_user):
+        """Тест місця поточного користувача"""
+        with app.app_context():
+            models.save_game_result(test_user["id"], "arithmetic", "easy", 100, 10.0, 1)
+        data = authenticated_client.get('/api/v1/leaderboard/arithmetic/rank/me?window=week').get_json()
+        assert (data["rank"], data["score"], data["players"]) == (1, 100, 1)
+        assert authenticated_client.get('/api/v1/leaderboard/color_rush/rank/me').status_code == 404
+
+    def test_rank_around_me(self, authenticated_client, app, test_user, players):
+        """Тест сусідів поточного користувача"""
+        with app.app_context():
+            models.save_game_result(test_user["id"], "arithmetic", "easy", 200, 10.0, 1)
+        data = authenticated_client.get('/api/v1/leaderboard/arithmetic/rank/around-me?count=1').get_json()
+        assert [(e["rank"], e["score"], e["is_me"]) for e in data["entries"]] == [
+            (1, 300, False), (2, 200, True), (3, 120, False)
+        ]
+        assert authenticated_client.get('/api/v1/leaderboard/arithmetic/rank/around-me?count=99').status_code == 400
+
+    def test_rank_requires_login(self, client):
+        """Тест що місце в рейтингу потребує автентифікації"""
+        assert client.get('/api/v1/leaderboard/arithmetic/rank/me').status_code == 401
+
+
+class TestLeaderboardStream:
+    """Тести хаба живих оновлень і /leaderboard/stream"""
+
+    def test_fanout_encodes_once_for_thousands_of_subscribers(self, app):
+        """Тест що одна подія кодується раз і ті самі байти йдуть усім підписникам"""
+        hub = live.LeaderboardHub()
+        subscribers = [hub.subscribe("all") for _ in range(5000)]
+        message = live.encode_event("leaderboard", {"game": "arithmetic", "changes": []})
+        hub.publish("all", message)
+        assert all(s.pending[0] is message for s in subscribers)
+        assert hub.subscriber_count() == 5000
+
+    def test_slow_subscriber_dropped(self, app):
+        """Тест що підписник з переповненою чергою відключається"""
+        hub = live.LeaderboardHub()
+        slow, fast = hub.subscribe("all"), hub.subscribe("all")
+        for i in range(live.MAX_PENDING + 1):
+            hub.publish("all", live.encode_event("leaderboard", {"n": i}))
+            fast.pending.clear()
+        assert hub.subscriber_count() == 1
+        assert slow.pending[-1] is live._CLOSED
+
+    def test_only_changed_ranks_published(self, app, players):
+        """Тест що після нового рекорду надсилаються лише змінені місця"""
+        hub = live.LeaderboardHub()
+        with app.app_context():
+            subscriber = hub.subscribe("all")
+            hub.snapshot("all")
+            models.save_game_result(players[2], "arithmetic", "easy", 200, 10.0, 1)
+            hub.on_results(players[2], [GameResult("arithmetic", "easy", 200, 10.0, 1)], [20])
+        event = subscriber.pending.popleft().decode()
+        assert event.startswith("event: leaderboard\n")
+        data = json.loads(event.split("data: ", 1)[1])
+        assert data["size"] == 3
+        assert data["changes"] == [
+            {"rank": 2, "username": "player2", "score": 200},
+            {"rank": 3, "username": "player0", "score": 120},
+        ]
+
+    def test_non_qualifying_score_skips_database(self, app, players, monkeypatch):
+        """Тест що рахунок нижче топ-K не перечитує рейтинг"""
+        hub = live.LeaderboardHub(top_k=2)
+        with app.app_context():
+            subscriber = hub.subscribe("all")
+            hub.snapshot("all")
+            calls = []
+            monkeypatch.setattr(live, "get_game_leaderboard", lambda *args: calls.append(args) or [])
+            hub.on_results(players[2], [GameResult("arithmetic", "easy", 100, 10.0, 1)], [10])
+        assert calls == []
+        assert not subscriber.pending
+
+    def test_stream_endpoint(self, client, app, players):
+        """Тест що стрім віддає знімок, а потім зміну після збереження результату"""
+        app.config["ENABLE_LIVE_LEADERBOARD"] = True
+        response = client.get('/leaderboard/stream')
+        assert response.mimetype == 'text/event-stream'
+        assert response.headers['Cache-Control'] == 'no-cache'
+        body = iter(response.response)
+        assert next(body).startswith(b"retry:")
+        snapshot = next(body).decode()
+        assert snapshot.startswith("event: snapshot\n")
+        assert json.loads(snapshot.split("data: ", 1)[1])["boards"]["arithmetic"][0]["username"] == "player1"
+
+        with app.app_context():
+            ingest_result(players[2], GameResult("arithmetic", "hard", 500, 10.0, 1))
+        change = json.loads(next(body).decode().split("data: ", 1)[1])
+        assert change["changes"][0] == {"rank": 1, "username": "player2", "score": 500}
+
+        response.close()
+        assert live.leaderboard_hub.subscriber_count() == 0
+
+    def test_poll_picks_up_other_process(self, app, players):
+        """Тест що опитування лічильників розсилає результат, збережений іншим процесом"""
+        hub = live.LeaderboardHub()
+        with app.app_context():
+            subscriber = hub.subscribe("all")
+            hub.snapshot("all")
+            before = models.get_leaderboard_versions()
+            # Інший воркер: збереження без on_results цього хаба
+            models.save_game_result(players[2], "arithmetic", "hard", 500, 10.0, 1)
+            assert models.get_leaderboard_versions()["arithmetic"] == before["arithmetic"] + 1
+            hub.poll()
+            hub.poll()
+        data = json.loads(subscriber.pending.popleft().decode().split("data: ", 1)[1])
+        assert data["game"] == "arithmetic"
+        assert data["changes"][0] == {"rank": 1, "username": "player2", "score": 500}
+        assert not subscriber.pending
+
+    def test_worse_score_keeps_version(self, app, players):
+        """Тест що результат без нового рекорду не змінює лічильник"""
+        with app.app_context():
+            before = models.get_leaderboard_versions()
+            models.save_game_result(players[0], "arithmetic", "easy", 10, 30.0, 10)
+            assert models.get_leaderboard_versions() == before
+
+    def test_day_rollover(self, app, players, monkeypatch):
+        """Тест що з новим UTC-днем знімок day перечитується, а підписники отримують новий повний знімок"""
+        hub = live.LeaderboardHub()
+        today = models.current_leaderboard_buckets()
+        with app.app_context():
+            subscriber = hub.subscribe("day")
+            before = json.loads(hub.snapshot("day").decode().split("data: ", 1)[1])
+            assert before["boards"]["arithmetic"]
+            tomorrow = dict(today, day="d:2999-01-01")
+            monkeypatch.setattr(models, "_leaderboard_buckets", lambda now: tomorrow)
+            after = json.loads(hub.snapshot("day").decode().split("data: ", 1)[1])
+            assert after["boards"]["arithmetic"] == []
+            hub.poll()
+        event = subscriber.pending.popleft().decode()
+        assert event.startswith("event: snapshot\n")
+        assert json.loads(event.split("data: ", 1)[1])["boards"]["arithmetic"] == []
+        assert not subscriber.pending
+
+    def test_page_without_live_flag(self, client, app):
+        """Тест що без ENABLE_LIVE_LEADERBOARD сторінка не відкриває EventSource, а стрім недоступний"""
+        assert b"data-stream" not in client.get('/leaderboard/').data
+        assert client.get('/leaderboard/stream').status_code == 404
+        app.config["ENABLE_LIVE_LEADERBOARD"] = True
+        app.extensions["fragment_cache"].clear()
+        assert b'data-stream="/leaderboard/stream' in client.get('/leaderboard/').data
+
+    def test_stream_rejects_unknown_window(self, client, app):
+        """Тест перевірки вікна стріму"""
+        app.config["ENABLE_LIVE_LEADERBOARD"] = True
+        assert client.get('/leaderboard/stream?window=year').status_code == 400
@@ -0,0 +1,133 @@
+"""
+Тести міграцій схеми
+Покриває: schema_version, порядок і повторний запуск, прийняття бази без
+історії міграцій, заповнення рейтингів порціями, продовження після збою, CLI
+"""
+from datetime import datetime
+import sqlite3
+import pytest
+from app.db import migrations, models
+
+
+@pytest.fixture
+def legacy_db(tmp_path, monkeypatch):
+    """База без schema_version: лише таблиці користувачів і результатів"""
+    path = str(tmp_path / "legacy.db")
+    monkeypatch.setattr(models, "DB_PATH", path)
+    conn = sqlite3.connect(path)
+    for statement in migrations.MIGRATIONS[0].steps[:2]:
+        conn.execute(statement)
+    now = datetime.utcnow().isoformat()
+    conn.executemany(
+        "INSERT INTO users (username, password_hash, created_at) VALUES (?, 'x', ?)",
+        [(f"player{i}", now) for i in range(3)]
+    )
+    conn.executemany(
+        "INSERT INTO game_results (user_id, game_name, level, score, time_spent, created_at) "
+        "VALUES (?, 'arithmetic', 'easy', ?, 1.0, ?)",
+        [(1 + i % 3, 10 * i, now) for i in range(7)]
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _leaderboard_state():
+    conn = models.get_db_connection()
+    best = conn.execute(
+        "SELECT bucket, game_name, user_id, score FROM leaderboard_best ORDER BY bucket, game_name, user_id"
+    ).fetchall()
+    tree = conn.execute(
+        "SELECT bucket, game_name, node, players FROM leaderboard_rank_tree WHERE players != 0 "
+        "ORDER BY bucket, game_name, node"
+    ).fetchall()
+    conn.close()
+    return [tuple(r) for r in best], [tuple(r) for r in tree]
+
+
+class TestMigrate:
+    """Тести застосування міграцій"""
+
+    def test_fresh_database(self, app):
+        """Тест що нова база отримує всі міграції і магазин заповнюється один раз"""
+        with app.app_context():
+            conn = models.get_db_connection()
+            assert migrations.get_schema_version(conn) == migrations.MIGRATIONS[-1].version
+            assert conn.execute("SELECT COUNT(*) FROM migration_progress").fetchone()[0] == 0
+            conn.close()
+            assert migrations.migrate() == []
+            assert len(models.get_all_shop_items()) == 4
+
+    def test_versions_are_ordered(self):
+        """Тест що версії міграцій унікальні та зростають"""
+        versions = [m.version for m in migrations.MIGRATIONS]
+        assert versions == sorted(set(versions))
+
+    def test_new_migration_applied_once(self, app):
+        """Тест що нова міграція застосовується до наявної бази лише раз"""
+        extra = migrations.MIGRATIONS + (
+            migrations.Migration(100, "feedback index", (
+                "CREATE INDEX idx_feedback_created_at ON feedback (created_at)",
+            )),
+        )
+        with app.app_context():
+            assert migrations.migrate(extra) == [100]
+            assert migrations.migrate(extra) == []
+            conn = models.get_db_connection()
+            assert conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'idx_feedback_created_at'"
+            ).fetchone()
+            conn.close()
+
+
+class TestBackfill:
+    """Тести заповнення порціями"""
+
+    def test_legacy_database_backfills_leaderboards(self, legacy_db):
+        """Тест що база без історії міграцій приймає її, а рейтинги заповнюються порціями"""
+        reports = []
+        applied = migrations.migrate(batch=2, pause=0, progress=lambda m, *r: reports.append((m.version, *r)))
+        assert applied == [m.version for m in migrations.MIGRATIONS]
+        assert [r for r in reports if r[1] == "rows"] == [(3, "rows", n, 7) for n in (2, 4, 6, 7)]
+
+        backfilled = _leaderboard_state()
+        models.rebuild_leaderboards()
+        assert backfilled == _leaderboard_state()
+        assert ("all", "arithmetic", 1, 60) in backfilled[0]
+
+    def test_resumes_after_failure(self, app):
+        """Тест що перервана міграція продовжується з останньої завершеної порції"""
+        calls = []
+
+        def backfill(conn, after_id, last_id):
+            calls.append(after_id)
+            if after_id == 2 and len(calls) == 2:
+                raise RuntimeError("interrupted")
+
+        extra = migrations.MIGRATIONS + (migrations.Migration(100, "rollup", (), backfill),)
+        with app.app_context():
+            user_id = models.create_user("alice", "password123")
+            for score in range(5):
+                models.save_game_result(user_id, "arithmetic", "easy", score, 1.0)
+            with pytest.raises(RuntimeError):
+                migrations.migrate(extra, batch=2, pause=0)
+            conn = models.get_db_connection()
+            assert tuple(conn.execute("SELECT after_id, last_id FROM migration_progress").fetchone()) == (2, 5)
+            conn.close()
+            assert migrations.migrate(extra, batch=2, pause=0) == [100]
+        assert calls == [0, 2, 2, 4]
+
+
+class TestMigrationsCLI:
+    """Тести командного рядка"""
+
+    def test_status_and_migrate(self, legacy_db, capsys):
+        """Тест --status і застосування міграцій з виводом прогресу"""
+        assert migrations.main(["--status"]) == 0
+        out = capsys.readouterr().out
+        assert "Schema version 0" in out and "pending 3: leaderboards" in out
+        assert migrations.main(["--batch", "5", "--pause", "0"]) == 0
+        out = capsys.readouterr().out
+        assert "3 leaderboards: 7/7 rows" in out
+        assert migrations.main([]) == 0
+        assert "Schema is up to date" in capsys.readouterr().out
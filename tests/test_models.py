@@ -86,6 +86,37 @@ class TestUserModel:
             user = models.get_user_by_id(user_id)
             assert user["role"] == "admin"
 
+    def test_users_page_keyset(self, app):
+        """Тест сторінок користувачів за id без password_hash"""
+        with app.app_context():
+            ids = [models.create_user(f"page{i}", "password123") for i in range(5)]
+            first = models.get_users_page(limit=2)
+            second = models.get_users_page(first[-1]["id"], limit=2)
+            assert [u["id"] for u in first + second] == ids[:4]
+            assert "password_hash" not in first[0].keys()
+
+    def test_search_users_by_prefix(self, app):
+        """Тест пошуку за початком імені без урахування регістру з курсором"""
+        with app.app_context():
+            for name in ("Bob", "bobby", "BOBCAT", "alice", "boz"):
+                models.create_user(name, "password123")
+            assert [u["username"] for u in models.search_users_by_prefix("bob")] == ["Bob", "bobby", "BOBCAT"]
+            page = models.search_users_by_prefix("BO", limit=2)
+            rest = models.search_users_by_prefix("BO", (page[-1]["username"], page[-1]["id"]))
+            assert [u["username"] for u in page + rest] == ["Bob", "bobby", "BOBCAT", "boz"]
+            assert models.search_users_by_prefix("bobz") == []
+
+    def test_search_uses_index(self, app):
+        """Тест що пошук за префіксом іде по індексу"""
+        with app.app_context():
+            conn = models.get_db_connection()
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM users WHERE username >= ? COLLATE NOCASE "
+                "AND username < ? COLLATE NOCASE ORDER BY username COLLATE NOCASE, id", ("bo", "bp")
+            ).fetchall()
+            conn.close()
+        assert "idx_users_username_nocase" in plan[0]["detail"]
+
 
 class TestGameResults:
     """Тести для результатів ігор"""
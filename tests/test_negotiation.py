@@ -0,0 +1,121 @@
+"""
+Тести узгодження формату відповідей /api/v1
+Покриває: вибір JSON чи MessagePack за Accept, Vary: Accept і матрицю
+еквівалентності обох кодувань для кожного ендпоінта API
+"""
+import shutil
+import pytest
+from app.db import models
+from app.utils import negotiation
+
+msgpack = pytest.importorskip("msgpack")
+
+JSON = {"Accept": "application/json"}
+MSGPACK = {"Accept": "application/msgpack"}
+
+# (метод, шлях, тіло); "batch" — пакет з новим токеном сесії на кожен запит
+CASES = [
+    ("GET", "/api/v1/user/profile", None),
+    ("GET", "/api/v1/user/1", None),
+    ("GET", "/api/v1/user/999", None),
+    ("GET", "/api/v1/shop/items", None),
+    ("GET", "/api/v1/shop/item/1", None),
+    ("POST", "/api/v1/shop/purchase/1", None),
+    ("GET", "/api/v1/shop/purchases", None),
+    ("GET", "/api/v1/feedback", None),
+    ("GET", "/api/v1/feedback/1", None),
+    ("POST", "/api/v1/feedback", {"message": "Great games"}),
+    ("PUT", "/api/v1/feedback/1", {"message": "Edited"}),
+    ("DELETE", "/api/v1/feedback/1", None),
+    ("POST", "/api/v1/results/batch", "batch"),
+    ("GET", "/api/v1/stats/games", None),
+    ("GET", "/api/v1/stats/game/arithmetic", None),
+    ("GET", "/api/v1/stats/game/arithmetic/distribution?level=easy", None),
+    ("GET", "/api/v1/leaderboard/arithmetic", None),
+    ("GET", "/api/v1/leaderboard/arithmetic/rank/me", None),
+    ("GET", "/api/v1/leaderboard/arithmetic/rank/around-me", None),
+    ("GET", "/api/v1/transactions", None),
+    ("POST", "/api/v1/user/theme", {"theme": "light"}),
+]
+
+
+def _decode(response):
+    if response.mimetype == negotiation.MSGPACK_MIMETYPE:
+        return msgpack.unpackb(response.data)
+    assert response.mimetype == negotiation.JSON_MIMETYPE
+    return response.get_json()
+
+
+@pytest.fixture
+def api_state(authenticated_client, sample_feedback, sample_game_results, shop_items):
+    return authenticated_client
+
+
+class TestNegotiation:
+    """Тести вибору формату"""
+
+    @pytest.mark.parametrize("accept, mimetype", [
+        (None, "application/json"),
+        ("*/*", "application/json"),
+        ("application/json", "application/json"),
+        ("application/msgpack", "application/msgpack"),
+        ("application/x-msgpack", "application/msgpack"),
+        ("application/json;q=0.5, application/msgpack", "application/msgpack"),
+        ("application/msgpack;q=0.5, application/json", "application/json"),
+        ("text/html", "application/json"),
+    ])
+    def test_accept(self, authenticated_client, accept, mimetype):
+        """Тест що формат обирається за Accept, а за замовчуванням — JSON"""
+        headers = {"Accept": accept} if accept else {}
+        response = authenticated_client.get('/api/v1/stats/games', headers=headers)
+        assert response.mimetype == mimetype
+        assert "Accept" in response.vary
+
+    def test_errors_negotiated(self, client):
+        """Тест що помилки API теж кодуються в MessagePack"""
+        response = client.get('/api/v1/user/profile', headers=MSGPACK)
+        assert response.status_code == 401
+        assert msgpack.unpackb(response.data) == {"error": "Authentication required"}
+
+    def test_json_without_msgpack(self, authenticated_client, monkeypatch):
+        """Тест що без пакета msgpack відповідь лишається JSON"""
+        monkeypatch.setattr(negotiation, "msgpack", None)
+        response = authenticated_client.get('/api/v1/stats/games', headers=MSGPACK)
+        assert response.mimetype == "application/json"
+
+    def test_msgpack_is_smaller(self, api_state, app, test_user):
+        """Тест що сторінка транзакцій у MessagePack менша за JSON"""
+        with app.app_context():
+            for i in range(100):
+                models.update_user_coins(test_user["id"], i, f"bonus {i}")
+        as_json = api_state.get('/api/v1/transactions?limit=100', headers=JSON)
+        as_msgpack = api_state.get('/api/v1/transactions?limit=100', headers=MSGPACK)
+        assert _decode(as_msgpack) == _decode(as_json)
+        assert len(as_msgpack.data) < len(as_json.data)
+
+
+class TestEquivalenceMatrix:
+    """Матриця: кожен ендпоінт повертає той самий вміст в обох кодуваннях"""
+
+    def test_matrix_covers_every_endpoint(self, app):
+        """Тест що матриця містить кожен маршрут blueprint api"""
+        adapter = app.url_map.bind("localhost")
+        covered = {adapter.match(path.split("?")[0], method)[0] for method, path, _ in CASES}
+        routed = {rule.endpoint for rule in app.url_map.iter_rules() if rule.endpoint.startswith("api.")}
+        assert routed == covered
+
+    @pytest.mark.parametrize("method, path, body", CASES, ids=[f"{m} {p}" for m, p, _ in CASES])
+    def test_equivalent(self, api_state, game_result, method, path, body, tmp_path):
+        """Тест що JSON і MessagePack дають однаковий статус і вміст на однаковому стані бази"""
+        snapshot = tmp_path / "snapshot.db"
+        shutil.copyfile(models.DB_PATH, snapshot)
+        decoded = {}
+        for name, headers in (("json", JSON), ("msgpack", MSGPACK)):
+            shutil.copyfile(snapshot, models.DB_PATH)
+            payload = body
+            if body == "batch":
+                payload = [{"game": "arithmetic", **game_result("arithmetic", "easy", score=70)}]
+            response = api_state.open(path, method=method, json=payload, headers=headers)
+            assert response.mimetype == f"application/{name}"
+            decoded[name] = (response.status_code, _decode(response))
+        assert decoded["json"] == decoded["msgpack"]
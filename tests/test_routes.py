@@ -4,6 +4,7 @@
 """
 import json
 import pytest
+from app.db import models
 
 class TestMainRoutes:
     """Тести головних маршрутів"""
@@ -67,13 +68,17 @@ class TestGamesRoutes:
     
     def test_save_arithmetic_result(self, authenticated_client):
         """Тест збереження результату Arithmetic"""
+        start = authenticated_client.post('/game/arithmetic/start', json={'level': 'easy', 'count': 10})
         response = authenticated_client.post(
             '/game/arithmetic/save_result',
             data=json.dumps({
                 'level': 'easy',
                 'score': 100,
                 'time': 30.5,
-                'rounds': 10
+                'rounds': 10,
+                # Правильні відповіді на перші 7 прикладів із пулу сервера
+                'answers': [round(eval(e), 1) for e in start.get_json()['rounds'][:7]],
+                'token': start.get_json()['token']
             }),
             content_type='application/json'
         )
@@ -83,13 +88,17 @@ class TestGamesRoutes:
     
     def test_save_sequence_result(self, authenticated_client):
         """Тест збереження результату Sequence Recall"""
+        start = authenticated_client.post('/game/sequence_recall/start', json={'level': 'medium'})
         response = authenticated_client.post(
             '/game/sequence_recall/save_result',
             data=json.dumps({
                 'level': 'medium',
                 'score': 200,
                 'time': 60.0,
-                'rounds': 5
+                'rounds': 6,
+                # Пройдено довжини 2-6 (20+30+40+50+60), шоста спроба хибна
+                'answers': start.get_json()['rounds'][:5] + ['0'],
+                'token': start.get_json()['token']
             }),
             content_type='application/json'
         )
@@ -243,6 +252,34 @@ class TestAdminRoutes:
         response = authenticated_admin.get('/admin/users')
         assert response.status_code == 200
     
+    def test_admin_users_paginated(self, app, authenticated_admin, monkeypatch):
+        """Тест що список користувачів ділиться на сторінки і віддається потоком"""
+        from app.routes import admin
+        monkeypatch.setattr(admin, "USERS_PAGE_SIZE", 2)
+        with app.app_context():
+            for i in range(3):
+                models.create_user(f"listed{i}", "password123")
+        response = authenticated_admin.get('/admin/users')
+        assert response.is_streamed
+        html = response.get_data(as_text=True)
+        assert "listed0" in html and "listed1" not in html and "after_id=2" in html
+        html = authenticated_admin.get('/admin/users?after_id=2').get_data(as_text=True)
+        assert "listed1" in html and "listed2" in html and "Next page" not in html
+
+    def test_admin_users_search(self, app, authenticated_admin):
+        """Тест пошуку користувачів за початком імені"""
+        with app.app_context():
+            models.create_user("Zed", "password123")
+            models.create_user("zelda", "password123")
+        html = authenticated_admin.get('/admin/users?q=ze').get_data(as_text=True)
+        assert "Zed" in html and "zelda" in html and "admin</td>" not in html
+
+    def test_admin_users_flash_shown_once(self, authenticated_admin, test_user):
+        """Тест що флеш-повідомлення на потоковій сторінці не повторюється"""
+        authenticated_admin.post(f'/admin/users/set_role/{test_user["id"]}', data={'role': 'admin'})
+        assert "Role updated!" in authenticated_admin.get('/admin/users').get_data(as_text=True)
+        assert "Role updated!" not in authenticated_admin.get('/admin/users').get_data(as_text=True)
+
     def test_admin_can_change_user_role(self, authenticated_admin, test_user):
         """Тест зміни ролі користувача адміном"""
         response = authenticated_admin.post(
@@ -274,4 +311,22 @@ class TestAPITestRoute:
     def test_api_test_page_loads(self, authenticated_client):
         """Тест завантаження сторінки API тесту"""
         response = authenticated_client.get('/api-test/')
-        assert response.status_code == 200
\ No newline at end of file
+        assert response.status_code == 200
+
+class TestSwaggerRoutes:
+    """Тести специфікації OpenAPI"""
+
+    def test_spec_parsed_once(self, client, monkeypatch):
+        """Тест що YAML розбирається один раз, поки файл не змінився"""
+        import yaml
+        from app.routes import swagger
+        calls = []
+        safe_load = yaml.safe_load
+        monkeypatch.setattr(swagger, "_spec_cache", (None, None))
+        monkeypatch.setattr(yaml, "safe_load", lambda f: calls.append(1) or safe_load(f))
+        first = client.get('/api/swagger.yaml')
+        second = client.get('/api/swagger.yaml')
+        assert first.status_code == 200
+        assert first.get_json() == second.get_json()
+        assert "paths" in first.get_json()
+        assert len(calls) == 1
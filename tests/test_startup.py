@@ -0,0 +1,92 @@
+"""
+Тести старту застосунку
+Покриває: create_app без звернень до бази, необов'язкові blueprints
+за конфігурацією, команду init-db, бенчмарк старту воркера
+"""
+import os
+import subprocess
+import sys
+import pytest
+from app import create_app
+from app.db import migrations, models
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def missing_db(tmp_path, monkeypatch):
+    path = str(tmp_path / "brainrush.db")
+    monkeypatch.setattr(models, "DB_PATH", path)
+    return path
+
+
+class TestCreateApp:
+    """Тести фабрики застосунку"""
+
+    def test_does_not_touch_database(self, missing_db):
+        """Тест що create_app не створює і не мігрує базу"""
+        create_app({"TESTING": True})
+        assert not os.path.exists(missing_db)
+
+    def test_optional_blueprints_disabled(self, app):
+        """Тест що Swagger UI і тестувальник API вимикаються конфігурацією"""
+        bare = create_app({"TESTING": True, "ENABLE_API_DOCS": False, "ENABLE_API_TEST": False})
+        assert "swagger" not in bare.blueprints and "api_test" not in bare.blueprints
+        client = bare.test_client()
+        assert client.get('/api/docs/').status_code == 404
+        html = client.get('/').get_data(as_text=True)
+        assert "/api-test" not in html
+
+    def test_optional_blueprints_enabled_by_default(self, app):
+        """Тест що за замовчуванням необов'язкові сторінки доступні"""
+        assert {"swagger", "api_test", "swagger_ui"} <= set(app.blueprints)
+
+    @pytest.mark.parametrize("value, enabled", [("0", False), ("off", False), ("1", True), ("yes", True)])
+    def test_env_flags(self, monkeypatch, value, enabled):
+        """Тест прапорців ENABLE_API_DOCS / ENABLE_API_TEST з оточення"""
+        monkeypatch.setenv("ENABLE_API_TEST", value)
+        assert ("api_test" in create_app().blueprints) is enabled
+
+
+    def test_models_do_not_import_numpy(self):
+        """Тест що NumPy вантажиться лише в аналітиці, а не разом з моделями"""
+        code = "import sys, app.db.models; sys.exit('numpy' in sys.modules)"
+        assert subprocess.run([sys.executable, "-c", code], cwd=ROOT).returncode == 0
+
+
+class TestInitDbCommand:
+    """Тести одноразової команди створення схеми"""
+
+    def test_init_db_command(self, missing_db):
+        """Тест що flask init-db застосовує міграції до нової бази"""
+        app = create_app({"TESTING": True})
+        result = app.test_cli_runner().invoke(args=["init-db"])
+        assert result.exit_code == 0, result.output
+        assert "Applied" in result.output
+        conn = models.get_db_connection()
+        assert migrations.get_schema_version(conn) == migrations.MIGRATIONS[-1].version
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        conn.close()
+        again = app.test_cli_runner().invoke(args=["init-db"])
+        assert again.exit_code == 0 and "Schema is up to date" in again.output
+
+    def test_init_db_command_failure(self, tmp_path, monkeypatch):
+        """Тест що помилка міграції дає ненульовий код і повідомлення, а не traceback"""
+        monkeypatch.setattr(models, "DB_PATH", str(tmp_path / "brainrush.db"))
+        (tmp_path / "brainrush.db").write_bytes(b"not a database" * 100)
+        result = create_app({"TESTING": True}).test_cli_runner().invoke(args=["init-db"])
+        assert result.exit_code == 1
+        assert "Migration failed" in result.output
+
+
+class TestStartupBench:
+    """Тести бенчмарку старту"""
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="preload scenario needs fork")
+    def test_reports_cold_and_preloaded_boot(self):
+        """Тест що бенчмарк вимірює холодний старт і воркери з preload"""
+        from benchmarks.startup import run_benchmark
+        report = run_benchmark(runs=1, workers=2)
+        assert report["cold"]["boot_ms"] > report["cold"]["create_app_ms"] > 0
+        assert report["preload"]["workers"] == 2
+        assert report["preload"]["boot_ms"] > 0